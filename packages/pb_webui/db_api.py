@@ -309,6 +309,16 @@ class _DbTableRowUpsertBody(BaseModel):
     data: dict[str, Any] = Field(default_factory=dict)
 
 
+class _DbContextPartitionBody(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    partitions: int = Field(default=0, ge=0, le=256)
+    dry_run: bool = False
+    restart_cursor: bool = False
+    drop_legacy: bool = False
+    batch_size: int = Field(default=1000, ge=100, le=5000)
+
+
 class _DbMigrateMongoPgBody(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -429,6 +439,30 @@ def register_db_router(
             raise HTTPException(status_code=500, detail=str(e)) from e
         return JSONResponse({"ok": True, "data": migrate_job_status_payload(job)})
 
+    @router.post(f"{x}/db/migrate/context-partitions", include_in_schema=True)
+    async def _db_migrate_context_partitions_start(
+        body: _DbContextPartitionBody,
+        token: str | None = Query(default=None),
+        x_pallas_token: str | None = Header(default=None, alias="X-Pallas-Token"),
+    ) -> JSONResponse:
+        check_pallas_write_token(plugin_config, x_pallas_token=x_pallas_token, token=token)
+        from pallas.core.foundation.db.migrate_jobs import migrate_job_status_payload, start_context_partition_job
+
+        try:
+            job = start_context_partition_job(
+                partitions=body.partitions or None,
+                dry_run=body.dry_run,
+                restart_cursor=body.restart_cursor,
+                drop_legacy=body.drop_legacy,
+                batch_size=body.batch_size,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        except Exception as e:  # noqa: BLE001
+            logger.exception("[WebUI] 启动语料分区迁移失败")
+            raise HTTPException(status_code=500, detail=str(e)) from e
+        return JSONResponse({"ok": True, "data": migrate_job_status_payload(job)})
+
     @router.get(f"{x}/db/migrate/mongo-to-pg/jobs/active", include_in_schema=True)
     async def _db_migrate_mongo_pg_active() -> JSONResponse:
         from pallas.core.foundation.db.migrate_jobs import active_migrate_job, migrate_job_status_payload
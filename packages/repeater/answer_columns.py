@@ -0,0 +1,276 @@
+"""回复候选列式预筛：把 Context.answers 的逐条字符串判断折成按快照缓存的列，筛选走数组运算。"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+try:
+    import numpy as np
+except ImportError:  # perf extra 未装时退回纯 Python 列
+    np = None
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from pallas.core.foundation.db import Context
+
+# 样本消息（messages[0]）的标志位
+FLAG_HAS_MESSAGE = 1
+FLAG_IS_CQ = 1 << 1
+FLAG_NIUNIU = 1 << 2
+FLAG_NIUNIU_SHORT = 1 << 3
+FLAG_CQ_XML = 1 << 4
+FLAG_NEWLINE = 1 << 5
+FLAG_AT_OTHER = 1 << 6
+
+_MAX_CACHED = 512
+
+_lock = threading.Lock()
+_columns_by_context: dict[int, tuple[weakref.ref, AnswerColumns]] = {}
+
+
+@dataclass(frozen=True, slots=True)
+class CandidateFilter:
+    """一次取候选的筛选参数；excluded_keywords 为 ban、近期已回与本句 keywords 的并集。"""
+
+    group_id: int
+    count_threshold: int
+    cross_group_threshold: int
+    is_drunk: bool
+    is_image: bool
+    to_me: bool
+    excluded_keywords: frozenset[str]
+    recent_messages: frozenset[str]
+
+
+@dataclass(frozen=True, slots=True)
+class CandidatePrefilter:
+    """AnswerColumns.prefilter 的结果；size 与列长度不符时视为失效。"""
+
+    size: int
+    indices: list[int]
+    mask: Any
+
+
+def _sample_flags(sample: str) -> int:
+    flags = FLAG_HAS_MESSAGE
+    if "[CQ:" in sample:
+        flags |= FLAG_IS_CQ
+    if sample.startswith("牛牛"):
+        flags |= FLAG_NIUNIU
+        if len(sample) <= 6:
+            flags |= FLAG_NIUNIU_SHORT
+    if sample.startswith("[CQ:xml"):
+        flags |= FLAG_CQ_XML
+    if "\n" in sample:
+        flags |= FLAG_NEWLINE
+    if "[CQ:at,qq=" in sample:
+        flags |= FLAG_AT_OTHER
+    return flags
+
+
+class AnswerColumns:
+    """
+    answers 的列式形态：count / group_id / time / flags 与驻留后的 keywords、样本消息 id，
+    以及每个 keywords 预切好的话题词元组。
+    快照内 answers 只读，列随快照对象存活；len 变化视为失效重建。
+    """
+
+    __slots__ = (
+        "size",
+        "counts",
+        "group_ids",
+        "times",
+        "flags",
+        "keyword_ids",
+        "sample_ids",
+        "keyword_index",
+        "keyword_terms",
+        "sample_index",
+    )
+
+    def __init__(self, answers: Iterable[Any]) -> None:
+        keyword_index: dict[str, int] = {}
+        sample_index: dict[str, int] = {}
+        counts: list[int] = []
+        group_ids: list[int] = []
+        times: list[int] = []
+        flags: list[int] = []
+        keyword_ids: list[int] = []
+        sample_ids: list[int] = []
+        for answer in answers:
+            counts.append(int(answer.count))
+            group_ids.append(int(answer.group_id))
+            times.append(int(answer.time))
+            keyword_ids.append(keyword_index.setdefault(answer.keywords, len(keyword_index)))
+            messages = answer.messages
+            if messages:
+                sample = messages[0]
+                flags.append(_sample_flags(sample))
+                sample_ids.append(sample_index.setdefault(sample, len(sample_index)))
+            else:
+                flags.append(0)
+                sample_ids.append(-1)
+        self.size = len(counts)
+        self.keyword_index = keyword_index
+        # 按 keyword id 预切好的话题词；CQ 码回复不参与话题加分
+        self.keyword_terms: list[tuple[str, ...]] = [
+            () if "[CQ:" in keywords else tuple(keywords.split(" ")) for keywords in keyword_index
+        ]
+        self.sample_index = sample_index
+        if np is not None:
+            self.counts = np.asarray(counts, dtype=np.int64)
+            self.group_ids = np.asarray(group_ids, dtype=np.int64)
+            self.times = np.asarray(times, dtype=np.int64)
+            self.flags = np.asarray(flags, dtype=np.uint8)
+            self.keyword_ids = np.asarray(keyword_ids, dtype=np.int32)
+            self.sample_ids = np.asarray(sample_ids, dtype=np.int32)
+        else:
+            self.counts = counts
+            self.group_ids = group_ids
+            self.times = times
+            self.flags = flags
+            self.keyword_ids = keyword_ids
+            self.sample_ids = sample_ids
+
+    def _rejected_flags(self, spec: CandidateFilter) -> int:
+        rejected = FLAG_CQ_XML | FLAG_NEWLINE
+        # 牛牛开头一般是学反了（教“牛牛你好”—“你好”），只在 @ 牛牛且够长时保留
+        rejected |= FLAG_NIUNIU_SHORT if spec.to_me else FLAG_NIUNIU
+        return rejected
+
+    def prefilter(self, excluded_keywords: Iterable[str]) -> CandidatePrefilter:
+        """与单条消息无关的规则先判一遍：有样本、非 xml / 多行 / 短牛牛，且不在 excluded_keywords 里。"""
+        excluded = {self.keyword_index[k] for k in excluded_keywords if k in self.keyword_index}
+        rejected = FLAG_CQ_XML | FLAG_NEWLINE | FLAG_NIUNIU_SHORT
+        indices = [
+            idx
+            for idx in range(self.size)
+            if self.flags[idx] & FLAG_HAS_MESSAGE
+            and not self.flags[idx] & rejected
+            and self.keyword_ids[idx] not in excluded
+        ]
+        mask = None
+        if np is not None:
+            mask = np.zeros(self.size, dtype=bool)
+            mask[indices] = True
+        return CandidatePrefilter(self.size, indices, mask)
+
+    def candidate_indices(self, spec: CandidateFilter, prefilter: CandidatePrefilter | None = None) -> list[int]:
+        """
+        返回可能进入候选的下标（保持原顺序）。逐条规则已在列上判完；
+        跨群计数只剔除总次数达不到阈值的 keywords，达标的仍按原顺序交给调用方累计。
+        给了 prefilter 时只在它留下的下标里筛，spec.excluded_keywords 只需放逐条相关的部分。
+        """
+        if not self.size:
+            return []
+        if prefilter is not None and prefilter.size != self.size:
+            prefilter = None
+        excluded = [self.keyword_index[k] for k in spec.excluded_keywords if k in self.keyword_index]
+        recent = [self.sample_index[m] for m in spec.recent_messages if m in self.sample_index]
+        if np is None:
+            rows = prefilter.indices if prefilter is not None else range(self.size)
+            return self._candidate_indices_rows(spec, set(excluded), set(recent), rows)
+
+        flags = self.flags
+        counts = self.counts
+        if prefilter is not None:
+            mask = prefilter.mask.copy()
+        else:
+            mask = (flags & FLAG_HAS_MESSAGE).astype(bool)
+        mask &= (flags & self._rejected_flags(spec)) == 0
+        if not spec.is_drunk:
+            mask &= counts >= spec.count_threshold
+        if excluded:
+            mask &= ~np.isin(self.keyword_ids, excluded)
+        if spec.is_image:
+            # 图片消息不回复纯文本
+            mask &= (flags & FLAG_IS_CQ).astype(bool)
+        if recent:
+            # 别人刚发的就重复，显得很笨
+            mask &= ~((counts < 3) & np.isin(self.sample_ids, recent))
+
+        same_group = self.group_ids == spec.group_id
+        other = mask & ~same_group & ((flags & FLAG_AT_OTHER) == 0)
+        if spec.is_drunk:
+            direct = other & (counts > spec.count_threshold)
+            cross = other & ~direct
+        else:
+            direct = np.zeros_like(mask)
+            cross = other
+        if spec.cross_group_threshold > 1 and cross.any():
+            per_keyword = np.bincount(self.keyword_ids[cross], minlength=len(self.keyword_index))
+            cross &= per_keyword[self.keyword_ids] >= spec.cross_group_threshold
+        keep = (mask & same_group) | direct | cross
+        return np.flatnonzero(keep).tolist()
+
+    def _candidate_indices_rows(
+        self, spec: CandidateFilter, excluded: set[int], recent: set[int], rows: Iterable[int]
+    ) -> list[int]:
+        rejected = self._rejected_flags(spec)
+        group_id = spec.group_id
+        threshold = spec.count_threshold
+        survivors: list[tuple[int, bool]] = []
+        cross_totals: dict[int, int] = {}
+        for idx in rows:
+            flags = self.flags[idx]
+            count = self.counts[idx]
+            if not flags & FLAG_HAS_MESSAGE or flags & rejected:
+                continue
+            if not spec.is_drunk and count < threshold:
+                continue
+            keyword_id = self.keyword_ids[idx]
+            if keyword_id in excluded:
+                continue
+            if spec.is_image and not flags & FLAG_IS_CQ:
+                continue
+            if count < 3 and self.sample_ids[idx] in recent:
+                continue
+            if self.group_ids[idx] == group_id:
+                survivors.append((idx, False))
+            elif flags & FLAG_AT_OTHER:
+                continue
+            elif spec.is_drunk and count > threshold:
+                survivors.append((idx, False))
+            else:
+                cross_totals[keyword_id] = cross_totals.get(keyword_id, 0) + 1
+                survivors.append((idx, True))
+        need = spec.cross_group_threshold
+        return [
+            idx for idx, cross in survivors if not cross or need <= 1 or cross_totals[self.keyword_ids[idx]] >= need
+        ]
+
+
+def answer_columns_for(context: Context) -> AnswerColumns:
+    """按快照对象取列；同一快照在 TTL 内被多次取候选时只构建一次。"""
+    answers = context.answers
+    key = id(context)
+    with _lock:
+        hit = _columns_by_context.get(key)
+        if hit is not None and hit[0]() is context and hit[1].size == len(answers):
+            return hit[1]
+    columns = AnswerColumns(answers)
+    try:
+        ref = weakref.ref(context, lambda _ref, key=key: _drop(key, _ref))
+    except TypeError:
+        return columns
+    with _lock:
+        _columns_by_context[key] = (ref, columns)
+        if len(_columns_by_context) > _MAX_CACHED:
+            _columns_by_context.pop(next(iter(_columns_by_context)), None)
+    return columns
+
+
+def _drop(key: int, ref: weakref.ref) -> None:
+    with _lock:
+        hit = _columns_by_context.get(key)
+        if hit is not None and hit[0] is ref:
+            _columns_by_context.pop(key, None)
+
+
+def clear_answer_columns() -> None:
+    with _lock:
+        _columns_by_context.clear()
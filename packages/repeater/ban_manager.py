@@ -1,6 +1,9 @@
 import re
+import sys
 import time
+import weakref
 from collections import defaultdict
+from itertools import chain
 
 from nonebot import logger
 
@@ -14,6 +17,11 @@ plugin_config = get_repeater_config()
 
 blacklist_repo = make_blacklist_repository()
 
+# 按 Context 快照缓存的编译结果上限，超出时先扫掉已回收的快照
+_MAX_CONTEXT_INDEX = 2048
+# 群里没有黑名单时的占位：身份固定，版本戳才不会因每次新建的空集合而失配
+_NO_BANS: frozenset[str] = frozenset()
+
 
 class BanManager:
     """复读插件的禁言/黑名单管理"""
@@ -26,6 +34,11 @@ class BanManager:
     _blacklist_answer = defaultdict(set)  # 每个群的封禁关键词
     _blacklist_answer_reserve = defaultdict(set)  # 候选黑名单
 
+    # 编译后的 ban 索引：群 -> (版本戳, 全局 | 本群)；Context 快照 -> 各群最终 ban 集
+    _ban_index_version = 0
+    _group_ban_index: dict[int, tuple[tuple[int, ...], frozenset[str]]] = {}
+    _context_ban_index: dict[int, tuple[weakref.ref, int, dict[int, tuple[frozenset[str], frozenset[str]]]]] = {}
+
     @staticmethod
     def find_ban_reply(group_id: int, bot_id: int, ban_raw_message: str, reply_dict: dict) -> dict | None:
         if group_id not in reply_dict:
@@ -107,15 +120,89 @@ class BanManager:
         ban_reason = Ban(keywords=keywords, group_id=group_id, reason=reason, time=int(time.time()))
         await context_repo.append_ban(pre_keywords, ban_reason)
 
+        from .bundle_precompute import discard_precomputed_candidates
+
         if keywords in BanManager._blacklist_answer_reserve[group_id]:
             BanManager._blacklist_answer[group_id].add(keywords)
             if keywords in BanManager._blacklist_answer_reserve[BanManager.BLACKLIST_FLAG]:
                 BanManager._blacklist_answer[BanManager.BLACKLIST_FLAG].add(keywords)
+                discard_precomputed_candidates(None)
         else:
             BanManager._blacklist_answer_reserve[group_id].add(keywords)
+        # 本群预计算条目立即作废，其他群的 ban 集在下一轮刷新时比对
+        discard_precomputed_candidates(group_id)
+        BanManager.invalidate_ban_index()
 
         return True
 
+    @staticmethod
+    def invalidate_ban_index() -> None:
+        BanManager._ban_index_version += 1
+        BanManager._group_ban_index.clear()
+        BanManager._context_ban_index.clear()
+
+    @staticmethod
+    def _context_ban_part(bans, group_id) -> set[str]:
+        """Context 上逐条 ban：本群与全局标记直接生效，其他群累计到阈值才算。"""
+        ban_keywords = set()
+        ban_count = defaultdict(int)
+        for ban in bans:
+            ban_key = ban.keywords
+            if ban.group_id in {group_id, BanManager.BLACKLIST_FLAG}:
+                ban_keywords.add(ban_key)
+            else:
+                # 超过 N 个群都把这句话 ban 了，那就全局 ban 掉
+                ban_count[ban_key] += 1
+                if ban_count[ban_key] == BanManager.CROSS_GROUP_THRESHOLD:
+                    ban_keywords.add(ban_key)
+        return ban_keywords
+
+    @staticmethod
+    def _group_ban_keywords(group_id) -> frozenset[str]:
+        # 用 get 而非下标，不在 defaultdict 里凭空建空集合
+        global_set = BanManager._blacklist_answer.get(BanManager.BLACKLIST_FLAG) or _NO_BANS
+        group_set = BanManager._blacklist_answer.get(group_id) or _NO_BANS
+        # 版本号之外再带上集合身份与大小，绕过 ban() 直接改字典（同步、测试）也能察觉
+        stamp = (BanManager._ban_index_version, id(global_set), len(global_set), id(group_set), len(group_set))
+        hit = BanManager._group_ban_index.get(group_id)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        compiled = frozenset(map(sys.intern, chain(global_set, group_set)))
+        BanManager._group_ban_index[group_id] = (stamp, compiled)
+        return compiled
+
+    @staticmethod
+    def compiled_ban_keywords(context: Context | None, group_id) -> frozenset[str]:
+        """
+        回复热路径用：与 find_ban_keywords 同结果，但走编译好的索引，不 await。
+        群级部分按版本戳复用，Context 部分按快照对象与各群缓存，快照被回收即失效。
+        """
+        base = BanManager._group_ban_keywords(group_id)
+        if context is None or not context.ban:
+            return base
+        index = BanManager._context_ban_index
+        key = id(context)
+        entry = index.get(key)
+        if entry is None or entry[0]() is not context or entry[1] != len(context.ban):
+            try:
+                ref = weakref.ref(context)
+            except TypeError:
+                return base | frozenset(map(sys.intern, BanManager._context_ban_part(context.ban, group_id)))
+            if len(index) >= _MAX_CONTEXT_INDEX:
+                for stale in [k for k, v in index.items() if v[0]() is None]:
+                    index.pop(stale, None)
+                if len(index) >= _MAX_CONTEXT_INDEX:
+                    index.clear()
+            entry = (ref, len(context.ban), {})
+            index[key] = entry
+        per_group = entry[2]
+        hit = per_group.get(group_id)
+        if hit is not None and hit[0] is base:
+            return hit[1]
+        compiled = base | frozenset(map(sys.intern, BanManager._context_ban_part(context.ban, group_id)))
+        per_group[group_id] = (base, compiled)
+        return compiled
+
     @staticmethod
     async def find_ban_keywords(context: Context | None, group_id) -> set:
         """
@@ -126,16 +213,7 @@ class BanManager:
         ban_keywords = BanManager._blacklist_answer[BanManager.BLACKLIST_FLAG] | BanManager._blacklist_answer[group_id]
         # 针对单条回复的黑名单
         if context is not None and context.ban:
-            ban_count = defaultdict(int)
-            for ban in context.ban:
-                ban_key = ban.keywords
-                if ban.group_id in {group_id, BanManager.BLACKLIST_FLAG}:
-                    ban_keywords.add(ban_key)
-                else:
-                    # 超过 N 个群都把这句话 ban 了，那就全局 ban 掉
-                    ban_count[ban_key] += 1
-                    if ban_count[ban_key] == BanManager.CROSS_GROUP_THRESHOLD:
-                        ban_keywords.add(ban_key)
+            ban_keywords |= BanManager._context_ban_part(context.ban, group_id)
         return ban_keywords
 
     @staticmethod
@@ -151,6 +229,7 @@ class BanManager:
                     global_blacklist.add(keywords)
 
         BanManager._blacklist_answer[BanManager.BLACKLIST_FLAG] |= global_blacklist
+        BanManager.invalidate_ban_index()
 
     @staticmethod
     async def _select_blacklist() -> None:
@@ -162,6 +241,7 @@ class BanManager:
                 BanManager._blacklist_answer[group_id] |= set(item.answers)
             if item.answers_reserve:
                 BanManager._blacklist_answer_reserve[group_id] |= set(item.answers_reserve)
+        BanManager.invalidate_ban_index()
 
     @staticmethod
     async def _sync_blacklist() -> None:
@@ -0,0 +1,207 @@
+"""热词候选预计算：按群统计高频触发 keywords，后台刷新 (群, keywords) 的快照、ban 集与预筛下标。
+
+回复路径命中时跳过查库、ban 计算与整表预筛，只剩逐条随机阈值与近期去重。
+快照对象或 ban 集变化时下一轮刷新重建；ban() 当场作废对应群，学习 / 改写 / 清理经语料缓存失效钩子
+当场作废对应 keywords，条目超过最长存活时间视为失效。
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import TYPE_CHECKING
+
+from nonebot import logger
+
+from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+from .topic_utils import recent_topic_counts
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from pallas.core.foundation.db import Context
+
+    from .answer_columns import AnswerColumns, CandidatePrefilter
+
+_DEFAULT_TOP_K = 8
+_DEFAULT_MAX_AGE_SEC = 90.0
+# 每群最多跟踪的触发 keywords；超出后丢掉得分低的一半
+_MAX_TRACKED_PER_GROUP = 512
+# 每轮刷新后触发计数减半，低于该值丢弃
+_DECAY = 0.5
+_MIN_SCORE = 0.25
+# recent_topics 里每出现一次相关话题词，热度加成 10%
+_TOPIC_BOOST = 0.1
+
+_triggers: dict[int, dict[str, float]] = {}
+_entries: dict[tuple[int, str], PrecomputedCandidates] = {}
+
+
+@dataclass(slots=True)
+class PrecomputedCandidates:
+    context: Context
+    ban_keywords: frozenset[str]
+    columns: AnswerColumns
+    prefilter: CandidatePrefilter
+    answers_len: int
+    refreshed_at: float
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = repo_env_raw_value(name)
+    if raw is None:
+        return default
+    try:
+        return max(0.0, float(str(raw).strip()))
+    except ValueError:
+        return default
+
+
+def bundle_precompute_top_k() -> int:
+    """每群预计算的热词数；``0`` 关闭预计算。"""
+    return int(_env_float("PALLAS_REPEATER_BUNDLE_PRECOMPUTE_TOP_K", _DEFAULT_TOP_K))
+
+
+def bundle_precompute_max_age_sec() -> float:
+    """条目最长存活秒数，超过即不再给回复路径用（刷新任务卡住时兜底）。"""
+    return _env_float("PALLAS_REPEATER_BUNDLE_PRECOMPUTE_MAX_AGE_SEC", _DEFAULT_MAX_AGE_SEC)
+
+
+def clear_bundle_precompute_for_tests() -> None:
+    _triggers.clear()
+    _entries.clear()
+
+
+def note_reply_trigger(group_id: int, keywords: str) -> None:
+    """回复路径每次按 keywords 取候选时记一次。"""
+    if not keywords:
+        return
+    scores = _triggers.setdefault(int(group_id), {})
+    scores[keywords] = scores.get(keywords, 0.0) + 1.0
+    if len(scores) > _MAX_TRACKED_PER_GROUP:
+        keep = sorted(scores.items(), key=itemgetter(1), reverse=True)[: _MAX_TRACKED_PER_GROUP // 2]
+        _triggers[int(group_id)] = dict(keep)
+
+
+def hot_trigger_keywords(group_id: int, topics: Iterable[str], top_k: int) -> list[str]:
+    """按触发次数取 top_k，近期话题词命中越多排名越靠前。"""
+    scores = _triggers.get(int(group_id))
+    if not scores or top_k <= 0:
+        return []
+    topic_counts = recent_topic_counts(topics)
+
+    def rank(item: tuple[str, float]) -> float:
+        keywords, score = item
+        if "[CQ:" in keywords or not topic_counts:
+            return score
+        return score * (1.0 + _TOPIC_BOOST * sum(topic_counts.get(key, 0) for key in keywords.split(" ")))
+
+    ranked = sorted(scores.items(), key=rank, reverse=True)
+    return [keywords for keywords, _ in ranked[:top_k]]
+
+
+def _decay_triggers() -> None:
+    for group_id in list(_triggers):
+        scores = {keywords: score * _DECAY for keywords, score in _triggers[group_id].items()}
+        scores = {keywords: score for keywords, score in scores.items() if score >= _MIN_SCORE}
+        if scores:
+            _triggers[group_id] = scores
+        else:
+            _triggers.pop(group_id, None)
+
+
+def lookup_precomputed_candidates(group_id: int, keywords: str) -> PrecomputedCandidates | None:
+    entry = _entries.get((int(group_id), keywords))
+    if entry is None:
+        return None
+    if time.monotonic() - entry.refreshed_at > bundle_precompute_max_age_sec():
+        _entries.pop((int(group_id), keywords), None)
+        return None
+    return entry
+
+
+def discard_precomputed_candidates(group_id: int | None = None, keywords: str | None = None) -> None:
+    """
+    ban 或语料变化后作废：给群号只清该群，给 keywords 只清该触发词（各群共用同一份语料快照），
+    两者都为 None 清全部（全局黑名单变化、批量清理）。
+    """
+    if group_id is None and keywords is None:
+        _entries.clear()
+        return
+    for key in [
+        key
+        for key in _entries
+        if (group_id is None or key[0] == int(group_id)) and (keywords is None or key[1] == keywords)
+    ]:
+        _entries.pop(key, None)
+
+
+async def refresh_hot_reply_candidates(recent_topics: Mapping[int, Iterable[str]]) -> int:
+    """后台刷新一轮，返回重建的条目数；快照对象与 ban 集都没变的条目只续期。"""
+    from pallas.core.foundation.db.context_repo_access import context_repo
+    from pallas.core.foundation.db.pool_budget import reply_pool_under_pressure
+    from pallas.core.platform.ingress.hotpath_metrics import record_bundle_precompute_refresh
+
+    from .answer_columns import answer_columns_for
+    from .ban_manager import BanManager
+
+    top_k = bundle_precompute_top_k()
+    if top_k <= 0:
+        _triggers.clear()
+        _entries.clear()
+        return 0
+    started = time.perf_counter()
+    wanted = [
+        (group_id, keywords)
+        for group_id in list(_triggers)
+        for keywords in hot_trigger_keywords(group_id, recent_topics.get(group_id, ()), top_k)
+    ]
+    wanted_set = set(wanted)
+    for key in [key for key in _entries if key not in wanted_set]:
+        _entries.pop(key, None)
+
+    find_reply = getattr(context_repo, "find_by_keywords_for_reply", None)
+    rebuilt = 0
+    for group_id, keywords in wanted:
+        # 与回复路径同一条压力线，池子紧张时让路
+        if reply_pool_under_pressure(threshold=0.55):
+            break
+        try:
+            if callable(find_reply):
+                context = await find_reply(keywords)
+            else:
+                context = await context_repo.find_by_keywords(keywords)
+        except Exception as exc:
+            logger.debug("repeater.bundle_precompute find failed group={} kw_len={}: {}", group_id, len(keywords), exc)
+            continue
+        key = (group_id, keywords)
+        if not context:
+            _entries.pop(key, None)
+            continue
+        ban_keywords = frozenset(await BanManager.find_ban_keywords(context=context, group_id=group_id))
+        now = time.monotonic()
+        entry = _entries.get(key)
+        if (
+            entry is not None
+            and entry.context is context
+            and entry.answers_len == len(context.answers)
+            and entry.ban_keywords == ban_keywords
+        ):
+            entry.refreshed_at = now
+            continue
+        columns = answer_columns_for(context)
+        _entries[key] = PrecomputedCandidates(
+            context=context,
+            ban_keywords=ban_keywords,
+            columns=columns,
+            prefilter=columns.prefilter((*ban_keywords, keywords)),
+            answers_len=len(context.answers),
+            refreshed_at=now,
+        )
+        rebuilt += 1
+
+    _decay_triggers()
+    record_bundle_precompute_refresh(rebuilt=rebuilt, duration_ms=(time.perf_counter() - started) * 1000.0)
+    return rebuilt
@@ -6,6 +6,8 @@ from pallas.console.webui.field_help import field_help
 FIELD_TO_ENV: dict[str, str] = {
     "learn_concurrency": "PALLAS_REPEATER_LEARN_CONCURRENCY",
     "learn_queue_max_size": "PALLAS_REPEATER_LEARN_QUEUE_SIZE",
+    "learn_batch_size": "PALLAS_REPEATER_LEARN_BATCH_SIZE",
+    "keyword_cache_slots": "PALLAS_REPEATER_KEYWORD_CACHE_SLOTS",
     "fanout_enabled": "PALLAS_REPEATER_FANOUT_ENABLED",
     "fanout_max_bots": "PALLAS_REPEATER_FANOUT_MAX_BOTS",
 }
@@ -123,6 +125,26 @@ class Config(BaseModel, extra="ignore"):
         ),
         json_schema_extra=_ui("学习与持久化", 50),
     )
+    learn_batch_size: int = Field(
+        default=64,
+        ge=1,
+        le=512,
+        description=field_help(
+            "后台学语料时一次最多合并写入多少条",
+            "填 1 表示逐条写入；群消息多时合并写入能明显减轻数据库压力",
+        ),
+        json_schema_extra=_ui("学习与持久化", 55),
+    )
+    keyword_cache_slots: int = Field(
+        default=65536,
+        ge=0,
+        le=1048576,
+        description=field_help(
+            "同机各进程共用的分词缓存能存多少句",
+            "每句约占 256 字节（含给长句留的大槽）；填 0 表示只用进程内缓存；重启后生效",
+        ),
+        json_schema_extra=_ui("学习与持久化", 58),
+    )
     fanout_enabled: bool = Field(
         default=False,
         description=field_help(
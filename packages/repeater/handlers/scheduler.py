@@ -15,6 +15,7 @@ from pallas.core.foundation.logging.bridge import format_business_event
 from pallas.core.platform.ingress.message_load import should_pause_tasks
 from pallas.core.platform.shard import context as shard_ctx
 
+from ..bundle_precompute import refresh_hot_reply_candidates
 from ..message_store import MessageStore
 from ..model import Chat
 from ..runtime_stats import prune_repeater_runtime_caches
@@ -136,3 +137,12 @@ async def sync_message_store_periodically() -> None:
     if shard_ctx.sharding_active() and shard_ctx.is_hub():
         return
     await MessageStore.periodic_sync_if_buffered()
+
+
+@scheduler.scheduled_job("interval", seconds=30)
+async def refresh_hot_reply_candidates_periodically() -> None:
+    if should_pause_tasks():
+        return
+    if shard_ctx.sharding_active() and shard_ctx.is_hub():
+        return
+    await refresh_hot_reply_candidates(Chat._recent_topics)
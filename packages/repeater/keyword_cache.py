@@ -0,0 +1,232 @@
+"""同机多 worker 共享的分词缓存：mmap 定长槽，读无锁、写走跨进程文件锁，按桶 clock 淘汰。
+
+键为 (top_k, plain_text) 的 blake2b；槽内存 keywords 元组与其拼音。
+槽分大小两档：多数短句落小槽，长关键词 / 长拼音落大槽（条数为小槽的四分之一），大槽也放不下才不缓存。
+读端靠槽内 crc 校验识别并发写造成的半截数据，校验不过按未命中处理。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import zlib
+from typing import TYPE_CHECKING
+
+from nonebot import logger
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+_MAGIC = b"PBKWC\x00\x02\x00"
+_FILE_HEADER = struct.Struct("<8sIIII")  # magic, small_slots, small_size, large_slots, large_size
+_SLOT_HEADER = struct.Struct("<QIHBB")  # key_hash, crc, payload_len, top_k, ref
+_SLOT_SIZE = 128
+_LARGE_SLOT_SIZE = 512
+# 大槽条数占小槽的比例
+_LARGE_SLOT_DIVISOR = 4
+_WAYS = 8
+_KW_SEP = "\x1f"
+_PINYIN_SEP = "\x1e"
+
+_cache: SharedKeywordCache | None = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def _key_hash(plain_text: str, top_k: int) -> int:
+    digest = hashlib.blake2b(f"{top_k}\x00{plain_text}".encode(), digest_size=8).digest()
+    # 0 表示空槽
+    return int.from_bytes(digest, "little") or 1
+
+
+def _slot_crc(key_hash: int, top_k: int, payload: bytes) -> int:
+    return zlib.crc32(payload, zlib.crc32(struct.pack("<QB", key_hash, top_k)))
+
+
+class _SlotClass:
+    """一档定长槽：桶数、槽长与它在文件里的 clock 指针区 / 槽区偏移。"""
+
+    __slots__ = ("buckets", "hands_offset", "payload_max", "slot_size", "slots", "slots_offset")
+
+    def __init__(self, slots: int, slot_size: int) -> None:
+        self.buckets = max(1, int(slots) // _WAYS)
+        self.slots = self.buckets * _WAYS
+        self.slot_size = slot_size
+        self.payload_max = slot_size - _SLOT_HEADER.size
+        self.hands_offset = 0
+        self.slots_offset = 0
+
+    def slot_offset(self, bucket: int, way: int) -> int:
+        return self.slots_offset + (bucket * _WAYS + way) * self.slot_size
+
+
+class SharedKeywordCache:
+    """
+    文件布局：文件头 | 小槽、大槽各自每桶一字节 clock 指针 | 小槽区 | 大槽区。
+    槽数与文件头不符时整体重建（tmp + replace），旧映射的进程继续用旧 inode 直到重启。
+    """
+
+    def __init__(self, path: Path, slots: int) -> None:
+        self.path = path
+        self.small = _SlotClass(slots, _SLOT_SIZE)
+        self.large = _SlotClass(max(_WAYS, self.small.slots // _LARGE_SLOT_DIVISOR), _LARGE_SLOT_SIZE)
+        self.slots = self.small.slots
+        self.small.hands_offset = _FILE_HEADER.size
+        self.large.hands_offset = self.small.hands_offset + self.small.buckets
+        self.small.slots_offset = (self.large.hands_offset + self.large.buckets + 63) // 64 * 64
+        self.large.slots_offset = self.small.slots_offset + self.small.slots * _SLOT_SIZE
+        self._size = self.large.slots_offset + self.large.slots * _LARGE_SLOT_SIZE
+        self._lock_path = path.with_name(f"{path.name}.lock")
+        self._mm = self._open()
+
+    def _file_header(self) -> bytes:
+        return _FILE_HEADER.pack(_MAGIC, self.small.slots, _SLOT_SIZE, self.large.slots, _LARGE_SLOT_SIZE)
+
+    def _header_ok(self) -> bool:
+        try:
+            with self.path.open("rb") as fh:
+                head = fh.read(_FILE_HEADER.size)
+        except OSError:
+            return False
+        return head == self._file_header()
+
+    def _open(self) -> mmap.mmap:
+        from pallas.core.foundation.fs_lock import interprocess_file_lock
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with interprocess_file_lock(self._lock_path):
+            if not self._header_ok() or self.path.stat().st_size != self._size:
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                with tmp.open("wb") as fh:
+                    fh.truncate(self._size)
+                    fh.write(self._file_header())
+                tmp.replace(self.path)
+            fd = os.open(str(self.path), os.O_RDWR)
+            try:
+                return mmap.mmap(fd, self._size)
+            finally:
+                os.close(fd)
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _read_slot(
+        self, offset: int, key_hash: int, top_k: int, payload_max: int
+    ) -> tuple[tuple[str, ...], str] | None:
+        mm = self._mm
+        slot_hash, crc, length, slot_top_k, ref = _SLOT_HEADER.unpack_from(mm, offset)
+        if slot_hash != key_hash or slot_top_k != top_k or length > payload_max:
+            return None
+        start = offset + _SLOT_HEADER.size
+        payload = mm[start : start + length]
+        if _slot_crc(key_hash, top_k, payload) != crc:
+            return None
+        if not ref:
+            # 单字节置位，多进程并发写同值无害
+            mm[offset + _SLOT_HEADER.size - 1] = 1
+        try:
+            text = payload.decode()
+        except UnicodeDecodeError:
+            return None
+        keywords, _, pinyin = text.partition(_PINYIN_SEP)
+        return (tuple(keywords.split(_KW_SEP)) if keywords else ()), pinyin
+
+    def get(self, plain_text: str, top_k: int) -> tuple[tuple[str, ...], str] | None:
+        key_hash = _key_hash(plain_text, top_k)
+        for cls in (self.small, self.large):
+            bucket = key_hash % cls.buckets
+            for way in range(_WAYS):
+                hit = self._read_slot(cls.slot_offset(bucket, way), key_hash, top_k, cls.payload_max)
+                if hit is not None:
+                    return hit
+        return None
+
+    def put(self, plain_text: str, top_k: int, keywords: tuple[str, ...], pinyin: str) -> bool | None:
+        """写入一条；返回是否淘汰了旧条目。载荷连大槽也放不进（或含分隔符）时不缓存，返回 None。"""
+        from pallas.core.foundation.fs_lock import interprocess_file_lock
+
+        if any(_KW_SEP in k or _PINYIN_SEP in k for k in keywords):
+            return None
+        payload = (_KW_SEP.join(keywords) + _PINYIN_SEP + pinyin).encode()
+        if len(payload) <= self.small.payload_max:
+            cls = self.small
+        elif len(payload) <= self.large.payload_max:
+            cls = self.large
+        else:
+            return None
+        key_hash = _key_hash(plain_text, top_k)
+        bucket = key_hash % cls.buckets
+        mm = self._mm
+        with interprocess_file_lock(self._lock_path):
+            victim = -1
+            for way in range(_WAYS):
+                slot_hash = _SLOT_HEADER.unpack_from(mm, cls.slot_offset(bucket, way))[0]
+                if slot_hash == key_hash:
+                    # 别的 worker 已写入
+                    return False
+                if slot_hash == 0 and victim < 0:
+                    victim = way
+            evicted = victim < 0
+            if evicted:
+                hand_at = cls.hands_offset + bucket
+                hand = mm[hand_at] % _WAYS
+                # clock：ref 置位的槽给一次机会，清位后继续转
+                for _ in range(_WAYS * 2):
+                    ref_at = cls.slot_offset(bucket, hand) + _SLOT_HEADER.size - 1
+                    if not mm[ref_at]:
+                        break
+                    mm[ref_at] = 0
+                    hand = (hand + 1) % _WAYS
+                victim = hand
+                mm[hand_at] = (hand + 1) % _WAYS
+            offset = cls.slot_offset(bucket, victim)
+            # 先作废键再写载荷，最后落键，读端最多看到未命中
+            _SLOT_HEADER.pack_into(mm, offset, 0, 0, 0, 0, 0)
+            start = offset + _SLOT_HEADER.size
+            mm[start : start + len(payload)] = payload
+            _SLOT_HEADER.pack_into(mm, offset, key_hash, _slot_crc(key_hash, top_k, payload), len(payload), top_k, 0)
+        return evicted
+
+
+def keyword_cache_slots() -> int:
+    from .config import get_repeater_config
+
+    return int(get_repeater_config().keyword_cache_slots)
+
+
+def keyword_cache_path() -> Path:
+    from pallas.core.foundation.paths import plugin_data_dir
+
+    return plugin_data_dir("repeater", create=True) / "keyword_cache.bin"
+
+
+def shared_keyword_cache() -> SharedKeywordCache | None:
+    """进程内单例；槽数为 0 或映射失败时返回 None，调用方退回仅进程内 lru。"""
+    global _cache, _cache_failed
+    if _cache is not None or _cache_failed:
+        return _cache
+    with _cache_lock:
+        if _cache is not None or _cache_failed:
+            return _cache
+        slots = keyword_cache_slots()
+        if slots <= 0:
+            _cache_failed = True
+            return None
+        try:
+            _cache = SharedKeywordCache(keyword_cache_path(), slots)
+        except (OSError, ValueError) as exc:
+            _cache_failed = True
+            logger.warning("Shared keyword cache is unavailable, falling back to per-process cache: [{}]", exc)
+        return _cache
+
+
+def reset_shared_keyword_cache() -> None:
+    global _cache, _cache_failed
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
+        _cache_failed = False
@@ -0,0 +1,97 @@
+"""复读 learn 合批写入：并发的 learn 任务共用一次 learn_answers 提交，逐条拿回结果。"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+from nonebot import logger
+
+from .learn_runtime_config import get_repeater_learn_runtime_config
+
+if TYPE_CHECKING:
+    from pallas.core.foundation.db.repository import LearnAnswerItem
+
+_writer: LearnBatchWriter | None = None
+
+
+def learn_batch_size() -> int:
+    return get_repeater_learn_runtime_config().learn_batch_size
+
+
+class LearnBatchWriter:
+    """
+    group commit：上一批在写库时，新到的 learn 先排队，下一轮一次取至多 batch_size 条。
+    空闲时首条不额外等待，只让出一次调度，把同一轮到达的并发 learn 收进同批。
+    """
+
+    def __init__(self, repo: Any, *, batch_size: int) -> None:
+        self._repo = repo
+        self.batch_size = max(1, int(batch_size))
+        self._pending: list[tuple[LearnAnswerItem, asyncio.Future[bool]]] = []
+        self._flush_task: asyncio.Task[None] | None = None
+        self._loop = asyncio.get_running_loop()
+
+    def bound_to_running_loop(self) -> bool:
+        return self._loop is asyncio.get_running_loop()
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, item: LearnAnswerItem) -> bool:
+        future: asyncio.Future[bool] = self._loop.create_future()
+        self._pending.append((item, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._run(), name="repeater_learn_batch_writer")
+        return await future
+
+    async def _run(self) -> None:
+        while self._pending:
+            await asyncio.sleep(0)
+            batch = self._pending[: self.batch_size]
+            del self._pending[: len(batch)]
+            # 已被取消的 learn（如 work job 租约丢失）不再写库，避免重试时重复计数
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                flags = await self._repo.learn_answers([item for item, _ in batch])
+            except Exception as exc:
+                logger.warning("Repeater learn batch of [{}] items failed: [{}]", len(batch), exc)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), created in zip(batch, flags, strict=True):
+                if not future.done():
+                    future.set_result(bool(created))
+
+
+def _learn_batch_writer(repo: Any) -> LearnBatchWriter:
+    global _writer
+    size = learn_batch_size()
+    if _writer is None or not _writer.bound_to_running_loop() or _writer.batch_size != size:
+        _writer = LearnBatchWriter(repo, batch_size=size)
+    return _writer
+
+
+def clear_learn_batch_writer() -> None:
+    global _writer
+    _writer = None
+
+
+async def submit_learn_answer(repo: Any, item: LearnAnswerItem) -> bool:
+    """仓储提供 learn_answers 且批量开启时合批；否则退回逐条 learn_answer。"""
+    learn_many = getattr(repo, "learn_answers", None)
+    if learn_batch_size() <= 1 or not callable(learn_many):
+        return bool(
+            await repo.learn_answer(
+                keywords=item.keywords,
+                group_id=item.group_id,
+                answer_keywords=item.answer_keywords,
+                answer_time=item.answer_time,
+                message=item.message,
+                append_on_existing=item.append_on_existing,
+            )
+        )
+    return await _learn_batch_writer(repo).submit(item)
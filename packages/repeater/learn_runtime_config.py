@@ -30,6 +30,16 @@ class RepeaterLearnRuntimeConfig(BaseModel):
             "保存后会重启后台学习线程以应用新容量；群消息特别多时可适当加大",
         ),
     )
+    learn_batch_size: int = Field(
+        default=64,
+        ge=1,
+        le=512,
+        description=field_help(
+            "后台学语料时一次最多合并写入多少条",
+            "填正整数，例如 64；填 1 表示逐条写入",
+            "同一批内相同的上下文与回答会合并计数，只在 PostgreSQL 下生效",
+        ),
+    )
 
 
 def clear_repeater_learn_runtime_config_cache() -> None:
@@ -43,4 +53,5 @@ def get_repeater_learn_runtime_config() -> RepeaterLearnRuntimeConfig:
     return RepeaterLearnRuntimeConfig(
         learn_concurrency=cfg.learn_concurrency,
         learn_queue_max_size=cfg.learn_queue_max_size,
+        learn_batch_size=cfg.learn_batch_size,
     )
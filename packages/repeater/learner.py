@@ -159,13 +159,20 @@ class Learner:
 
         learn_answer = getattr(context_repo, "learn_answer", None)
         if callable(learn_answer):
-            await learn_answer(
-                keywords=pre_keywords,
-                group_id=group_id,
-                answer_keywords=keywords,
-                answer_time=cur_time,
-                message=raw_message,
-                append_on_existing=chat_data.is_plain_text,
+            from pallas.core.foundation.db.repository import LearnAnswerItem
+
+            from .learn_batch import submit_learn_answer
+
+            await submit_learn_answer(
+                context_repo,
+                LearnAnswerItem(
+                    keywords=pre_keywords,
+                    group_id=group_id,
+                    answer_keywords=keywords,
+                    answer_time=cur_time,
+                    message=raw_message,
+                    append_on_existing=chat_data.is_plain_text,
+                ),
             )
             await note_context_exists(pre_keywords)
             return
@@ -14,13 +14,13 @@ _GROUP_TAIL_LIMIT = 8
 
 async def group_messages_before(chat_data: ChatData) -> list[MessageModel]:
     from .message_store import MessageStore
+    from .message_window import last_matching
 
     group_id = int(chat_data.group_id)
     before_time = int(chat_data.time)
-    mem = [m for m in MessageStore._message_dict.get(group_id, []) if int(m.time) < before_time]
-    if mem:
-        return mem[-_GROUP_TAIL_LIMIT:]
-    return []
+    return last_matching(
+        MessageStore._message_dict.get(group_id, ()), _GROUP_TAIL_LIMIT, lambda m: int(m.time) < before_time
+    )
 
 
 async def user_message_before_in_group(chat_data: ChatData, group_msgs: list[MessageModel]) -> MessageModel | None:
@@ -2,7 +2,7 @@ import asyncio
 import random
 import time
 from collections import defaultdict
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Sequence
 from typing import TYPE_CHECKING
 
 from nonebot import logger
@@ -12,6 +12,8 @@ from pallas.core.foundation.db import make_message_repository
 from pallas.core.platform.shard import context as shard_ctx
 
 from .config import get_repeater_config
+from .message_window import GroupMessageWindow, WindowMessage, persistable
+from .popularity_index import GroupPopularityIndex
 
 if TYPE_CHECKING:
     from .model import ChatData
@@ -23,6 +25,10 @@ plugin_config = get_repeater_config()
 message_repo = make_message_repository()
 
 
+def _new_window() -> GroupMessageWindow:
+    return GroupMessageWindow(MessageStore.window_capacity())
+
+
 class MessageStore:
     """
     消息存储与持久化层，负责消息缓存、数据库同步和检索
@@ -32,12 +38,42 @@ class MessageStore:
     SAVE_TIME_THRESHOLD = plugin_config.save_time_threshold
     SAVE_COUNT_THRESHOLD = plugin_config.save_count_threshold
     SAVE_RESERVED_SIZE = plugin_config.save_reserved_size
+    # 少于该条数的群不参与主动发言，也不进热度索引
+    POPULARITY_MIN_MESSAGES = 10
 
     # Class variables
-    _message_dict: dict[int, list[MessageModel]] = defaultdict(list)
+    _message_dict: dict[int, GroupMessageWindow] = defaultdict(_new_window)
     _synced_prefix_counts: dict[int, int] = {}
     _message_lock = asyncio.Lock()
     _late_save_time = 0
+    # bulk_insert 期间窗口下标须保持稳定，环满时暂不覆盖
+    _syncing = False
+    _popularity = GroupPopularityIndex(POPULARITY_MIN_MESSAGES)
+
+    @staticmethod
+    def window_capacity() -> int:
+        """落库后保留条数 + 触发落库的条数；正常节奏下环不会追上未落库的消息。"""
+        return max(1, int(MessageStore.SAVE_RESERVED_SIZE)) + max(0, int(MessageStore.SAVE_COUNT_THRESHOLD))
+
+    @staticmethod
+    def group_window(group_id: int) -> GroupMessageWindow:
+        """取群窗口，外部直接放进来的 list 就地换成环；调用方须持有 _message_lock。"""
+        group_msgs = MessageStore._message_dict.get(group_id)
+        if isinstance(group_msgs, GroupMessageWindow):
+            return group_msgs
+        window = GroupMessageWindow(MessageStore.window_capacity(), group_msgs or ())
+        MessageStore._message_dict[group_id] = window
+        return window
+
+    @staticmethod
+    def _append(group_id: int, message: WindowMessage) -> GroupMessageWindow:
+        """追加并维护已同步前缀：环满时只覆盖已落库的最旧消息。"""
+        group_msgs = MessageStore.group_window(group_id)
+        synced = min(MessageStore._synced_prefix_counts.get(group_id, 0), len(group_msgs))
+        if group_msgs.append(message, evict=synced > 0 and not MessageStore._syncing):
+            MessageStore._synced_prefix_counts[group_id] = synced - 1
+        MessageStore._popularity.touch(group_id, group_msgs)
+        return group_msgs
 
     @staticmethod
     def build_message(chat_data: "ChatData") -> MessageModel:
@@ -60,12 +96,11 @@ class MessageStore:
     async def capture_message(
         chat_data: "ChatData",
         topics_callback: Callable[[int, list[str]], Awaitable[None]] | None = None,
-    ) -> MessageModel:
+    ) -> WindowMessage:
         """只更新消息进程的近期窗口，持久化由 work aux 处理。"""
-        message = MessageStore.build_message(chat_data)
+        message = WindowMessage.from_chat_data(chat_data)
         async with MessageStore._message_lock:
-            group_msgs = MessageStore._message_dict[chat_data.group_id]
-            group_msgs.append(message)
+            group_msgs = MessageStore._append(chat_data.group_id, message)
             # aux 将单独持久化该消息；标记本地窗口前缀，避免定时 _sync 重复写入。
             MessageStore._synced_prefix_counts[chat_data.group_id] = len(group_msgs)
             if MessageStore._late_save_time == 0:
@@ -97,24 +132,9 @@ class MessageStore:
         trigger_keywords: list[str] | None = None
 
         async with MessageStore._message_lock:
-            group_msgs = MessageStore._message_dict[group_id]
-            if not group_msgs:
+            if not MessageStore._message_dict.get(group_id):
                 MessageStore._synced_prefix_counts[group_id] = 0
-            group_msgs.append(
-                MessageModel.model_construct(
-                    group_id=group_id,
-                    user_id=chat_data.user_id,
-                    bot_id=chat_data.bot_id,
-                    raw_message=chat_data.raw_message,
-                    is_plain_text=chat_data.is_plain_text,
-                    plain_text=chat_data.plain_text,
-                    keywords=chat_data.keywords,
-                    sender_name=chat_data.sender_name,
-                    message_id=chat_data.message_id,
-                    reply_to_message_id=chat_data.reply_to_message_id,
-                    time=chat_data.time,
-                )
-            )
+            group_msgs = MessageStore._append(group_id, WindowMessage.from_chat_data(chat_data))
 
             if chat_data.is_plain_text and topics_callback is not None:
                 trigger_keywords = chat_data._keywords_list
@@ -124,7 +144,7 @@ class MessageStore:
             if MessageStore._late_save_time == 0:
                 MessageStore._late_save_time = cur_time - 1
             else:
-                count = len(MessageStore._message_dict[group_id])
+                count = len(group_msgs)
                 if (
                     count > MessageStore.SAVE_COUNT_THRESHOLD
                     or cur_time - MessageStore._late_save_time > MessageStore.SAVE_TIME_THRESHOLD
@@ -156,7 +176,7 @@ class MessageStore:
             if MessageStore._late_save_time == 0:
                 MessageStore._synced_prefix_counts.clear()
             save_list: list[MessageModel] = [
-                msg
+                persistable(msg)
                 for group_id, group_msgs in MessageStore._message_dict.items()
                 for msg in group_msgs[min(MessageStore._synced_prefix_counts.get(group_id, 0), len(group_msgs)) :]
             ]
@@ -167,39 +187,61 @@ class MessageStore:
                 for group_id, group_msgs in MessageStore._message_dict.items()
                 if len(group_msgs) > min(MessageStore._synced_prefix_counts.get(group_id, 0), len(group_msgs))
             }
+            MessageStore._syncing = True
 
+        inserted = False
         try:
             await message_repo.bulk_insert(save_list)
+            inserted = True
         except RuntimeError:
             return
         except Exception as e:
             logger.error(f"repeater message_store bulk_insert failed in _sync: {e}")
             return
+        finally:
+            if not inserted:
+                MessageStore._syncing = False
 
         async with MessageStore._message_lock:
             # 仅丢弃本轮真正已同步的消息，
             # 已同步的消息保留最后 SAVE_RESERVED_SIZE 条供随机采样，
-            # 未同步的新消息全部保留，留给下一轮 _sync
-            new_dict: dict[int, list[MessageModel]] = {}
+            # 未同步的新消息全部保留，留给下一轮 _sync；窗口原地裁剪
             new_synced_prefix_counts: dict[int, int] = {}
-            for group_id, group_msgs in MessageStore._message_dict.items():
+            for group_id in list(MessageStore._message_dict):
+                group_msgs = MessageStore.group_window(group_id)
                 prior_synced_prefix = min(MessageStore._synced_prefix_counts.get(group_id, 0), len(group_msgs))
                 sync_boundary = min(sync_boundaries.get(group_id, prior_synced_prefix), len(group_msgs))
-                synced = group_msgs[:sync_boundary]
-                unsynced = group_msgs[sync_boundary:]
-                if len(synced) > MessageStore.SAVE_RESERVED_SIZE:
-                    synced = synced[-MessageStore.SAVE_RESERVED_SIZE :]
-                combined = synced + unsynced
-                if not combined:
+                dropped = max(0, sync_boundary - MessageStore.SAVE_RESERVED_SIZE)
+                group_msgs.drop_oldest(dropped)
+                if not group_msgs:
+                    del MessageStore._message_dict[group_id]
                     continue
-                new_dict[group_id] = combined
-                new_synced_prefix_counts[group_id] = len(synced)
-            MessageStore._message_dict.clear()
-            MessageStore._message_dict.update(new_dict)
+                new_synced_prefix_counts[group_id] = sync_boundary - dropped
             MessageStore._synced_prefix_counts = new_synced_prefix_counts
+            MessageStore._syncing = False
+            MessageStore._popularity.rebuild(MessageStore._message_dict)
 
             MessageStore._late_save_time = cur_time
 
+    @staticmethod
+    def note_group_changed(group_id: int) -> None:
+        """窗口在 MessageStore 之外被改动后同步热度索引；调用方须持有 _message_lock。"""
+        group_msgs = MessageStore._message_dict.get(group_id)
+        if group_msgs is None:
+            MessageStore._popularity.discard(group_id)
+        else:
+            MessageStore._popularity.touch(group_id, group_msgs)
+
+    @staticmethod
+    async def popular_groups(
+        *,
+        limit: int,
+        accept: Callable[[int, Sequence[WindowMessage]], bool],
+    ) -> list[tuple[int, Sequence[WindowMessage]]]:
+        """按消息速率升序取至多 limit 个 accept 通过的群，不拷贝整个窗口字典。"""
+        async with MessageStore._message_lock:
+            return MessageStore._popularity.ascending(MessageStore._message_dict, limit=limit, accept=accept)
+
     @staticmethod
     async def periodic_sync_if_buffered() -> bool:
         async with MessageStore._message_lock:
@@ -210,7 +252,7 @@ class MessageStore:
         return True
 
     @staticmethod
-    async def get_random_message_from_each_group() -> dict[int, MessageModel]:
+    async def get_random_message_from_each_group() -> dict[int, WindowMessage]:
         """
         获取每个群近期一条随机发言
 
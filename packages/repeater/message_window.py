@@ -0,0 +1,204 @@
+"""群近期消息窗口：__slots__ 记录 + 定长环形缓冲，追加与淘汰均 O(1)。
+
+窗口只服务复读检测、主动发言与学习上下文，落库时才还原成 Message 文档。
+"""
+
+from __future__ import annotations
+
+import sys
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from itertools import chain, islice
+from typing import TYPE_CHECKING, Any, overload
+
+if TYPE_CHECKING:
+    from pallas.core.foundation.db import Message as MessageModel
+
+    from .model import ChatData
+
+_intern = sys.intern
+
+
+class WindowMessage:
+    """窗口内的一条消息；文本字段 intern，复读刷屏时同一句只存一份。"""
+
+    __slots__ = (
+        "bot_id",
+        "group_id",
+        "is_plain_text",
+        "keywords",
+        "message_id",
+        "plain_text",
+        "raw_message",
+        "reply_to_message_id",
+        "sender_name",
+        "suppressed_by_rage",
+        "time",
+        "user_id",
+    )
+
+    def __init__(
+        self,
+        *,
+        group_id: int,
+        user_id: int,
+        bot_id: int,
+        raw_message: str,
+        is_plain_text: bool = True,
+        plain_text: str = "",
+        keywords: str = "",
+        sender_name: str = "",
+        message_id: int | None = None,
+        reply_to_message_id: int | None = None,
+        suppressed_by_rage: bool = False,
+        time: int = 0,
+    ) -> None:
+        self.group_id = group_id
+        self.user_id = user_id
+        self.bot_id = bot_id
+        self.raw_message = _intern(raw_message)
+        self.is_plain_text = is_plain_text
+        self.plain_text = _intern(plain_text)
+        self.keywords = _intern(keywords)
+        self.sender_name = _intern(sender_name) if sender_name else ""
+        self.message_id = message_id
+        self.reply_to_message_id = reply_to_message_id
+        self.suppressed_by_rage = suppressed_by_rage
+        self.time = time
+
+    @classmethod
+    def from_chat_data(cls, chat_data: ChatData) -> WindowMessage:
+        return cls(
+            group_id=chat_data.group_id,
+            user_id=chat_data.user_id,
+            bot_id=chat_data.bot_id,
+            raw_message=chat_data.raw_message,
+            is_plain_text=chat_data.is_plain_text,
+            plain_text=chat_data.plain_text,
+            keywords=chat_data.keywords,
+            sender_name=chat_data.sender_name,
+            message_id=chat_data.message_id,
+            reply_to_message_id=chat_data.reply_to_message_id,
+            suppressed_by_rage=chat_data.suppressed_by_rage,
+            time=chat_data.time,
+        )
+
+    def to_message(self) -> MessageModel:
+        from pallas.core.foundation.db import Message as MessageModel
+
+        return MessageModel.model_construct(**{name: getattr(self, name) for name in self.__slots__})
+
+    def __repr__(self) -> str:
+        return (
+            f"WindowMessage(group_id={self.group_id}, user_id={self.user_id}, "
+            f"time={self.time}, raw_message={self.raw_message!r})"
+        )
+
+
+def persistable(msg: Any) -> Any:
+    """窗口记录还原为 Message 文档；其他对象（测试桩、旧窗口）原样返回。"""
+    return msg.to_message() if isinstance(msg, WindowMessage) else msg
+
+
+class GroupMessageWindow(Sequence[Any]):
+    """
+    单群消息环：未满时顺序追加，满后覆盖最旧一条。
+    evict=False 的追加在满时直接扩容而非覆盖，留给调用方保护尚未落库的消息；
+    drop_oldest 之后缓冲回到线性布局。切片与倒序扫描都不复制整个窗口。
+    """
+
+    __slots__ = ("_buf", "_head", "capacity")
+
+    def __init__(self, capacity: int, items: Iterable[Any] = ()) -> None:
+        self.capacity = max(1, int(capacity))
+        self._buf: list[Any] = list(items)
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def _index(self, i: int) -> int:
+        n = len(self._buf)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("window index out of range")
+        return (self._head + i) % n
+
+    @overload
+    def __getitem__(self, i: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[Any]: ...
+
+    def __getitem__(self, i: int | slice) -> Any:
+        if isinstance(i, slice):
+            buf = self._buf
+            n = len(buf)
+            head = self._head
+            return [buf[(head + j) % n] for j in range(*i.indices(n))]
+        return self._buf[self._index(i)]
+
+    def __iter__(self) -> Iterator[Any]:
+        buf = self._buf
+        head = self._head
+        if not head:
+            return iter(buf)
+        return chain(islice(buf, head, None), islice(buf, 0, head))
+
+    def __reversed__(self) -> Iterator[Any]:
+        buf = self._buf
+        head = self._head
+        n = len(buf)
+        for j in range(n - 1, -1, -1):
+            yield buf[(head + j) % n]
+
+    def __repr__(self) -> str:
+        return f"GroupMessageWindow(capacity={self.capacity}, size={len(self._buf)})"
+
+    def _linearize(self) -> None:
+        if self._head:
+            buf = self._buf
+            self._buf = buf[self._head :] + buf[: self._head]
+            self._head = 0
+
+    def append(self, msg: Any, *, evict: bool = True) -> bool:
+        """追加一条；返回是否覆盖了最旧一条。"""
+        buf = self._buf
+        n = len(buf)
+        if n < self.capacity or not evict:
+            self._linearize()
+            self._buf.append(msg)
+            return False
+        head = self._head
+        buf[head] = msg
+        self._head = (head + 1) % n
+        return True
+
+    def extend(self, items: Iterable[Any]) -> None:
+        """与 list.extend 一致：只追加，不淘汰。"""
+        self._linearize()
+        self._buf.extend(items)
+
+    def drop_oldest(self, count: int) -> None:
+        if count <= 0:
+            return
+        self._linearize()
+        del self._buf[:count]
+
+    def clear(self) -> None:
+        self._buf = []
+        self._head = 0
+
+
+def last_matching(group_msgs: Sequence[Any], limit: int, predicate: Callable[[Any], bool]) -> list[Any]:
+    """倒序扫到 limit 条满足 predicate 的消息即停，按时间正序返回；窗口与普通列表通用。"""
+    picked: list[Any] = []
+    if limit <= 0:
+        return picked
+    for msg in reversed(group_msgs):
+        if predicate(msg):
+            picked.append(msg)
+            if len(picked) >= limit:
+                break
+    picked.reverse()
+    return picked
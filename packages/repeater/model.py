@@ -1,7 +1,7 @@
 import asyncio
 import re
 import time
-from collections import defaultdict, deque
+from collections import defaultdict
 from collections.abc import AsyncGenerator
 from dataclasses import dataclass
 from functools import cached_property, lru_cache
@@ -12,7 +12,6 @@ from nonebot import logger
 from nonebot.adapters.onebot.v11 import GroupMessageEvent, Message
 
 from pallas.core.foundation.config import BotConfig
-from pallas.core.foundation.db import Message as MessageModel
 from pallas.core.foundation.db.context_repo_access import context_repo
 from pallas.core.shared.reply_command_rule import extract_reply_id_from_raw_message
 
@@ -20,8 +19,9 @@ from .ban_manager import BanManager
 from .config import get_repeater_config
 from .learner import Learner
 from .message_store import MessageStore
+from .message_window import WindowMessage
 from .responder import Responder
-from .topic_utils import filtered_recent_topics
+from .topic_utils import TopicWindow, filtered_recent_topics
 
 try:
     import jieba_next.analyse as jieba_analyse
@@ -38,20 +38,56 @@ except ImportError:
 plugin_config = get_repeater_config()
 
 
+def _keywords_pinyin(text: str) -> str:
+    return "".join([item[0] for item in pypinyin.pinyin(text, style=pypinyin.NORMAL, errors="default")]).lower()
+
+
 @lru_cache(maxsize=4096)
-def extract_keyword_tags(plain_text: str, top_k: int = 2) -> tuple[str, ...]:
-    """跨消息复用分词结果；同句高频出现时避免反复跑 jieba。"""
+def extract_keyword_entry(plain_text: str, top_k: int = 2) -> tuple[tuple[str, ...], str]:
+    """
+    分词结果与其拼音一起缓存：进程内 lru 之下挂同机共享的 mmap 缓存，
+    热句在各分片 worker 间只跑一次 jieba。拼音按 " ".join(keywords) 计算。
+    """
     import time
 
-    from pallas.core.platform.ingress.hotpath_metrics import record_keywords_extract_ms
+    from pallas.core.platform.ingress.hotpath_metrics import (
+        record_keywords_extract_ms,
+        record_keywords_shared_evicted,
+        record_keywords_shared_lookup,
+        record_keywords_shared_skipped,
+    )
+
+    from .keyword_cache import shared_keyword_cache
 
     text = (plain_text or "").strip()
     if not text:
-        return ()
+        return (), ""
+    shared = shared_keyword_cache()
+    if shared is not None:
+        hit = shared.get(text, top_k)
+        record_keywords_shared_lookup(hit=hit is not None)
+        if hit is not None:
+            return hit
     started = time.perf_counter()
-    result = jieba_analyse.extract_tags(text, topK=top_k)
+    keywords = tuple(cast("list[str]", jieba_analyse.extract_tags(text, topK=top_k)))
     record_keywords_extract_ms((time.perf_counter() - started) * 1000.0)
-    return tuple(cast("list[str]", result))
+    pinyin = _keywords_pinyin(" ".join(keywords)) if keywords else ""
+    if shared is not None:
+        try:
+            evicted = shared.put(text, top_k, keywords, pinyin)
+        except (OSError, ValueError) as exc:
+            logger.debug("Shared keyword cache write failed: [{}]", exc)
+        else:
+            if evicted is None:
+                record_keywords_shared_skipped()
+            elif evicted:
+                record_keywords_shared_evicted()
+    return keywords, pinyin
+
+
+def extract_keyword_tags(plain_text: str, top_k: int = 2) -> tuple[str, ...]:
+    """跨消息复用分词结果；同句高频出现时避免反复跑 jieba。"""
+    return extract_keyword_entry(plain_text, top_k)[0]
 
 
 def warmup_keyword_extraction() -> None:
@@ -59,6 +95,22 @@ def warmup_keyword_extraction() -> None:
     jieba_analyse.extract_tags("预热", topK=1)
 
 
+_CONTEXT_CLEANUP_BUDGET_SEC = 600.0
+
+
+def context_cleanup_budget_sec() -> float:
+    """每晚 Answer 清理的时间预算；用尽后断点落库，下一轮接着跑。"""
+    from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+    raw = repo_env_raw_value("PALLAS_REPEATER_CONTEXT_CLEANUP_BUDGET_SEC")
+    if raw is None:
+        return _CONTEXT_CLEANUP_BUDGET_SEC
+    try:
+        return max(1.0, float(str(raw).strip()))
+    except ValueError:
+        return _CONTEXT_CLEANUP_BUDGET_SEC
+
+
 @dataclass
 class ChatData:
     group_id: int
@@ -105,9 +157,9 @@ class ChatData:
 
     @cached_property
     def keywords_pinyin(self) -> str:
-        return "".join([
-            item[0] for item in pypinyin.pinyin(self.keywords, style=pypinyin.NORMAL, errors="default")
-        ]).lower()
+        if self.keywords_len:
+            return extract_keyword_entry(self.plain_text, ChatData._keywords_size)[1]
+        return _keywords_pinyin(self.keywords)
 
     @cached_property
     def to_me(self) -> bool:
@@ -151,7 +203,7 @@ class Chat:
     _reply_lock = asyncio.Lock()  # 回复消息缓存锁
     _topics_lock = asyncio.Lock()
 
-    _recent_topics = defaultdict(lambda: deque(maxlen=Chat.TOPICS_SIZE))
+    _recent_topics = defaultdict(lambda: TopicWindow(Chat.TOPICS_SIZE))
 
     # #
     def __init__(self, data: ChatData | GroupMessageEvent):
@@ -237,7 +289,7 @@ class Chat:
         return await BanManager.ban(group_id, bot_id, ban_raw_message, reason, Chat._reply_dict)
 
     @staticmethod
-    async def get_random_message_from_each_group() -> dict[int, MessageModel]:
+    async def get_random_message_from_each_group() -> dict[int, WindowMessage]:
         """
         获取每个群近期一条随机发言
 
@@ -261,9 +313,34 @@ class Chat:
 
         await context_repo.delete_expired(expiration, Chat.ANSWER_THRESHOLD)
 
+        from .bundle_precompute import discard_precomputed_candidates
         from .context_exists_cache import invalidate_context_exists_cache
 
         await invalidate_context_exists_cache(None)
+        # 非 PG 后端逐条 replace_answers 不经语料缓存失效钩子，这里统一作废
+        discard_precomputed_candidates(None)
+
+        # PG：按主键分批集合删除，限时且可断点续跑；其他后端返回 None 走逐条重写
+        prune = getattr(context_repo, "prune_expired_answers", None)
+        if callable(prune):
+            progress = await prune(
+                trigger_threshold=100,
+                expiration=expiration,
+                clear_time=cur_time,
+                budget_sec=context_cleanup_budget_sec(),
+            )
+            if progress is not None:
+                logger.info(
+                    "Context cleanup pruned [{}] answers across [{}] contexts in [{}] batches, "
+                    "[{:.0f}]ms, finished [{}], resume id [{}]",
+                    progress.answers_deleted,
+                    progress.contexts,
+                    progress.batches,
+                    progress.elapsed_ms,
+                    progress.finished,
+                    progress.last_id,
+                )
+                return
 
         all_context = await context_repo.find_for_cleanup(100, expiration)
         for context in all_context:
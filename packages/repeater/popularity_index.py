@@ -0,0 +1,115 @@
+"""群热度索引：按近期消息速率维护的惰性小顶堆，供主动发言按热度升序挑群。"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping, Sequence
+
+_COMPACT_SLACK = 64
+
+
+def message_rate(msgs: Sequence[Any], min_messages: int) -> float | None:
+    """条数 / 首尾时间跨度；不足 min_messages 条时不参与排序，跨度为 0 视为最热。"""
+    count = len(msgs)
+    if count < min_messages:
+        return None
+    duration = msgs[-1].time - msgs[0].time
+    return count / duration if duration else math.inf
+
+
+class GroupPopularityIndex:
+    """
+    群窗口每次变动后 touch 一次（O(log n)），旧堆项靠 seq 失效、出堆时丢弃。
+    取群时逐个出堆，校验速率仍与窗口一致后再放回；未经 touch 的改动在这里就地纠正。
+    """
+
+    def __init__(self, min_messages: int) -> None:
+        self.min_messages = int(min_messages)
+        self._heap: list[tuple[float, int, int]] = []
+        # group_id -> (rate, seq)；不足条数的群记 None，只用于和窗口字典对账
+        self._entries: dict[int, tuple[float, int] | None] = {}
+        self._seq = 0
+        self._source_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def touch(self, group_id: int, msgs: Sequence[Any]) -> None:
+        rate = message_rate(msgs, self.min_messages)
+        current = self._entries.get(group_id)
+        if rate is None:
+            self._entries[group_id] = None
+            return
+        if current is not None and current[0] == rate:
+            return
+        self._seq += 1
+        self._entries[group_id] = (rate, self._seq)
+        heapq.heappush(self._heap, (rate, self._seq, group_id))
+        if len(self._heap) > 2 * len(self._entries) + _COMPACT_SLACK:
+            self._compact()
+
+    def discard(self, group_id: int) -> None:
+        self._entries.pop(group_id, None)
+
+    def rebuild(self, message_dict: Mapping[int, Sequence[Any]]) -> None:
+        self._entries.clear()
+        self._heap.clear()
+        for group_id, msgs in message_dict.items():
+            rate = message_rate(msgs, self.min_messages)
+            if rate is None:
+                self._entries[group_id] = None
+                continue
+            self._seq += 1
+            self._entries[group_id] = (rate, self._seq)
+            self._heap.append((rate, self._seq, group_id))
+        heapq.heapify(self._heap)
+        self._source_id = id(message_dict)
+
+    def ensure_synced(self, message_dict: Mapping[int, Sequence[Any]]) -> None:
+        """窗口字典被整体替换或群数对不上（绕过 touch 增删了群）时全量重建。"""
+        if id(message_dict) != self._source_id or len(self._entries) != len(message_dict):
+            self.rebuild(message_dict)
+
+    def _compact(self) -> None:
+        # 原地替换：ascending 出堆途中也可能触发压缩
+        self._heap[:] = [
+            (entry[0], entry[1], group_id) for group_id, entry in self._entries.items() if entry is not None
+        ]
+        heapq.heapify(self._heap)
+
+    def ascending(
+        self,
+        message_dict: Mapping[int, Sequence[Any]],
+        *,
+        limit: int,
+        accept: Callable[[int, Sequence[Any]], bool],
+    ) -> list[tuple[int, Sequence[Any]]]:
+        """按速率升序返回至多 limit 个 accept 通过的群；调用方须持有窗口锁。"""
+        self.ensure_synced(message_dict)
+        picked: list[tuple[int, Sequence[Any]]] = []
+        seen: list[tuple[float, int, int]] = []
+        heap = self._heap
+        while heap and len(picked) < limit:
+            item = heapq.heappop(heap)
+            rate, seq, group_id = item
+            entry = self._entries.get(group_id)
+            if entry is None or entry[1] != seq:
+                continue
+            msgs = message_dict.get(group_id)
+            if msgs is None:
+                self._entries.pop(group_id, None)
+                continue
+            if message_rate(msgs, self.min_messages) != rate:
+                self._entries.pop(group_id, None)
+                self.touch(group_id, msgs)
+                continue
+            seen.append(item)
+            if accept(group_id, msgs):
+                picked.append((group_id, msgs))
+        for item in seen:
+            heapq.heappush(heap, item)
+        return picked
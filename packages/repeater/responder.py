@@ -3,9 +3,9 @@ import hashlib
 import random
 import time
 from collections import defaultdict
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Sequence
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from nonebot import get_bots, logger
 from nonebot.adapters.onebot.v11 import Message
@@ -13,8 +13,8 @@ from nonebot.adapters.onebot.v11 import Message
 from pallas.core.foundation.config import BotConfig
 from pallas.core.foundation.db import Answer
 from pallas.core.foundation.db.context_repo_access import context_repo
-from pallas.core.foundation.db.pool_budget import is_pg_pool_timeout_error, pg_pool_under_pressure
-from pallas.core.platform.ingress.hotpath_metrics import record_bundle_stages
+from pallas.core.foundation.db.pool_budget import is_pg_pool_timeout_error, reply_pool_under_pressure
+from pallas.core.platform.ingress.hotpath_metrics import record_bundle_precompute_lookup, record_bundle_stages
 from pallas.core.platform.shard import context as shard_ctx
 from pallas.core.platform.shard.repeater_ingress_metrics import record_repeater_reply_selection
 from pallas.product.llm.kernel.memory_governance import can_apply_feedback_bias
@@ -23,10 +23,13 @@ from pallas.product.persona.group_expression_profile import GroupReplyShapeHint
 from pallas.product.persona.model import ResolvedPersona
 from pallas.product.persona.scorer import freshness_multiplier, message_weight_multiplier
 
+from .answer_columns import CandidateFilter, answer_columns_for
 from .ban_manager import BanManager
+from .bundle_precompute import bundle_precompute_top_k, lookup_precomputed_candidates, note_reply_trigger
 from .config import get_repeater_config
+from .message_window import last_matching
 from .opportunity_trace import append_repeater_opportunity_trace
-from .topic_utils import filtered_recent_topics
+from .topic_utils import filtered_recent_topics, recent_topic_counts
 
 if TYPE_CHECKING:
     from .model import ChatData
@@ -126,10 +129,9 @@ class Responder:
     def _group_activity_score(group_msgs: list) -> float:
         if not group_msgs:
             return 0.0
-        human_msgs = Responder._human_messages_for_repeat(group_msgs)
-        if not human_msgs:
+        recent = Responder._human_messages_for_repeat(group_msgs, 12)
+        if not recent:
             return 0.0
-        recent = human_msgs[-12:]
         unique_users = {int(uid) for msg in recent if (uid := getattr(msg, "user_id", None)) is not None}
         activity = min(len(recent), 12) / 12.0
         diversity = min(len(unique_users), 5) / 5.0
@@ -333,9 +335,12 @@ class Responder:
         return random.choice(fresh), "default"
 
     @staticmethod
-    def _human_messages_for_repeat(group_msgs: list) -> list:
+    def _human_messages_for_repeat(group_msgs: Sequence[Any], limit: int) -> list:
+        """窗口末尾至多 limit 条非 bot 消息，倒序扫描不复制整个窗口。"""
         ignore = Responder._repeat_ignore_user_ids()
-        return [m for m in group_msgs if (uid := getattr(m, "user_id", None)) is None or uid not in ignore]
+        return last_matching(
+            group_msgs, limit, lambda m: (uid := getattr(m, "user_id", None)) is None or uid not in ignore
+        )
 
     @staticmethod
     def evaluate_llm_candidate_text(
@@ -567,9 +572,9 @@ class Responder:
         # 复读！
         rt = Responder.REPEAT_THRESHOLD
         if rt >= 2 and group_id in message_dict:
-            human_msgs = Responder._human_messages_for_repeat(group_msgs)
             tail = rt - 1
-            if len(human_msgs) >= tail and all(item.raw_message == raw_message for item in human_msgs[-tail:]):
+            human_msgs = Responder._human_messages_for_repeat(group_msgs, tail)
+            if len(human_msgs) >= tail and all(item.raw_message == raw_message for item in human_msgs):
                 # 到这里说明当前群里是在复读
                 group_bot_replies = reply_dict[group_id][bot_id]
                 if len(group_bot_replies) and group_bot_replies[-1]["reply"] != raw_message:
@@ -605,37 +610,47 @@ class Responder:
             )
             return None
 
-        if pg_pool_under_pressure(threshold=0.55):
-            logger.debug(
-                "repeater.skip_reply_context pg_pool_pressure group_id={} bot_id={} kw_len={}",
-                group_id,
-                bot_id,
-                len(keywords),
-            )
-            return None
+        precomputed = None
+        if bundle_precompute_top_k() > 0:
+            note_reply_trigger(group_id, keywords)
+            precomputed = lookup_precomputed_candidates(group_id, keywords)
+            record_bundle_precompute_lookup(hit=precomputed is not None)
 
-        find_reply = getattr(context_repo, "find_by_keywords_for_reply", None)
-        t_db = time.perf_counter()
-        try:
-            if callable(find_reply):
-                context = await find_reply(keywords)
-            else:
-                context = await context_repo.find_by_keywords(keywords)
-        except Exception as exc:
-            if is_pg_pool_timeout_error(exc):
+        db_find_ms = None
+        if precomputed is not None:
+            context = precomputed.context
+        else:
+            if reply_pool_under_pressure(threshold=0.55):
                 logger.debug(
-                    "repeater.skip_reply_context db_timeout group_id={} bot_id={} kw_len={}",
+                    "repeater.skip_reply_context pg_pool_pressure group_id={} bot_id={} kw_len={}",
                     group_id,
                     bot_id,
                     len(keywords),
                 )
                 return None
-            raise
-        db_find_ms = (time.perf_counter() - t_db) * 1000.0
 
-        if not context:
-            record_bundle_stages(outcome="db_miss", db_find_ms=db_find_ms)
-            return None
+            find_reply = getattr(context_repo, "find_by_keywords_for_reply", None)
+            t_db = time.perf_counter()
+            try:
+                if callable(find_reply):
+                    context = await find_reply(keywords)
+                else:
+                    context = await context_repo.find_by_keywords(keywords)
+            except Exception as exc:
+                if is_pg_pool_timeout_error(exc):
+                    logger.debug(
+                        "repeater.skip_reply_context db_timeout group_id={} bot_id={} kw_len={}",
+                        group_id,
+                        bot_id,
+                        len(keywords),
+                    )
+                    return None
+                raise
+            db_find_ms = (time.perf_counter() - t_db) * 1000.0
+
+            if not context:
+                record_bundle_stages(outcome="db_miss", db_find_ms=db_find_ms)
+                return None
 
         from pallas.product.persona import resolve_persona_for_message
         from pallas.product.persona.scorer import scaled_answer_threshold
@@ -687,9 +702,11 @@ class Responder:
         else:
             cross_group_threshold = Responder.CROSS_GROUP_THRESHOLD
 
-        t_ban = time.perf_counter()
-        ban_keywords = await BanManager.find_ban_keywords(context=context, group_id=group_id)
-        ban_ms = (time.perf_counter() - t_ban) * 1000.0
+        ban_ms = None
+        if precomputed is None:
+            t_ban = time.perf_counter()
+            ban_keywords = BanManager.compiled_ban_keywords(context, group_id)
+            ban_ms = (time.perf_counter() - t_ban) * 1000.0
 
         candidate_answers: dict[str, Answer] = {}
         other_group_cache = {}
@@ -728,67 +745,65 @@ class Responder:
 
         t_select = time.perf_counter()
 
-        def candidate_append(dst: dict[str, Answer], answer: Answer):
+        topic_counts = recent_topic_counts(recent_topics[group_id])
+
+        def candidate_append(dst: dict[str, Answer], answer: Answer, terms: tuple[str, ...], *, owned: bool = False):
+            # 快照里的 Answer 由多次取候选共享，合并计数前先拷一份，列缓存才能一直有效
             answer_key = answer.keywords
-            if "[CQ:" not in answer_key:
-                topics = recent_topics[group_id]
-                for key in answer_key.split(" "):
-                    if key in topics:
-                        answer._topical += topics.count(key)
+            topical = sum(topic_counts.get(term, 0) for term in terms) if topic_counts else 0
 
             if answer_key not in dst:
+                if not owned:
+                    answer = answer.model_copy(update={"messages": list(answer.messages)})
+                answer._topical += topical
                 dst[answer_key] = answer
             else:
                 pre_answer = dst[answer_key]
                 pre_answer.count += answer.count
                 pre_answer.messages += answer.messages
 
-        for answer in context.answers:
-            count = answer.count
-            if not is_drunk and count < answer_count_threshold:
-                continue
-
+        if precomputed is not None:
+            # ban 与本句 keywords 已折进预筛
+            columns = precomputed.columns
+            prefilter = precomputed.prefilter
+            excluded_keywords = frozenset(recent_replies)
+        else:
+            columns = answer_columns_for(context)
+            prefilter = None
+            excluded_keywords = frozenset((*ban_keywords, *recent_replies, keywords))
+        candidate_filter = CandidateFilter(
+            group_id=int(group_id),
+            count_threshold=int(answer_count_threshold),
+            cross_group_threshold=int(cross_group_threshold),
+            is_drunk=bool(is_drunk),
+            is_image=bool(chat_data.is_image),
+            to_me=bool(chat_data.to_me),
+            excluded_keywords=excluded_keywords,
+            recent_messages=frozenset(recent_message),
+        )
+        context_answers = context.answers
+        keyword_ids = columns.keyword_ids
+        keyword_terms = columns.keyword_terms
+        # 逐条字符串规则已在列上判完，这里只按原顺序做同群/跨群归并
+        for idx in columns.candidate_indices(candidate_filter, prefilter):
+            answer = context_answers[idx]
             answer_key = answer.keywords
-            if answer_key in ban_keywords or answer_key in recent_replies or answer_key == keywords:
-                continue
-
-            if not answer.messages:
-                continue
-
-            sample_msg = answer.messages[0]
-            if chat_data.is_image and "[CQ:" not in sample_msg:
-                # 图片消息不回复纯文本。图片经常是表情包，后面的纯文本啥都有，很乱
-                continue
-            if sample_msg.startswith("牛牛"):
-                if not chat_data.to_me or len(sample_msg) <= 6:
-                    # 这种一般是学反过来的，比如有人教“牛牛你好”——“你好”
-                    # 然后下次有人发“你好”，突然回个“牛牛你好”，有点莫名其妙的
-                    continue
-            if sample_msg.startswith("[CQ:xml"):
-                continue
-            if "\n" in sample_msg:
-                continue
-            if count < 3 and sample_msg in recent_message:  # 别人刚发的就重复，显得很笨
-                continue
-
+            terms = keyword_terms[keyword_ids[idx]]
             if answer.group_id == group_id:
-                candidate_append(candidate_answers, answer)
-            # 别的群的 at, 忽略
-            elif "[CQ:at,qq=" in sample_msg:
-                continue
-            elif is_drunk and count > answer_count_threshold:
-                candidate_append(candidate_answers, answer)
+                candidate_append(candidate_answers, answer, terms)
+            elif is_drunk and answer.count > answer_count_threshold:
+                candidate_append(candidate_answers, answer, terms)
             else:  # 有这么 N 个群都有相同的回复，就作为全局回复
                 answers_count[answer_key] += 1
                 cur_count = answers_count[answer_key]
                 if cur_count < cross_group_threshold:  # 没达到阈值前，先缓存
-                    candidate_append(other_group_cache, answer)
+                    candidate_append(other_group_cache, answer, terms)
                 elif cur_count == cross_group_threshold:  # 刚达到阈值时，将缓存加入
                     if cur_count > 1:
-                        candidate_append(candidate_answers, other_group_cache[answer_key])
-                    candidate_append(candidate_answers, answer)
+                        candidate_append(candidate_answers, other_group_cache[answer_key], terms, owned=True)
+                    candidate_append(candidate_answers, answer, terms)
                 else:  # 超过阈值后，加入
-                    candidate_append(candidate_answers, answer)
+                    candidate_append(candidate_answers, answer, terms)
 
         if not candidate_answers:
             select_ms = (time.perf_counter() - t_select) * 1000.0
@@ -70,6 +70,7 @@ async def prune_repeater_runtime_caches(*, now: int | None = None, ttl_sec: int
             message_groups_removed += 1
             message_records_removed += len(rows)
             MessageStore._message_dict.pop(group_id, None)
+            MessageStore.note_group_changed(group_id)
 
     reply_groups_removed = 0
     reply_bot_buckets_removed = 0
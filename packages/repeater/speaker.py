@@ -3,7 +3,6 @@ from __future__ import annotations
 import random
 import time
 from collections import defaultdict, deque
-from functools import cmp_to_key
 from typing import TYPE_CHECKING, Any
 
 from nonebot.adapters.onebot.v11 import Message
@@ -21,8 +20,9 @@ from .responder import Responder
 
 if TYPE_CHECKING:
     import asyncio
+    from collections.abc import Sequence
 
-    from pallas.core.foundation.db import Message as MessageModel
+    from .message_window import WindowMessage
 
 
 class Speaker:
@@ -35,6 +35,8 @@ class Speaker:
     SPEAK_CONTINUOUSLY_MAX_LEN = Chat.SPEAK_CONTINUOUSLY_MAX_LEN
     DUPLICATE_REPLY = Chat.DUPLICATE_REPLY
     REPLY_FLAG = Chat.REPLY_FLAG
+    # 每轮从热度索引取多少个候选群；整批都发不出去再取下一批
+    SPEAK_SCAN_BATCH = 64
 
     _recent_speak = defaultdict(lambda: deque(maxlen=Chat.DUPLICATE_REPLY))
 
@@ -83,35 +85,46 @@ class Speaker:
         """
         根据群聊活跃度判断是否主动发言，返回 (bot_id, group_id, 消息列表, 戳一戳目标) 或 None
         """
-        basic_msgs_len = 10
+        basic_msgs_len = MessageStore.POPULARITY_MIN_MESSAGES
         basic_delay = 600
 
-        def group_popularity_cmp(lhs: tuple[int, list[MessageModel]], rhs: tuple[int, list[MessageModel]]) -> int:
-            def cmp(a: int | float, b: int | float) -> int:
-                return (a > b) - (a < b)
-
-            _, lhs_msgs = lhs
-            _, rhs_msgs = rhs
-
-            lhs_len = len(lhs_msgs)
-            rhs_len = len(rhs_msgs)
-
-            if lhs_len < basic_msgs_len or rhs_len < basic_msgs_len:
-                return cmp(lhs_len, rhs_len)
-
-            lhs_duration = lhs_msgs[-1].time - lhs_msgs[0].time
-            rhs_duration = rhs_msgs[-1].time - rhs_msgs[0].time
-
-            if not lhs_duration or not rhs_duration:
-                return cmp(lhs_len, rhs_len)
-
-            return cmp(lhs_len / lhs_duration, rhs_len / rhs_duration)
-
-        async with MessageStore._message_lock:
-            message_items = list(MessageStore._message_dict.items())
-        popularity = sorted(message_items, key=cmp_to_key(group_popularity_cmp))
-
         cur_time = time.time()
+        tried: set[int] = set()
+
+        def eligible(group_id: int, group_msgs: Sequence[WindowMessage]) -> bool:
+            # 发言阈值项非负，距最后一条不足 basic_delay 的群后面必然跳过，提前在锁内筛掉
+            return group_id not in tried and cur_time - group_msgs[-1].time >= basic_delay
+
+        while True:
+            popularity = await MessageStore.popular_groups(limit=Speaker.SPEAK_SCAN_BATCH, accept=eligible)
+            if not popularity:
+                return None
+            tried.update(group_id for group_id, _ in popularity)
+            spoken = await Speaker._speak_in_groups(
+                popularity,
+                cur_time=cur_time,
+                basic_msgs_len=basic_msgs_len,
+                basic_delay=basic_delay,
+                reply_dict=reply_dict,
+                reply_lock=reply_lock,
+                recent_topics=recent_topics,
+                topics_lock=topics_lock,
+            )
+            if spoken is not None:
+                return spoken
+
+    @staticmethod
+    async def _speak_in_groups(
+        popularity: list[tuple[int, Sequence[WindowMessage]]],
+        *,
+        cur_time: float,
+        basic_msgs_len: int,
+        basic_delay: int,
+        reply_dict: defaultdict,
+        reply_lock: asyncio.Lock,
+        recent_topics,
+        topics_lock: asyncio.Lock,
+    ) -> tuple[int, int, list[Message], int | None] | None:
         for group_id, group_msgs in popularity:
             if blocks_proactive_speak(group_id):
                 continue
@@ -178,7 +191,7 @@ class Speaker:
 
             recently = Speaker._recent_speak[group_id]
 
-            def msg_filter(msg: MessageModel) -> bool:
+            def msg_filter(msg: WindowMessage) -> bool:
                 cur_raw_message = msg.raw_message
                 cur_keywords = msg.keywords
                 return (
@@ -1,2 +1,75 @@
+from __future__ import annotations
+
+from collections import Counter, deque
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Mapping
+
+
 def filtered_recent_topics(keywords_list: list[str]) -> list[str]:
     return [k for k in keywords_list if not k.startswith("牛牛")]
+
+
+class TopicWindow:
+    """
+    每群近期话题词：定长 deque 保留顺序，Counter 计数随追加与挤出同步增减。
+    取候选时按词查次数是一次字典查找，不再每次把整个窗口数一遍。
+    """
+
+    __slots__ = ("_items", "counts")
+
+    def __init__(self, maxlen: int, topics: Iterable[str] = ()) -> None:
+        self._items: deque[str] = deque(maxlen=maxlen)
+        self.counts: Counter[str] = Counter()
+        self.extend(topics)
+
+    @property
+    def maxlen(self) -> int | None:
+        return self._items.maxlen
+
+    def append(self, topic: str) -> None:
+        items = self._items
+        counts = self.counts
+        if items.maxlen is not None and len(items) >= items.maxlen:
+            if not items.maxlen:
+                return
+            evicted = items[0]
+            left = counts[evicted] - 1
+            if left:
+                counts[evicted] = left
+            else:
+                del counts[evicted]
+        items.append(topic)
+        counts[topic] += 1
+
+    def extend(self, topics: Iterable[str]) -> None:
+        for topic in topics:
+            self.append(topic)
+
+    def __iadd__(self, topics: Iterable[str]) -> TopicWindow:
+        self.extend(topics)
+        return self
+
+    def count(self, topic: str) -> int:
+        return self.counts.get(topic, 0)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.counts.clear()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return f"TopicWindow({list(self._items)!r}, maxlen={self._items.maxlen})"
+
+
+def recent_topic_counts(topics: Iterable[str]) -> Mapping[str, int]:
+    """TopicWindow 直接给出随窗口维护的计数；其它可迭代对象（旧 deque、协调层快照）现数一遍。"""
+    if isinstance(topics, TopicWindow):
+        return topics.counts
+    return Counter(topics)
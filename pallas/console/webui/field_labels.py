@@ -135,6 +135,8 @@ FIELD_LABELS: dict[str, str] = {
     "inbound_filter_substrings": "关键词拦截",
     "ingress_bypass_unified": "单进程运行时跳过消息预筛",
     "instance_secret": "加入协同的密钥",
+    "keyword_cache_slots": "分词共享缓存条数",
+    "learn_batch_size": "学习合并写入条数",
     "learn_concurrency": "后台学习并发数",
     "learn_queue_max_size": "学习队列容量",
     "maa_attach_screenshot": "指令后自动截图",
@@ -27,6 +27,7 @@ from .modules import (
     StickerLabel,
     UserConfigModule,
 )
+from .records import AnswerRecord, BanRecord, ContextRecord, MessageRecord, as_document
 from .repository import (
     AclRepository,
     AdminRepository,
@@ -401,7 +402,9 @@ async def init_postgresql_db() -> None:
     from sqlalchemy import text
     from sqlalchemy.ext.asyncio import create_async_engine
 
+    from .hot_queries import install_hot_query_hooks, prepared_statement_cache_size
     from .repository_pg import init_pg, is_pg_initialized, try_enable_pg_stat_statements
+    from .runtime import install_reply_read_engine, reply_read_pool_settings
 
     if is_pg_initialized():
         return
@@ -445,7 +448,10 @@ async def init_postgresql_db() -> None:
         max_overflow=max_overflow,
         pool_recycle=pool_recycle,
         pool_pre_ping=True,
-        connect_args={"server_settings": pg_session_server_settings()},
+        connect_args={
+            "server_settings": pg_session_server_settings(),
+            "prepared_statement_cache_size": prepared_statement_cache_size(),
+        },
     )
     try:
         await init_pg(engine)
@@ -469,6 +475,34 @@ async def init_postgresql_db() -> None:
         raise
     if _cfg_bool("PG_STAT_STATEMENTS_ENABLED"):
         await try_enable_pg_stat_statements(engine)
+    reply_pool = reply_read_pool_settings()
+    if reply_pool is not None:
+        reply_host = reply_pool["host"] or host
+        reply_port = reply_pool["port"] or port
+        # 引擎惰性建连：副本此刻不可达也不阻塞启动，首次取连接失败即回落主池
+        reply_engine = create_async_engine(
+            f"postgresql+asyncpg://{auth}{reply_host}:{reply_port}/{db_name}",
+            pool_size=reply_pool["pool_size"],
+            max_overflow=reply_pool["max_overflow"],
+            pool_recycle=pool_recycle,
+            pool_pre_ping=True,
+            connect_args={
+                "server_settings": {**pg_session_server_settings(), "default_transaction_read_only": "on"},
+                "prepared_statement_cache_size": prepared_statement_cache_size(),
+            },
+        )
+        install_hot_query_hooks(reply_engine)
+        install_reply_read_engine(
+            reply_engine,
+            target=f"{reply_host}:{reply_port}",
+            capacity=reply_pool["pool_size"] + reply_pool["max_overflow"],
+        )
+        logger.info(
+            "[DB] 接话只读池已就绪：地址 [{}:{}] | 连接池 [{}]",
+            reply_host,
+            reply_port,
+            f"{reply_pool['pool_size']}+{reply_pool['max_overflow']}",
+        )
     logger.info(
         "[DB] PostgreSQL [{}] 已连接：地址 [{}:{}] | 连接池 [{}] | 回收周期 [{}s]",
         db_name,
@@ -494,6 +528,14 @@ async def init_postgresql_db() -> None:
     except Exception:
         pass
 
+    try:
+        from .config_invalidation import start_config_invalidation_listener
+
+        transport = await start_config_invalidation_listener(engine)
+        logger.info("[DB] 配置缓存失效通道：{}", transport)
+    except Exception as exc:
+        logger.warning("[DB] 配置缓存失效监听启动失败，退回 TTL: {}", exc)
+
     try:
         from .image_cache_migration import ensure_image_cache_blob_migration_started
 
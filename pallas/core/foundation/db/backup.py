@@ -13,7 +13,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Literal
 
-from pallas.core.foundation.db import _cfg, get_db_backend
+from pallas.core.foundation.db import _cfg, _cfg_int, get_db_backend
 from pallas.core.foundation.paths import PROJECT_ROOT
 
 MongoScope = Literal["full", "important"]
@@ -580,6 +580,10 @@ def run_postgres_restore(*, run_dir: Path) -> BackupResult:
         if not tool_on_path("pg_restore"):
             raise RuntimeError(missing_tool_message("pg_restore"))
         cmd = ["pg_restore", *_postgres_base_cmd(), "--clean", "--if-exists", "--no-owner", "--no-privileges"]
+        # 数据段本身就是 COPY 流；PG_RESTORE_JOBS>1 时按表并行跑多路 COPY（仅 custom / directory 格式）
+        jobs = _cfg_int("PG_RESTORE_JOBS", 1)
+        if jobs > 1:
+            cmd.extend(["-j", str(min(jobs, 16))])
         if artifact.is_dir():
             cmd.extend(["-Fd", str(artifact)])
         else:
@@ -0,0 +1,184 @@
+"""配置缓存跨进程失效：写入方广播 (表, 主键)，其它进程收到后只丢本地那一条缓存。
+
+``PG_CONFIG_INVALIDATION``：``auto``（默认）分片且 coord Redis 可用时走 Redis 频道，否则走 PG
+LISTEN/NOTIFY；也可强制 ``pg`` / ``redis``，``off`` 退回纯 TTL。PG 通道的 NOTIFY 与写入同一事务，
+提交后才送达；监听用独立 asyncpg 连接，不占连接池。Redis 通道在提交后发布。
+
+监听在线时配置缓存 TTL 取 ``PG_CONFIG_CACHE_PUSHED_TTL``（默认 600s），掉线期间回落
+``PG_CONFIG_CACHE_TTL``；每次（重新）接上都整表清空，补上断线期间漏掉的通知。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import uuid
+from typing import TYPE_CHECKING, Any
+
+from nonebot import logger
+
+from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+CONFIG_NOTIFY_CHANNEL = "pallas_config_invalidate"
+CONFIG_REDIS_CHANNEL = "pallas:config_invalidate"
+_TRANSPORTS = frozenset({"pg", "redis", "off"})
+_PING_INTERVAL_SEC = 30.0
+_RETRY_SEC = 5.0
+
+# 自己发出的通知不再处理：本进程写入时已就地失效
+_ORIGIN = uuid.uuid4().hex[:12]
+_listener_task: asyncio.Task | None = None
+_listening = False
+_stats = {"sent": 0, "received": 0, "applied": 0, "connects": 0}
+
+
+def config_invalidation_transport() -> str:
+    raw = str(repo_env_raw_value("PG_CONFIG_INVALIDATION") or "auto").strip().lower()
+    if raw in _TRANSPORTS:
+        return raw
+    try:
+        from pallas.core.platform.coord.redis_settings import coord_redis_enabled
+        from pallas.core.platform.shard import context as shard_ctx
+
+        if shard_ctx.sharding_active() and coord_redis_enabled():
+            return "redis"
+    except Exception:
+        pass
+    return "pg"
+
+
+def config_push_active() -> bool:
+    """当前进程是否在线收着失效通知；决定配置缓存能否放长 TTL。"""
+    return _listening
+
+
+def _set_listening(active: bool) -> None:
+    global _listening
+    if active:
+        _stats["connects"] += 1
+        _clear_all_config_caches()
+    _listening = active
+
+
+def _clear_all_config_caches() -> None:
+    from pallas.core.foundation.db.repository_pg import invalidate_config_cache
+
+    invalidate_config_cache(None)
+
+
+def config_invalidation_payload(table: str, key: Any) -> str:
+    return json.dumps({"o": _ORIGIN, "t": table, "k": key}, separators=(",", ":"))
+
+
+def apply_config_invalidation(raw: str | bytes) -> bool:
+    """处理一条通知；自己发的、格式不对的忽略。"""
+    from pallas.core.foundation.db.repository_pg import invalidate_config_cache
+
+    _stats["received"] += 1
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return False
+    if not isinstance(data, dict) or data.get("o") == _ORIGIN:
+        return False
+    table = data.get("t")
+    if not isinstance(table, str):
+        return False
+    invalidate_config_cache(table, data.get("k"))
+    _stats["applied"] += 1
+    return True
+
+
+async def note_config_write(session: AsyncSession, table: str, key: Any) -> None:
+    """写事务提交前调用：PG 通道把 NOTIFY 挂进同一事务，回滚则不发。"""
+    if config_invalidation_transport() != "pg":
+        return
+    from sqlalchemy import func, select
+
+    await session.execute(select(func.pg_notify(CONFIG_NOTIFY_CHANNEL, config_invalidation_payload(table, key))))
+    _stats["sent"] += 1
+
+
+def announce_config_write(table: str, key: Any) -> None:
+    """提交后调用：Redis 通道广播；先提交再发，收方回源才不会读到旧行。"""
+    if config_invalidation_transport() != "redis":
+        return
+    from pallas.core.platform.shard.coord.config_invalidation import schedule_publish_config_invalidation
+
+    schedule_publish_config_invalidation(config_invalidation_payload(table, key))
+    _stats["sent"] += 1
+
+
+def _on_pg_notify(_conn: Any, _pid: int, _channel: str, payload: str) -> None:
+    apply_config_invalidation(payload)
+
+
+def _asyncpg_connect_kwargs(engine: AsyncEngine) -> dict[str, Any]:
+    import inspect
+
+    import asyncpg
+
+    _args, params = engine.dialect.create_connect_args(engine.url)
+    accepted = inspect.signature(asyncpg.connect).parameters
+    return {k: v for k, v in params.items() if k in accepted}
+
+
+async def _pg_listen_loop(engine: AsyncEngine) -> None:
+    import asyncpg
+
+    params = _asyncpg_connect_kwargs(engine)
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(**params)
+            await conn.add_listener(CONFIG_NOTIFY_CHANNEL, _on_pg_notify)
+            _set_listening(True)
+            while not conn.is_closed():
+                await asyncio.sleep(_PING_INTERVAL_SEC)
+                # 空闲连接被中间设备掐断时 asyncpg 不一定察觉，定期探一下
+                await conn.execute("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.debug("Config invalidation listener lost its connection: {}", exc)
+        finally:
+            _set_listening(False)
+            if conn is not None:
+                with contextlib.suppress(Exception):
+                    await conn.close(timeout=2)
+        await asyncio.sleep(_RETRY_SEC)
+
+
+async def start_config_invalidation_listener(engine: AsyncEngine) -> str:
+    """按传输方式起监听任务，返回实际使用的传输；已在跑则不重复起。"""
+    global _listener_task
+    transport = config_invalidation_transport()
+    if transport == "off" or (_listener_task is not None and not _listener_task.done()):
+        return transport
+    if transport == "redis":
+        from pallas.core.platform.shard.coord.config_invalidation import config_invalidation_redis_listen_loop
+
+        _listener_task = asyncio.create_task(
+            config_invalidation_redis_listen_loop(on_connect=_set_listening, on_message=apply_config_invalidation)
+        )
+    else:
+        _listener_task = asyncio.create_task(_pg_listen_loop(engine))
+    return transport
+
+
+async def stop_config_invalidation_listener() -> None:
+    global _listener_task
+    task, _listener_task = _listener_task, None
+    if task is not None and not task.done():
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await task
+    _set_listening(False)
+
+
+def config_invalidation_stats() -> dict[str, Any]:
+    return {"transport": config_invalidation_transport(), "listening": _listening, **_stats}
@@ -0,0 +1,511 @@
+"""语料三表可选哈希分区：影子表建表、在线拷贝、切换与分区级维护。
+
+``PG_CONTEXT_PARTITIONS=N``（默认 0 关闭）：context 按 keywords_hash、context_answer 按 context_id、
+context_answer_message 按 answer_id 哈希分 N 片。分区表的主键 / 唯一约束须带分区键，
+跨表外键改成行级 AFTER DELETE 触发器级联（PG 的外键级联本身也是行触发器，开销同级）。
+
+新库（三表为空）由启动期 ensure 直接建成分区表；已有数据走 migrate_jobs 的在线迁移：
+建影子表 ``<表>__part`` 并在旧表挂同步触发器 → 按主键 keyset 分批拷贝（断点进 maintenance_cursor）
+→ 同一快照比对行数 → 短事务改名切换，旧表留作 ``<表>__legacy``。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from typing import TYPE_CHECKING, Any
+
+from nonebot import logger
+from sqlalchemy import text
+
+from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# (表, 分区键)；顺序即拷贝与切换顺序
+PARTITIONED_TABLES: tuple[tuple[str, str], ...] = (
+    ("context", "keywords_hash"),
+    ("context_answer", "context_id"),
+    ("context_answer_message", "answer_id"),
+)
+_SHADOW = "__part"
+_LEGACY = "__legacy"
+_MAX_PARTITIONS = 256
+_PG_IDENT_MAX = 63
+_SYNC_TRIGGER = "pallas_part_sync"
+_CASCADE_TRIGGER = "pallas_part_cascade"
+_COPY_CURSOR_PREFIX = "context_partition_copy:"
+
+# 当前库已生效的分片数；0 为单表。启动 ensure 与切换后更新，其他进程切换后由 refresh_context_partition_layout 跟上。
+_layout = 0
+
+
+def context_partition_target() -> int:
+    raw = repo_env_raw_value("PG_CONTEXT_PARTITIONS")
+    if raw is not None:
+        try:
+            value = int(str(raw).strip())
+        except ValueError:
+            return 0
+        return 0 if value < 2 else min(_MAX_PARTITIONS, value)
+    return 0
+
+
+def context_partition_count() -> int:
+    return _layout
+
+
+def note_context_partition_layout(count: int) -> None:
+    global _layout
+    _layout = max(0, int(count))
+
+
+def is_stale_context_partition_layout_error(exc: BaseException) -> bool:
+    """
+    本进程仍按单表布局发 ``RETURNING (xmax = 0)``，而别的进程已在线切换成分区表时 PG 的报错
+    （feature_not_supported：cannot retrieve a system column in this context）。
+    """
+    orig = getattr(exc, "orig", exc)
+    if getattr(orig, "sqlstate", None) not in (None, "0A000"):
+        return False
+    return "cannot retrieve a system column" in str(orig)
+
+
+async def refresh_context_partition_layout() -> int:
+    """从目录重读分区布局并更新本进程记录；布局只在启动与切换时由本进程写入，其余 worker 靠它跟上。"""
+    from pallas.core.foundation.db.repository_pg import pg_engine
+
+    engine = pg_engine()
+    if engine is None:
+        return _layout
+    async with engine.connect() as conn:
+        count = await conn.run_sync(detect_context_partitions)
+    if count != _layout:
+        logger.info("Context partition layout changed from [{}] to [{}] partitions.", _layout, count)
+    note_context_partition_layout(count)
+    return count
+
+
+def context_partition_names(table: str, count: int | None = None) -> list[str]:
+    n = _layout if count is None else count
+    return [f"{table}_p{i}" for i in range(n)]
+
+
+def _suffixed(name: str, suffix: str) -> str:
+    return name[: _PG_IDENT_MAX - len(suffix)] + suffix
+
+
+def _relkind(connection, name: str) -> str | None:
+    return connection.execute(
+        text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:name)"), {"name": name}
+    ).scalar_one_or_none()
+
+
+def _partitions_of(connection, name: str) -> int:
+    return int(
+        connection.execute(
+            text("SELECT count(*) FROM pg_inherits WHERE inhparent = to_regclass(:name)"), {"name": name}
+        ).scalar_one()
+    )
+
+
+def detect_context_partitions(connection) -> int:
+    """已分区返回分片数，单表返回 0。"""
+    if _relkind(connection, "context_answer") != "p":
+        return 0
+    return _partitions_of(connection, "context_answer")
+
+
+def _key_constraints(connection, table: str) -> list[tuple[str, str, list[str]]]:
+    """主键 / 唯一约束：(约束名, 'p'|'u', 列)。"""
+    rows = connection.execute(
+        text(
+            """
+            SELECT c.conname, c.contype,
+                   array_agg(a.attname::text ORDER BY k.ord) AS cols
+            FROM pg_constraint c
+            CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+            WHERE c.conrelid = to_regclass(:name) AND c.contype IN ('p', 'u')
+            GROUP BY c.conname, c.contype
+            ORDER BY c.contype, c.conname
+            """
+        ),
+        {"name": table},
+    ).all()
+    return [(str(r[0]), str(r[1]), list(r[2])) for r in rows]
+
+
+def _plain_indexes(connection, table: str) -> list[tuple[str, str]]:
+    """非唯一且不挂约束的索引：(索引名, 建索引语句)。"""
+    rows = connection.execute(
+        text(
+            """
+            SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            WHERE i.indrelid = to_regclass(:name) AND NOT i.indisunique
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+            ORDER BY 1
+            """
+        ),
+        {"name": table},
+    ).all()
+    return [(str(r[0]).split(".")[-1], str(r[1])) for r in rows]
+
+
+def _all_index_names(connection, table: str) -> list[tuple[str, str | None]]:
+    """表上全部索引：(索引名, 所属约束名或 None)。"""
+    rows = connection.execute(
+        text(
+            """
+            SELECT ci.relname, c.conname
+            FROM pg_index i
+            JOIN pg_class ci ON ci.oid = i.indexrelid
+            LEFT JOIN pg_constraint c ON c.conindid = i.indexrelid AND c.conrelid = i.indrelid
+            WHERE i.indrelid = to_regclass(:name)
+            """
+        ),
+        {"name": table},
+    ).all()
+    return [(str(r[0]), str(r[1]) if r[1] is not None else None) for r in rows]
+
+
+def _rename_indexes(connection, table: str, rename: Callable[[str], str | None]) -> None:
+    for index_name, constraint in _all_index_names(connection, table):
+        target = rename(constraint or index_name)
+        if target is None or target == (constraint or index_name):
+            continue
+        if constraint:
+            # 约束改名会连带改其背后的索引名，ON CONFLICT ON CONSTRAINT 依赖这个名字
+            connection.execute(text(f'ALTER TABLE "{table}" RENAME CONSTRAINT "{constraint}" TO "{target}"'))
+        else:
+            connection.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{target}"'))
+
+
+_INDEXDEF_RE = re.compile(r"^CREATE INDEX (\S+) ON (?:ONLY )?(\S+) ")
+
+
+def create_context_partition_shadow(connection, count: int) -> None:
+    """按旧表列 / 默认值 / 索引建影子分区表；已存在的影子表跳过。"""
+    for table, key in PARTITIONED_TABLES:
+        shadow = table + _SHADOW
+        if _relkind(connection, shadow) is not None:
+            continue
+        connection.execute(
+            text(f'CREATE TABLE "{shadow}" (LIKE "{table}" INCLUDING DEFAULTS) PARTITION BY HASH ("{key}")')
+        )
+        for i, part in enumerate(context_partition_names(table, count)):
+            connection.execute(
+                text(f'CREATE TABLE "{part}" PARTITION OF "{shadow}" FOR VALUES WITH (MODULUS {count}, REMAINDER {i})')
+            )
+        for conname, contype, cols in _key_constraints(connection, table):
+            if key not in cols:
+                cols = [*cols, key]
+            kind = "PRIMARY KEY" if contype == "p" else "UNIQUE"
+            col_sql = ", ".join(f'"{c}"' for c in cols)
+            connection.execute(
+                text(f'ALTER TABLE "{shadow}" ADD CONSTRAINT "{_suffixed(conname, _SHADOW)}" {kind} ({col_sql})')
+            )
+        for index_name, indexdef in _plain_indexes(connection, table):
+            match = _INDEXDEF_RE.match(indexdef)
+            if match is None:
+                logger.warning("Context partition shadow skipped an unparsed index [{}].", index_name)
+                continue
+            rest = indexdef[match.end() :]
+            connection.execute(text(f'CREATE INDEX "{_suffixed(index_name, _SHADOW)}" ON "{shadow}" {rest}'))
+
+
+def install_context_partition_sync(connection) -> None:
+    """旧表挂行级同步触发器：拷贝期间的写入、改动、删除同步落到影子表。"""
+    for table, key in PARTITIONED_TABLES:
+        shadow = table + _SHADOW
+        func = f"pallas_sync_{table}{_SHADOW}"
+        connection.execute(
+            text(
+                f"""
+                CREATE OR REPLACE FUNCTION "{func}"() RETURNS trigger LANGUAGE plpgsql AS $$
+                BEGIN
+                    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                        DELETE FROM "{shadow}" WHERE id = OLD.id AND "{key}" = OLD."{key}";
+                    END IF;
+                    IF TG_OP = 'DELETE' THEN
+                        RETURN OLD;
+                    END IF;
+                    INSERT INTO "{shadow}" SELECT NEW.* ON CONFLICT DO NOTHING;
+                    RETURN NEW;
+                END $$
+                """
+            )
+        )
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {_SYNC_TRIGGER} ON "{table}"'))
+        connection.execute(
+            text(
+                f'CREATE TRIGGER {_SYNC_TRIGGER} AFTER INSERT OR UPDATE OR DELETE ON "{table}" '
+                f'FOR EACH ROW EXECUTE FUNCTION "{func}"()'
+            )
+        )
+
+
+def _drop_context_partition_sync(connection) -> None:
+    for table, _key in PARTITIONED_TABLES:
+        connection.execute(text(f'DROP TRIGGER IF EXISTS {_SYNC_TRIGGER} ON "{table}"'))
+        connection.execute(text(f'DROP FUNCTION IF EXISTS "pallas_sync_{table}{_SHADOW}"()'))
+
+
+def drop_context_partition_shadow(connection) -> None:
+    """放弃一次未完成的迁移：摘同步触发器、删影子表与拷贝断点。"""
+    _drop_context_partition_sync(connection)
+    for table, _key in reversed(PARTITIONED_TABLES):
+        connection.execute(text(f'DROP TABLE IF EXISTS "{table}{_SHADOW}"'))
+    connection.execute(
+        text("DELETE FROM maintenance_cursor WHERE name LIKE :prefix"), {"prefix": _COPY_CURSOR_PREFIX + "%"}
+    )
+
+
+def install_context_partition_cascade(connection) -> None:
+    """分区表之间没有外键：删 context 连带 answer / ban，删 answer 连带 message。"""
+    connection.execute(
+        text(
+            """
+            CREATE OR REPLACE FUNCTION pallas_context_part_cascade() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                DELETE FROM context_answer WHERE context_id = OLD.id;
+                DELETE FROM context_ban WHERE context_id = OLD.id;
+                RETURN OLD;
+            END $$
+            """
+        )
+    )
+    connection.execute(
+        text(
+            """
+            CREATE OR REPLACE FUNCTION pallas_context_answer_part_cascade() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                DELETE FROM context_answer_message WHERE answer_id = OLD.id;
+                RETURN OLD;
+            END $$
+            """
+        )
+    )
+    for table, func in (
+        ("context", "pallas_context_part_cascade"),
+        ("context_answer", "pallas_context_answer_part_cascade"),
+    ):
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {_CASCADE_TRIGGER} ON {table}"))
+        connection.execute(
+            text(f"CREATE TRIGGER {_CASCADE_TRIGGER} AFTER DELETE ON {table} FOR EACH ROW EXECUTE FUNCTION {func}()")
+        )
+
+
+def swap_context_partitions(connection) -> int:
+    """单事务切换：旧表及其索引 / 约束改名为 __legacy，影子表接管正式名。返回分片数。"""
+    names = ", ".join(f'"{table}"' for table, _key in PARTITIONED_TABLES)
+    connection.execute(text(f"LOCK TABLE {names}, context_ban IN ACCESS EXCLUSIVE MODE"))
+    _drop_context_partition_sync(connection)
+    for conname in connection.execute(
+        text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = 'context_ban'::regclass AND contype = 'f' AND confrelid = 'context'::regclass"
+        )
+    ).scalars():
+        connection.execute(text(f'ALTER TABLE context_ban DROP CONSTRAINT "{conname}"'))
+
+    for table, _key in PARTITIONED_TABLES:
+        originals = {constraint or index_name for index_name, constraint in _all_index_names(connection, table)}
+        _rename_indexes(connection, table, lambda name: _suffixed(name, _LEGACY))
+        connection.execute(text(f'ALTER TABLE "{table}" RENAME TO "{table}{_LEGACY}"'))
+        shadow_names = {_suffixed(name, _SHADOW): name for name in originals}
+        _rename_indexes(connection, table + _SHADOW, shadow_names.get)
+        connection.execute(text(f'ALTER TABLE "{table}{_SHADOW}" RENAME TO "{table}"'))
+        seq = connection.execute(
+            text("SELECT pg_get_serial_sequence(:legacy, 'id')"), {"legacy": table + _LEGACY}
+        ).scalar_one_or_none()
+        if seq:
+            connection.execute(text(f'ALTER SEQUENCE {seq} OWNED BY "{table}".id'))
+    install_context_partition_cascade(connection)
+    connection.execute(
+        text("DELETE FROM maintenance_cursor WHERE name LIKE :prefix"), {"prefix": _COPY_CURSOR_PREFIX + "%"}
+    )
+    count = detect_context_partitions(connection)
+    note_context_partition_layout(count)
+    return count
+
+
+def drop_context_partition_legacy(connection) -> None:
+    for table, _key in reversed(PARTITIONED_TABLES):
+        connection.execute(text(f'DROP TABLE IF EXISTS "{table}{_LEGACY}" CASCADE'))
+
+
+def _context_tables_empty(connection) -> bool:
+    for table, _key in PARTITIONED_TABLES:
+        if connection.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{table}")')).scalar_one():
+            return False
+    return True
+
+
+def ensure_context_partitions(connection) -> None:
+    """启动期：记录当前分区布局；开启分区且三表为空时直接建成分区表，有数据则提示走在线迁移。"""
+    if _relkind(connection, "context_answer") is None:
+        return
+    current = detect_context_partitions(connection)
+    note_context_partition_layout(current)
+    target = context_partition_target()
+    if current:
+        install_context_partition_cascade(connection)
+        if target and target != current:
+            logger.warning(
+                "PG_CONTEXT_PARTITIONS is [{}] but the context tables already use [{}] partitions; "
+                "changing the partition count is not supported in place.",
+                target,
+                current,
+            )
+        return
+    if not target:
+        return
+    if not _context_tables_empty(connection):
+        logger.warning(
+            "PG_CONTEXT_PARTITIONS is [{}] but the context tables hold data; "
+            "run the context partition migration job to convert them online.",
+            target,
+        )
+        return
+    drop_context_partition_shadow(connection)
+    create_context_partition_shadow(connection, target)
+    swap_context_partitions(connection)
+    drop_context_partition_legacy(connection)
+    logger.info("Context tables were created with [{}] hash partitions.", target)
+
+
+# ---- 在线拷贝（async，跑在主事件循环，复用主连接池） ----
+
+
+_PRESSURE_WAIT_SEC = 1.0
+
+
+async def _wait_for_headroom() -> None:
+    """池压时让路：每批前等到主池回落到接话压力线以下。"""
+    from pallas.core.foundation.db.pool_budget import pg_pool_under_pressure
+
+    for _ in range(3600):
+        if not pg_pool_under_pressure(threshold=0.55):
+            return
+        await asyncio.sleep(_PRESSURE_WAIT_SEC)
+
+
+async def prepare_context_partition_migration(count: int, *, restart: bool = False) -> dict[str, Any]:
+    """建影子表并挂同步触发器；restart 先丢弃上一次的影子表与断点。"""
+    from pallas.core.foundation.db.repository_pg import pg_engine
+
+    engine = pg_engine()
+    if engine is None:
+        raise RuntimeError("PostgreSQL 尚未初始化")
+
+    def _prepare(connection) -> dict[str, Any]:
+        if detect_context_partitions(connection):
+            raise ValueError("语料表已是分区表")
+        if restart:
+            drop_context_partition_shadow(connection)
+        create_context_partition_shadow(connection, count)
+        install_context_partition_sync(connection)
+        return {table: _partitions_of(connection, table + _SHADOW) for table, _key in PARTITIONED_TABLES}
+
+    async with engine.begin() as conn:
+        return await conn.run_sync(_prepare)
+
+
+async def copy_context_partition_table(
+    table: str,
+    *,
+    batch_size: int,
+    on_batch: Callable[[int, int], None] | None = None,
+) -> int:
+    """按主键 keyset 把旧表拷进影子表；FOR SHARE 锁住本批行，并发改删等本批提交后经同步触发器落地。"""
+    from pallas.core.foundation.db.repository_pg import get_session
+
+    cursor_name = _COPY_CURSOR_PREFIX + table
+    async with get_session(read_only=True) as session:
+        last_id = int(
+            (
+                await session.execute(
+                    text("SELECT last_id FROM maintenance_cursor WHERE name = :name"), {"name": cursor_name}
+                )
+            ).scalar_one_or_none()
+            or 0
+        )
+    copied = 0
+    while True:
+        await _wait_for_headroom()
+        async with get_session() as session:
+            row = (
+                await session.execute(
+                    text(
+                        f"""
+                        WITH batch AS (
+                            SELECT * FROM "{table}" WHERE id > :after ORDER BY id LIMIT :limit FOR SHARE
+                        ), moved AS (
+                            INSERT INTO "{table}{_SHADOW}" SELECT * FROM batch ON CONFLICT DO NOTHING
+                        )
+                        SELECT count(*), max(id) FROM batch
+                        """
+                    ),
+                    {"after": last_id, "limit": int(batch_size)},
+                )
+            ).one()
+            rows, max_id = int(row[0]), row[1]
+            if rows:
+                last_id = int(max_id)
+                now = int(time.time())
+                await session.execute(
+                    text(
+                        """
+                        INSERT INTO maintenance_cursor (name, last_id, pass_started_at, processed, deleted, updated_at)
+                        VALUES (:name, :last_id, :now, :rows, 0, :now)
+                        ON CONFLICT (name) DO UPDATE SET last_id = EXCLUDED.last_id,
+                            processed = maintenance_cursor.processed + EXCLUDED.processed,
+                            updated_at = EXCLUDED.updated_at
+                        """
+                    ),
+                    {"name": cursor_name, "last_id": last_id, "now": now, "rows": rows},
+                )
+            await session.commit()
+        copied += rows
+        if on_batch is not None and rows:
+            on_batch(copied, last_id)
+        if rows < batch_size:
+            return copied
+        await asyncio.sleep(0)
+
+
+async def verify_context_partition_counts() -> dict[str, Any]:
+    """同一 REPEATABLE READ 快照里比对新旧行数；同步触发器与业务写同事务，一致快照下应完全相等。"""
+    from pallas.core.foundation.db.repository_pg import pg_engine
+
+    engine = pg_engine()
+    if engine is None:
+        raise RuntimeError("PostgreSQL 尚未初始化")
+    tables: dict[str, dict[str, int]] = {}
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="REPEATABLE READ")
+        async with conn.begin():
+            for table, _key in PARTITIONED_TABLES:
+                source = int((await conn.execute(text(f'SELECT count(*) FROM "{table}"'))).scalar_one())
+                shadow = int((await conn.execute(text(f'SELECT count(*) FROM "{table}{_SHADOW}"'))).scalar_one())
+                tables[table] = {"source": source, "shadow": shadow}
+    return {"ok": all(v["source"] == v["shadow"] for v in tables.values()), "tables": tables}
+
+
+async def finish_context_partition_migration(*, drop_legacy: bool = False) -> int:
+    from pallas.core.foundation.db.repository_pg import clear_reply_query_snapshot_cache, pg_engine
+
+    engine = pg_engine()
+    if engine is None:
+        raise RuntimeError("PostgreSQL 尚未初始化")
+    async with engine.begin() as conn:
+        count = await conn.run_sync(swap_context_partitions)
+    if drop_legacy:
+        async with engine.begin() as conn:
+            await conn.run_sync(drop_context_partition_legacy)
+    await clear_reply_query_snapshot_cache(None)
+    return count
@@ -0,0 +1,118 @@
+"""热路径查询：语句只构造一次、参数全走绑定，按名统计编译与执行耗时。
+
+接话快照、学习 upsert、近期消息、任务认领这类每条消息都要跑的查询，若每次现拼 Core 语句，
+光是构造与算缓存键就要一截 CPU；IN 列表长度不同还会生成不同 SQL 文本，把 asyncpg
+每连接的预编译语句缓存冲掉。热查询改为模块级一次构造（变体按 ``functools.cache`` 分开），
+列表参数用 ``= ANY(:array)``，SQL 文本固定，SQLAlchemy 编译缓存与预编译语句都能命中。
+
+``hot_query(stmt, name)`` 打标；引擎装上 ``install_hot_query_hooks`` 后按名累计调用数、
+编译缓存未命中数与编译耗时、执行耗时（含驱动往返），由 pg_activity_diagnostics 输出。
+``PG_PREPARED_STATEMENT_CACHE_SIZE``（默认 256）：每条连接缓存的预编译语句条数。
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_MISS
+
+from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+if TYPE_CHECKING:
+    from sqlalchemy.sql.base import Executable
+
+HOT_QUERY_OPTION = "pallas_hot_query"
+_T0_ATTR = "_pallas_hot_t0"
+
+
+@dataclass(slots=True)
+class _HotQueryStat:
+    calls: int = 0
+    compile_misses: int = 0
+    compile_ms: float = 0.0
+    exec_ms: float = 0.0
+    max_exec_ms: float = 0.0
+
+
+_stats: dict[str, _HotQueryStat] = {}
+
+
+def prepared_statement_cache_size() -> int:
+    raw = repo_env_raw_value("PG_PREPARED_STATEMENT_CACHE_SIZE")
+    if raw is not None:
+        try:
+            return max(0, int(str(raw).strip()))
+        except ValueError:
+            pass
+    return 256
+
+
+def hot_query[S: Executable](stmt: S, name: str) -> S:
+    """给语句打热查询标，执行时按 name 记账。"""
+    return stmt.execution_options(**{HOT_QUERY_OPTION: name})
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is None:
+        return
+    name = context.execution_options.get(HOT_QUERY_OPTION)
+    if name is None:
+        return
+    now = perf_counter()
+    stat = _stats.get(name)
+    if stat is None:
+        stat = _stats[name] = _HotQueryStat()
+    stat.calls += 1
+    # _gen_time 是 SQLAlchemy 私有属性，换版本后缺失就不记编译耗时
+    gen_time = getattr(context.compiled, "_gen_time", None)
+    if gen_time is not None and context.cache_hit is CACHE_MISS:
+        # 与 SQLAlchemy 日志里 "generated in" 同口径：编译对象创建到开始执行
+        stat.compile_misses += 1
+        stat.compile_ms += (now - gen_time) * 1000.0
+    setattr(context, _T0_ATTR, now)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    t0 = getattr(context, _T0_ATTR, None) if context is not None else None
+    if t0 is None:
+        return
+    stat = _stats.get(context.execution_options.get(HOT_QUERY_OPTION))
+    if stat is None:
+        return
+    elapsed_ms = (perf_counter() - t0) * 1000.0
+    stat.exec_ms += elapsed_ms
+    stat.max_exec_ms = max(stat.max_exec_ms, elapsed_ms)
+
+
+def install_hot_query_hooks(engine: Any) -> None:
+    """在 (Async)Engine 上挂计时钩子；重复调用无副作用。"""
+    target = getattr(engine, "sync_engine", engine)
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+def hot_query_stats() -> list[dict[str, Any]]:
+    """按累计执行耗时降序的各热查询统计。"""
+    rows = [
+        {
+            "name": name,
+            "calls": stat.calls,
+            "compile_misses": stat.compile_misses,
+            "compile_ms": round(stat.compile_ms, 2),
+            "mean_ms": round(stat.exec_ms / stat.calls, 2) if stat.calls else 0.0,
+            "max_ms": round(stat.max_exec_ms, 2),
+            "total_ms": round(stat.exec_ms, 1),
+        }
+        for name, stat in list(_stats.items())
+    ]
+    rows.sort(key=operator.itemgetter("total_ms"), reverse=True)
+    return rows
+
+
+def reset_hot_query_stats() -> None:
+    _stats.clear()
@@ -84,6 +84,7 @@ PROTECTED_OBJECTS = frozenset({
     "bot_config",
     "config",
     "group_config",
+    "maintenance_cursor",
     "migration_state",
     "schema_migrations",
     "user_config",
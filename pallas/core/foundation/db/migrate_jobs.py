@@ -1,4 +1,4 @@
-"""控制台 Mongo→PostgreSQL 迁移异步任务。"""
+"""控制台数据库迁移异步任务：Mongo→PostgreSQL，以及语料三表在线转哈希分区。"""
 
 from __future__ import annotations
 
@@ -14,6 +14,7 @@ from typing import Any, Literal
 
 from nonebot import logger
 
+MigrateJobKind = Literal["mongo_to_pg", "context_partitions"]
 MigrateJobStatus = Literal["queued", "running", "completed", "failed"]
 MigrateJobPhase = Literal[
     "queued",
@@ -29,11 +30,13 @@ _MAX_JOB_HISTORY = 16
 _MAX_LOG_LINES = 200
 _lock = threading.Lock()
 _jobs: dict[str, MigrateJobState] = {}
+_job_tasks: set[asyncio.Task[None]] = set()
 
 
 @dataclass
 class MigrateJobState:
     job_id: str
+    kind: MigrateJobKind = "mongo_to_pg"
     status: MigrateJobStatus = "queued"
     phase: MigrateJobPhase = "queued"
     dry_run: bool = False
@@ -41,6 +44,8 @@ class MigrateJobState:
     switch_backend: bool = True
     try_hot_rebind: bool = True
     batch_size: int = 1000
+    partitions: int = 0
+    drop_legacy: bool = False
     tables: list[str] = field(default_factory=list)
     error: str = ""
     result: dict[str, Any] = field(default_factory=dict)
@@ -91,6 +96,7 @@ def migrate_job_status_payload(job: MigrateJobState) -> dict[str, Any]:
         elapsed_sec = max(0.0, end - job.started_at)
     return {
         "job_id": job.job_id,
+        "kind": job.kind,
         "status": job.status,
         "phase": job.phase,
         "dry_run": job.dry_run,
@@ -227,6 +233,107 @@ def start_migrate_job(
     return job
 
 
+async def _run_context_partition_job(job: MigrateJobState) -> None:
+    from pallas.core.foundation.db import context_partitions as parts
+
+    job.status = "running"
+    job.started_at = time.time()
+    job.phase = "preflight"
+    logger.info("语料分区迁移开始，job [{}]、分片 [{}]、dry_run [{}]", job.job_id, job.partitions, job.dry_run)
+    try:
+        if job.dry_run:
+            _append_log(job, f"dry_run partitions={job.partitions} tables={','.join(job.tables)}")
+        else:
+            shadow = await parts.prepare_context_partition_migration(job.partitions, restart=job.restart_cursor)
+            job.result["shadow"] = shadow
+            _append_log(job, f"shadow partitions={shadow}")
+
+            job.phase = "migrate"
+            copied: dict[str, int] = {}
+            for table in job.tables:
+
+                def _progress(total: int, last_id: int, table: str = table) -> None:
+                    copied[table] = total
+                    job.result["copied"] = dict(copied)
+                    if total % (job.batch_size * 50) < job.batch_size:
+                        _append_log(job, f"copy {table} rows={total} last_id={last_id}")
+
+                copied[table] = await parts.copy_context_partition_table(
+                    table, batch_size=job.batch_size, on_batch=_progress
+                )
+                job.result["copied"] = dict(copied)
+                _append_log(job, f"copy {table} done rows={copied[table]}")
+
+            job.phase = "verify"
+            verify = await parts.verify_context_partition_counts()
+            job.result["verify"] = verify
+            _append_log(job, f"verify ok={verify.get('ok')}")
+            if not verify.get("ok"):
+                raise RuntimeError("行数校验未通过，同步触发器仍在，可稍后重试（不带 restart 会续拷）")
+
+            job.phase = "switch"
+            count = await parts.finish_context_partition_migration(drop_legacy=job.drop_legacy)
+            job.result["partitions"] = count
+            _append_log(job, f"switched partitions={count} drop_legacy={job.drop_legacy}")
+
+        job.phase = "done"
+        job.status = "completed"
+        job.finished_at = time.time()
+        logger.info("语料分区迁移完成，job [{}]", job.job_id)
+    except Exception as e:  # noqa: BLE001
+        logger.exception("context partition migrate job failed")
+        job.status = "failed"
+        job.error = str(e)
+        job.finished_at = time.time()
+        _append_log(job, f"ERROR: {e}")
+    finally:
+        prune_migrate_jobs()
+
+
+def start_context_partition_job(
+    *,
+    partitions: int | None = None,
+    dry_run: bool = False,
+    restart_cursor: bool = False,
+    drop_legacy: bool = False,
+    batch_size: int = 1000,
+) -> MigrateJobState:
+    """在主事件循环上跑：拷贝复用主连接池，并按池压让路。"""
+    from pallas.core.foundation.db.context_partitions import (
+        PARTITIONED_TABLES,
+        context_partition_count,
+        context_partition_target,
+    )
+
+    if active_migrate_job() is not None:
+        raise ValueError("已有迁移任务进行中")
+    if context_partition_count():
+        raise ValueError("语料表已是分区表")
+    count = int(partitions or context_partition_target())
+    if not 2 <= count <= 256:
+        raise ValueError("分片数须在 2～256 之间（或设置 PG_CONTEXT_PARTITIONS）")
+    job = MigrateJobState(
+        job_id=secrets.token_hex(8),
+        kind="context_partitions",
+        dry_run=dry_run,
+        restart_cursor=restart_cursor,
+        switch_backend=False,
+        try_hot_rebind=False,
+        batch_size=max(100, min(int(batch_size), 5000)),
+        partitions=count,
+        drop_legacy=drop_legacy and not dry_run,
+        tables=[table for table, _key in PARTITIONED_TABLES],
+    )
+    with _lock:
+        _jobs[job.job_id] = job
+    task = asyncio.get_running_loop().create_task(
+        _run_context_partition_job(job), name=f"context_partition_migrate_{job.job_id}"
+    )
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    return job
+
+
 def migrate_wizard_info() -> dict[str, Any]:
     from pallas.core.foundation.db.runtime import get_db_backend
     from pallas.core.foundation.db.schema_registry import list_pg_schema_ensure_steps
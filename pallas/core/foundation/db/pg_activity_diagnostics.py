@@ -1,4 +1,4 @@
-"""PG 侧活动诊断：pg_stat_activity / wait_event / 阻塞链 / pg_stat_statements。"""
+"""PG 侧活动诊断：pg_stat_activity / wait_event / 阻塞链 / pg_stat_statements / 本进程热查询耗时。"""
 
 from __future__ import annotations
 
@@ -153,6 +153,7 @@ class PgActivitySnapshot:
     idle_in_tx: list[dict[str, Any]] = field(default_factory=list)
     statements_top: list[dict[str, Any]] = field(default_factory=list)
     statements_available: bool = False
+    hot_queries: list[dict[str, Any]] = field(default_factory=list)
     error: str | None = None
 
 
@@ -265,6 +266,12 @@ def format_pg_activity_detail(snapshot: PgActivitySnapshot) -> str:
     elif not snapshot.statements_top:
         lines.append("stat_top_mean: pg_stat_statements unavailable")
 
+    lines.extend(
+        "hot_query: {name} calls={calls} mean_ms={mean_ms} max_ms={max_ms} total_ms={total_ms} "
+        "compile_misses={compile_misses} compile_ms={compile_ms}".format(**row)
+        for row in snapshot.hot_queries[: pg_stat_statements_top_n()]
+    )
+
     if snapshot.error:
         lines.append(f"probe_error={snapshot.error}")
 
@@ -274,9 +281,10 @@ def format_pg_activity_detail(snapshot: PgActivitySnapshot) -> str:
 async def collect_pg_activity_snapshot() -> PgActivitySnapshot:
     from sqlalchemy import text
 
+    from pallas.core.foundation.db.hot_queries import hot_query_stats
     from pallas.core.foundation.db.repository_pg import is_pg_initialized, pg_engine
 
-    snap = PgActivitySnapshot()
+    snap = PgActivitySnapshot(hot_queries=hot_query_stats())
     if not is_pg_initialized():
         snap.error = "pg_not_initialized"
         return snap
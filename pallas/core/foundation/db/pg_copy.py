@@ -0,0 +1,102 @@
+"""PG COPY 批量写入：asyncpg ``copy_records_to_table`` 直灌纯追加表。
+
+``PG_BULK_COPY``（默认 1 开启）：message 落库与 Mongo→PG 迁移在一批足够大时走 COPY 协议，
+省掉 executemany 的逐行参数绑定与往返。带唯一约束、需要 ON CONFLICT 的表不走 COPY，
+由调用方退回 INSERT；非 asyncpg 驱动同样退回。字符串里的 \\x00 与 ``_s`` 一样剥掉。
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import Table, UniqueConstraint
+
+from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+    from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+# 少于这么多行时 INSERT 与 COPY 相差无几，不值得多一次驱动往返
+COPY_MIN_ROWS = 256
+
+_copy_safe_cache: dict[str, bool] = {}
+
+
+def bulk_copy_enabled() -> bool:
+    raw = repo_env_raw_value("PG_BULK_COPY")
+    if raw is None:
+        return True
+    return str(raw).strip().lower() not in {"0", "false", "no", "off"}
+
+
+def copy_safe_table(table: Table) -> bool:
+    """只有主键自增、没有其它唯一约束 / 唯一索引的表才能盲灌；有冲突语义的表须走 INSERT。"""
+    cached = _copy_safe_cache.get(table.fullname)
+    if cached is not None:
+        return cached
+    unique = any(isinstance(c, UniqueConstraint) for c in table.constraints)
+    unique = unique or any(ix.unique for ix in table.indexes)
+    unique = unique or any(c.unique for c in table.columns)
+    pk = list(table.primary_key.columns)
+    safe = not unique and len(pk) == 1 and pk[0].autoincrement in (True, "auto")
+    _copy_safe_cache[table.fullname] = safe
+    return safe
+
+
+def copy_columns(table: Table) -> list[str]:
+    """COPY 的列清单：除自增主键外的全部列。"""
+    return [c.name for c in table.columns if not c.primary_key]
+
+
+def _scalar_defaults(table: Table, columns: list[str]) -> list[Any]:
+    # ORM 侧 default= 不会作用到 COPY，缺省的列在客户端补上
+    defaults: list[Any] = []
+    for name in columns:
+        default = table.columns[name].default
+        defaults.append(default.arg if default is not None and default.is_scalar else None)
+    return defaults
+
+
+def _clean(value: Any) -> Any:
+    if isinstance(value, str) and "\x00" in value:
+        return value.replace("\x00", "")
+    return value
+
+
+def copy_records(table: Table, rows: Iterable[Mapping[str, Any]]) -> tuple[list[str], list[tuple[Any, ...]]]:
+    """把 dict 行整理成 COPY 元组：缺列补默认值，字符串剥 NUL。"""
+    columns = copy_columns(table)
+    defaults = _scalar_defaults(table, columns)
+    pairs = list(zip(columns, defaults, strict=True))
+    records = [tuple(_clean(row.get(name, default)) for name, default in pairs) for row in rows]
+    return columns, records
+
+
+async def copy_rows(
+    bind: AsyncSession | AsyncConnection,
+    table: Table,
+    rows: Iterable[Mapping[str, Any]],
+) -> int | None:
+    """
+    在调用方的事务里 COPY 一批行，返回写入行数；表不适合 COPY 或驱动不是 asyncpg 时返回 None，
+    此时尚未写入任何数据，调用方照旧 INSERT 即可。
+    """
+    if not copy_safe_table(table):
+        return None
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    conn = await bind.connection() if isinstance(bind, AsyncSession) else bind
+    raw = await conn.get_raw_connection()
+    driver = getattr(raw, "driver_connection", None)
+    if driver is None or not hasattr(driver, "copy_records_to_table"):
+        return None
+    columns, records = copy_records(table, rows)
+    if not records:
+        return 0
+    if not driver.is_in_transaction():
+        # asyncpg 适配层懒开事务：先经 SQLAlchemy 打一条空语句，COPY 才与同一会话的其它写入同进同退
+        await conn.exec_driver_sql("SELECT 1")
+    await driver.copy_records_to_table(table.name, records=records, columns=columns, schema_name=table.schema)
+    return len(records)
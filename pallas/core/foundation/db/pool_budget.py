@@ -79,6 +79,19 @@ def pg_pool_under_pressure(*, threshold: float = 0.75) -> bool:
     return util >= threshold
 
 
+def reply_pool_under_pressure(*, threshold: float = 0.55) -> bool:
+    """接话只读池可用时按它的占用判断，主池再忙也不影响接话；否则看主池。"""
+    from pallas.core.foundation.db.runtime import reply_read_engine, reply_read_pool_live_stats
+
+    if reply_read_engine() is None:
+        return pg_pool_under_pressure(threshold=threshold)
+    snap = reply_read_pool_live_stats()
+    capacity = int((snap or {}).get("capacity", 0))
+    if capacity <= 0:
+        return False
+    return float(snap.get("checked_out", 0)) / float(capacity) >= threshold
+
+
 def is_pg_pool_timeout_error(exc: BaseException) -> bool:
     """SQLAlchemy QueuePool 等待连接超时等，接话热路径应快速放弃而非占满 matcher 墙钟。"""
     if isinstance(exc, (TimeoutError, asyncio.TimeoutError)):
@@ -109,6 +122,8 @@ def remote_corpus_concurrency_limit() -> int:
 
 
 def pool_budget_status() -> dict[str, Any]:
+    from pallas.core.foundation.db.runtime import reply_read_pool_live_stats
+
     snap = pg_pool_snapshot()
     capacity = pg_pool_capacity()
     util = pg_pool_utilization()
@@ -118,4 +133,5 @@ def pool_budget_status() -> dict[str, Any]:
         "utilization": util,
         "under_pressure": util is not None and util >= 0.75,
         "remote_corpus_limit": remote_corpus_concurrency_limit(),
+        "reply_pool": reply_read_pool_live_stats(),
     }
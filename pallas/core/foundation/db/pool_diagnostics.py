@@ -191,6 +191,14 @@ async def emit_pool_diagnostics_tick() -> None:
     activity = await collect_pg_activity_snapshot()
     wait_s = wait_summary(activity)
 
+    reply_pool = budget.get("reply_pool") or {}
+    reply_s = "-"
+    if reply_pool:
+        reply_s = (
+            f"{reply_pool.get('checked_out', '?')}/{reply_pool.get('capacity', '?')}"
+            f" {'ok' if reply_pool.get('healthy') else 'down'} 回落 {reply_pool.get('failovers', 0)}"
+        )
+
     slow_top = ", ".join(f"{k} [{v}]" for k, v in _slow_by_caller.most_common(3))
     if not slow_top:
         slow_top = "-"
@@ -209,11 +217,12 @@ async def emit_pool_diagnostics_tick() -> None:
     )
     diag_log = logger.info if notable else logger.debug
     diag_log(
-        "pg pool diag：占用 [{}] | 利用率 [{}] | 空闲事务 [{}] | 等待 [{}] "
+        "pg pool diag：占用 [{}] | 利用率 [{}] | 接话池 [{}] | 空闲事务 [{}] | 等待 [{}] "
         "| 远程压力跳过 [{}] | 远程忙跳过 [{}] | 镜像跳过 [{}] "
         "| 慢会话 [{}] 最慢 [{:.0f}ms] | 学习队列 [{}] 池等待 [{}] | 慢TOP [{}]",
         f"{live.get('checked_out', '?')}/{live.get('capacity', budget.get('capacity', '?'))}",
         util_pct,
+        reply_s,
         idle_tx if idle_tx is not None else "?",
         wait_s,
         skipped_pressure,
@@ -242,6 +251,7 @@ async def emit_pool_diagnostics_tick() -> None:
             "utilization": budget.get("utilization"),
             "under_pressure": budget.get("under_pressure"),
             "live": budget.get("live"),
+            "reply_pool": budget.get("reply_pool"),
             "idle_in_tx": idle_tx,
         }
         note_db_probe_result(True, pool=pool_summary)
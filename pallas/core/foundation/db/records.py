@@ -0,0 +1,151 @@
+"""后端无关的轻量语料 / 消息记录：__slots__ dataclass，PG 仓储读路径直接返回。
+
+字段与 modules 里的 Beanie 模型一一对应，并保留调用方用到的 model_dump / model_copy；
+只有 Mongo 路径真正需要 Document 时才经 to_document / as_document 还原。
+留 weakref 槽：接话侧的列缓存、ban 索引与合并视图都按快照对象弱引用缓存。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pallas.core.foundation.db.modules import Answer, Ban, Context, Message
+
+
+@dataclass(slots=True, weakref_slot=True)
+class BanRecord:
+    keywords: str
+    group_id: int
+    reason: str
+    time: int
+
+    def model_dump(self, **_kwargs: Any) -> dict[str, Any]:
+        return {"keywords": self.keywords, "group_id": self.group_id, "reason": self.reason, "time": self.time}
+
+    def model_copy(self, *, update: dict[str, Any] | None = None, deep: bool = False) -> BanRecord:
+        return replace(self, **(update or {}))
+
+    def to_document(self) -> Ban:
+        from pallas.core.foundation.db.modules import Ban
+
+        return Ban.model_construct(**self.model_dump())
+
+
+@dataclass(slots=True, weakref_slot=True)
+class AnswerRecord:
+    keywords: str
+    group_id: int
+    count: int = 1
+    time: int = 0
+    messages: list[str] = field(default_factory=list)
+    # 与 Answer 的私有属性同名：接话打分时累加话题分，不参与比较与导出
+    _topical: int = field(default=0, repr=False, compare=False)
+
+    def model_dump(self, **_kwargs: Any) -> dict[str, Any]:
+        return {
+            "keywords": self.keywords,
+            "group_id": self.group_id,
+            "count": self.count,
+            "time": self.time,
+            "messages": list(self.messages),
+        }
+
+    def model_copy(self, *, update: dict[str, Any] | None = None, deep: bool = False) -> AnswerRecord:
+        copied = replace(self, **(update or {}))
+        if deep and not (update and "messages" in update):
+            copied.messages = list(copied.messages)
+        return copied
+
+    def to_document(self) -> Answer:
+        from pallas.core.foundation.db.modules import Answer
+
+        return Answer.model_construct(**self.model_dump())
+
+
+@dataclass(slots=True, weakref_slot=True)
+class ContextRecord:
+    keywords: str
+    time: int
+    trigger_count: int = 1
+    answers: list[Any] = field(default_factory=list)
+    ban: list[Any] = field(default_factory=list)
+    clear_time: int = 0
+
+    def model_dump(self, *, by_alias: bool = False, **kwargs: Any) -> dict[str, Any]:
+        return {
+            "keywords": self.keywords,
+            "time": self.time,
+            "count" if by_alias else "trigger_count": self.trigger_count,
+            "answers": [a.model_dump(by_alias=by_alias, **kwargs) for a in self.answers],
+            "ban": [b.model_dump(by_alias=by_alias, **kwargs) for b in self.ban],
+            "clear_time": self.clear_time,
+        }
+
+    def model_copy(self, *, update: dict[str, Any] | None = None, deep: bool = False) -> ContextRecord:
+        copied = replace(self, **(update or {}))
+        if deep:
+            copied.answers = [a.model_copy(deep=True) for a in copied.answers]
+            copied.ban = [b.model_copy(deep=True) for b in copied.ban]
+        return copied
+
+    def to_document(self) -> Context:
+        from pallas.core.foundation.db.modules import Context
+
+        return Context.model_construct(
+            keywords=self.keywords,
+            time=self.time,
+            trigger_count=self.trigger_count,
+            answers=[as_document(a) for a in self.answers],
+            ban=[as_document(b) for b in self.ban],
+            clear_time=self.clear_time,
+        )
+
+
+@dataclass(slots=True, weakref_slot=True)
+class MessageRecord:
+    group_id: int
+    user_id: int
+    bot_id: int
+    raw_message: str
+    is_plain_text: bool = True
+    plain_text: str = ""
+    keywords: str = ""
+    sender_name: str = ""
+    message_id: int | None = None
+    reply_to_message_id: int | None = None
+    suppressed_by_rage: bool = False
+    time: int = 0
+
+    def model_dump(self, **_kwargs: Any) -> dict[str, Any]:
+        return {
+            "group_id": self.group_id,
+            "user_id": self.user_id,
+            "bot_id": self.bot_id,
+            "raw_message": self.raw_message,
+            "is_plain_text": self.is_plain_text,
+            "plain_text": self.plain_text,
+            "keywords": self.keywords,
+            "sender_name": self.sender_name,
+            "message_id": self.message_id,
+            "reply_to_message_id": self.reply_to_message_id,
+            "suppressed_by_rage": self.suppressed_by_rage,
+            "time": self.time,
+        }
+
+    def model_copy(self, *, update: dict[str, Any] | None = None, deep: bool = False) -> MessageRecord:
+        return replace(self, **(update or {}))
+
+    def to_document(self) -> Message:
+        from pallas.core.foundation.db.modules import Message
+
+        return Message.model_construct(**self.model_dump())
+
+
+DomainRecord = BanRecord | AnswerRecord | ContextRecord | MessageRecord
+
+
+def as_document(value: Any) -> Any:
+    """记录还原为对应的 Beanie 模型；已是模型（或其它对象）原样返回。"""
+    return value.to_document() if isinstance(value, DomainRecord) else value
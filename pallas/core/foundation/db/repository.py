@@ -38,6 +38,30 @@ class ImageCachePruneResult:
     remaining_blob_bytes: int
 
 
+@dataclass(frozen=True, slots=True)
+class ContextCleanupProgress:
+    """一轮分批清理的进度；finished 为 False 表示时间预算用尽，断点已落库，下次接着跑。"""
+
+    contexts: int
+    answers_deleted: int
+    batches: int
+    last_id: int
+    finished: bool
+    elapsed_ms: float
+
+
+@dataclass(frozen=True, slots=True)
+class LearnAnswerItem:
+    """单条学习写入；批量 learn 按 (keywords, group_id, answer_keywords) 合并计数。"""
+
+    keywords: str
+    group_id: int
+    answer_keywords: str
+    answer_time: int
+    message: str
+    append_on_existing: bool
+
+
 @runtime_checkable
 class ContextRepository(Protocol):
     async def find_by_keywords(self, keywords: str) -> Context | None:
@@ -26,6 +26,7 @@ from pallas.core.foundation.db.modules import (
     SchemaMigration,
     StickerLabel,
 )
+from pallas.core.foundation.db.records import as_document
 from pallas.core.shared.utils.invalidate_cache import clear_model_cache
 
 if TYPE_CHECKING:
@@ -46,10 +47,11 @@ class MongoContextRepository:
         return await Context.find_one(Context.keywords == keywords)
 
     async def save(self, context: Context) -> None:
-        await context.save()
+        # 其它后端读出的轻量记录在这里才还原成 Document
+        await as_document(context).save()
 
     async def insert(self, context: Context) -> None:
-        await context.insert()
+        await as_document(context).insert()
 
     async def delete_expired(self, expiration: int, threshold: int) -> None:
         await Context.find(
@@ -221,7 +223,7 @@ class MongoMessageRepository:
         return [int(row["_id"]) for row in rows]
 
     async def bulk_insert(self, messages: list[Message]) -> None:
-        await Message.insert_many(messages)
+        await Message.insert_many([as_document(m) for m in messages])
 
 
 class MongoBlackListRepository:
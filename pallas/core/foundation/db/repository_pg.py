@@ -4,11 +4,11 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import functools
 import hashlib
 import json
 import os
 import time
-from collections import OrderedDict
 from contextlib import asynccontextmanager
 from typing import TYPE_CHECKING, Any
 
@@ -25,18 +25,21 @@ from sqlalchemy import (
     Text,
     UniqueConstraint,
     and_,
+    any_,
+    bindparam,
     case,
     delete,
     func,
     insert,
     inspect,
+    literal,
     literal_column,
     or_,
     select,
     text,
     update,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
@@ -48,12 +51,21 @@ from pallas.core.foundation.db.blob_store import (
     read_image_blob_at,
     write_image_blob,
 )
+from pallas.core.foundation.db.hot_queries import hot_query, install_hot_query_hooks
+from pallas.core.foundation.db.records import AnswerRecord, BanRecord, ContextRecord, MessageRecord
 from pallas.core.platform.observability import slow_path_threshold_ms
 from pallas.product.llm.corpus_contamination import reject_corpus_learn_message
 
 if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
     from pallas.core.foundation.db.modules import Answer, Ban, BlackList, Context, ImageCache, Message
-    from pallas.core.foundation.db.repository import ImageCachePrunePolicy, ImageCachePruneResult
+    from pallas.core.foundation.db.repository import (
+        ContextCleanupProgress,
+        ImageCachePrunePolicy,
+        ImageCachePruneResult,
+        LearnAnswerItem,
+    )
 
 _JsonB = JSONB().with_variant(JSON(), "sqlite")
 
@@ -149,6 +161,23 @@ class ContextRow(Base):
     ban: Mapped[list[ContextBanRow]] = relationship("ContextBanRow", cascade="all, delete-orphan", lazy="noload")
 
 
+class CorpusHotRollupRow(Base):
+    """热词增量汇总：按 (UTC 日, 群) 记 top 词条下各回复的学习次数；group_id=-1 为全局桶。"""
+
+    __tablename__ = "corpus_hot_rollup"
+    __table_args__ = (Index("ix_corpus_hot_rollup_group_day", "group_id", "day"),)
+
+    day: Mapped[int] = mapped_column(Integer, primary_key=True)
+    group_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    keywords_hash: Mapped[str] = mapped_column(Text, primary_key=True)
+    # 空串为超出回复上限的计数，只进总分不进回复列表
+    answer_hash: Mapped[str] = mapped_column(Text, primary_key=True)
+    keywords: Mapped[str] = mapped_column(Text, nullable=False)
+    answer_keywords: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    message: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
 class MessageRow(Base):
     __tablename__ = "message"
     __table_args__ = (
@@ -255,6 +284,19 @@ class SchemaMigrationRow(Base):
     applied_at: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
 
 
+class MaintenanceCursorRow(Base):
+    """分批维护任务的断点：按 name 记录上次处理到的主键与本轮累计进度。"""
+
+    __tablename__ = "maintenance_cursor"
+
+    name: Mapped[str] = mapped_column(Text, primary_key=True)
+    last_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    pass_started_at: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    processed: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    deleted: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
 class BotConfigRow(Base):
     __tablename__ = "bot_config"
 
@@ -495,9 +537,6 @@ class LlmMemoryHierStatusRow(Base):
 
 _engine: AsyncEngine | None = None
 _session_factory: async_sessionmaker[AsyncSession] | None = None
-_reply_query_snapshot_cache: OrderedDict[str, tuple[float, Context | None]] = OrderedDict()
-_reply_query_snapshot_inflight: dict[str, asyncio.Task[Context | None]] = {}
-_reply_query_snapshot_lock = asyncio.Lock()
 _DELETE_ID_BATCH = 1000
 
 
@@ -925,6 +964,75 @@ async def get_session(*, read_only: bool = False):
                 await asyncio.shield(session.invalidate())
 
 
+def is_reply_replica_unavailable_error(exc: BaseException) -> bool:
+    """只读池连接层故障（断连、拒连、取连接超时）；SQL 本身出错不算，不触发回落。"""
+    from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+    if isinstance(exc, (OSError, TimeoutError, asyncio.TimeoutError, InterfaceError, OperationalError)):
+        return True
+    if isinstance(exc, DBAPIError) and exc.connection_invalidated:
+        return True
+    from pallas.core.foundation.db.pool_budget import is_pg_pool_timeout_error
+
+    return is_pg_pool_timeout_error(exc)
+
+
+@asynccontextmanager
+async def get_reply_session():
+    """接话只读会话：配了接话只读池走它，取连接失败记冷却并回落主池只读会话。"""
+    from pallas.core.foundation.db.runtime import (
+        note_reply_read_failover,
+        note_reply_read_failure,
+        note_reply_read_session,
+        reply_read_engine,
+    )
+
+    engine = reply_read_engine()
+    session = None
+    if engine is not None:
+        session = AsyncSession(engine, expire_on_commit=False)
+        try:
+            await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+        except Exception as exc:
+            with contextlib.suppress(BaseException):
+                await asyncio.shield(session.invalidate())
+            session = None
+            note_reply_read_failure()
+            note_reply_read_failover()
+            logger.warning("Reply read pool is unavailable; falling back to the primary pool: {}", exc)
+    if session is None:
+        async with get_session(read_only=True) as fallback:
+            yield fallback
+        return
+
+    from pallas.core.foundation.db.pool_diagnostics import note_slow_pg_session, session_hold_warn_ms
+
+    note_reply_read_session()
+    t0 = time.monotonic()
+    try:
+        yield session
+    except Exception as exc:
+        if is_reply_replica_unavailable_error(exc):
+            note_reply_read_failure()
+        raise
+    finally:
+        held_ms = (time.monotonic() - t0) * 1000.0
+        if held_ms >= session_hold_warn_ms():
+            note_slow_pg_session(held_ms, "reply_read_pool")
+        try:
+            await asyncio.shield(session.close())
+        except BaseException:
+            with contextlib.suppress(BaseException):
+                await asyncio.shield(session.invalidate())
+
+
+def _ensure_pg_context_partitions(connection) -> None:
+    """记录语料三表分区布局；PG_CONTEXT_PARTITIONS 开启且表为空时直接建成哈希分区表。"""
+    from pallas.core.foundation.db.context_partitions import ensure_context_partitions
+
+    ensure_context_partitions(connection)
+
+
 # 启动期 DDL ensure 注册表（step_id 稳定，供控制台与可观测使用）
 PG_SCHEMA_ENSURE_STEPS: list[tuple[str, Any]] = [
     ("ddl.image_cache_blob_data", _ensure_pg_image_cache_blob_data),
@@ -952,6 +1060,8 @@ PG_SCHEMA_ENSURE_STEPS: list[tuple[str, Any]] = [
     ("ddl.context_answer_message_reply_index", _ensure_pg_context_answer_message_reply_index),
     ("ddl.background_job_delivery_claim_index", _ensure_pg_background_job_delivery_claim_index),
     ("ddl.background_job_pending_claim_index", _ensure_pg_background_job_pending_claim_index),
+    # 须在语料表索引 ensure 之后：影子分区表照抄旧表现有索引
+    ("ddl.context_partitions", _ensure_pg_context_partitions),
 ]
 
 
@@ -962,6 +1072,7 @@ async def init_pg(engine: AsyncEngine) -> None:
 
     _engine = engine
     _session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    install_hot_query_hooks(engine)
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -976,10 +1087,15 @@ async def dispose_pg() -> None:
         _engine = None
     # 释放 engine 后清空 session factory
     _session_factory = None
+    from pallas.core.foundation.db.runtime import dispose_reply_read_engine
+
+    await dispose_reply_read_engine()
     await clear_reply_query_snapshot_cache(None)
+    from pallas.core.foundation.db.config_invalidation import stop_config_invalidation_listener
+
+    await stop_config_invalidation_listener()
     # schema 重建后清空 ORM 缓存
-    for cache in _CONFIG_CACHES.values():
-        await cache.clear()
+    invalidate_config_cache(None)
 
 
 _LOAD_RELATED = [
@@ -1003,6 +1119,46 @@ _ANSWER_BATCH = 500  # ContextAnswerRow 6 列 × 500 = 3000
 _MSG_BATCH = 16000  # ContextAnswerMessageRow 2 列 × 16000 = 32000
 
 
+def _any_id(ids: list[int]):
+    """``= ANY(:ids)``：整批 id 作为单个 bigint[] 参数下发，不随批量展开成占位符。"""
+    return any_(literal(ids, type_=ARRAY(BigInteger)))
+
+
+async def _prune_answers_by_partition(
+    session: AsyncSession, ctx_ids: list[int], expiration: int, partitions: int
+) -> int:
+    """
+    分区布局下的 prune 删除：整批 id 哈希到各片，直接对父表 ``= ANY`` 删会扫遍 N 片。
+    先用 satisfies_hash_partition 把 id 按分片分组，再逐片删，条件同样与删除放在同一条语句里。
+    """
+    from pallas.core.foundation.db.context_partitions import context_partition_names
+
+    names = context_partition_names("context_answer", partitions)
+    groups = (
+        await session.execute(
+            text(
+                "SELECT r, array_agg(id) FROM unnest(CAST(:ids AS bigint[])) AS id "
+                "CROSS JOIN generate_series(0, CAST(:n AS integer) - 1) AS r "
+                "WHERE satisfies_hash_partition('context_answer'::regclass, CAST(:n AS integer), r, id) "
+                "GROUP BY r"
+            ),
+            {"ids": ctx_ids, "n": partitions},
+        )
+    ).all()
+    deleted = 0
+    for remainder, ids in groups:
+        result = await session.execute(
+            text(
+                f'DELETE FROM "{names[int(remainder)]}" '
+                "WHERE context_id = ANY(CAST(:ids AS bigint[])) AND count <= 1 AND time <= :expiration "
+                "RETURNING id"
+            ),
+            {"ids": list(ids), "expiration": expiration},
+        )
+        deleted += len(result.all())
+    return deleted
+
+
 async def delete_context_answer_orphans(
     session: AsyncSession,
     *,
@@ -1010,7 +1166,10 @@ async def delete_context_answer_orphans(
     kept_ids: list[int],
     chunk_size: int = _DELETE_ID_BATCH,
 ) -> None:
-    """删除指定 Context 下未保留的 Answer，避免生成超长 NOT IN 参数列表。"""
+    """删除指定 Context 下未保留的 Answer，避免生成超长 NOT IN 参数列表。
+
+    每条语句都带 context_id：分区布局下只落在该 Context 所在的一片。
+    """
     if not kept_ids:
         await session.execute(delete(ContextAnswerRow).where(ContextAnswerRow.context_id == ctx_id))
         return
@@ -1080,40 +1239,21 @@ async def _insert_bans_batched(session: AsyncSession, context_id: int, bans) ->
         await session.flush()
 
 
-def row_to_context(row: ContextRow, *, reply_messages: dict[int, list[str]] | None = None) -> Context:
-    from pallas.core.foundation.db.modules import Answer, Ban, Context
-
+def row_to_context(row: ContextRow, *, reply_messages: dict[int, list[str]] | None = None) -> ContextRecord:
     answers = []
     for a in row.answers:
         if reply_messages is not None:
             msgs = list(reply_messages.get(int(a.id), []))
         else:
             msgs = [m.message for m in a.messages]
-        answers.append(
-            Answer.model_construct(
-                keywords=a.keywords,
-                group_id=a.group_id,
-                count=a.count,
-                time=a.time,
-                messages=msgs,
-            )
-        )
-    ban = [
-        Ban.model_construct(
-            keywords=b.keywords,
-            group_id=b.group_id,
-            reason=b.reason,
-            time=b.time,
-        )
-        for b in row.ban
-    ]
-    return Context.model_construct(
-        keywords=row.keywords,
-        time=row.time,
-        trigger_count=row.trigger_count,
-        answers=answers,
-        ban=ban,
-        clear_time=row.clear_time,
+        answers.append(AnswerRecord(a.keywords, a.group_id, a.count, a.time, msgs))
+    return ContextRecord(
+        row.keywords,
+        row.time,
+        row.trigger_count,
+        answers,
+        [BanRecord(b.keywords, b.group_id, b.reason, b.time) for b in row.ban],
+        row.clear_time,
     )
 
 
@@ -1126,33 +1266,23 @@ def build_reply_context(
     answer_rows: list[ContextAnswerRow],
     ban_rows: list[ContextBanRow],
     reply_messages: dict[int, list[str]],
-):
-    from pallas.core.foundation.db.modules import Answer, Ban, Context
-
-    return Context.model_construct(
-        keywords=keywords,
-        time=time_value,
-        trigger_count=trigger_count,
-        answers=[
-            Answer.model_construct(
-                keywords=answer.keywords,
-                group_id=answer.group_id,
-                count=answer.count,
-                time=answer.time,
-                messages=list(reply_messages.get(int(answer.id), [])),
+) -> ContextRecord:
+    return ContextRecord(
+        keywords,
+        time_value,
+        trigger_count,
+        [
+            AnswerRecord(
+                answer.keywords,
+                answer.group_id,
+                answer.count,
+                answer.time,
+                list(reply_messages.get(int(answer.id), [])),
             )
             for answer in answer_rows
         ],
-        ban=[
-            Ban.model_construct(
-                keywords=ban.keywords,
-                group_id=ban.group_id,
-                reason=ban.reason,
-                time=ban.time,
-            )
-            for ban in ban_rows
-        ],
-        clear_time=clear_time,
+        [BanRecord(ban.keywords, ban.group_id, ban.reason, ban.time) for ban in ban_rows],
+        clear_time,
     )
 
 
@@ -1184,33 +1314,33 @@ def build_reply_message_query(answer_ids: list[int], msg_cap: int):
 
 
 async def clear_reply_query_snapshot_cache(keywords: str | None = None) -> None:
-    async with _reply_query_snapshot_lock:
-        if keywords is None:
-            _reply_query_snapshot_cache.clear()
-            _reply_query_snapshot_inflight.clear()
-            return
-        key = keywords.strip()
-        if key:
-            _reply_query_snapshot_cache.pop(key, None)
+    """清接话快照；上层 find / reply 条目由快照填充，一并失效。"""
+    from pallas.product.corpus.read_cache import discard_precomputed_replies, shared_read_cache
+
+    if keywords is None:
+        shared_read_cache().clear()
+        discard_precomputed_replies(None)
+        return
+    key = keywords.strip()
+    if key:
+        shared_read_cache().drop(key)
+        discard_precomputed_replies(key)
 
 
 async def cached_reply_query_snapshot(
     keywords: str,
     loader,
-) -> Context | None:
-    from pallas.core.foundation.db.pool_budget import is_pg_pool_timeout_error, pg_pool_under_pressure
+) -> ContextRecord | None:
+    from pallas.core.foundation.db.pool_budget import is_pg_pool_timeout_error, reply_pool_under_pressure
     from pallas.core.platform.ingress.hotpath_metrics import record_reply_snapshot
     from pallas.product.corpus.find_cache import mark_reply_db_fail, reply_db_fail_active
-    from pallas.product.corpus.reply_perf_config import (
-        reply_snapshot_max_entries,
-        reply_snapshot_query_timeout_sec,
-        reply_snapshot_ttl_sec,
-    )
+    from pallas.product.corpus.read_cache import SNAPSHOT_LAYER, shared_read_cache
+    from pallas.product.corpus.reply_perf_config import reply_snapshot_query_timeout_sec, reply_snapshot_ttl_sec
 
     key = (keywords or "").strip()
     if not key:
         return None
-    if pg_pool_under_pressure(threshold=0.55):
+    if reply_pool_under_pressure(threshold=0.55):
         record_reply_snapshot(hit=False, skipped=True)
         logger.debug(
             "Reply query snapshot skipped because the PostgreSQL pool is under pressure for keyword length [{}].",
@@ -1224,39 +1354,24 @@ async def cached_reply_query_snapshot(
             len(key),
         )
         return None
-    now = time.monotonic()
-    task: asyncio.Task[Context | None] | None = None
-    async with _reply_query_snapshot_lock:
-        hit = _reply_query_snapshot_cache.get(key)
-        if hit is not None:
-            expire_at, value = hit
-            if now < expire_at:
-                _reply_query_snapshot_cache.move_to_end(key)
-                record_reply_snapshot(hit=True)
-                return value
-            _reply_query_snapshot_cache.pop(key, None)
-        task = _reply_query_snapshot_inflight.get(key)
-        if task is None:
-            task = asyncio.create_task(loader(key))
-            _reply_query_snapshot_inflight[key] = task
-            record_reply_snapshot(hit=False)
-        else:
-            # 与 inflight 合并：算命中同类请求，避免重复打库计数偏高
-            record_reply_snapshot(hit=True)
+    cache = shared_read_cache()
+    hit, value = cache.get(SNAPSHOT_LAYER, key)
+    if hit:
+        record_reply_snapshot(hit=True)
+        return value
+    task, started = cache.join_or_start(SNAPSHOT_LAYER, key, loader)
+    # 与 inflight 合并：算命中同类请求，避免重复打库计数偏高
+    record_reply_snapshot(hit=not started)
 
     try:
         ctx = await asyncio.wait_for(asyncio.shield(task), timeout=reply_snapshot_query_timeout_sec())
     except TimeoutError:
-        async with _reply_query_snapshot_lock:
-            if _reply_query_snapshot_inflight.get(key) is task:
-                _reply_query_snapshot_inflight.pop(key, None)
+        cache.abandon(SNAPSHOT_LAYER, key, task)
         record_reply_snapshot(hit=False)
         logger.debug("Reply query snapshot timed out for keyword length [{}].", len(key))
         return None
     except Exception as exc:
-        async with _reply_query_snapshot_lock:
-            if _reply_query_snapshot_inflight.get(key) is task:
-                _reply_query_snapshot_inflight.pop(key, None)
+        cache.abandon(SNAPSHOT_LAYER, key, task)
         if is_pg_pool_timeout_error(exc):
             mark_reply_db_fail(key)
             logger.debug(
@@ -1266,16 +1381,122 @@ async def cached_reply_query_snapshot(
             return None
         raise
 
-    async with _reply_query_snapshot_lock:
-        if _reply_query_snapshot_inflight.get(key) is task:
-            _reply_query_snapshot_inflight.pop(key, None)
-        _reply_query_snapshot_cache[key] = (time.monotonic() + reply_snapshot_ttl_sec(), ctx)
-        _reply_query_snapshot_cache.move_to_end(key)
-        while len(_reply_query_snapshot_cache) > reply_snapshot_max_entries():
-            _reply_query_snapshot_cache.popitem(last=False)
+    cache.finish(SNAPSHOT_LAYER, key, task, ctx, reply_snapshot_ttl_sec())
     return ctx
 
 
+def _was_insert_column(count_column):
+    """
+    upsert RETURNING 里区分 insert / update：单表取 ``xmax = 0``；分区表取不到系统列，
+    改回传 upsert 后的计数，由 _was_insert 与本次写入的计数比对（库内计数 ≥ 1，被更新的行必然更大）。
+    """
+    from pallas.core.foundation.db.context_partitions import context_partition_count
+
+    if context_partition_count():
+        return count_column.label("was_insert")
+    return literal_column("(xmax = 0)").label("was_insert")
+
+
+def _was_insert(value: Any, sent: int) -> bool:
+    """
+    计数比对是分区布局下的近似：已有行计数为 0（迁移 / replace_answers 可写入）时，更新后恰等于 sent，
+    会被当作新建——后果只是多写一条首条 message、多清一次快照缓存，不影响计数本身，故不另加往返去判别。
+    """
+    if isinstance(value, bool):
+        return value
+    return int(value) == int(sent)
+
+
+async def _retry_on_stale_partition_layout(write: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    分区布局按进程记录，别的 worker 在线切换后本进程仍发 ``xmax = 0`` 会被 PG 拒绝：
+    重读目录布局后重试一次（write 每次调用都须按当前布局重新构造语句）。
+    """
+    from sqlalchemy.exc import DBAPIError
+
+    from pallas.core.foundation.db.context_partitions import (
+        is_stale_context_partition_layout_error,
+        refresh_context_partition_layout,
+    )
+
+    try:
+        return await write()
+    except DBAPIError as exc:
+        if not is_stale_context_partition_layout_error(exc):
+            raise
+    await refresh_context_partition_layout()
+    return await write()
+
+
+@functools.cache
+def _learn_answer_pipeline(partitioned: bool):
+    """
+    learn_answer 的单语句版本：context upsert → answer upsert → message insert 串成一条 CTE，
+    一次往返完成。各段 RETURNING 的 was_insert 取法随 partitioned 变化，两种变体各构造一次。
+    """
+    ctx_stmt = pg_insert(ContextRow).values(
+        keywords=bindparam("kw"),
+        keywords_hash=bindparam("khash"),
+        time=bindparam("ts"),
+        trigger_count=1,
+        clear_time=0,
+    )
+    ctx = (
+        ctx_stmt
+        .on_conflict_do_update(
+            index_elements=[ContextRow.keywords_hash],
+            set_={
+                "trigger_count": ContextRow.trigger_count + 1,
+                "time": ctx_stmt.excluded.time,
+            },
+        )
+        .returning(ContextRow.id, _was_insert_column(ContextRow.trigger_count))
+        .cte("learn_ctx")
+    )
+    ans_stmt = pg_insert(ContextAnswerRow).from_select(
+        ["context_id", "keywords", "keywords_hash", "group_id", "count", "time"],
+        select(
+            ctx.c.id,
+            bindparam("ans_kw", type_=Text),
+            bindparam("ans_khash", type_=Text),
+            bindparam("gid", type_=BigInteger),
+            literal(1, Integer),
+            bindparam("ts", type_=BigInteger),
+        ),
+    )
+    ans = (
+        ans_stmt
+        .on_conflict_do_update(
+            constraint="uq_context_answer_ctx_group_kw",
+            set_={
+                "count": ContextAnswerRow.count + 1,
+                "time": ans_stmt.excluded.time,
+            },
+        )
+        .returning(ContextAnswerRow.id, _was_insert_column(ContextAnswerRow.count))
+        .cte("learn_ans")
+    )
+    # 分区表回传的是 upsert 后计数，等于 1 即本次新建
+    answer_created = ans.c.was_insert == 1 if partitioned else ans.c.was_insert
+    msg = insert(ContextAnswerMessageRow).from_select(
+        ["answer_id", "message"],
+        select(ans.c.id, bindparam("msg", type_=Text)).where(or_(answer_created, bindparam("append", type_=Boolean))),
+    )
+    stmt = (
+        select(
+            ctx.c.id.label("ctx_id"),
+            ctx.c.was_insert.label("ctx_was_insert"),
+            ans.c.id.label("ans_id"),
+            ans.c.was_insert.label("ans_was_insert"),
+        )
+        .select_from(ctx)
+        .join(ans, literal(True))
+        # message 段不被最终 SELECT 引用，须显式挂上才会随语句执行
+        .add_cte(msg.cte("learn_msg"))
+    )
+    return hot_query(stmt, "learn_answer")
+
+
 def row_to_blacklist(row: BlackListRow):
     from pallas.core.foundation.db.modules import BlackList
 
@@ -1300,6 +1521,47 @@ def row_to_image_cache(row: ImageCacheRow) -> ImageCache:
     )
 
 
+# 接话快照单语句：context、ban 与按 count/time 取前 ans_cap 条 answer（各带最近 msg_cap 条 message）
+# 一次往返聚合成 JSON；message 按 answer 走 LATERAL + (answer_id, id) 索引倒序取，不再全量开窗排名
+_REPLY_SNAPSHOT_SQL = hot_query(
+    text(
+        """
+        SELECT c.id, c.keywords, c.time, c.trigger_count, c.clear_time,
+            COALESCE((
+                SELECT json_agg(json_build_object(
+                    'keywords', b.keywords, 'group_id', b.group_id,
+                    'reason', b.reason, 'time', b.time
+                ) ORDER BY b.id)
+                FROM context_ban b WHERE b.context_id = c.id
+            ), '[]'::json) AS bans,
+            COALESCE((
+                SELECT json_agg(json_build_object(
+                    'keywords', a.keywords, 'group_id', a.group_id,
+                    'count', a.count, 'time', a.time,
+                    'messages', COALESCE(m.values, '[]'::json)
+                ) ORDER BY a.count DESC, a.time DESC)
+                FROM (
+                    SELECT a.id, a.keywords, a.group_id, a.count, a.time
+                    FROM context_answer a
+                    WHERE a.context_id = c.id
+                    ORDER BY a.count DESC, a.time DESC LIMIT :ans_cap
+                ) a
+                LEFT JOIN LATERAL (
+                    SELECT json_agg(t.message ORDER BY t.id) AS values
+                    FROM (
+                        SELECT m.message, m.id FROM context_answer_message m
+                        WHERE m.answer_id = a.id
+                        ORDER BY m.id DESC LIMIT :msg_cap
+                    ) t
+                ) m ON true
+            ), '[]'::json) AS answers
+        FROM context c WHERE c.keywords_hash = :khash
+        """
+    ),
+    "reply_snapshot",
+)
+
+
 class PgContextRepository:
     async def context_exists_by_keywords(self, keywords: str) -> bool:
         khash = keywords_hash(keywords)
@@ -1307,7 +1569,7 @@ class PgContextRepository:
             result = await session.execute(select(ContextRow.id).where(ContextRow.keywords_hash == khash).limit(1))
             return result.scalar_one_or_none() is not None
 
-    async def find_by_keywords(self, keywords: str) -> Context | None:
+    async def find_by_keywords(self, keywords: str) -> ContextRecord | None:
         khash = keywords_hash(keywords)
         async with get_session(read_only=True) as session:
             result = await session.execute(
@@ -1316,80 +1578,37 @@ class PgContextRepository:
             row = result.scalar_one_or_none()
             return row_to_context(row) if row else None
 
-    async def find_by_keywords_for_reply(self, keywords: str) -> Context | None:
+    async def find_by_keywords_for_reply(self, keywords: str) -> ContextRecord | None:
         return await cached_reply_query_snapshot(keywords, self._find_by_keywords_for_reply_uncached)
 
-    async def _find_by_keywords_for_reply_uncached(self, keywords: str) -> Context | None:
+    async def _find_by_keywords_for_reply_uncached(self, keywords: str) -> ContextRecord | None:
         """接话路径：轻量列查询 + 限量 Answer/Message，避免 ORM 关联热路径放大。"""
-        return await self._find_by_keywords_for_reply_snapshot(keywords)
-
-    async def _find_by_keywords_for_reply_snapshot(self, keywords: str) -> Context | None:
-        """一次受限快照读取接话所需的 context、ban、answer 与 message。"""
-        from pallas.core.foundation.db.modules import Answer, Ban, Context
+        from pallas.core.foundation.db.runtime import note_reply_read_failover, reply_read_engine
 
+        on_replica = reply_read_engine() is not None
+        try:
+            return await self._find_by_keywords_for_reply_snapshot(keywords)
+        except Exception as exc:
+            # 只读池查询中途断开：get_reply_session 已记冷却，本次直接回主池重读一遍
+            if not on_replica or not is_reply_replica_unavailable_error(exc) or reply_read_engine() is not None:
+                raise
+            note_reply_read_failover()
+            logger.debug("Reply snapshot retried on the primary pool after a reply read pool failure: {}", exc)
+            return await self._find_by_keywords_for_reply_snapshot(keywords)
+
+    async def _find_by_keywords_for_reply_snapshot(self, keywords: str) -> ContextRecord | None:
+        """单条语句、一次往返读取接话所需的 context、ban、answer 与 message（受 caps 限制）。"""
         khash = keywords_hash(keywords)
         from pallas.product.corpus.reply_perf_config import reply_query_caps
 
         msg_cap, ans_cap = reply_query_caps(keywords)
         t_start = time.monotonic()
-        async with get_session(read_only=True) as session:
-            context_row = (
-                (
-                    await session.execute(
-                        text(
-                            """
-                        SELECT c.id, c.keywords, c.time, c.trigger_count, c.clear_time,
-                            COALESCE((
-                                SELECT jsonb_agg(jsonb_build_object(
-                                    'keywords', b.keywords, 'group_id', b.group_id,
-                                    'reason', b.reason, 'time', b.time
-                                ) ORDER BY b.id)
-                                FROM context_ban b WHERE b.context_id = c.id
-                            ), '[]'::jsonb) AS bans
-                        FROM context c WHERE c.keywords_hash = :khash
-                        """
-                        ),
-                        {"khash": khash},
-                    )
-                )
+        async with get_reply_session() as session:
+            row = (
+                (await session.execute(_REPLY_SNAPSHOT_SQL, {"khash": khash, "ans_cap": ans_cap, "msg_cap": msg_cap}))
                 .mappings()
                 .one_or_none()
             )
-            row = None
-            if context_row is not None:
-                answer_row = (
-                    (
-                        await session.execute(
-                            text(
-                                """
-                            WITH answers AS (
-                                SELECT a.id, a.keywords, a.group_id, a.count, a.time
-                                FROM context_answer a
-                                WHERE a.context_id = :context_id
-                                ORDER BY a.count DESC, a.time DESC LIMIT :ans_cap
-                            ), ranked_messages AS (
-                                SELECT m.answer_id, m.message, m.id,
-                                       row_number() OVER (PARTITION BY m.answer_id ORDER BY m.id DESC) AS rn
-                                FROM context_answer_message m JOIN answers a ON a.id = m.answer_id
-                            ), messages AS (
-                                SELECT answer_id, jsonb_agg(message ORDER BY id) AS values
-                                FROM ranked_messages WHERE rn <= :msg_cap GROUP BY answer_id
-                            )
-                            SELECT COALESCE(jsonb_agg(jsonb_build_object(
-                                'keywords', a.keywords, 'group_id', a.group_id,
-                                'count', a.count, 'time', a.time,
-                                'messages', COALESCE(m.values, '[]'::jsonb)
-                            ) ORDER BY a.count DESC, a.time DESC), '[]'::jsonb) AS answers
-                            FROM answers a LEFT JOIN messages m ON m.answer_id = a.id
-                            """
-                            ),
-                            {"context_id": context_row["id"], "ans_cap": ans_cap, "msg_cap": msg_cap},
-                        )
-                    )
-                    .mappings()
-                    .one()
-                )
-                row = {**context_row, "answers": answer_row["answers"]}
         elapsed_ms = (time.monotonic() - t_start) * 1000.0
         if row is None:
             self._log_reply_query_slow(
@@ -1419,13 +1638,13 @@ class PgContextRepository:
             message_count=sum(len(answer["messages"]) for answer in answers),
             hit=True,
         )
-        return Context.model_construct(
-            keywords=row["keywords"],
-            time=row["time"],
-            trigger_count=row["trigger_count"],
-            clear_time=row["clear_time"],
-            ban=[Ban.model_construct(**ban) for ban in bans],
-            answers=[Answer.model_construct(**answer) for answer in answers],
+        return ContextRecord(
+            row["keywords"],
+            row["time"],
+            row["trigger_count"],
+            [AnswerRecord(**answer) for answer in answers],
+            [BanRecord(**ban) for ban in bans],
+            row["clear_time"],
         )
 
     @staticmethod
@@ -1522,7 +1741,36 @@ class PgContextRepository:
     _DELETE_EXPIRED_CHUNK = 10000
 
     async def delete_expired(self, expiration: int, threshold: int) -> None:
-        """分批删除过期 Context，避免千万级时长锁表。级联删除由 FK ondelete=CASCADE 处理。"""
+        """分批删除过期 Context，避免千万级时长锁表。级联删除由 FK ondelete=CASCADE（分区布局下为级联触发器）处理。"""
+        from pallas.core.foundation.db.context_partitions import (
+            context_partition_names,
+            refresh_context_partition_layout,
+        )
+
+        # 维护任务不在热路径上，每次从目录重读布局，别的 worker 在线切换后也能走逐片删
+        partitions = context_partition_names("context", await refresh_context_partition_layout())
+        if partitions:
+            deleted_any = False
+            # 分区布局：逐片删，每批的扫描、级联与之后的 vacuum 都只落在一片上
+            for part in partitions:
+                while True:
+                    async with get_session() as session:
+                        result = await session.execute(
+                            text(
+                                f"DELETE FROM {part} WHERE id IN ("
+                                f"SELECT id FROM {part} WHERE time < :expiration AND trigger_count < :threshold "
+                                "LIMIT :chunk) RETURNING id"
+                            ),
+                            {"expiration": expiration, "threshold": threshold, "chunk": self._DELETE_EXPIRED_CHUNK},
+                        )
+                        deleted = len(result.scalars().all())
+                        await session.commit()
+                    deleted_any = deleted_any or deleted > 0
+                    if deleted < self._DELETE_EXPIRED_CHUNK:
+                        break
+            if deleted_any:
+                await clear_reply_query_snapshot_cache(None)
+            return
         deleted_any = False
         while True:
             async with get_session() as session:
@@ -1545,12 +1793,12 @@ class PgContextRepository:
 
     _CLEANUP_CHUNK = 500
 
-    async def find_for_cleanup(self, trigger_threshold: int, expiration: int) -> list[Context]:
+    async def find_for_cleanup(self, trigger_threshold: int, expiration: int) -> list[ContextRecord]:
         """
         语义对齐 Mongo：trigger_count > threshold OR clear_time < expiration。
         流式按主键 id 分页，避免千万级时一次性全加载 OOM。
         """
-        results: list[Context] = []
+        results: list[ContextRecord] = []
         last_id = 0
         while True:
             async with get_session(read_only=True) as session:
@@ -1576,6 +1824,129 @@ class PgContextRepository:
                 break
         return results
 
+    _PRUNE_CURSOR = "context_answer_prune"
+    _PRUNE_CONTEXT_CHUNK = 1000
+
+    async def prune_expired_answers(
+        self,
+        *,
+        trigger_threshold: int,
+        expiration: int,
+        clear_time: int,
+        budget_sec: float,
+    ) -> ContextCleanupProgress:
+        """
+        集合式清理，语义同逐条 find_for_cleanup + replace_answers：
+        命中 trigger_count > threshold OR clear_time < expiration 的 Context，
+        删掉 count <= 1 且 time <= expiration 的 Answer（Message 由 FK 级联），并刷新 clear_time。
+        按主键 keyset 分批，每批一个事务，断点与本轮累计进度随批次一起写进 maintenance_cursor；
+        超出 budget_sec 即停，下次从断点续跑，扫到表尾后断点归零。
+        分区布局下每批按 context_id 所在分片分组，逐片删 Answer，每条 DELETE 只落在一片上。
+        """
+        from pallas.core.foundation.db.context_partitions import refresh_context_partition_layout
+        from pallas.core.foundation.db.repository import ContextCleanupProgress
+
+        partitions = await refresh_context_partition_layout()
+        started = time.monotonic()
+        deadline = started + max(0.0, float(budget_sec))
+        contexts = answers_deleted = batches = 0
+        async with get_session(read_only=True) as session:
+            cursor = await session.get(MaintenanceCursorRow, self._PRUNE_CURSOR)
+            last_id = int(cursor.last_id) if cursor is not None else 0
+        finished = False
+        while True:
+            async with get_session() as session:
+                ctx_ids = list(
+                    (
+                        await session.execute(
+                            select(ContextRow.id)
+                            .where(
+                                ContextRow.id > last_id,
+                                or_(
+                                    ContextRow.trigger_count > trigger_threshold,
+                                    ContextRow.clear_time < expiration,
+                                ),
+                            )
+                            .order_by(ContextRow.id)
+                            .limit(self._PRUNE_CONTEXT_CHUNK)
+                        )
+                    )
+                    .scalars()
+                    .all()
+                )
+                finished = len(ctx_ids) < self._PRUNE_CONTEXT_CHUNK
+                deleted = 0
+                if ctx_ids and partitions:
+                    deleted = await _prune_answers_by_partition(session, ctx_ids, expiration, partitions)
+                elif ctx_ids:
+                    # 条件与删除放在同一条语句里：先查 id 再按 id 删时，并发 learn_answer 刚把
+                    # count 加上去的 Answer 仍会被删掉
+                    deleted = len(
+                        (
+                            await session.execute(
+                                delete(ContextAnswerRow)
+                                .where(
+                                    ContextAnswerRow.context_id == _any_id(ctx_ids),
+                                    ContextAnswerRow.count <= 1,
+                                    ContextAnswerRow.time <= expiration,
+                                )
+                                .returning(ContextAnswerRow.id)
+                            )
+                        ).all()
+                    )
+                if ctx_ids:
+                    await session.execute(
+                        update(ContextRow).where(ContextRow.id == _any_id(ctx_ids)).values(clear_time=clear_time)
+                    )
+                    last_id = int(ctx_ids[-1])
+                now = int(time.time())
+                cursor_values = {
+                    "last_id": 0 if finished else last_id,
+                    "processed": len(ctx_ids),
+                    "deleted": deleted,
+                    "pass_started_at": now,
+                    "updated_at": now,
+                }
+                stmt = pg_insert(MaintenanceCursorRow).values(name=self._PRUNE_CURSOR, **cursor_values)
+                await session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[MaintenanceCursorRow.name],
+                        set_={
+                            "last_id": stmt.excluded.last_id,
+                            # 本轮从 0 起算时重置累计量，续跑时累加
+                            "processed": case(
+                                (MaintenanceCursorRow.last_id == 0, stmt.excluded.processed),
+                                else_=MaintenanceCursorRow.processed + stmt.excluded.processed,
+                            ),
+                            "deleted": case(
+                                (MaintenanceCursorRow.last_id == 0, stmt.excluded.deleted),
+                                else_=MaintenanceCursorRow.deleted + stmt.excluded.deleted,
+                            ),
+                            "pass_started_at": case(
+                                (MaintenanceCursorRow.last_id == 0, stmt.excluded.pass_started_at),
+                                else_=MaintenanceCursorRow.pass_started_at,
+                            ),
+                            "updated_at": stmt.excluded.updated_at,
+                        },
+                    )
+                )
+                await session.commit()
+            contexts += len(ctx_ids)
+            answers_deleted += deleted
+            batches += 1
+            if finished or time.monotonic() >= deadline:
+                break
+        if answers_deleted:
+            await clear_reply_query_snapshot_cache(None)
+        return ContextCleanupProgress(
+            contexts=contexts,
+            answers_deleted=answers_deleted,
+            batches=batches,
+            last_id=0 if finished else last_id,
+            finished=finished,
+            elapsed_ms=(time.monotonic() - started) * 1000.0,
+        )
+
     async def upsert_answer(
         self,
         keywords: str,
@@ -1588,7 +1959,7 @@ class PgContextRepository:
         """
         原子 upsert，依赖 UNIQUE(context_id, group_id, keywords)：
           - INSERT ... ON CONFLICT DO UPDATE SET count = count + 1, time = EXCLUDED.time
-          - RETURNING 中借助 xmax 判断 insert vs update，决定是否 append message
+          - RETURNING 中借助 xmax（分区表为 upsert 后计数）判断 insert vs update，决定是否 append message
           - 最后原子递增 Context.trigger_count / 更新 time
         """
         khash = keywords_hash(keywords)
@@ -1597,41 +1968,44 @@ class PgContextRepository:
         if reject_corpus_learn_message(msg_s, source="upsert_answer"):
             return
 
-        async with get_session() as session:
-            ctx_result = await session.execute(select(ContextRow.id).where(ContextRow.keywords_hash == khash))
-            ctx_id = ctx_result.scalar_one_or_none()
-            if ctx_id is None:
-                return
+        async def write() -> None:
+            async with get_session() as session:
+                ctx_result = await session.execute(select(ContextRow.id).where(ContextRow.keywords_hash == khash))
+                ctx_id = ctx_result.scalar_one_or_none()
+                if ctx_id is None:
+                    return
 
-            stmt = pg_insert(ContextAnswerRow).values(
-                context_id=ctx_id,
-                keywords=ans_kw_s,
-                keywords_hash=keywords_hash(ans_kw_s),
-                group_id=group_id,
-                count=1,
-                time=answer_time,
-            )
-            stmt = stmt.on_conflict_do_update(
-                constraint="uq_context_answer_ctx_group_kw",
-                set_={
-                    "count": ContextAnswerRow.count + 1,
-                    "time": stmt.excluded.time,
-                },
-            ).returning(ContextAnswerRow.id, literal_column("(xmax = 0)").label("was_insert"))
+                stmt = pg_insert(ContextAnswerRow).values(
+                    context_id=ctx_id,
+                    keywords=ans_kw_s,
+                    keywords_hash=keywords_hash(ans_kw_s),
+                    group_id=group_id,
+                    count=1,
+                    time=answer_time,
+                )
+                stmt = stmt.on_conflict_do_update(
+                    constraint="uq_context_answer_ctx_group_kw",
+                    set_={
+                        "count": ContextAnswerRow.count + 1,
+                        "time": stmt.excluded.time,
+                    },
+                ).returning(ContextAnswerRow.id, _was_insert_column(ContextAnswerRow.count))
 
-            row = (await session.execute(stmt)).first()
-            assert row is not None
-            ans_id, was_insert = int(row.id), bool(row.was_insert)
+                row = (await session.execute(stmt)).first()
+                assert row is not None
+                ans_id, was_insert = int(row.id), _was_insert(row.was_insert, 1)
 
-            if was_insert or append_on_existing:
-                await session.execute(insert(ContextAnswerMessageRow).values(answer_id=ans_id, message=msg_s))
+                if was_insert or append_on_existing:
+                    await session.execute(insert(ContextAnswerMessageRow).values(answer_id=ans_id, message=msg_s))
 
-            await session.execute(
-                update(ContextRow)
-                .where(ContextRow.id == ctx_id)
-                .values(trigger_count=ContextRow.trigger_count + 1, time=answer_time)
-            )
-            await session.commit()
+                await session.execute(
+                    update(ContextRow)
+                    .where(ContextRow.id == ctx_id)
+                    .values(trigger_count=ContextRow.trigger_count + 1, time=answer_time)
+                )
+                await session.commit()
+
+        await _retry_on_stale_partition_layout(write)
 
     async def learn_answer(
         self,
@@ -1644,9 +2018,9 @@ class PgContextRepository:
         append_on_existing: bool,
     ) -> bool:
         """
-        学习热路径专用：
+        学习热路径专用，整条链路是一条 CTE 语句、一次往返：
           - Context 不存在时直接原子创建并写入首条 Answer
-          - Context 已存在时在同一事务内原子 upsert Answer
+          - Context 已存在时在同一语句内原子 upsert Answer
         返回值表示本次是否新建了 Context。
         """
         khash = keywords_hash(keywords)
@@ -1656,53 +2030,185 @@ class PgContextRepository:
         if reject_corpus_learn_message(msg_s, source="learn_answer"):
             return False
 
-        async with get_session() as session:
-            ctx_stmt = pg_insert(ContextRow).values(
-                keywords=kw_s,
-                keywords_hash=khash,
-                time=answer_time,
-                trigger_count=1,
-                clear_time=0,
-            )
-            ctx_stmt = ctx_stmt.on_conflict_do_update(
-                index_elements=[ContextRow.keywords_hash],
-                set_={
-                    "trigger_count": ContextRow.trigger_count + 1,
-                    "time": ctx_stmt.excluded.time,
-                },
-            ).returning(ContextRow.id, literal_column("(xmax = 0)").label("was_insert"))
+        from pallas.core.foundation.db.context_partitions import context_partition_count
 
-            ctx_row = (await session.execute(ctx_stmt)).first()
-            assert ctx_row is not None
-            ctx_id, ctx_created = int(ctx_row.id), bool(ctx_row.was_insert)
-
-            ans_stmt = pg_insert(ContextAnswerRow).values(
-                context_id=ctx_id,
-                keywords=ans_kw_s,
-                keywords_hash=keywords_hash(ans_kw_s),
+        async def write() -> bool:
+            # 每次按当前布局取语句变体，布局重读后的重试才会换成分区版本
+            partitioned = bool(context_partition_count())
+            async with get_session() as session:
+                row = (
+                    await session.execute(
+                        _learn_answer_pipeline(partitioned),
+                        {
+                            "kw": kw_s,
+                            "khash": khash,
+                            "ts": answer_time,
+                            "ans_kw": ans_kw_s,
+                            "ans_khash": keywords_hash(ans_kw_s),
+                            "gid": group_id,
+                            "msg": msg_s,
+                            "append": append_on_existing,
+                        },
+                    )
+                ).one()
+                created = _was_insert(row.ctx_was_insert, 1)
+                await session.commit()
+            return created
+
+        ctx_created = await _retry_on_stale_partition_layout(write)
+        if ctx_created:
+            await clear_reply_query_snapshot_cache(keywords)
+        from pallas.core.foundation.db.repository import LearnAnswerItem
+        from pallas.product.corpus.hot_rollup import note_hot_learn
+        from pallas.product.corpus.read_cache import note_corpus_learn
+
+        note_corpus_learn(kw_s)
+        note_hot_learn([
+            LearnAnswerItem(
+                keywords=kw_s,
                 group_id=group_id,
-                count=1,
-                time=answer_time,
+                answer_keywords=ans_kw_s,
+                answer_time=answer_time,
+                message=msg_s,
+                append_on_existing=append_on_existing,
             )
-            ans_stmt = ans_stmt.on_conflict_do_update(
-                constraint="uq_context_answer_ctx_group_kw",
-                set_={
-                    "count": ContextAnswerRow.count + 1,
-                    "time": ans_stmt.excluded.time,
-                },
-            ).returning(ContextAnswerRow.id, literal_column("(xmax = 0)").label("was_insert"))
+        ])
+        return ctx_created
 
-            ans_row = (await session.execute(ans_stmt)).first()
-            assert ans_row is not None
-            ans_id, answer_created = int(ans_row.id), bool(ans_row.was_insert)
+    async def learn_answers(self, items: list[LearnAnswerItem]) -> list[bool]:
+        """
+        批量学习：同批按 (keywords, group_id, answer_keywords) 合并为计数增量，
+        Context / Answer / Message 各一条多行 INSERT ... ON CONFLICT，同一事务提交。
+        语义与逐条 learn_answer 等价；返回值与 items 对齐，仅新建 Context 的首条为 True。
+        """
+        created_flags = [False] * len(items)
+        # khash -> [keywords, trigger 增量, 末条 time, 首条下标]
+        ctx_groups: dict[str, list[Any]] = {}
+        # (khash, group_id, answer khash) -> [answer keywords, count 增量, 末条 time, [(下标, message, append)]]
+        ans_groups: dict[tuple[str, int, str], list[Any]] = {}
+        accepted: list[LearnAnswerItem] = []
+        for index, item in enumerate(items):
+            msg_s = _s(item.message) or ""
+            if reject_corpus_learn_message(msg_s, source="learn_answer"):
+                continue
+            accepted.append(item)
+            kw_s = _s(item.keywords) or ""
+            ans_kw_s = _s(item.answer_keywords) or ""
+            khash = keywords_hash(kw_s)
+            ctx = ctx_groups.setdefault(khash, [kw_s, 0, 0, index])
+            ctx[1] += 1
+            ctx[2] = int(item.answer_time)
+            ans = ans_groups.setdefault((khash, int(item.group_id), keywords_hash(ans_kw_s)), [ans_kw_s, 0, 0, []])
+            ans[1] += 1
+            ans[2] = int(item.answer_time)
+            ans[3].append((index, msg_s, bool(item.append_on_existing)))
+        if not ctx_groups:
+            return created_flags
 
-            if answer_created or append_on_existing:
-                await session.execute(insert(ContextAnswerMessageRow).values(answer_id=ans_id, message=msg_s))
+        t_start = time.monotonic()
 
-            await session.commit()
-            if ctx_created:
-                await clear_reply_query_snapshot_cache(keywords)
-            return ctx_created
+        async def write() -> tuple[list[str], int]:
+            ctx_ids: dict[str, int] = {}
+            created_hashes: list[str] = []
+            answer_ids: dict[tuple[str, int, str], tuple[int, bool]] = {}
+            async with get_session() as session:
+                # 按 hash 排序写入，并发批次之间加锁顺序一致，避免死锁
+                ctx_keys = sorted(ctx_groups)
+                for offset in range(0, len(ctx_keys), _ANSWER_BATCH):
+                    chunk = ctx_keys[offset : offset + _ANSWER_BATCH]
+                    ctx_stmt = pg_insert(ContextRow).values([
+                        {
+                            "keywords": ctx_groups[khash][0],
+                            "keywords_hash": khash,
+                            "time": ctx_groups[khash][2],
+                            "trigger_count": ctx_groups[khash][1],
+                            "clear_time": 0,
+                        }
+                        for khash in chunk
+                    ])
+                    ctx_stmt = ctx_stmt.on_conflict_do_update(
+                        index_elements=[ContextRow.keywords_hash],
+                        set_={
+                            "trigger_count": ContextRow.trigger_count + ctx_stmt.excluded.trigger_count,
+                            "time": ctx_stmt.excluded.time,
+                        },
+                    ).returning(ContextRow.id, ContextRow.keywords_hash, _was_insert_column(ContextRow.trigger_count))
+                    for row in (await session.execute(ctx_stmt)).all():
+                        ctx_ids[str(row.keywords_hash)] = int(row.id)
+                        if _was_insert(row.was_insert, ctx_groups[str(row.keywords_hash)][1]):
+                            created_hashes.append(str(row.keywords_hash))
+
+                ans_keys = sorted(ans_groups, key=lambda key: (ctx_ids[key[0]], key[1], key[2]))
+                for offset in range(0, len(ans_keys), _ANSWER_BATCH):
+                    chunk = ans_keys[offset : offset + _ANSWER_BATCH]
+                    ans_stmt = pg_insert(ContextAnswerRow).values([
+                        {
+                            "context_id": ctx_ids[key[0]],
+                            "keywords": ans_groups[key][0],
+                            "keywords_hash": key[2],
+                            "group_id": key[1],
+                            "count": ans_groups[key][1],
+                            "time": ans_groups[key][2],
+                        }
+                        for key in chunk
+                    ])
+                    ans_stmt = ans_stmt.on_conflict_do_update(
+                        constraint="uq_context_answer_ctx_group_kw",
+                        set_={
+                            "count": ContextAnswerRow.count + ans_stmt.excluded.count,
+                            "time": ans_stmt.excluded.time,
+                        },
+                    ).returning(
+                        ContextAnswerRow.id,
+                        ContextAnswerRow.context_id,
+                        ContextAnswerRow.group_id,
+                        ContextAnswerRow.keywords_hash,
+                        _was_insert_column(ContextAnswerRow.count),
+                    )
+                    hash_by_ctx_id = {ctx_ids[key[0]]: key[0] for key in chunk}
+                    for row in (await session.execute(ans_stmt)).all():
+                        key = (hash_by_ctx_id[int(row.context_id)], int(row.group_id), str(row.keywords_hash))
+                        answer_ids[key] = (int(row.id), _was_insert(row.was_insert, ans_groups[key][1]))
+
+                # 逐条语义：新建 Answer 的首条必写 message，其余仅 append_on_existing 时追加
+                msg_entries: list[tuple[int, int, str]] = []
+                for key, (_ans_kw, _count, _time, entries) in ans_groups.items():
+                    ans_id, answer_created = answer_ids[key]
+                    for position, (index, msg_s, append) in enumerate(entries):
+                        if append or (answer_created and position == 0):
+                            msg_entries.append((index, ans_id, msg_s))
+                msg_entries.sort()
+                for offset in range(0, len(msg_entries), _MSG_BATCH):
+                    await session.execute(
+                        insert(ContextAnswerMessageRow).values([
+                            {"answer_id": ans_id, "message": msg_s}
+                            for _index, ans_id, msg_s in msg_entries[offset : offset + _MSG_BATCH]
+                        ])
+                    )
+                await session.commit()
+            return created_hashes, len(msg_entries)
+
+        created_hashes, message_count = await _retry_on_stale_partition_layout(write)
+
+        for khash in created_hashes:
+            created_flags[ctx_groups[khash][3]] = True
+            await clear_reply_query_snapshot_cache(ctx_groups[khash][0])
+        from pallas.core.platform.ingress.hotpath_metrics import record_learn_batch
+        from pallas.product.corpus.hot_rollup import note_hot_learn
+        from pallas.product.corpus.read_cache import note_corpus_learn
+
+        for group in ctx_groups.values():
+            note_corpus_learn(group[0])
+        note_hot_learn(accepted)
+
+        record_learn_batch(
+            items=len(items),
+            contexts=len(ctx_groups),
+            answers=len(ans_groups),
+            messages=message_count,
+            duration_ms=(time.monotonic() - t_start) * 1000.0,
+        )
+        return created_flags
 
     async def replace_answers(self, keywords: str, answers: list[Answer], clear_time: int) -> None:
         khash = keywords_hash(keywords)
@@ -1796,9 +2302,7 @@ class PgContextRepository:
             pre_keywords, reply_keywords = row
             return str(pre_keywords), str(reply_keywords)
 
-    async def list_answers_for_group_since(self, group_id: int, cutoff_time: int) -> list[Answer]:
-        from pallas.core.foundation.db.modules import Answer
-
+    async def list_answers_for_group_since(self, group_id: int, cutoff_time: int) -> list[AnswerRecord]:
         async with get_session(read_only=True) as session:
             result = await session.execute(
                 select(ContextAnswerRow)
@@ -1810,35 +2314,62 @@ class PgContextRepository:
             )
             rows = list(result.scalars().all())
         return [
-            Answer(
-                keywords=str(row.keywords),
-                group_id=int(row.group_id),
-                count=int(row.count),
-                time=int(row.time),
-                messages=[str(msg.message) for msg in row.messages],
+            AnswerRecord(
+                str(row.keywords),
+                int(row.group_id),
+                int(row.count),
+                int(row.time),
+                [str(msg.message) for msg in row.messages],
             )
             for row in rows
         ]
 
 
-def row_to_message(row: MessageRow) -> Message:
-    from pallas.core.foundation.db.modules import Message
-
-    return Message.model_construct(
-        group_id=int(row.group_id),
-        user_id=int(row.user_id),
-        bot_id=int(row.bot_id),
-        raw_message=str(row.raw_message),
-        is_plain_text=bool(row.is_plain_text),
-        plain_text=str(row.plain_text),
-        keywords=str(row.keywords),
-        sender_name=str(row.sender_name or ""),
-        message_id=int(row.message_id) if row.message_id is not None else None,
-        reply_to_message_id=int(row.reply_to_message_id) if row.reply_to_message_id is not None else None,
+def row_to_message(row: MessageRow) -> MessageRecord:
+    return MessageRecord(
+        int(row.group_id),
+        int(row.user_id),
+        int(row.bot_id),
+        str(row.raw_message),
+        bool(row.is_plain_text),
+        str(row.plain_text),
+        str(row.keywords),
+        str(row.sender_name or ""),
+        int(row.message_id) if row.message_id is not None else None,
+        int(row.reply_to_message_id) if row.reply_to_message_id is not None else None,
         time=int(row.time),
     )
 
 
+def _message_values(m: Message | MessageRecord) -> dict[str, Any]:
+    return {
+        "group_id": m.group_id,
+        "user_id": m.user_id,
+        "bot_id": m.bot_id,
+        "raw_message": _s(m.raw_message) or "",
+        "is_plain_text": m.is_plain_text,
+        "plain_text": _s(m.plain_text) or "",
+        "keywords": _s(m.keywords) or "",
+        "sender_name": _s(m.sender_name) or "",
+        "message_id": m.message_id,
+        "reply_to_message_id": m.reply_to_message_id,
+        "suppressed_by_rage": bool(getattr(m, "suppressed_by_rage", False)),
+        "time": m.time,
+    }
+
+
+@functools.cache
+def _recent_in_group_stmt(by_time: bool, by_user: bool):
+    """find_recent_in_group 的四种过滤组合各构造一次。"""
+    stmt = select(MessageRow).where(MessageRow.group_id == bindparam("group_id"))
+    if by_time:
+        stmt = stmt.where(MessageRow.time < bindparam("before_time"))
+    if by_user:
+        stmt = stmt.where(MessageRow.user_id == bindparam("user_id"))
+    stmt = stmt.order_by(MessageRow.time.desc()).limit(bindparam("cap", type_=Integer))
+    return hot_query(stmt, "find_recent_in_group")
+
+
 class PgMessageRepository:
     # MessageRow 有 8 列，asyncpg 单语句参数上限 32767，保守取 4000 行/批
     _BULK_BATCH_SIZE = 4000
@@ -1850,16 +2381,16 @@ class PgMessageRepository:
         before_time: int | None = None,
         user_id: int | None = None,
         limit: int = 8,
-    ) -> list[Message]:
+    ) -> list[MessageRecord]:
         cap = max(1, min(int(limit), 32))
-        stmt = select(MessageRow).where(MessageRow.group_id == int(group_id))
+        params: dict[str, int] = {"group_id": int(group_id), "cap": cap}
         if before_time is not None:
-            stmt = stmt.where(MessageRow.time < int(before_time))
+            params["before_time"] = int(before_time)
         if user_id is not None:
-            stmt = stmt.where(MessageRow.user_id == int(user_id))
-        stmt = stmt.order_by(MessageRow.time.desc()).limit(cap)
+            params["user_id"] = int(user_id)
+        stmt = _recent_in_group_stmt(before_time is not None, user_id is not None)
         async with get_session(read_only=True) as session:
-            result = await session.execute(stmt)
+            result = await session.execute(stmt, params)
             rows = list(result.scalars().all())
         rows.reverse()
         return [row_to_message(r) for r in rows]
@@ -1904,29 +2435,20 @@ class PgMessageRepository:
             result = await session.execute(stmt)
             return [int(row[0]) for row in result.all()]
 
-    async def bulk_insert(self, messages: list[Message]) -> None:
+    async def bulk_insert(self, messages: list[Message | MessageRecord]) -> None:
+        from pallas.core.foundation.db.pg_copy import COPY_MIN_ROWS, bulk_copy_enabled, copy_rows
+
         if not messages:
             return
         async with get_session() as session:
+            # 攒够一批的落库走 COPY；单条 / 小批或驱动不支持时照旧 executemany
+            if len(messages) >= COPY_MIN_ROWS and bulk_copy_enabled():
+                copied = await copy_rows(session, MessageRow.__table__, map(_message_values, messages))
+                if copied is not None:
+                    await session.commit()
+                    return
             for i in range(0, len(messages), self._BULK_BATCH_SIZE):
-                batch = messages[i : i + self._BULK_BATCH_SIZE]
-                values = [
-                    {
-                        "group_id": m.group_id,
-                        "user_id": m.user_id,
-                        "bot_id": m.bot_id,
-                        "raw_message": _s(m.raw_message) or "",
-                        "is_plain_text": m.is_plain_text,
-                        "plain_text": _s(m.plain_text) or "",
-                        "keywords": _s(m.keywords) or "",
-                        "sender_name": _s(m.sender_name) or "",
-                        "message_id": m.message_id,
-                        "reply_to_message_id": m.reply_to_message_id,
-                        "suppressed_by_rage": bool(getattr(m, "suppressed_by_rage", False)),
-                        "time": m.time,
-                    }
-                    for m in batch
-                ]
+                values = [_message_values(m) for m in messages[i : i + self._BULK_BATCH_SIZE]]
                 # 走 Core executemany，避免 ORM 构造开销
                 await session.execute(insert(MessageRow), values)
             await session.commit()
@@ -2313,48 +2835,59 @@ def _cfg_env(key: str, default: str) -> str:
 
 class _ConfigCache:
     """
-    简单的容量 + TTL 缓存，对齐 Mongo Beanie 的 model-level cache 语义。
-    对每个 (row_class) 一个实例；key 是主键值，value 是 (row, expire_ts)
-    None 也会被缓存。
+    容量 + TTL 缓存，对齐 Mongo Beanie 的 model-level cache 语义。
+    对每个 (row_class) 一个实例；key 是主键值，value 是 [row, expire_ts, touched_ts]，None 也会被缓存。
+
+    读路径不加锁：单事件循环里 dict 的读写本身原子，超容量时整体换一个裁剪后的新 dict。
+    命中时只刷新条目上的 touched_ts，裁剪按它留最近用过的，淘汰顺序仍是 LRU。
+    ``epoch`` 在失效时递增：回源前记下，回源期间若被失效就不回填，免得把旧行塞回去。
     """
 
-    def __init__(self, ttl: float, capacity: int) -> None:
+    __slots__ = ("_capacity", "_pushed_ttl", "_store", "_ttl", "epoch")
+
+    def __init__(self, ttl: float, capacity: int, *, pushed_ttl: float | None = None) -> None:
         self._ttl = ttl
+        self._pushed_ttl = ttl if pushed_ttl is None else max(ttl, pushed_ttl)
         self._capacity = capacity
-        self._store: OrderedDict[Any, tuple[Any, float]] = OrderedDict()
-        self._lock = asyncio.Lock()
+        self._store: dict[Any, list[Any]] = {}
+        self.epoch = 0
 
-    async def get(self, key: Any) -> tuple[bool, Any]:
-        """TTL 缓存查询，返回 hit 与 value。"""
-        if self._ttl <= 0 or self._capacity <= 0:
+    def get(self, key: Any) -> tuple[bool, Any]:
+        """TTL 缓存查询，返回 hit 与 value；过期条目留给下次 put 覆盖。"""
+        item = self._store.get(key)
+        if item is None:
+            return False, None
+        now = time.monotonic()
+        if item[1] <= now:
             return False, None
-        async with self._lock:
-            item = self._store.get(key)
-            if item is None:
-                return False, None
-            value, expire_ts = item
-            if expire_ts <= time.time():
-                self._store.pop(key, None)
-                return False, None
-            self._store.move_to_end(key)
-            return True, value
-
-    async def put(self, key: Any, value: Any) -> None:
+        item[2] = now
+        return True, item[0]
+
+    def put(self, key: Any, value: Any, *, epoch: int | None = None) -> None:
         if self._ttl <= 0 or self._capacity <= 0:
             return
-        async with self._lock:
-            self._store[key] = (value, time.time() + self._ttl)
-            self._store.move_to_end(key)
-            while len(self._store) > self._capacity:
-                self._store.popitem(last=False)
+        if epoch is not None and epoch != self.epoch:
+            return
+        from pallas.core.foundation.db.config_invalidation import config_push_active
 
-    async def invalidate(self, key: Any) -> None:
-        async with self._lock:
-            self._store.pop(key, None)
+        now = time.monotonic()
+        store = self._store
+        store[key] = [value, now + (self._pushed_ttl if config_push_active() else self._ttl), now]
+        if len(store) > self._capacity:
+            # 先丢过期，仍超则按最近使用留九成，摊薄裁剪次数
+            live = [(k, item) for k, item in store.items() if item[1] > now]
+            if len(live) > self._capacity:
+                live.sort(key=lambda entry: entry[1][2])
+                live = live[-max(1, self._capacity * 9 // 10) :]
+            self._store = dict(live)
 
-    async def clear(self) -> None:
-        async with self._lock:
-            self._store.clear()
+    def invalidate(self, key: Any) -> None:
+        self.epoch += 1
+        self._store.pop(key, None)
+
+    def clear(self) -> None:
+        self.epoch += 1
+        self._store = {}
 
 
 _CONFIG_CACHES: dict[type, _ConfigCache] = {}
@@ -2364,12 +2897,29 @@ def _get_config_cache(row_class: type) -> _ConfigCache:
     cache = _CONFIG_CACHES.get(row_class)
     if cache is None:
         ttl = float(_cfg_env("PG_CONFIG_CACHE_TTL", "60"))
+        pushed_ttl = float(_cfg_env("PG_CONFIG_CACHE_PUSHED_TTL", "600"))
         capacity = int(_cfg_env("PG_CONFIG_CACHE_SIZE", "10000"))
-        cache = _ConfigCache(ttl=ttl, capacity=capacity)
+        cache = _ConfigCache(ttl=ttl, capacity=capacity, pushed_ttl=pushed_ttl)
         _CONFIG_CACHES[row_class] = cache
     return cache
 
 
+def invalidate_config_cache(table: str | None, key: Any = None) -> None:
+    """按表 / 主键丢本地配置缓存；table 为 None 清全部。跨进程失效通知最终落到这里。"""
+    if table is None:
+        for cache in _CONFIG_CACHES.values():
+            cache.clear()
+        return
+    entry = _CONFIG_TABLE_MAP.get(table)
+    cache = _CONFIG_CACHES.get(entry[0]) if entry is not None else None
+    if cache is None:
+        return
+    if key is None:
+        cache.clear()
+    else:
+        cache.invalidate(key)
+
+
 class PgConfigRepository:
     def __init__(self, table: str, primary_key: str) -> None:
         if table not in _CONFIG_TABLE_MAP:
@@ -2379,14 +2929,15 @@ class PgConfigRepository:
         # 这里做一致性断言，避免静默与 _CONFIG_TABLE_MAP 失同步。
         if primary_key != pk_field:
             raise ValueError(f"primary_key {primary_key!r} 与 {table} 登记的主键 {pk_field!r} 不一致")
-        self._row_class, self._pk_field = row_class, pk_field
+        self._table, self._row_class, self._pk_field = table, row_class, pk_field
         self._cache = _get_config_cache(self._row_class)
 
     async def get(self, key_id: int, *, ignore_cache: bool = False) -> Any | None:
         if not ignore_cache:
-            hit, value = await self._cache.get(key_id)
+            hit, value = self._cache.get(key_id)
             if hit:
                 return value
+        epoch = self._cache.epoch
         async with get_session(read_only=True) as session:
             result = await session.execute(
                 select(self._row_class).where(getattr(self._row_class, self._pk_field) == key_id)
@@ -2394,7 +2945,7 @@ class PgConfigRepository:
             row = result.scalar_one_or_none()
             if row is not None:
                 session.expunge(row)
-        await self._cache.put(key_id, row)
+        self._cache.put(key_id, row, epoch=epoch)
         return row
 
     async def list_all(self) -> list[Any]:
@@ -2405,6 +2956,9 @@ class PgConfigRepository:
         return rows
 
     async def get_or_create(self, key_id: int, **defaults: Any) -> tuple[Any, bool]:
+        from pallas.core.foundation.db.config_invalidation import announce_config_write, note_config_write
+
+        epoch = self._cache.epoch
         async with get_session() as session:
             result = await session.execute(
                 select(self._row_class).where(getattr(self._row_class, self._pk_field) == key_id)
@@ -2412,11 +2966,13 @@ class PgConfigRepository:
             row = result.scalar_one_or_none()
             if row is not None:
                 session.expunge(row)
-                await self._cache.put(key_id, row)
+                self._cache.put(key_id, row, epoch=epoch)
                 return row, False
             try:
                 new_row = self._row_class(**{self._pk_field: key_id, **_strip_null_deep(defaults)})
                 session.add(new_row)
+                # 别的进程可能缓存着“不存在”，新建同样要广播
+                await note_config_write(session, self._table, key_id)
                 await session.commit()
             except IntegrityError:
                 # 并发下已被其他 writer 插入，回源拿最新行
@@ -2427,10 +2983,13 @@ class PgConfigRepository:
                 existing = result.scalar_one_or_none()
                 if existing is not None:
                     session.expunge(existing)
-                await self._cache.put(key_id, existing)
+                self._cache.put(key_id, existing)
                 return existing, False
             session.expunge(new_row)
-            await self._cache.put(key_id, new_row)
+            # 先递增 epoch：并发回源读到的“不存在”不再回填
+            self._cache.invalidate(key_id)
+            self._cache.put(key_id, new_row)
+            announce_config_write(self._table, key_id)
             return new_row, True
 
     async def upsert_field(self, key_id: int, field: str, value: Any) -> None:
@@ -2443,8 +3002,7 @@ class PgConfigRepository:
                 set_={field: getattr(stmt.excluded, field)},
             )
             await session.execute(stmt)
-            await session.commit()
-        await self._cache.invalidate(key_id)
+            await self._committed_write(session, key_id)
 
     async def upsert_fields(self, key_id: int, fields: dict[str, Any]) -> None:
         """批量字段级 upsert"""
@@ -2458,11 +3016,19 @@ class PgConfigRepository:
                 set_={k: getattr(stmt.excluded, k) for k in cleaned},
             )
             await session.execute(stmt)
-            await session.commit()
-        await self._cache.invalidate(key_id)
+            await self._committed_write(session, key_id)
+
+    async def _committed_write(self, session: AsyncSession, key_id: int) -> None:
+        """提交写事务并失效本地与其它进程的缓存；PG 通道的 NOTIFY 随事务一起提交。"""
+        from pallas.core.foundation.db.config_invalidation import announce_config_write, note_config_write
+
+        await note_config_write(session, self._table, key_id)
+        await session.commit()
+        self._cache.invalidate(key_id)
+        announce_config_write(self._table, key_id)
 
     async def invalidate_cache(self) -> None:
-        await self._cache.clear()
+        self._cache.clear()
 
 
 def image_cache_has_blob_clause():
@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import os
+import time
+from typing import Any
 
 _BACKEND_ALIASES: dict[str, str] = {
     "mongo": "mongodb",
@@ -39,3 +41,107 @@ def is_mongodb_backend(backend: str | None = None) -> bool:
 
 def is_postgresql_backend(backend: str | None = None) -> bool:
     return normalize_db_backend_name(backend or get_db_backend()) == "postgresql"
+
+
+# 接话只读池：指向只读副本（PG_REPLICA_HOST）或同库独立小池（PG_REPLY_POOL_SIZE），
+# 接话快照与 bundle 预取走这里，不与学习 / 后台写争主池；副本连不上时冷却期内回落主池。
+_REPLY_RETRY_SEC_DEFAULT = 30.0
+_reply_engine: Any = None
+_reply_target = ""
+_reply_capacity = 0
+_reply_down_until = 0.0
+_reply_stats: dict[str, int] = {"sessions": 0, "failovers": 0, "errors": 0}
+
+
+def _repo_env_int(key: str, default: int, *, minimum: int = 0) -> int:
+    from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+    raw = repo_env_raw_value(key)
+    if raw is not None:
+        try:
+            return max(minimum, int(str(raw).strip()))
+        except ValueError:
+            pass
+    return default
+
+
+def reply_read_pool_settings() -> dict[str, Any] | None:
+    """未配副本且 PG_REPLY_POOL_SIZE=0（默认）时返回 None，接话沿用主池。"""
+    from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+    host = str(repo_env_raw_value("PG_REPLICA_HOST") or "").strip()
+    pool_size = _repo_env_int("PG_REPLY_POOL_SIZE", 4 if host else 0)
+    if pool_size <= 0:
+        return None
+    return {
+        "host": host or None,
+        "port": _repo_env_int("PG_REPLICA_PORT", 0, minimum=0) or None,
+        "pool_size": pool_size,
+        "max_overflow": _repo_env_int("PG_REPLY_MAX_OVERFLOW", 2),
+    }
+
+
+def reply_read_retry_sec() -> float:
+    return float(_repo_env_int("PG_REPLY_REPLICA_RETRY_SEC", int(_REPLY_RETRY_SEC_DEFAULT), minimum=1))
+
+
+def install_reply_read_engine(engine: Any, *, target: str, capacity: int) -> None:
+    global _reply_engine, _reply_target, _reply_capacity, _reply_down_until
+    _reply_engine = engine
+    _reply_target = target
+    _reply_capacity = max(1, int(capacity))
+    _reply_down_until = 0.0
+
+
+def reply_read_engine(*, now: float | None = None) -> Any:
+    """可用的接话只读 engine；未配置或处于故障冷却期返回 None（调用方回落主池）。"""
+    if _reply_engine is None:
+        return None
+    cur = time.monotonic() if now is None else now
+    if cur < _reply_down_until:
+        return None
+    return _reply_engine
+
+
+def note_reply_read_session() -> None:
+    _reply_stats["sessions"] += 1
+
+
+def note_reply_read_failure(*, now: float | None = None) -> None:
+    """只读池取连接或查询失败：进入冷却，期间接话走主池。"""
+    global _reply_down_until
+    cur = time.monotonic() if now is None else now
+    _reply_stats["errors"] += 1
+    _reply_down_until = cur + reply_read_retry_sec()
+
+
+def note_reply_read_failover() -> None:
+    _reply_stats["failovers"] += 1
+
+
+def reply_read_pool_live_stats() -> dict[str, Any] | None:
+    if _reply_engine is None:
+        return None
+    pool = _reply_engine.pool
+    return {
+        "target": _reply_target,
+        "pool_size": int(pool.size()),
+        "checked_out": int(pool.checkedout()),
+        "overflow": int(pool.overflow()),
+        "capacity": _reply_capacity,
+        "healthy": time.monotonic() >= _reply_down_until,
+        **_reply_stats,
+    }
+
+
+async def dispose_reply_read_engine() -> None:
+    global _reply_engine, _reply_target, _reply_capacity, _reply_down_until
+    engine = _reply_engine
+    _reply_engine = None
+    _reply_target = ""
+    _reply_capacity = 0
+    _reply_down_until = 0.0
+    for key in _reply_stats:
+        _reply_stats[key] = 0
+    if engine is not None:
+        await engine.dispose()
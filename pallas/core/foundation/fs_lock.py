@@ -10,7 +10,7 @@ from contextlib import contextmanager
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Generator, Iterator
     from pathlib import Path
 
 
@@ -62,6 +62,43 @@ def interprocess_file_lock(lock_path: Path) -> Iterator[None]:
         os.close(fd)
 
 
+@contextmanager
+def try_interprocess_file_lock(lock_path: Path) -> Generator[bool, None, None]:
+    """非阻塞版 interprocess_file_lock：拿不到立即 yield False，拿到时 yield True 并在退出时释放。"""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(lock_path), os.O_CREAT | os.O_RDWR)
+    acquired = False
+    try:
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+
+                if os.fstat(fd).st_size < 1:
+                    os.write(fd, b"\0")
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            acquired = True
+        except OSError:
+            acquired = False
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                if sys.platform == "win32":
+                    _release_win32_lock(fd)
+                else:
+                    import fcntl
+
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            except OSError:
+                pass
+        os.close(fd)
+
+
 def atomic_write_text(path: Path, text: str, *, encoding: str = "utf-8") -> None:
     """唯一 tmp + replace，避免分片下共用固定 .tmp 竞态。"""
     path.parent.mkdir(parents=True, exist_ok=True)
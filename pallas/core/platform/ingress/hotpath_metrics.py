@@ -16,6 +16,10 @@ from typing import Any
 _COUNTERS = (
     "route_resolve_calls",
     "keywords_extract_calls",
+    "keywords_shared_hit",
+    "keywords_shared_miss",
+    "keywords_shared_evict",
+    "keywords_shared_skip",
     "bundle_lookup_calls",
     "bundle_cache_hit",
     "bundle_cache_negative_hit",
@@ -25,6 +29,12 @@ _COUNTERS = (
     "bundle_timeout",
     "bundle_db_error",
     "bundle_other_error",
+    "bundle_precompute_hit",
+    "bundle_precompute_miss",
+    "bundle_precompute_refreshes",
+    "bundle_precompute_rebuilt",
+    "corpus_negative_hit",
+    "corpus_negative_miss",
     "learn_enqueued",
     "learn_buffered",
     "learn_persisted",
@@ -32,6 +42,11 @@ _COUNTERS = (
     "learn_skipped_pressure",
     "learn_skipped_full",
     "learn_completed",
+    "learn_batch_flushes",
+    "learn_batch_items",
+    "learn_batch_contexts",
+    "learn_batch_answers",
+    "learn_batch_messages",
     "message_persist_buffered",
     "message_persist_skipped_full",
     "chat_shed_sidework",
@@ -59,6 +74,8 @@ _STAGE_KEYS = (
     "sql_answer",
     "sql_message",
     "sql_total",
+    "learn_batch",
+    "precompute_refresh",
 )
 _state: dict[str, int] = dict.fromkeys(_COUNTERS, 0)
 _day_key = ""
@@ -131,6 +148,21 @@ def record_keywords_extract_ms(duration_ms: float) -> None:
         _keywords_ms.append(float(duration_ms))
 
 
+def record_keywords_shared_lookup(*, hit: bool) -> None:
+    _rollover_if_needed()
+    _state["keywords_shared_hit" if hit else "keywords_shared_miss"] += 1
+
+
+def record_keywords_shared_evicted() -> None:
+    _rollover_if_needed()
+    _state["keywords_shared_evict"] += 1
+
+
+def record_keywords_shared_skipped() -> None:
+    _rollover_if_needed()
+    _state["keywords_shared_skip"] += 1
+
+
 def record_bundle_lookup(
     *,
     duration_ms: float,
@@ -196,6 +228,24 @@ def record_bundle_stages(
     _append_stage("select", select_ms)
 
 
+def record_bundle_precompute_lookup(*, hit: bool) -> None:
+    _rollover_if_needed()
+    _state["bundle_precompute_hit" if hit else "bundle_precompute_miss"] += 1
+
+
+def record_bundle_precompute_refresh(*, rebuilt: int, duration_ms: float) -> None:
+    """热词候选后台刷新一轮；rebuilt 为快照或 ban 集变化后重建的条目数。"""
+    _rollover_if_needed()
+    _state["bundle_precompute_refreshes"] += 1
+    _state["bundle_precompute_rebuilt"] += max(0, int(rebuilt))
+    _append_stage("precompute_refresh", duration_ms)
+
+
+def record_corpus_negative_cache(*, hit: bool) -> None:
+    _rollover_if_needed()
+    _state["corpus_negative_hit" if hit else "corpus_negative_miss"] += 1
+
+
 def record_reply_snapshot(*, hit: bool, skipped: bool = False) -> None:
     _rollover_if_needed()
     if skipped:
@@ -260,6 +310,17 @@ def record_learn_completed() -> None:
     _state["learn_completed"] += 1
 
 
+def record_learn_batch(*, items: int, contexts: int, answers: int, messages: int, duration_ms: float) -> None:
+    """批量 learn 一次提交：items 合并成 answers 行，比值即合并率。"""
+    _rollover_if_needed()
+    _state["learn_batch_flushes"] += 1
+    _state["learn_batch_items"] += max(0, int(items))
+    _state["learn_batch_contexts"] += max(0, int(contexts))
+    _state["learn_batch_answers"] += max(0, int(answers))
+    _state["learn_batch_messages"] += max(0, int(messages))
+    _append_stage("learn_batch", duration_ms)
+
+
 def record_message_persist_buffered() -> None:
     _rollover_if_needed()
     _state["message_persist_buffered"] += 1
@@ -292,9 +353,9 @@ def record_llm_retained_under_shed() -> None:
 
 def _keywords_cache_stats() -> dict[str, int | float | None]:
     try:
-        from packages.repeater.model import extract_keyword_tags
+        from packages.repeater.model import extract_keyword_entry
 
-        info = extract_keyword_tags.cache_info()
+        info = extract_keyword_entry.cache_info()
         hits = int(info.hits)
         misses = int(info.misses)
         total = hits + misses
@@ -313,6 +374,55 @@ def _keywords_cache_stats() -> dict[str, int | float | None]:
         }
 
 
+_READ_CACHE_SUM_KEYS = (
+    "corpus_read_cache_hits",
+    "corpus_read_cache_misses",
+    "corpus_read_cache_evictions",
+    "corpus_read_cache_admission_rejects",
+    "corpus_read_cache_invalidations",
+    "corpus_read_cache_entries",
+    "corpus_read_cache_bytes",
+)
+
+
+def _corpus_read_cache_stats() -> dict[str, int | float | None]:
+    try:
+        from pallas.product.corpus.read_cache import read_cache_stats
+
+        stats = read_cache_stats()
+        return {
+            "corpus_read_cache_hits": int(stats["hits"]),
+            "corpus_read_cache_misses": int(stats["misses"]),
+            "corpus_read_cache_evictions": int(stats["evictions"]),
+            "corpus_read_cache_admission_rejects": int(stats["admission_rejects"]),
+            "corpus_read_cache_invalidations": int(stats["invalidations"]),
+            "corpus_read_cache_entries": int(stats["entries"]),
+            "corpus_read_cache_bytes": int(stats["approx_bytes"]),
+            "corpus_read_cache_hit_ratio": stats["hit_ratio"],
+        }
+    except Exception:
+        return {**dict.fromkeys(_READ_CACHE_SUM_KEYS, 0), "corpus_read_cache_hit_ratio": None}
+
+
+def _keywords_shared_hit_ratio(counters: dict[str, int]) -> float | None:
+    hits = int(counters.get("keywords_shared_hit") or 0)
+    total = hits + int(counters.get("keywords_shared_miss") or 0)
+    return round(hits / total, 4) if total else None
+
+
+def _bundle_precompute_hit_ratio(counters: dict[str, int]) -> float | None:
+    hits = int(counters.get("bundle_precompute_hit") or 0)
+    total = hits + int(counters.get("bundle_precompute_miss") or 0)
+    return round(hits / total, 4) if total else None
+
+
+def _learn_batch_coalesce_ratio(counters: dict[str, int]) -> float | None:
+    answers = int(counters.get("learn_batch_answers") or 0)
+    if not answers:
+        return None
+    return round(int(counters.get("learn_batch_items") or 0) / answers, 4)
+
+
 def _stage_percentiles() -> dict[str, float | None]:
     out: dict[str, float | None] = {}
     for key in _STAGE_KEYS:
@@ -347,8 +457,12 @@ def hotpath_metrics_snapshot() -> dict[str, Any]:
         "bundle_ms_p95": _percentile(_bundle_ms, 0.95),
         "bundle_cache_hit_ratio": round(cache_hits / bundle_lookups, 4) if bundle_lookups else None,
         "reply_snapshot_hit_ratio": round(snap_hit / snap_total, 4) if snap_total else None,
+        "learn_batch_coalesce_ratio": _learn_batch_coalesce_ratio(_state),
+        "keywords_shared_hit_ratio": _keywords_shared_hit_ratio(_state),
+        "bundle_precompute_hit_ratio": _bundle_precompute_hit_ratio(_state),
         **_stage_percentiles(),
         **_keywords_cache_stats(),
+        **_corpus_read_cache_stats(),
     }
 
 
@@ -372,6 +486,7 @@ def merge_hotpath_metrics(rows: list[dict[str, Any]]) -> dict[str, Any]:
     lru_hits = 0
     lru_misses = 0
     lru_size = 0
+    read_cache = dict.fromkeys(_READ_CACHE_SUM_KEYS, 0)
     for row in rows:
         if not isinstance(row, dict):
             continue
@@ -388,12 +503,15 @@ def merge_hotpath_metrics(rows: list[dict[str, Any]]) -> dict[str, Any]:
         lru_hits += int(row.get("keywords_lru_hits") or 0)
         lru_misses += int(row.get("keywords_lru_misses") or 0)
         lru_size = max(lru_size, int(row.get("keywords_lru_size") or 0))
+        for key in _READ_CACHE_SUM_KEYS:
+            read_cache[key] += int(row.get(key) or 0)
     lookups = int(counters["bundle_lookup_calls"])
     cache_hits = int(counters["bundle_cache_hit"]) + int(counters.get("bundle_cache_negative_hit") or 0)
     snap_hit = int(counters["reply_snapshot_hit"])
     snap_miss = int(counters["reply_snapshot_miss"])
     snap_total = snap_hit + snap_miss
     lru_total = lru_hits + lru_misses
+    read_total = read_cache["corpus_read_cache_hits"] + read_cache["corpus_read_cache_misses"]
     merged_pct = {key: (round(max(vals), 3) if vals else None) for key, vals in collected.items()}
     return {
         "day_key": day_key or _today_key(),
@@ -402,8 +520,15 @@ def merge_hotpath_metrics(rows: list[dict[str, Any]]) -> dict[str, Any]:
         **merged_pct,
         "bundle_cache_hit_ratio": round(cache_hits / lookups, 4) if lookups else None,
         "reply_snapshot_hit_ratio": round(snap_hit / snap_total, 4) if snap_total else None,
+        "learn_batch_coalesce_ratio": _learn_batch_coalesce_ratio(counters),
+        "keywords_shared_hit_ratio": _keywords_shared_hit_ratio(counters),
+        "bundle_precompute_hit_ratio": _bundle_precompute_hit_ratio(counters),
         "keywords_lru_hits": lru_hits,
         "keywords_lru_misses": lru_misses,
         "keywords_lru_size": lru_size,
         "keywords_lru_hit_ratio": round(lru_hits / lru_total, 4) if lru_total else None,
+        **read_cache,
+        "corpus_read_cache_hit_ratio": (
+            round(read_cache["corpus_read_cache_hits"] / read_total, 4) if read_total else None
+        ),
     }
@@ -0,0 +1,83 @@
+"""分片：经 coord Redis 频道广播配置缓存失效（hub / worker 都订阅）。"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from nonebot import logger
+
+from pallas.core.foundation.db.config_invalidation import CONFIG_REDIS_CHANNEL
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def publish_config_invalidation_sync(body: str) -> bool:
+    from pallas.core.platform.coord.redis_claim import get_coord_redis_client
+    from pallas.core.platform.coord.redis_settings import coord_redis_enabled
+
+    if not coord_redis_enabled():
+        return False
+    client = get_coord_redis_client()
+    if client is None:
+        return False
+    try:
+        client.publish(CONFIG_REDIS_CHANNEL, body)
+        return True
+    except Exception:
+        return False
+
+
+def schedule_publish_config_invalidation(body: str) -> None:
+    async def job() -> None:
+        try:
+            await asyncio.to_thread(publish_config_invalidation_sync, body)
+        except Exception as err:
+            logger.debug(f"config_invalidation publish: {err}")
+
+    asyncio.create_task(job())
+
+
+async def config_invalidation_redis_listen_loop(
+    *,
+    on_connect: Callable[[bool], None],
+    on_message: Callable[[str], bool],
+) -> None:
+    from pallas.core.platform.coord.redis_claim import get_coord_redis_client
+    from pallas.core.platform.coord.redis_settings import coord_redis_enabled
+
+    while True:
+        if not coord_redis_enabled():
+            await asyncio.sleep(5.0)
+            continue
+        client = get_coord_redis_client()
+        if client is None:
+            await asyncio.sleep(5.0)
+            continue
+        pubsub = None
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            await asyncio.to_thread(pubsub.subscribe, CONFIG_REDIS_CHANNEL)
+            on_connect(True)
+            while True:
+                raw = await asyncio.to_thread(pubsub.get_message, timeout=1.0)
+                if not raw or raw.get("type") != "message":
+                    continue
+                body = raw.get("data")
+                if isinstance(body, bytes):
+                    body = body.decode("utf-8")
+                if isinstance(body, str):
+                    on_message(body)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            logger.debug(f"config_invalidation redis listen: {err}")
+            await asyncio.sleep(2.0)
+        finally:
+            on_connect(False)
+            if pubsub is not None:
+                try:
+                    await asyncio.to_thread(pubsub.close)
+                except Exception:
+                    pass
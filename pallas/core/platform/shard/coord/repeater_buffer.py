@@ -14,6 +14,8 @@ from pallas.core.platform.shard import context as shard_ctx
 from pallas.core.platform.shard.registry.config import get_shard_registry_settings
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
     from packages.repeater.model import ChatData
 
 _REDIS_CHANNEL = "pallas:repeater_buffer"
@@ -113,7 +115,7 @@ def schedule_publish_repeater_buffer(chat_data: ChatData) -> None:
     asyncio.create_task(job())
 
 
-def _message_tail_dup(group_msgs: list, msg: dict[str, Any]) -> bool:
+def _message_tail_dup(group_msgs: Sequence[Any], msg: dict[str, Any]) -> bool:
     uid = int(msg["user_id"])
     t = int(msg["time"])
     plain = str(msg.get("plain_text") or "")
@@ -154,16 +156,16 @@ async def ingest_repeater_buffer_event(data: dict[str, Any]) -> None:
 
 async def apply_repeater_buffer_message(msg: dict[str, Any]) -> bool:
     from packages.repeater.message_store import MessageStore
+    from packages.repeater.message_window import WindowMessage
     from packages.repeater.model import Chat
-    from pallas.core.foundation.db import Message as MessageModel
 
     group_id = int(msg["group_id"])
     async with MessageStore._message_lock:
-        group_msgs = MessageStore._message_dict[group_id]
+        group_msgs = MessageStore.group_window(group_id)
         if _message_tail_dup(group_msgs, msg):
             return False
         group_msgs.append(
-            MessageModel.model_construct(
+            WindowMessage(
                 group_id=group_id,
                 user_id=int(msg["user_id"]),
                 bot_id=int(msg["bot_id"]),
@@ -175,8 +177,8 @@ async def apply_repeater_buffer_message(msg: dict[str, Any]) -> bool:
             )
         )
         tail_limit = max(1, int(MessageStore.SAVE_RESERVED_SIZE))
-        if len(group_msgs) > tail_limit:
-            del group_msgs[: len(group_msgs) - tail_limit]
+        group_msgs.drop_oldest(len(group_msgs) - tail_limit)
+        MessageStore.note_group_changed(group_id)
     topics = msg.get("topics")
     if isinstance(topics, list):
         await Chat.merge_recent_topics(group_id, [str(item) for item in topics])
@@ -2,15 +2,49 @@
 
 from __future__ import annotations
 
+import functools
 import time
 import uuid
 
-from sqlalchemy import case, delete, func, or_, select, tuple_, update
+from sqlalchemy import Float, Integer, Text, all_, any_, bindparam, case, delete, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from .models import WorkJob
 
 
+@functools.cache
+def build_claim_many_statement(by_kinds: bool, excluding: bool, by_owner: bool, prioritized: bool):
+    """
+    claim_many 的认领查询，按过滤组合各构造一次；集合参数走 ``= ANY(:array)``，
+    集合大小变化不改 SQL 文本，预编译语句可复用。
+    """
+    from pallas.core.foundation.db.hot_queries import hot_query
+    from pallas.core.foundation.db.repository_pg import BackgroundJobRow
+
+    now = bindparam("now", type_=Float)
+    stmt = select(BackgroundJobRow).where(
+        BackgroundJobRow.finished_at.is_(None),
+        BackgroundJobRow.available_at <= now,
+        or_(BackgroundJobRow.status == "pending", BackgroundJobRow.leased_until < now),
+    )
+    if by_kinds:
+        stmt = stmt.where(BackgroundJobRow.kind == any_(bindparam("kinds", type_=ARRAY(Text))))
+    if excluding:
+        stmt = stmt.where(BackgroundJobRow.kind != all_(bindparam("exclude_kinds", type_=ARRAY(Text))))
+    if by_owner:
+        stmt = stmt.where(BackgroundJobRow.payload["bot_qq"].astext == any_(bindparam("bot_qqs", type_=ARRAY(Text))))
+    if prioritized:
+        stmt = stmt.order_by(
+            case((BackgroundJobRow.kind == any_(bindparam("priority_kinds", type_=ARRAY(Text))), 0), else_=1),
+            BackgroundJobRow.created_at,
+        )
+    else:
+        stmt = stmt.order_by(BackgroundJobRow.created_at)
+    stmt = stmt.with_for_update(skip_locked=True).limit(bindparam("limit", type_=Integer))
+    return hot_query(stmt, "work_jobs.claim_many")
+
+
 def build_requeue_terminal_statement(job: WorkJob, *, now: float):
     from pallas.core.foundation.db.repository_pg import BackgroundJobRow
 
@@ -191,7 +225,7 @@ class PostgresWorkJobStore:
         bot_owner_ids: frozenset[int] | None = None,
         priority_kinds: frozenset[str] | None = None,
     ) -> list[WorkJob]:
-        from pallas.core.foundation.db.repository_pg import BackgroundJobRow, get_session
+        from pallas.core.foundation.db.repository_pg import get_session
         from pallas.core.platform.observability import SlowPathTimer, slow_path_threshold_ms
 
         timer = SlowPathTimer(
@@ -200,27 +234,20 @@ class PostgresWorkJobStore:
             log_level="debug",
         )
         now = time.time()
-        stmt = select(BackgroundJobRow).where(
-            BackgroundJobRow.finished_at.is_(None),
-            BackgroundJobRow.available_at <= now,
-            or_(BackgroundJobRow.status == "pending", BackgroundJobRow.leased_until < now),
-        )
+        params: dict[str, object] = {"now": now, "limit": max(1, int(limit))}
         if kinds is not None:
-            stmt = stmt.where(BackgroundJobRow.kind.in_(tuple(kinds)))
+            params["kinds"] = sorted(kinds)
         if exclude_kinds is not None:
-            stmt = stmt.where(BackgroundJobRow.kind.not_in(tuple(exclude_kinds)))
+            params["exclude_kinds"] = sorted(exclude_kinds)
         if bot_owner_ids is not None:
-            stmt = stmt.where(BackgroundJobRow.payload["bot_qq"].astext.in_([str(int(q)) for q in bot_owner_ids]))
+            params["bot_qqs"] = [str(int(q)) for q in bot_owner_ids]
         if priority_kinds:
-            stmt = stmt.order_by(
-                case((BackgroundJobRow.kind.in_(tuple(priority_kinds)), 0), else_=1),
-                BackgroundJobRow.created_at,
-            )
-        else:
-            stmt = stmt.order_by(BackgroundJobRow.created_at)
-        stmt = stmt.with_for_update(skip_locked=True).limit(max(1, int(limit)))
+            params["priority_kinds"] = sorted(priority_kinds)
+        stmt = build_claim_many_statement(
+            kinds is not None, exclude_kinds is not None, bot_owner_ids is not None, bool(priority_kinds)
+        )
         async with get_session() as session:
-            rows = (await session.execute(stmt)).scalars().all()
+            rows = (await session.execute(stmt, params)).scalars().all()
             timer.mark("query")
             for row in rows:
                 row.status = "leased"
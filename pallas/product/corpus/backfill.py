@@ -1,8 +1,16 @@
-"""本机语料渐进同步到社区共享池。"""
+"""本机语料渐进同步到社区共享池。
+
+每轮是一条分段流水线：翻页读本地 → 挑句并过学习护栏 → 合并成 bulk 条目 → 上传。
+段与段之间是有界队列，下游慢了上游自然停下；读页与上传前都看池压，池压高时先等一会、
+等不到就结束本轮。游标只在一页上传确认后才前移，并且按页序连续推进，中途失败或限流时
+停在最后一个完整提交的页，下一轮从那里续上。
+"""
 
 from __future__ import annotations
 
+import asyncio
 import time
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any
 
 from nonebot import logger
@@ -14,7 +22,7 @@ from pallas.product.corpus.config import community_contribute_enabled, get_corpu
 from pallas.product.corpus.factory import build_community_repository
 from pallas.product.corpus.store import corpus_community_enrollment_valid
 from pallas.product.corpus.text_util import plain_message_text
-from pallas.product.corpus.write_fanout import corpus_write_queue
+from pallas.product.corpus.write_fanout import coalesce_answer_entries, corpus_write_queue
 
 if TYPE_CHECKING:
     from pallas.core.foundation.db.modules import Context
@@ -59,8 +67,46 @@ def corpus_backfill_max_per_minute() -> int:
         return 40
 
 
+def corpus_backfill_pages_per_round() -> int:
+    from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+    raw = repo_env_raw_value("PALLAS_CORPUS_BACKFILL_PAGES_PER_ROUND")
+    try:
+        return max(1, min(int(str(raw or "8").strip()), 200))
+    except ValueError:
+        return 8
+
+
+def corpus_backfill_concurrency() -> int:
+    """挑句与上传两段各自的并发 worker 数。"""
+    from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+    raw = repo_env_raw_value("PALLAS_CORPUS_BACKFILL_CONCURRENCY")
+    try:
+        return max(1, min(int(str(raw or "2").strip()), 8))
+    except ValueError:
+        return 2
+
+
+_STAGE_QUEUE_MAX = 2
+_BULK_MAX_ITEMS = 256
+_PRESSURE_WAIT_SEC = 0.5
+_PRESSURE_MAX_WAITS = 20
+
 _rate_window_start = 0
 _rate_window_count = 0
+_stage_queues: dict[str, asyncio.Queue[_BackfillPage | None]] = {}
+_stats: dict[str, Any] = {
+    "running": False,
+    "rounds": 0,
+    "contexts_committed": 0,
+    "items_pushed": 0,
+    "items_rejected": 0,
+    "last_round_contexts": 0,
+    "last_round_sec": 0.0,
+    "contexts_per_sec": None,
+    "last_stop_reason": "",
+}
 
 
 def should_run_corpus_backfill() -> bool:
@@ -135,22 +181,49 @@ async def list_local_contexts_page_mongo(*, after_keywords: str, limit: int) ->
     return await Context.find(query).sort("+keywords").limit(limit).to_list()
 
 
-async def push_context_to_community(context: Context, community) -> int:
-    pushed = 0
-    for ans in context.answers or []:
-        message = pick_backfill_message(ans.messages, ans.keywords)
-        if not message:
-            continue
-        await community.upsert_answer(
-            keywords=context.keywords,
-            group_id=0,
-            answer_keywords=ans.keywords,
-            answer_time=int(ans.time or 0),
-            message=message,
-            append_on_existing=True,
-        )
-        pushed += 1
-    return pushed
+@dataclass(slots=True)
+class _BackfillPage:
+    seq: int
+    contexts: list[Context]
+    entries: list[dict[str, Any]] = field(default_factory=list)
+    items: list[dict[str, Any]] = field(default_factory=list)
+    rejected: int = 0
+
+    @property
+    def last_keywords(self) -> str:
+        return self.contexts[-1].keywords
+
+
+class _CursorCommitter:
+    """按页序连续推进游标；halt_after 之后的页即使上传成功也不前移，下一轮会重传。"""
+
+    def __init__(self, cursor: str) -> None:
+        self.cursor = cursor
+        self.committed_contexts = 0
+        self._next_seq = 0
+        self._done: dict[int, _BackfillPage] = {}
+        self._halt_after: int | None = None
+
+    def accepts(self, seq: int) -> bool:
+        return self._halt_after is None or seq <= self._halt_after
+
+    def halt_after(self, seq: int) -> None:
+        if self._halt_after is None or seq < self._halt_after:
+            self._halt_after = seq
+
+    def commit(self, page: _BackfillPage) -> None:
+        if not self.accepts(page.seq):
+            return
+        self._done[page.seq] = page
+        advanced = False
+        while self._next_seq in self._done:
+            done = self._done.pop(self._next_seq)
+            self.cursor = done.last_keywords
+            self.committed_contexts += len(done.contexts)
+            self._next_seq += 1
+            advanced = True
+        if advanced:
+            save_backfill_state({"cursor_keywords": self.cursor, "updated_unix": int(time.time())})
 
 
 def pick_backfill_message(messages: list[str] | None, fallback: str) -> str:
@@ -161,12 +234,204 @@ def pick_backfill_message(messages: list[str] | None, fallback: str) -> str:
     return plain_message_text(str(fallback or ""))
 
 
+def backfill_answer_entries(context: Context) -> tuple[list[dict[str, Any]], int]:
+    """每个 Answer 挑一句上传；返回 (upsert_answer 参数列表, 被学习护栏拦下的条数)。"""
+    from pallas.product.llm.corpus_contamination import reject_corpus_learn_message
+
+    entries: list[dict[str, Any]] = []
+    rejected = 0
+    for ans in context.answers or []:
+        message = pick_backfill_message(ans.messages, ans.keywords)
+        if not message:
+            continue
+        if reject_corpus_learn_message(message, source="corpus_backfill"):
+            rejected += 1
+            continue
+        entries.append({
+            "keywords": context.keywords,
+            "group_id": 0,
+            "answer_keywords": ans.keywords,
+            "answer_time": int(ans.time or 0),
+            "message": message,
+            "append_on_existing": True,
+        })
+    return entries, rejected
+
+
+async def push_context_to_community(context: Context, community) -> int:
+    entries, _rejected = backfill_answer_entries(context)
+    for entry in entries:
+        await community.upsert_answer(**entry)
+    return len(entries)
+
+
+async def _wait_for_headroom() -> bool:
+    """池压或 mirror 队列满时最多等 ``_PRESSURE_MAX_WAITS`` 轮；仍不行返回 False。"""
+    for _ in range(_PRESSURE_MAX_WAITS):
+        if not backfill_should_skip_pressure():
+            return True
+        await asyncio.sleep(_PRESSURE_WAIT_SEC)
+    return not backfill_should_skip_pressure()
+
+
+def corpus_backfill_stats() -> dict[str, Any]:
+    return {
+        **_stats,
+        "queue_depth": {stage: queue.qsize() for stage, queue in _stage_queues.items()},
+        "queue_max": _STAGE_QUEUE_MAX,
+    }
+
+
+class _BackfillRound:
+    def __init__(self, community: Any, cursor: str) -> None:
+        self.community = community
+        self.committer = _CursorCommitter(cursor)
+        self.bulk = callable(getattr(community, "contribute_bulk", None))
+        self.stop_reason = ""
+        self.pushed = 0
+        self.rejected = 0
+        self.skipped = 0
+        self.fetched_contexts = 0
+
+    def stop(self, seq: int, reason: str) -> None:
+        """seq 这一页及之后不再前移游标。"""
+        self.committer.halt_after(seq - 1)
+        if not self.stop_reason:
+            self.stop_reason = reason
+
+    async def fetch(self, outbox: asyncio.Queue[_BackfillPage | None], workers: int) -> None:
+        cursor = self.committer.cursor
+        batch_size = corpus_backfill_batch_size()
+        for seq in range(corpus_backfill_pages_per_round()):
+            if self.stop_reason:
+                break
+            if not await _wait_for_headroom():
+                self.stop(seq, "pressure")
+                break
+            contexts = await list_local_contexts_page(after_keywords=cursor, limit=batch_size)
+            if not contexts:
+                break
+            self.fetched_contexts += len(contexts)
+            cursor = contexts[-1].keywords
+            await outbox.put(_BackfillPage(seq=seq, contexts=contexts))
+            if len(contexts) < batch_size:
+                # 短页即已到表尾
+                break
+        # 出错时不发结束标记：_gather_or_cancel 会取消整条流水线
+        for _ in range(workers):
+            await outbox.put(None)
+
+    async def validate(self, page: _BackfillPage) -> _BackfillPage | None:
+        if not self.committer.accepts(page.seq):
+            return None
+        for index, context in enumerate(page.contexts):
+            if not consume_backfill_rate_slot():
+                self.skipped += len(page.contexts) - index
+                self.stop(page.seq + 1, "rate_limited")
+                del page.contexts[index:]
+                break
+            entries, rejected = backfill_answer_entries(context)
+            page.entries.extend(entries)
+            page.rejected += rejected
+            # 让出事件循环，长页不独占
+            await asyncio.sleep(0)
+        return page if page.contexts else None
+
+    async def merge(self, page: _BackfillPage) -> _BackfillPage:
+        if self.bulk:
+            page.items = coalesce_answer_entries(page.entries)
+        return page
+
+    async def upsert(self, page: _BackfillPage) -> None:
+        if not self.committer.accepts(page.seq):
+            return
+        if not await _wait_for_headroom():
+            self.stop(page.seq, "pressure")
+            return
+        if self.bulk:
+            for offset in range(0, len(page.items), _BULK_MAX_ITEMS):
+                try:
+                    ok = await self.community.contribute_bulk(page.items[offset : offset + _BULK_MAX_ITEMS])
+                except Exception as e:
+                    logger.warning("Corpus backfill bulk failed with error type [{}]: [{!r}]", type(e).__name__, e)
+                    ok = False
+                if not ok:
+                    self.stop(page.seq, "upload_failed")
+                    return
+            pushed = len(page.entries)
+        else:
+            pushed = 0
+            for entry in page.entries:
+                try:
+                    await self.community.upsert_answer(**entry)
+                except Exception as e:
+                    self.skipped += 1
+                    logger.warning("Corpus backfill item failed for keywords [{}]: [{}]", entry["keywords"], e)
+                    continue
+                pushed += 1
+        self.pushed += pushed
+        self.rejected += page.rejected
+        _stats["items_pushed"] += pushed
+        _stats["items_rejected"] += page.rejected
+        self.committer.commit(page)
+
+    async def run(self) -> None:
+        workers = corpus_backfill_concurrency()
+        validate_q: asyncio.Queue[_BackfillPage | None] = asyncio.Queue(maxsize=_STAGE_QUEUE_MAX)
+        merge_q: asyncio.Queue[_BackfillPage | None] = asyncio.Queue(maxsize=_STAGE_QUEUE_MAX)
+        upsert_q: asyncio.Queue[_BackfillPage | None] = asyncio.Queue(maxsize=_STAGE_QUEUE_MAX)
+        _stage_queues.update(validate=validate_q, merge=merge_q, upsert=upsert_q)
+        try:
+            await _gather_or_cancel(
+                self.fetch(validate_q, workers),
+                _run_stage(validate_q, merge_q, workers, 1, self.validate),
+                _run_stage(merge_q, upsert_q, 1, workers, self.merge),
+                _run_stage(upsert_q, None, workers, 0, self.upsert),
+            )
+        finally:
+            _stage_queues.clear()
+
+
+async def _gather_or_cancel(*coros) -> None:
+    """同 gather，但任一协程抛错（或自身被取消）时取消其余的，免得它们卡在段间队列上永不退出。"""
+    tasks = [asyncio.create_task(coro) for coro in coros]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _run_stage(inbox, outbox, workers: int, downstream_workers: int, handle) -> None:
+    """workers 个协程消费 inbox；全部收到结束标记后再给下游每个 worker 发一个。
+
+    出错时整段直接抛出、不发结束标记，由上层取消其余各段。
+    """
+
+    async def worker() -> None:
+        while True:
+            page = await inbox.get()
+            if page is None:
+                return
+            out = await handle(page)
+            if outbox is not None and out is not None:
+                await outbox.put(out)
+
+    await _gather_or_cancel(*(worker() for _ in range(workers)))
+    if outbox is not None:
+        for _ in range(downstream_workers):
+            await outbox.put(None)
+
+
 async def run_corpus_backfill_round() -> None:
     if not should_run_corpus_backfill():
         return
     if backfill_should_skip_pressure():
         logger.debug("corpus backfill skipped: pool pressure or mirror queue full")
         return
+    if _stats["running"]:
+        return
 
     community = build_community_repository()
     if community is None:
@@ -174,33 +439,35 @@ async def run_corpus_backfill_round() -> None:
 
     state = load_backfill_state()
     cursor = str(state.get("cursor_keywords") or "")
-    batch_size = corpus_backfill_batch_size()
-    contexts = await list_local_contexts_page(after_keywords=cursor, limit=batch_size)
-    if not contexts:
+    started = time.monotonic()
+    job = _BackfillRound(community, cursor)
+    _stats["running"] = True
+    try:
+        await job.run()
+    finally:
+        _stats["running"] = False
+    elapsed = time.monotonic() - started
+    committed = job.committer.committed_contexts
+    _stats["rounds"] += 1
+    _stats["contexts_committed"] += committed
+    _stats["last_round_contexts"] = committed
+    _stats["last_round_sec"] = round(elapsed, 3)
+    _stats["contexts_per_sec"] = round(committed / elapsed, 3) if committed and elapsed > 0 else None
+    _stats["last_stop_reason"] = job.stop_reason
+
+    if not job.fetched_contexts and not job.stop_reason:
         if cursor:
             save_backfill_state({"cursor_keywords": "", "wrapped_unix": int(time.time())})
             logger.info(format_business_event("语料回填批次", "已完成", pushed=0, skipped=0, cursor="wrapped"))
         return
-
-    pushed = 0
-    skipped = 0
-    last_keywords = cursor
-    for context in contexts:
-        if not consume_backfill_rate_slot():
-            skipped += len(contexts) - pushed - skipped
-            break
-        if backfill_should_skip_pressure():
-            skipped += 1
-            continue
-        try:
-            pushed += await push_context_to_community(context, community)
-        except Exception as e:
-            skipped += 1
-            logger.warning("Corpus backfill item failed for keywords [{}]: [{}]", context.keywords, e)
-            continue
-        last_keywords = context.keywords
-
-    save_backfill_state({"cursor_keywords": last_keywords, "updated_unix": int(time.time())})
     logger.info(
-        format_business_event("语料回填批次", "已完成", pushed=pushed, skipped=skipped, cursor=last_keywords[:40])
+        format_business_event(
+            "语料回填批次",
+            "已完成",
+            pushed=job.pushed,
+            skipped=job.skipped,
+            rejected=job.rejected,
+            contexts=committed,
+            cursor=job.committer.cursor[:40],
+        )
     )
@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import asyncio
+import importlib.util
+from functools import cache
 from typing import Any
 
 import httpx
@@ -11,6 +13,7 @@ from nonebot import logger
 from pallas.core.foundation.config.repo_settings import repo_env_raw_value
 from pallas.core.foundation.db.modules import Answer, Ban, Context
 from pallas.core.foundation.db.repository import ContextRepositoryExistenceMixin
+from pallas.product.corpus.negative_cache import note_remote_miss, note_remote_present, remote_miss_cached
 from pallas.product.message_scrub.quiet_http_loggers import scrub_http_log_noise
 
 
@@ -36,6 +39,41 @@ def remote_corpus_contribute_timeout_sec() -> float:
     return max(12.0, remote_corpus_timeout_sec())
 
 
+def remote_corpus_batch_window_ms() -> float:
+    """同一窗口内到达的 keywords 合成一次多 key 请求；``0`` 关闭合批，逐 key GET。"""
+    raw = repo_env_raw_value("PALLAS_CORPUS_REMOTE_BATCH_WINDOW_MS")
+    if raw is not None:
+        try:
+            return max(0.0, float(str(raw).strip()))
+        except ValueError:
+            pass
+    return 5.0
+
+
+def remote_corpus_batch_max_keys() -> int:
+    raw = repo_env_raw_value("PALLAS_CORPUS_REMOTE_BATCH_MAX")
+    if raw is not None:
+        try:
+            return max(1, int(str(raw).strip()))
+        except ValueError:
+            pass
+    return 32
+
+
+@cache
+def _http2_available() -> bool:
+    # httpx 的 HTTP/2 依赖 h2（perf extra）；未装时退回 HTTP/1.1 keep-alive
+    return importlib.util.find_spec("h2") is not None
+
+
+def _remote_corpus_client(timeout: float) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=timeout,
+        http2=_http2_available(),
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0),
+    )
+
+
 _shared_client: httpx.AsyncClient | None = None
 _shared_client_timeout: float | None = None
 _shared_client_lock = asyncio.Lock()
@@ -51,7 +89,7 @@ async def shared_remote_corpus_client(timeout_sec: float) -> httpx.AsyncClient:
         if _shared_client is None or _shared_client_timeout != timeout:
             if _shared_client is not None:
                 await _shared_client.aclose()
-            _shared_client = httpx.AsyncClient(timeout=timeout)
+            _shared_client = _remote_corpus_client(timeout)
             _shared_client_timeout = timeout
     return _shared_client
 
@@ -102,9 +140,20 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
 
         await maybe_refresh_corpus_enrollment_on_auth_failure()
 
+    @property
+    def batch_key(self) -> tuple[tuple[str, ...], str, float]:
+        return tuple(self._api_bases), self._token, self._timeout
+
+    def _batch_supported(self) -> bool:
+        return any(base not in _batch_unsupported_bases for base in self._api_bases)
+
     async def find_by_keywords(self, keywords: str) -> Context | None:
         if not keywords or not self._api_bases:
             return None
+        if remote_miss_cached(keywords):
+            return None
+        if remote_corpus_batch_window_ms() > 0 and self._batch_supported():
+            return await _find_batcher(self).find(keywords)
         from pallas.product.corpus.remote_budget import RemoteCorpusBudget
 
         async with RemoteCorpusBudget(hot_path=True, wait=False) as budget:
@@ -112,6 +161,85 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
                 return None
             return await self._find_by_keywords_http(keywords)
 
+    async def find_many_by_keywords(self, keys: list[str]) -> dict[str, Context | None | Exception]:
+        """一批 keywords 共用一个远程并发槽；单 key 的失败以异常对象放在结果里。"""
+        from pallas.product.corpus.remote_budget import RemoteCorpusBudget
+
+        async with RemoteCorpusBudget(hot_path=True, wait=False) as budget:
+            if budget.skipped:
+                return dict.fromkeys(keys)
+            if len(keys) == 1:
+                return {keys[0]: await self._find_by_keywords_http(keys[0])}
+            return await self._find_many_http(keys)
+
+    async def _find_many_http(self, keys: list[str]) -> dict[str, Context | None | Exception]:
+        last_error: httpx.HTTPError | None = None
+        try:
+            async with scrub_http_log_noise():
+                client = await shared_remote_corpus_client(self._timeout)
+                for base in self._api_bases:
+                    batch_url = f"{base}/contexts"
+                    if not batch_url.startswith("http") or base in _batch_unsupported_bases:
+                        continue
+                    try:
+                        resp = await client.post(batch_url, json={"keywords": keys}, headers=self._headers())
+                    except httpx.HTTPError as e:
+                        last_error = e
+                        logger.warning("Corpus community batch search failed with error type [{}]", type(e).__name__)
+                        continue
+                    if resp.status_code == 401:
+                        asyncio.create_task(self.schedule_auth_refresh())
+                        return dict.fromkeys(keys)
+                    if resp.status_code in _BULK_UNSUPPORTED_STATUS:
+                        # 旧版中心没有多 key 接口（或不认请求体），记下后该 base 改回逐 key GET
+                        _batch_unsupported_bases.add(base)
+                        logger.info("Corpus community base does not support batch search, falling back per key")
+                        continue
+                    if resp.status_code != 200:
+                        logger.warning(
+                            "Corpus community batch search returned HTTP [{}], response bytes [{}]",
+                            resp.status_code,
+                            len(resp.content),
+                        )
+                        continue
+                    data = resp.json()
+                    return await self._demux_batch(keys, data if isinstance(data, dict) else {})
+        except httpx.HTTPError as e:
+            logger.warning("Corpus community batch find failed with error type [{}]", type(e).__name__)
+            raise
+        if last_error is not None:
+            raise last_error
+        return await self._find_each_http(keys)
+
+    async def _demux_batch(self, keys: list[str], data: dict[str, Any]) -> dict[str, Context | None | Exception]:
+        contexts = data.get("contexts")
+        contexts = contexts if isinstance(contexts, dict) else {}
+        errors = data.get("errors")
+        failed = [key for key in keys if isinstance(errors, dict) and key in errors]
+        out: dict[str, Context | None | Exception] = {}
+        for key in keys:
+            payload = contexts.get(key)
+            out[key] = self._context_from_payload(payload) if isinstance(payload, dict) else None
+            if key in failed:
+                continue
+            if out[key] is None:
+                note_remote_miss(key)
+            else:
+                note_remote_present(key)
+        if failed:
+            # 中心对个别 key 报错：只把这几个 key 单独重试一次，不连累同批其他调用方
+            out.update(await self._find_each_http(failed))
+        return out
+
+    async def _find_each_http(self, keys: list[str]) -> dict[str, Context | None | Exception]:
+        results = await asyncio.gather(*(self._find_by_keywords_http(key) for key in keys), return_exceptions=True)
+        out: dict[str, Context | None | Exception] = {}
+        for key, result in zip(keys, results, strict=True):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+            out[key] = result
+        return out
+
     async def _find_by_keywords_http(self, keywords: str) -> Context | None:
         last_error: httpx.HTTPError | None = None
         try:
@@ -135,6 +263,7 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
                         asyncio.create_task(self.schedule_auth_refresh())
                         return None
                     if resp.status_code == 404:
+                        note_remote_miss(keywords)
                         return None
                     if resp.status_code != 200:
                         logger.warning(
@@ -146,6 +275,7 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
                     data = resp.json()
                     if not isinstance(data, dict):
                         return None
+                    note_remote_present(keywords)
                     return self._context_from_payload(data)
         except httpx.HTTPError as e:
             logger.warning("Corpus community find failed with error type [{}]", type(e).__name__)
@@ -158,6 +288,7 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
         return None
 
     async def insert(self, context: Context) -> None:
+        note_remote_present(context.keywords)
         await self._post_contribute({"op": "insert", "context": self._context_to_payload(context)})
 
     async def delete_expired(self, expiration: int, threshold: int) -> None:
@@ -175,6 +306,7 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
         message: str,
         append_on_existing: bool,
     ) -> None:
+        note_remote_present(keywords)
         await self._post_contribute({
             "op": "upsert_answer",
             "keywords": keywords,
@@ -194,19 +326,66 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
     async def find_ban_reply_target(self, group_id: int, reply_message: str) -> tuple[str, str] | None:
         return None
 
-    async def _post_contribute(self, body: dict[str, Any]) -> None:
+    async def contribute_bulk(self, items: list[dict[str, Any]]) -> bool:
+        """合并后的多条 contribute 整批提交；True 表示全部送达。需要逐条进度时用 contribute_items。"""
+        return not await self.contribute_items(items)
+
+    async def contribute_items(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        合并后的多条 contribute 一次 POST（``{"op": "bulk", "items": [...]}``），返回未送达的条目（空表示全部送达）。
+        服务端不认 bulk 时记住该组 base，此后逐条按旧版请求体 POST：带计数增量的 upsert_answer 拆成 count 次，
+        中途失败时已发出的部分从返回条目里扣掉，调用方只需重发返回值。
+        """
+        if not items:
+            return []
+        for item in items:
+            context = item.get("context")
+            note_remote_present(str((context if isinstance(context, dict) else item).get("keywords") or ""))
+        bases = tuple(self._api_bases)
+        if bases not in _bulk_unsupported_bases:
+            status = await self._post_contribute({"op": "bulk", "items": items})
+            if status in (200, 202):
+                return []
+            if status not in _BULK_UNSUPPORTED_STATUS:
+                return list(items)
+            _bulk_unsupported_bases.add(bases)
+        for index, item in enumerate(items):
+            if item.get("op") != "upsert_answer":
+                if not await self._post_legacy_contribute(item):
+                    return list(items[index:])
+                continue
+            messages = list(item.get("messages") or [item.get("message")])
+            count = max(1, int(item.get("count") or 1))
+            for done in range(count):
+                # 旧版 upsert_answer 每次只加 1、只认 message；样本用完后沿用首条
+                message = messages[done] if done < len(messages) else item.get("message")
+                if not await self._post_legacy_contribute(_legacy_upsert_body(item, message)):
+                    rest = {**item, "count": count - done, "messages": messages[done:] or [item.get("message")]}
+                    return [rest, *items[index + 1 :]]
+        return []
+
+    async def _post_legacy_contribute(self, body: dict[str, Any]) -> bool:
+        try:
+            return await self._post_contribute(body) in (200, 202)
+        except httpx.HTTPError:
+            # 异常已在 _post_contribute_http 记过日志；这里只需停下并报告进度
+            return False
+
+    async def _post_contribute(self, body: dict[str, Any]) -> int | None:
+        """返回最后一次响应的 HTTP 状态；没有可用 base 或预算跳过时为 None。"""
         if not self._api_bases:
-            return
+            return None
         from pallas.product.corpus.remote_budget import RemoteCorpusBudget
 
         # 后台 mirror：可排队等槽；wait=False 会被 prefetch/find 长期挤掉导致共享池不涨
         async with RemoteCorpusBudget(hot_path=False, wait=True) as budget:
             if budget.skipped:
-                return
-            await self._post_contribute_http(body)
+                return None
+            return await self._post_contribute_http(body)
 
-    async def _post_contribute_http(self, body: dict[str, Any]) -> None:
+    async def _post_contribute_http(self, body: dict[str, Any]) -> int | None:
         last_error: httpx.HTTPError | None = None
+        last_status: int | None = None
         contribute_timeout = remote_corpus_contribute_timeout_sec()
         try:
             async with scrub_http_log_noise():
@@ -221,8 +400,9 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
                         last_error = e
                         logger.warning("Corpus community contribution failed with error type [{}]", type(e).__name__)
                         continue
+                    last_status = resp.status_code
                     if resp.status_code in (200, 202):
-                        return
+                        return last_status
                     if resp.status_code in (401, 403):
                         asyncio.create_task(self.schedule_auth_refresh())
                     logger.warning(
@@ -235,6 +415,7 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
             raise
         if last_error is not None:
             raise last_error
+        return last_status
 
     @staticmethod
     def _context_from_payload(data: dict[str, Any]) -> Context:
@@ -303,3 +484,94 @@ class RemoteCorpusRepository(ContextRepositoryExistenceMixin):
                 for b in context.ban
             ],
         }
+
+
+def _legacy_upsert_body(item: dict[str, Any], message: Any) -> dict[str, Any]:
+    """合并条目还原成单次 upsert_answer 的请求体（不带 count / messages）。"""
+    return {
+        "op": "upsert_answer",
+        "keywords": item.get("keywords"),
+        "group_id": int(item.get("group_id") or 0),
+        "answer_keywords": item.get("answer_keywords"),
+        "answer_time": int(item.get("answer_time") or 0),
+        "message": message,
+        "append_on_existing": bool(item.get("append_on_existing")),
+    }
+
+
+# 不支持 POST /contexts 的 base；进程内记住，配置变更重建仓储时不必清
+_batch_unsupported_bases: set[str] = set()
+# 不认 contribute bulk 的 base 组合，整组退回逐条 POST
+_bulk_unsupported_bases: set[tuple[str, ...]] = set()
+_BULK_UNSUPPORTED_STATUS = frozenset({400, 404, 405, 422, 501})
+_batchers: dict[tuple[tuple[str, ...], str, float], RemoteFindBatcher] = {}
+
+
+class RemoteFindBatcher:
+    """
+    远程 find 的微批：窗口内到达的 keywords 合成一次 find_many_by_keywords，结果按 key 分发回各调用方。
+    同 key 并发只查一次；攒满 batch_max 立即发出，不等窗口结束。整批传输失败时每个调用方都拿到该异常。
+    """
+
+    def __init__(self, repo: RemoteCorpusRepository) -> None:
+        self.repo = repo
+        self._loop = asyncio.get_running_loop()
+        self._pending: dict[str, list[asyncio.Future[Context | None]]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def bound_to_running_loop(self) -> bool:
+        return self._loop is asyncio.get_running_loop()
+
+    async def find(self, keywords: str) -> Context | None:
+        loop = self._loop
+        future: asyncio.Future[Context | None] = loop.create_future()
+        self._pending.setdefault(keywords, []).append(future)
+        if len(self._pending) >= remote_corpus_batch_max_keys():
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(remote_corpus_batch_window_ms() / 1000.0, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.create_task(self._dispatch(batch), name="corpus_remote_find_batch")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: dict[str, list[asyncio.Future[Context | None]]]) -> None:
+        try:
+            results = await self.repo.find_many_by_keywords(list(batch))
+        except Exception as exc:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+        for key, futures in batch.items():
+            result = results.get(key)
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+def _find_batcher(repo: RemoteCorpusRepository) -> RemoteFindBatcher:
+    """按 (api_bases, token, timeout) 共享：factory 每次新建仓储实例，prefetch 各 worker 的查询也能合进同一批。"""
+    batcher = _batchers.get(repo.batch_key)
+    if batcher is None or not batcher.bound_to_running_loop():
+        batcher = _batchers[repo.batch_key] = RemoteFindBatcher(repo)
+    return batcher
+
+
+def clear_remote_find_batchers() -> None:
+    _batchers.clear()
+    _batch_unsupported_bases.clear()
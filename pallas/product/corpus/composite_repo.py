@@ -13,12 +13,13 @@ from pallas.product.corpus.config import (
     remote_corpus_find_enabled,
     remote_corpus_find_mode,
 )
-from pallas.product.corpus.merge import merge_contexts
+from pallas.product.corpus.merge import merged_context_view
+from pallas.product.corpus.reply_perf_config import find_cache_max_entries
 from pallas.product.corpus.write_fanout import schedule_mirror_insert, schedule_mirror_upsert_answer
 
 if TYPE_CHECKING:
     from pallas.core.foundation.db.modules import Answer, Ban, Context
-    from pallas.core.foundation.db.repository import ContextRepository
+    from pallas.core.foundation.db.repository import ContextCleanupProgress, ContextRepository, LearnAnswerItem
 
 
 class CompositeContextRepository:
@@ -131,7 +132,9 @@ class CompositeContextRepository:
                     outcome=outcome,
                 )
                 raise
-            merged = merge_contexts(merged, ctx, strategy=strategy)
+            merged = merged_context_view(
+                keywords, source_id, merged, ctx, strategy=strategy, max_entries=find_cache_max_entries()
+            )
             if source_id == "local" and strategy == "local_first" and self.local_first_has_answers(merged):
                 outcome = "local_short_circuit"
                 timer.finish(
@@ -188,6 +191,13 @@ class CompositeContextRepository:
     async def find_for_cleanup(self, trigger_threshold: int, expiration: int) -> list[Context]:
         return await self._local.find_for_cleanup(trigger_threshold, expiration)
 
+    async def prune_expired_answers(self, **kwargs) -> ContextCleanupProgress | None:
+        """本地库支持集合式清理时委托，否则返回 None 由调用方走逐条 replace_answers。"""
+        prune = getattr(self._local, "prune_expired_answers", None)
+        if not callable(prune):
+            return None
+        return await prune(**kwargs)
+
     async def upsert_answer(
         self,
         keywords: str,
@@ -282,45 +292,95 @@ class CompositeContextRepository:
                     append_on_existing=append_on_existing,
                 )
 
-        from pallas.core.foundation.db.modules import Answer, Context
+        from pallas.core.foundation.db.repository import LearnAnswerItem
         from pallas.product.corpus.find_cache import invalidate_find_cache
 
         await invalidate_find_cache(keywords)
+        self._schedule_learn_mirror(
+            LearnAnswerItem(
+                keywords=keywords,
+                group_id=group_id,
+                answer_keywords=answer_keywords,
+                answer_time=answer_time,
+                message=message,
+                append_on_existing=append_on_existing,
+            ),
+            created=created,
+        )
+        return created
+
+    async def learn_answers(self, items: list[LearnAnswerItem]) -> list[bool]:
+        """批量学习：本地一次提交，镜像仍逐条排队，保持与 learn_answer 相同的 fan-out。"""
+        from pallas.product.llm.corpus_contamination import reject_corpus_learn_message
+
+        created_flags = [False] * len(items)
+        accepted = [
+            (index, item)
+            for index, item in enumerate(items)
+            if not reject_corpus_learn_message(item.message, source="composite_learn_answer")
+        ]
+        if not accepted:
+            return created_flags
+        local_learn_many = getattr(self._local, "learn_answers", None)
+        if not callable(local_learn_many):
+            for index, item in accepted:
+                created_flags[index] = await self.learn_answer(
+                    keywords=item.keywords,
+                    group_id=item.group_id,
+                    answer_keywords=item.answer_keywords,
+                    answer_time=item.answer_time,
+                    message=item.message,
+                    append_on_existing=item.append_on_existing,
+                )
+            return created_flags
+
+        local_flags = await local_learn_many([item for _, item in accepted])
+        from pallas.product.corpus.find_cache import invalidate_find_cache
+
+        for keywords in dict.fromkeys(item.keywords for _, item in accepted):
+            await invalidate_find_cache(keywords)
+        for (index, item), created in zip(accepted, local_flags, strict=True):
+            created_flags[index] = bool(created)
+            self._schedule_learn_mirror(item, created=bool(created))
+        return created_flags
+
+    def _schedule_learn_mirror(self, item: LearnAnswerItem, *, created: bool) -> None:
         if created:
+            from pallas.core.foundation.db.modules import Answer, Context
+
             schedule_mirror_insert(
                 fed=self._fed,
                 community=self._community,
                 cfg=self._cfg,
                 context=Context.model_construct(
-                    keywords=keywords,
-                    time=answer_time,
+                    keywords=item.keywords,
+                    time=item.answer_time,
                     trigger_count=1,
                     answers=[
                         Answer(
-                            keywords=answer_keywords,
-                            group_id=group_id,
+                            keywords=item.answer_keywords,
+                            group_id=item.group_id,
                             count=1,
-                            time=answer_time,
-                            messages=[message],
+                            time=item.answer_time,
+                            messages=[item.message],
                         )
                     ],
                     ban=[],
                     clear_time=0,
                 ),
             )
-        else:
-            schedule_mirror_upsert_answer(
-                fed=self._fed,
-                community=self._community,
-                cfg=self._cfg,
-                keywords=keywords,
-                group_id=group_id,
-                answer_keywords=answer_keywords,
-                answer_time=answer_time,
-                message=message,
-                append_on_existing=append_on_existing,
-            )
-        return created
+            return
+        schedule_mirror_upsert_answer(
+            fed=self._fed,
+            community=self._community,
+            cfg=self._cfg,
+            keywords=item.keywords,
+            group_id=item.group_id,
+            answer_keywords=item.answer_keywords,
+            answer_time=item.answer_time,
+            message=item.message,
+            append_on_existing=item.append_on_existing,
+        )
 
     async def replace_answers(self, keywords: str, answers: list[Answer], clear_time: int) -> None:
         await self._local.replace_answers(keywords, answers, clear_time)
@@ -1,4 +1,4 @@
-"""find_by_keywords 进程内 TTL 缓存，减轻复读热路径远程 HTTP。"""
+"""find_by_keywords 进程内缓存，减轻复读热路径远程 HTTP；存储在 read_cache 的 find / reply 层。"""
 
 from __future__ import annotations
 
@@ -9,16 +9,13 @@ from typing import TYPE_CHECKING
 from nonebot import logger
 
 from pallas.core.foundation.db.pool_budget import is_pg_pool_timeout_error
-from pallas.product.corpus.reply_perf_config import find_cache_max_entries, find_cache_ttl_sec
+from pallas.product.corpus.merge import clear_merged_context_views
+from pallas.product.corpus.read_cache import FIND_LAYER, REPLY_LAYER, discard_precomputed_replies, shared_read_cache
+from pallas.product.corpus.reply_perf_config import find_cache_ttl_sec
 
 if TYPE_CHECKING:
     from pallas.core.foundation.db.modules import Context
 
-_find_cache: dict[str, tuple[float, Context | None]] = {}
-_reply_find_cache: dict[str, tuple[float, Context | None]] = {}
-_find_inflight: dict[str, asyncio.Task[Context | None]] = {}
-_reply_find_inflight: dict[str, asyncio.Task[Context | None]] = {}
-_find_lock = asyncio.Lock()
 _REPLY_DB_FAIL_TTL_SEC = 2.0
 _reply_db_fail_until: dict[str, float] = {}
 
@@ -48,8 +45,7 @@ def reply_db_fail_active(keywords: str) -> bool:
 
 
 async def _cached_find(
-    cache: dict[str, tuple[float, Context | None]],
-    inflight: dict[str, asyncio.Task[Context | None]],
+    layer: str,
     keywords: str,
     loader,
     *,
@@ -58,40 +54,23 @@ async def _cached_find(
     key = (keywords or "").strip()
     if not key:
         return None
-    now = time.monotonic()
-    if _reply_db_fail_active(key, now=now):
+    if _reply_db_fail_active(key):
         if for_reply:
             logger.debug(
                 "Corpus find reply was skipped during reply database failure cooldown for keyword length [{}]",
                 len(key),
             )
         return None
-    task: asyncio.Task[Context | None] | None = None
-    async with _find_lock:
-        hit = cache.get(key)
-        if hit is not None:
-            exp, val = hit
-            if now < exp:
-                return val
-            cache.pop(key, None)
-        task = inflight.get(key)
-        if task is None:
-            task = asyncio.create_task(loader(key))
-            inflight[key] = task
-        cache_max = find_cache_max_entries()
-        if len(cache) > cache_max:
-            stale = [k for k, (e, _) in cache.items() if now >= e]
-            for k in stale:
-                cache.pop(k, None)
-            if len(cache) > cache_max:
-                cache.clear()
+    cache = shared_read_cache()
+    hit, value = cache.get(layer, key)
+    if hit:
+        return value
+    task, _started = cache.join_or_start(layer, key, loader)
 
     try:
         ctx = await asyncio.shield(task)
     except Exception as exc:
-        async with _find_lock:
-            if inflight.get(key) is task:
-                inflight.pop(key, None)
+        cache.abandon(layer, key, task)
         if is_pg_pool_timeout_error(exc):
             mark_reply_db_fail(key)
             if for_reply:
@@ -102,11 +81,7 @@ async def _cached_find(
             return None
         raise
 
-    expire_at = time.monotonic() + find_cache_ttl_sec()
-    async with _find_lock:
-        if inflight.get(key) is task:
-            inflight.pop(key, None)
-        cache[key] = (expire_at, ctx)
+    cache.finish(layer, key, task, ctx, find_cache_ttl_sec())
     return ctx
 
 
@@ -114,30 +89,29 @@ async def cached_find_by_keywords(
     keywords: str,
     loader,
 ) -> Context | None:
-    return await _cached_find(_find_cache, _find_inflight, keywords, loader)
+    return await _cached_find(FIND_LAYER, keywords, loader)
 
 
 async def cached_find_by_keywords_for_reply(
     keywords: str,
     loader,
 ) -> Context | None:
-    return await _cached_find(_reply_find_cache, _reply_find_inflight, keywords, loader, for_reply=True)
+    return await _cached_find(REPLY_LAYER, keywords, loader, for_reply=True)
 
 
 async def invalidate_find_cache(keywords: str | None = None) -> None:
-    async with _find_lock:
-        if keywords is None:
-            _find_cache.clear()
-            _reply_find_cache.clear()
-            _find_inflight.clear()
-            _reply_find_inflight.clear()
-            _reply_db_fail_until.clear()
-            return
-        key = keywords.strip()
-        if key:
-            _find_cache.pop(key, None)
-            _reply_find_cache.pop(key, None)
-            _reply_db_fail_until.pop(key, None)
+    """只清 find / reply 层；PG 接话快照由 clear_reply_query_snapshot_cache 负责。"""
+    if keywords is None:
+        clear_merged_context_views()
+        shared_read_cache().clear((FIND_LAYER, REPLY_LAYER))
+        discard_precomputed_replies(None)
+        _reply_db_fail_until.clear()
+        return
+    key = keywords.strip()
+    if key:
+        shared_read_cache().drop(key, (FIND_LAYER, REPLY_LAYER))
+        discard_precomputed_replies(key)
+        _reply_db_fail_until.pop(key, None)
 
 
 async def reset_find_cache_for_tests() -> None:
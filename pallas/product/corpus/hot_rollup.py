@@ -0,0 +1,355 @@
+"""本机语料热词的增量汇总：学习事件喂进内存 sketch，定期把增量刷进 corpus_hot_rollup。
+
+每个 (UTC 日, 群) 一个 count-min + top-K 候选，另有一个全局桶（group_id=-1）。
+只有进过 top-K 的词条才落表，计数是进榜之后的学习次数；被挤出榜的词条未刷的增量照常落表。
+多 worker 各自累加增量，表上 ON CONFLICT 相加，读侧按窗口求和，不扫 context_answer。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import time
+from array import array
+from typing import TYPE_CHECKING, Any
+
+from nonebot import logger
+
+from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from pallas.core.foundation.db.repository import LearnAnswerItem
+
+GLOBAL_GROUP_ID = -1
+_DAY_SEC = 86400
+_DEPTH = 4
+_GROUP_WIDTH = 512
+_GROUP_TOP_K = 64
+_GLOBAL_WIDTH = 8192
+_GLOBAL_TOP_K = 512
+# 每个词条最多单独记的回复数，其余并进空串行只计总分
+_ANSWERS_PER_ENTRY = 8
+# 单日最多跟踪的群，超出的群只进全局桶
+_MAX_GROUP_SKETCHES = 4096
+_DEFAULT_FLUSH_SEC = 30.0
+_DEFAULT_WINDOW_DAYS = 7.0
+_COUNTER_MAX = 0xFFFFFFFF
+_UPSERT_BATCH = 4000  # 8 列 × 4000 = 32000，低于 asyncpg 参数上限
+
+_sketches: dict[tuple[int, int], HotKeywordSketch] = {}
+_flush_task: asyncio.Task[int] | None = None
+_last_flush = 0.0
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = repo_env_raw_value(name)
+    if raw is None:
+        return default
+    try:
+        return max(0.0, float(str(raw).strip()))
+    except ValueError:
+        return default
+
+
+def hot_rollup_window_days() -> int:
+    """读侧汇总最近几天（含今天）；``0`` 关闭增量汇总，热词查询退回全量聚合。"""
+    return int(_env_float("PALLAS_CORPUS_HOT_ROLLUP_DAYS", _DEFAULT_WINDOW_DAYS))
+
+
+def hot_rollup_flush_sec() -> float:
+    return _env_float("PALLAS_CORPUS_HOT_ROLLUP_FLUSH_SEC", _DEFAULT_FLUSH_SEC)
+
+
+def hot_rollup_day(ts: float | None = None) -> int:
+    return int((time.time() if ts is None else ts) // _DAY_SEC)
+
+
+class _HotEntry:
+    __slots__ = ("answers", "count", "keywords", "other")
+
+    def __init__(self, keywords: str, count: int) -> None:
+        self.keywords = keywords
+        self.count = count
+        # answer_keywords -> [未刷增量, 首条消息]
+        self.answers: dict[str, list[Any]] = {}
+        self.other = 0
+
+
+class HotKeywordSketch:
+    """count-min 估计全部词条的频次，最小堆维护 top-K 候选；堆里过期的计数懒删除。"""
+
+    __slots__ = ("_heap", "depth", "entries", "k", "pending", "table", "width")
+
+    def __init__(self, *, width: int, depth: int = _DEPTH, k: int) -> None:
+        self.width = max(16, int(width))
+        self.depth = max(1, int(depth))
+        self.k = max(1, int(k))
+        self.table = array("I", bytes(4 * self.width * self.depth))
+        self.entries: dict[str, _HotEntry] = {}
+        self._heap: list[tuple[int, str]] = []
+        # 被挤出榜的词条还没刷的增量：(keywords, answer_keywords) -> [增量, 消息]
+        self.pending: dict[tuple[str, str], list[Any]] = {}
+
+    def _bump(self, keywords: str, n: int) -> int:
+        """conservative update：只抬到 最小值 + n，估计偏高更少。"""
+        table = self.table
+        width = self.width
+        cells = [row * width + hash((row, keywords)) % width for row in range(self.depth)]
+        target = min(min(table[cell] for cell in cells) + n, _COUNTER_MAX)
+        for cell in cells:
+            if table[cell] < target:
+                table[cell] = target
+        return target
+
+    def estimate(self, keywords: str) -> int:
+        width = self.width
+        return min(self.table[row * width + hash((row, keywords)) % width] for row in range(self.depth))
+
+    def add(self, keywords: str, answer_keywords: str, message: str, n: int = 1) -> None:
+        estimate = self._bump(keywords, n)
+        entry = self.entries.get(keywords)
+        if entry is None:
+            if len(self.entries) >= self.k:
+                floor = self._floor()
+                if floor is not None and estimate <= floor.count:
+                    return
+                if floor is not None:
+                    self._evict(floor)
+            entry = self.entries[keywords] = _HotEntry(keywords, estimate)
+        else:
+            entry.count += n
+        heapq.heappush(self._heap, (entry.count, keywords))
+        slot = entry.answers.get(answer_keywords)
+        if slot is not None:
+            slot[0] += n
+        elif len(entry.answers) < _ANSWERS_PER_ENTRY:
+            entry.answers[answer_keywords] = [n, message]
+        else:
+            entry.other += n
+        if len(self._heap) > self.k * 8:
+            self._heap = [(e.count, kw) for kw, e in self.entries.items()]
+            heapq.heapify(self._heap)
+
+    def _floor(self) -> _HotEntry | None:
+        heap = self._heap
+        while heap:
+            count, keywords = heap[0]
+            entry = self.entries.get(keywords)
+            if entry is not None and entry.count == count:
+                return entry
+            heapq.heappop(heap)
+        return None
+
+    def _evict(self, entry: _HotEntry) -> None:
+        self.entries.pop(entry.keywords, None)
+        for answer_keywords, (delta, message) in entry.answers.items():
+            if delta:
+                self._park(entry.keywords, answer_keywords, delta, message)
+        if entry.other:
+            self._park(entry.keywords, "", entry.other, None)
+
+    def _park(self, keywords: str, answer_keywords: str, delta: int, message: str | None) -> None:
+        slot = self.pending.setdefault((keywords, answer_keywords), [0, message])
+        slot[0] += delta
+
+    def drain(self) -> list[tuple[str, str, int, str | None]]:
+        """取出待刷增量 (keywords, answer_keywords, delta, message) 并清零；条目本身留在榜上。"""
+        out = [(kw, ans, delta, msg) for (kw, ans), (delta, msg) in self.pending.items() if delta]
+        self.pending.clear()
+        for entry in self.entries.values():
+            for answer_keywords, slot in entry.answers.items():
+                if slot[0]:
+                    out.append((entry.keywords, answer_keywords, slot[0], slot[1]))
+                    slot[0] = 0
+            if entry.other:
+                out.append((entry.keywords, "", entry.other, None))
+                entry.other = 0
+        return out
+
+
+def _sketch_for(day: int, group_id: int) -> HotKeywordSketch | None:
+    key = (day, group_id)
+    sketch = _sketches.get(key)
+    if sketch is not None:
+        return sketch
+    if group_id == GLOBAL_GROUP_ID:
+        sketch = HotKeywordSketch(width=_GLOBAL_WIDTH, k=_GLOBAL_TOP_K)
+    else:
+        if sum(1 for d, g in _sketches if d == day and g != GLOBAL_GROUP_ID) >= _MAX_GROUP_SKETCHES:
+            return None
+        sketch = HotKeywordSketch(width=_GROUP_WIDTH, k=_GROUP_TOP_K)
+    _sketches[key] = sketch
+    return sketch
+
+
+def note_hot_learn(items: Iterable[LearnAnswerItem]) -> None:
+    """学习写入提交后调用；同步、只动内存，到刷新间隔时在后台落表。"""
+    global _last_flush
+    if hot_rollup_window_days() <= 0:
+        return
+    for item in items:
+        if not item.keywords or not item.answer_keywords:
+            continue
+        day = hot_rollup_day(item.answer_time)
+        for group_id in (GLOBAL_GROUP_ID, int(item.group_id)):
+            sketch = _sketch_for(day, group_id)
+            if sketch is not None:
+                sketch.add(item.keywords, item.answer_keywords, item.message)
+    now = time.monotonic()
+    if not _last_flush:
+        # 从第一批学习事件起计时，不在启动瞬间就刷一次
+        _last_flush = now
+    elif now - _last_flush >= hot_rollup_flush_sec():
+        schedule_hot_rollup_flush()
+
+
+def schedule_hot_rollup_flush() -> asyncio.Task[int] | None:
+    global _flush_task, _last_flush
+    if _flush_task is not None and not _flush_task.done():
+        return _flush_task
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    _last_flush = time.monotonic()
+    _flush_task = asyncio.create_task(flush_hot_rollup(), name="corpus_hot_rollup_flush")
+    return _flush_task
+
+
+async def flush_hot_rollup() -> int:
+    """把全部 sketch 的增量刷进表并清理窗口外的旧行；返回写入行数。失败的增量放回下次再刷。"""
+    global _last_flush
+    _last_flush = time.monotonic()
+    today = hot_rollup_day()
+    rows: list[dict[str, Any]] = []
+    for (day, group_id), sketch in list(_sketches.items()):
+        for keywords, answer_keywords, delta, message in sketch.drain():
+            rows.append({
+                "day": day,
+                "group_id": group_id,
+                "keywords": keywords,
+                "answer_keywords": answer_keywords,
+                "count": delta,
+                "message": message,
+            })
+        if day < today - 1:
+            # 隔日的 sketch 刷完即丢，迟到的学习事件会新建一个
+            _sketches.pop((day, group_id), None)
+    if not rows:
+        return 0
+    try:
+        await _upsert_rollup_rows(rows, prune_before=today - max(1, hot_rollup_window_days()) + 1)
+    except Exception as exc:
+        logger.warning("Corpus hot rollup flush failed with error type [{}]: [{}]", type(exc).__name__, exc)
+        for row in rows:
+            sketch = _sketch_for(row["day"], row["group_id"])
+            if sketch is not None:
+                sketch._park(row["keywords"], row["answer_keywords"], row["count"], row["message"])
+        return 0
+    return len(rows)
+
+
+async def _upsert_rollup_rows(rows: list[dict[str, Any]], *, prune_before: int) -> None:
+    from sqlalchemy import delete, func
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+    from pallas.core.foundation.db.repository_pg import CorpusHotRollupRow, get_session, keywords_hash
+
+    # 同一主键在一条 INSERT 里出现两次会报错，先按主键合并
+    merged: dict[tuple[int, int, str, str], dict[str, Any]] = {}
+    for row in rows:
+        answer_keywords = row["answer_keywords"]
+        key = (
+            row["day"],
+            row["group_id"],
+            keywords_hash(row["keywords"]),
+            keywords_hash(answer_keywords) if answer_keywords else "",
+        )
+        hit = merged.get(key)
+        if hit is None:
+            merged[key] = {
+                "day": key[0],
+                "group_id": key[1],
+                "keywords_hash": key[2],
+                "answer_hash": key[3],
+                "keywords": row["keywords"].replace("\x00", ""),
+                "answer_keywords": answer_keywords.replace("\x00", ""),
+                "count": int(row["count"]),
+                "message": row["message"].replace("\x00", "") if row["message"] else None,
+            }
+        else:
+            hit["count"] += int(row["count"])
+    values = [merged[key] for key in sorted(merged)]
+    async with get_session() as session:
+        for offset in range(0, len(values), _UPSERT_BATCH):
+            stmt = pg_insert(CorpusHotRollupRow).values(values[offset : offset + _UPSERT_BATCH])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["day", "group_id", "keywords_hash", "answer_hash"],
+                set_={
+                    "count": CorpusHotRollupRow.count + stmt.excluded.count,
+                    "message": func.coalesce(CorpusHotRollupRow.message, stmt.excluded.message),
+                },
+            )
+            await session.execute(stmt)
+        await session.execute(delete(CorpusHotRollupRow).where(CorpusHotRollupRow.day < prune_before))
+        await session.commit()
+
+
+async def read_hot_rollup_rows(
+    *,
+    group_id: int,
+    limit: int,
+    answers_per_keyword: int,
+) -> list[dict[str, Any]]:
+    """窗口内按词条求和取 top，再取每条的 top 回复；行结构与全量聚合一致，交给同一套组装。"""
+    from sqlalchemy import text
+
+    from pallas.core.foundation.db.repository_pg import get_session
+
+    sql = """
+WITH top_kw AS (
+    SELECT keywords_hash, MIN(keywords) AS keywords, SUM(count) AS score
+    FROM corpus_hot_rollup
+    WHERE group_id = :group_id AND day >= :since
+    GROUP BY keywords_hash
+    ORDER BY score DESC, keywords ASC
+    LIMIT :lim
+), ranked AS (
+    SELECT
+        r.keywords_hash,
+        r.answer_keywords,
+        SUM(r.count) AS count,
+        MIN(r.message) AS message,
+        ROW_NUMBER() OVER (
+            PARTITION BY r.keywords_hash
+            ORDER BY SUM(r.count) DESC, r.answer_keywords ASC
+        ) AS rn
+    FROM corpus_hot_rollup r
+    INNER JOIN top_kw t ON t.keywords_hash = r.keywords_hash
+    WHERE r.group_id = :group_id AND r.day >= :since AND r.answer_hash <> ''
+    GROUP BY r.keywords_hash, r.answer_keywords
+)
+SELECT t.keywords, t.score, a.answer_keywords, a.count, a.message
+FROM top_kw t
+INNER JOIN ranked a ON a.keywords_hash = t.keywords_hash AND a.rn <= :ans_lim
+ORDER BY t.score DESC, t.keywords ASC, a.rn ASC
+"""
+    params = {
+        "group_id": int(group_id),
+        "since": hot_rollup_day() - max(1, hot_rollup_window_days()) + 1,
+        "lim": max(limit * 4, limit),
+        "ans_lim": answers_per_keyword,
+    }
+    async with get_session(read_only=True) as session:
+        return [dict(row) for row in (await session.execute(text(sql), params)).mappings().all()]
+
+
+def clear_hot_rollup_for_tests() -> None:
+    global _flush_task, _last_flush
+    if _flush_task is not None and not _flush_task.done():
+        _flush_task.cancel()
+    _sketches.clear()
+    _flush_task = None
+    _last_flush = 0.0
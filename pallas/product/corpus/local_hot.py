@@ -63,6 +63,38 @@ async def aggregate_local_hot_keywords_pg(
     group_id: int | None,
     limit: int,
     answers_per_keyword: int,
+) -> list[dict[str, Any]]:
+    from pallas.product.corpus.hot_rollup import (
+        GLOBAL_GROUP_ID,
+        flush_hot_rollup,
+        hot_rollup_window_days,
+        read_hot_rollup_rows,
+    )
+
+    # 优先读增量汇总表；汇总关闭或窗口内还没有数据（刚部署）时退回全量聚合
+    if hot_rollup_window_days() > 0:
+        await flush_hot_rollup()
+        rows = await read_hot_rollup_rows(
+            group_id=int(group_id) if scope == "group" and group_id is not None else GLOBAL_GROUP_ID,
+            limit=limit,
+            answers_per_keyword=answers_per_keyword,
+        )
+        if rows:
+            return hot_items_from_rows(rows, limit=limit)
+    return await scan_local_hot_keywords_pg(
+        scope=scope,
+        group_id=group_id,
+        limit=limit,
+        answers_per_keyword=answers_per_keyword,
+    )
+
+
+async def scan_local_hot_keywords_pg(
+    *,
+    scope: str,
+    group_id: int | None,
+    limit: int,
+    answers_per_keyword: int,
 ) -> list[dict[str, Any]]:
     from pallas.core.foundation.db.repository_pg import get_session
 
@@ -124,19 +156,23 @@ ORDER BY r.score DESC, r.keywords ASC, r.rn ASC
 
     async with get_session(read_only=True) as session:
         rows = (await session.execute(text(sql), params)).mappings().all()
+    return hot_items_from_rows(rows, limit=limit)
+
 
-    by_ctx: dict[int, dict[str, Any]] = {}
-    order: list[int] = []
+def hot_items_from_rows(rows: Any, *, limit: int) -> list[dict[str, Any]]:
+    """按 score 排好序的 (keywords, score, answer_keywords, count, message) 行组装成热词条目。"""
+    by_kw: dict[str, dict[str, Any]] = {}
+    order: list[str] = []
     for row in rows:
-        ctx_id = int(row["context_id"])
-        bucket = by_ctx.get(ctx_id)
+        raw = str(row["keywords"] or "")
+        bucket = by_kw.get(raw)
         if bucket is None:
-            label = plain_message_text(str(row["keywords"] or ""))
+            label = plain_message_text(raw)
             if not label:
                 continue
             bucket = {"keywords": label, "score": int(row["score"] or 0), "answer_rows": []}
-            by_ctx[ctx_id] = bucket
-            order.append(ctx_id)
+            by_kw[raw] = bucket
+            order.append(raw)
         bucket["answer_rows"].append({
             "answer_keywords": row.get("answer_keywords"),
             "count": int(row.get("count") or 0),
@@ -144,8 +180,8 @@ ORDER BY r.score DESC, r.keywords ASC, r.rn ASC
         })
 
     out: list[dict[str, Any]] = []
-    for ctx_id in order:
-        bucket = by_ctx[ctx_id]
+    for raw in order:
+        bucket = by_kw[raw]
         answers = build_hot_answers(bucket["answer_rows"])
         if not answers:
             continue
@@ -1,11 +1,21 @@
-"""多语料源 Context / Answer 合并。"""
+"""多语料源 Context / Answer 合并。
+
+合并结果是只读共享视图：未冲突的 Answer 直接引用来源对象，只有 merge_counts 下
+同 (group_id, keywords) 的 Answer 才新建一份。调用方要改动前先 copy_context 拷一份
+（复读取候选已在 candidate_append 里按需拷贝）。
+合并结果挂在本地回复快照旁缓存，热词反复查询拿到的是同一个视图，不再重复合并。
+"""
 
 from __future__ import annotations
 
+import weakref
+
 from pallas.core.foundation.db.modules import Answer, Ban, Context
 
 MergeStrategy = str  # local_first | merge_counts
 
+_merged_views: dict[tuple[str, str], tuple[weakref.ref, int, tuple[int, ...], str, Context]] = {}
+
 
 def answer_key(answer: Answer) -> tuple[int, str]:
     return (int(answer.group_id), str(answer.keywords))
@@ -22,6 +32,7 @@ def copy_answer(answer: Answer) -> Answer:
 
 
 def copy_context(context: Context) -> Context:
+    """深拷贝一份可写的 Context；合并视图与快照共享的对象改动前须先经过这里。"""
     return Context.model_construct(
         keywords=context.keywords,
         time=int(context.time),
@@ -41,27 +52,99 @@ def merge_contexts(
     if extra is None:
         return base
     if base is None:
-        return copy_context(extra)
+        return extra
 
-    answers_map: dict[tuple[int, str], Answer] = {answer_key(a): copy_answer(a) for a in base.answers}
+    answers_map: dict[tuple[int, str], Answer] = {answer_key(a): a for a in base.answers}
+    # merge_counts 冲突时新建的 Answer 及其消息去重集合；来源对象一律不改
+    owned: dict[tuple[int, str], set[str]] = {}
     for incoming in extra.answers:
         key = answer_key(incoming)
         existing = answers_map.get(key)
         if existing is None:
-            answers_map[key] = copy_answer(incoming)
+            answers_map[key] = incoming
+            continue
+        if strategy != "merge_counts":
             continue
-        if strategy == "merge_counts":
-            existing.count = int(existing.count) + int(incoming.count)
-            existing.time = max(int(existing.time), int(incoming.time))
-            for msg in incoming.messages:
-                if msg not in existing.messages:
-                    existing.messages.append(msg)
+        seen = owned.get(key)
+        if seen is None:
+            existing = copy_answer(existing)
+            answers_map[key] = existing
+            seen = owned[key] = set(existing.messages)
+        existing.count = int(existing.count) + int(incoming.count)
+        existing.time = max(int(existing.time), int(incoming.time))
+        for msg in incoming.messages:
+            if msg not in seen:
+                seen.add(msg)
+                existing.messages.append(msg)
 
     return Context.model_construct(
         keywords=base.keywords,
         time=max(int(base.time), int(extra.time)),
         trigger_count=int(base.trigger_count) + int(extra.trigger_count),
         answers=list(answers_map.values()),
-        ban=[Ban(keywords=b.keywords, group_id=b.group_id, reason=b.reason, time=b.time) for b in base.ban],
+        ban=list(base.ban),
         clear_time=max(int(base.clear_time), int(extra.clear_time)),
     )
+
+
+def _fingerprint(context: Context) -> tuple[int, ...]:
+    """远程来源每次都是新对象，按计数摘要判断内容是否变化；学习必然抬高 count 或 time。"""
+    answers = context.answers
+    return (
+        int(context.trigger_count),
+        int(context.time),
+        len(answers),
+        sum(int(a.count) for a in answers),
+        max((int(a.time) for a in answers), default=0),
+    )
+
+
+def merged_context_view(
+    keywords: str,
+    source_id: str,
+    base: Context | None,
+    extra: Context | None,
+    *,
+    strategy: MergeStrategy = "local_first",
+    max_entries: int = 512,
+) -> Context | None:
+    """
+    merge_contexts 的缓存版：本地侧仍是上次那个回复快照对象、远程侧内容摘要未变时
+    直接返回上次的合并视图。本地快照过期换了新对象即自然失效，不需要单独清理。
+    按 (keywords, 并入的来源) 分槽，多来源逐级合并时每一级各自命中。
+    """
+    if base is None or extra is None:
+        return merge_contexts(base, extra, strategy=strategy)
+    extra_print = _fingerprint(extra)
+    slot = (keywords, source_id)
+    hit = _merged_views.get(slot)
+    if (
+        hit is not None
+        and hit[0]() is base
+        and hit[1] == len(base.answers)
+        and hit[2] == extra_print
+        and hit[3] == strategy
+    ):
+        return hit[4]
+    merged = merge_contexts(base, extra, strategy=strategy)
+    if merged is None:
+        return None
+    try:
+        base_ref = weakref.ref(base)
+    except TypeError:
+        return merged
+    if slot not in _merged_views and len(_merged_views) >= max_entries:
+        # 按插入顺序丢最老的一半，热词会在下次查询时重新进来
+        for stale in list(_merged_views)[: max(1, max_entries // 2)]:
+            _merged_views.pop(stale, None)
+    _merged_views[slot] = (base_ref, len(base.answers), extra_print, strategy, merged)
+    return merged
+
+
+def clear_merged_context_views(keywords: str | None = None) -> None:
+    if keywords is None:
+        _merged_views.clear()
+        return
+    key = keywords.strip()
+    for slot in [slot for slot in _merged_views if slot[0] == key]:
+        _merged_views.pop(slot, None)
@@ -0,0 +1,287 @@
+"""社区语料远程未命中的落盘负缓存：mmap 定长槽，同机分片 worker 共享，重启后仍有效。
+
+槽里只存 keywords 的 blake2b、到期 unix 秒与累计未命中次数；读无锁，写走非阻塞的跨进程文件锁，
+锁被别的 worker 占着时不在事件循环上等：记未命中直接跳过，清除退回无锁改写。
+同一 keywords 反复未命中时 TTL 按倍率拉长（封顶），远端查到或本机贡献过即清掉。
+只记确定的未命中（404 / 批量结果为空），超时、限流、预算跳过不记。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+
+from nonebot import logger
+
+from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+_MAGIC = b"PBNEG\x00\x01\x00"
+_FILE_HEADER = struct.Struct("<8sII")  # magic, slot_count, slot_size
+_SLOT = struct.Struct("<QIHH")  # key_hash, expires_at, misses, check
+_WAYS = 4
+_MISSES_MAX = 0xFFFF
+_EXPIRES_MAX = 0xFFFFFFFF
+_DEFAULT_TTL_SEC = 1800.0
+_DEFAULT_MAX_TTL_SEC = 86400.0
+_DEFAULT_GROWTH = 2.0
+_DEFAULT_SLOTS = 65536
+
+_cache: NegativeLookupCache | None = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = repo_env_raw_value(name)
+    if raw is None:
+        return default
+    try:
+        return max(0.0, float(str(raw).strip()))
+    except ValueError:
+        return default
+
+
+def negative_cache_ttl_sec() -> float:
+    """首次未命中的 TTL；``0`` 关闭负缓存。"""
+    return _env_float("PALLAS_CORPUS_NEGATIVE_TTL_SEC", _DEFAULT_TTL_SEC)
+
+
+def negative_cache_max_ttl_sec() -> float:
+    return _env_float("PALLAS_CORPUS_NEGATIVE_MAX_TTL_SEC", _DEFAULT_MAX_TTL_SEC)
+
+
+def negative_cache_growth() -> float:
+    """到期后再次未命中时 TTL 的放大倍率；``1`` 即固定 TTL。"""
+    return max(1.0, _env_float("PALLAS_CORPUS_NEGATIVE_TTL_GROWTH", _DEFAULT_GROWTH))
+
+
+def negative_cache_slots() -> int:
+    return int(_env_float("PALLAS_CORPUS_NEGATIVE_SLOTS", _DEFAULT_SLOTS))
+
+
+def negative_cache_path() -> Path:
+    return Path("data/pallas_config/corpus_negative_cache.bin")
+
+
+def _key_hash(keywords: str) -> int:
+    digest = hashlib.blake2b(keywords.encode(), digest_size=8).digest()
+    # 0 表示空槽
+    return int.from_bytes(digest, "little") or 1
+
+
+def _slot_check(key_hash: int, expires_at: int, misses: int) -> int:
+    return zlib.crc32(struct.pack("<QIH", key_hash, expires_at, misses)) & 0xFFFF
+
+
+def _grown_ttl(ttl_sec: float, max_ttl_sec: float, growth: float, misses: int) -> int:
+    """ttl_sec * growth ** (misses - 1)，封顶 max(ttl_sec, max_ttl_sec)；在对数空间比较，倍率再大也不溢出。"""
+    cap = min(float(_EXPIRES_MAX), max(ttl_sec, max_ttl_sec))
+    steps = min(misses - 1, 64)
+    if ttl_sec <= 0 or steps <= 0 or growth <= 1.0:
+        return int(min(cap, max(0.0, ttl_sec)))
+    if math.log(ttl_sec) + steps * math.log(growth) >= math.log(cap):
+        return int(cap)
+    return int(ttl_sec * growth**steps)
+
+
+class NegativeLookupCache:
+    """
+    文件布局：文件头 | slot_count 个 16 字节槽，按桶 4 路组相联。
+    过期条目留在槽里保存未命中次数，桶满时先淘汰最早到期的。
+    槽数与文件头不符时整体重建（tmp + replace）。
+    """
+
+    def __init__(self, path: Path, slots: int) -> None:
+        self.path = path
+        self.buckets = max(1, int(slots) // _WAYS)
+        self.slots = self.buckets * _WAYS
+        self._slots_offset = (_FILE_HEADER.size + 63) // 64 * 64
+        self._size = self._slots_offset + self.slots * _SLOT.size
+        self._lock_path = path.with_name(f"{path.name}.lock")
+        self._mm = self._open()
+
+    def _header_ok(self) -> bool:
+        try:
+            with self.path.open("rb") as fh:
+                head = fh.read(_FILE_HEADER.size)
+        except OSError:
+            return False
+        if len(head) != _FILE_HEADER.size:
+            return False
+        magic, slot_count, slot_size = _FILE_HEADER.unpack(head)
+        return magic == _MAGIC and slot_count == self.slots and slot_size == _SLOT.size
+
+    def _open(self) -> mmap.mmap:
+        from pallas.core.foundation.fs_lock import interprocess_file_lock
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with interprocess_file_lock(self._lock_path):
+            if not self._header_ok() or self.path.stat().st_size != self._size:
+                tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+                with tmp.open("wb") as fh:
+                    fh.truncate(self._size)
+                    fh.write(_FILE_HEADER.pack(_MAGIC, self.slots, _SLOT.size))
+                tmp.replace(self.path)
+            fd = os.open(str(self.path), os.O_RDWR)
+            try:
+                return mmap.mmap(fd, self._size)
+            finally:
+                os.close(fd)
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _slot_offset(self, bucket: int, way: int) -> int:
+        return self._slots_offset + (bucket * _WAYS + way) * _SLOT.size
+
+    def _find(self, key_hash: int) -> tuple[int, int, int] | None:
+        """返回 (offset, expires_at, misses)；校验不过的半截写按不存在处理。"""
+        bucket = key_hash % self.buckets
+        for way in range(_WAYS):
+            offset = self._slot_offset(bucket, way)
+            slot_hash, expires_at, misses, check = _SLOT.unpack_from(self._mm, offset)
+            if slot_hash == key_hash and _slot_check(key_hash, expires_at, misses) == check:
+                return offset, expires_at, misses
+        return None
+
+    def is_negative(self, keywords: str, *, now: float | None = None) -> bool:
+        hit = self._find(_key_hash(keywords))
+        return hit is not None and hit[1] > (time.time() if now is None else now)
+
+    def note_miss(
+        self,
+        keywords: str,
+        *,
+        ttl_sec: float,
+        max_ttl_sec: float,
+        growth: float,
+        now: float | None = None,
+    ) -> int:
+        """记一次未命中，返回本次生效的 TTL 秒数；锁被占着时不记，返回 0。"""
+        from pallas.core.foundation.fs_lock import try_interprocess_file_lock
+
+        key_hash = _key_hash(keywords)
+        cur = int(time.time() if now is None else now)
+        mm = self._mm
+        with try_interprocess_file_lock(self._lock_path) as locked:
+            if not locked:
+                # 负缓存只是省一次远程查询，漏记无妨
+                return 0
+            hit = self._find(key_hash)
+            if hit is not None:
+                offset, expires_at, misses = hit
+                if expires_at > cur:
+                    # 别的 worker 刚记过，不重复放大
+                    return expires_at - cur
+                misses = min(_MISSES_MAX, misses + 1)
+            else:
+                offset = self._victim(key_hash % self.buckets, cur)
+                misses = 1
+            ttl = _grown_ttl(ttl_sec, max_ttl_sec, growth, misses)
+            expires_at = min(_EXPIRES_MAX, cur + max(1, ttl))
+            _SLOT.pack_into(mm, offset, key_hash, expires_at, misses, _slot_check(key_hash, expires_at, misses))
+        return ttl
+
+    def _victim(self, bucket: int, now: int) -> int:
+        best_offset = self._slot_offset(bucket, 0)
+        best_rank: tuple[int, int] | None = None
+        for way in range(_WAYS):
+            offset = self._slot_offset(bucket, way)
+            slot_hash, expires_at, _misses, _check = _SLOT.unpack_from(self._mm, offset)
+            if slot_hash == 0:
+                return offset
+            # 已过期的优先，其次到期最早的
+            rank = (0 if expires_at <= now else 1, expires_at)
+            if best_rank is None or rank < best_rank:
+                best_rank, best_offset = rank, offset
+        return best_offset
+
+    def forget(self, keywords: str) -> bool:
+        from pallas.core.foundation.fs_lock import try_interprocess_file_lock
+
+        key_hash = _key_hash(keywords)
+        # 绝大多数 keywords 不在表里，先无锁看一眼
+        if self._find(key_hash) is None:
+            return False
+        with try_interprocess_file_lock(self._lock_path) as locked:
+            hit = self._find(key_hash)
+            if hit is None:
+                return False
+            # 没拿到锁也照样清：与并发写交错时要么清掉别的 key（多查一次远端），要么校验不过按不存在处理
+            _SLOT.pack_into(self._mm, hit[0], 0, 0, 0, 0)
+        if not locked:
+            logger.debug("Corpus negative cache entry was cleared without the file lock")
+        return True
+
+
+def shared_negative_cache() -> NegativeLookupCache | None:
+    """进程内单例；TTL 或槽数为 0、映射失败时返回 None，调用方照常查远端。"""
+    global _cache, _cache_failed
+    if _cache is not None or _cache_failed:
+        return _cache
+    with _cache_lock:
+        if _cache is not None or _cache_failed:
+            return _cache
+        slots = negative_cache_slots()
+        if slots <= 0 or negative_cache_ttl_sec() <= 0:
+            _cache_failed = True
+            return None
+        try:
+            _cache = NegativeLookupCache(negative_cache_path(), slots)
+        except (OSError, ValueError) as exc:
+            _cache_failed = True
+            logger.warning("Corpus negative lookup cache is unavailable: [{}]", exc)
+        return _cache
+
+
+def reset_shared_negative_cache() -> None:
+    global _cache, _cache_failed
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+        _cache = None
+        _cache_failed = False
+
+
+def remote_miss_cached(keywords: str) -> bool:
+    """远程查询前调用：True 表示近期确认过远端没有，直接按未命中处理。"""
+    if not keywords or negative_cache_ttl_sec() <= 0:
+        return False
+    cache = shared_negative_cache()
+    if cache is None:
+        return False
+    from pallas.core.platform.ingress.hotpath_metrics import record_corpus_negative_cache
+
+    hit = cache.is_negative(keywords)
+    record_corpus_negative_cache(hit=hit)
+    return hit
+
+
+def note_remote_miss(keywords: str) -> None:
+    ttl = negative_cache_ttl_sec()
+    if not keywords or ttl <= 0:
+        return
+    cache = shared_negative_cache()
+    if cache is not None:
+        cache.note_miss(
+            keywords,
+            ttl_sec=ttl,
+            max_ttl_sec=negative_cache_max_ttl_sec(),
+            growth=negative_cache_growth(),
+        )
+
+
+def note_remote_present(keywords: str) -> None:
+    """远端查到或本机刚贡献过：清掉负缓存，下次照常查。"""
+    if not keywords or negative_cache_ttl_sec() <= 0:
+        return
+    cache = shared_negative_cache()
+    if cache is not None:
+        cache.forget(keywords)
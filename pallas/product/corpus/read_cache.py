@@ -0,0 +1,392 @@
+"""语料读缓存：find / 接话 / PG 接话快照三层共用一份分片 W-TinyLFU 缓存。
+
+按 keywords 分片，每片是 窗口 LRU + 主区分段 LRU（试用 / 保护），窗口挤出的新词要比主区
+试用段队尾更常被查才准入，一次性短语进不来也挤不走热词。访问频率用每片一份的 count-min
+草图（4 位饱和计数，定期减半）记录，三层共享同一关键词的频率。
+
+全部读写都在事件循环线程里同步完成、中间不 await，所以不持锁；分片只为让淘汰与重排局限在
+一小段 OrderedDict 上。同层同 key 的并发 miss 合并成一个加载任务（single-flight）。
+
+上层条目（find / reply）由下层快照填充时，过期时间不超过快照本身，避免把快照的旧值续命。
+学习写入时 find / reply 层直接失效，快照层截短到写入宽限期，热词连续学习时仍能吸收重查。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from pallas.core.foundation.config.repo_settings import repo_env_raw_value
+
+FIND_LAYER = "find"
+REPLY_LAYER = "reply"
+SNAPSHOT_LAYER = "snapshot"
+LAYERS = (FIND_LAYER, REPLY_LAYER, SNAPSHOT_LAYER)
+
+_DEFAULT_SHARDS = 16
+_DEFAULT_WRITE_GRACE_SEC = 1.0
+_WINDOW_RATIO = 0.01
+_PROTECTED_RATIO = 0.8
+_SKETCH_DEPTH = 4
+_SKETCH_MAX = 15
+_SKETCH_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+_MASK64 = (1 << 64) - 1
+
+_shared: CorpusReadCache | None = None
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = repo_env_raw_value(name)
+    if raw is None:
+        return default
+    try:
+        return max(0.0, float(str(raw).strip()))
+    except ValueError:
+        return default
+
+
+def read_cache_shards() -> int:
+    return max(1, int(_env_float("PALLAS_CORPUS_READ_CACHE_SHARDS", _DEFAULT_SHARDS)))
+
+
+def read_cache_write_grace_sec() -> float:
+    """学习写入后快照层最多再复用多少秒；``0`` 即学习后立刻失效。"""
+    return _env_float("PALLAS_CORPUS_READ_CACHE_WRITE_GRACE_SEC", _DEFAULT_WRITE_GRACE_SEC)
+
+
+def read_cache_capacity() -> int:
+    """三层合计条目上限：沿用原 find 缓存与接话快照两项上限之和。"""
+    from pallas.product.corpus.reply_perf_config import find_cache_max_entries, reply_snapshot_max_entries
+
+    return find_cache_max_entries() + reply_snapshot_max_entries()
+
+
+def approx_value_bytes(value: Any) -> int:
+    """粗估条目占用：Context 按字符串与答案对象累加，其它值取 getsizeof。"""
+    if value is None:
+        return 64
+    answers = getattr(value, "answers", None)
+    if answers is None:
+        return sys.getsizeof(value)
+    total = 256 + sys.getsizeof(getattr(value, "keywords", ""))
+    for answer in answers:
+        total += 160 + sys.getsizeof(answer.keywords)
+        total += sum(sys.getsizeof(msg) for msg in answer.messages)
+    return total + 128 * len(getattr(value, "ban", ()) or ())
+
+
+class FrequencySketch:
+    """count-min 草图，4 行、4 位饱和计数；累计加数达到 sample_size 时全表减半做老化。"""
+
+    __slots__ = ("_additions", "_mask", "_table", "_width", "sample_size")
+
+    def __init__(self, capacity: int) -> None:
+        width = 16
+        while width < capacity:
+            width <<= 1
+        self._width = width
+        self._mask = width - 1
+        self._table = bytearray(_SKETCH_DEPTH * width)
+        self._additions = 0
+        self.sample_size = max(64, 10 * capacity)
+
+    def _indexes(self, key: str) -> list[int]:
+        h = hash(key) & _MASK64
+        width = self._width
+        return [
+            row * width + ((((h ^ seed) * 0x9E3779B97F4A7C15) & _MASK64) >> 32 & self._mask)
+            for row, seed in enumerate(_SKETCH_SEEDS)
+        ]
+
+    def frequency(self, key: str) -> int:
+        table = self._table
+        return min(table[i] for i in self._indexes(key))
+
+    def increment(self, key: str) -> None:
+        table = self._table
+        indexes = self._indexes(key)
+        low = min(table[i] for i in indexes)
+        if low >= _SKETCH_MAX:
+            return
+        # 保守更新：只抬最小的那几格，减少哈希冲突带来的高估
+        for i in indexes:
+            if table[i] == low:
+                table[i] = low + 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._table = bytearray(b >> 1 for b in table)
+            self._additions //= 2
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    expires_at: float
+    size: int
+
+
+class _Shard:
+    __slots__ = (
+        "bytes",
+        "inflight",
+        "main_cap",
+        "probation",
+        "protected",
+        "protected_cap",
+        "sketch",
+        "window",
+        "window_cap",
+    )
+
+    def __init__(self, capacity: int) -> None:
+        self.window: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self.probation: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self.protected: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self.inflight: dict[tuple[str, str], asyncio.Task[Any]] = {}
+        self.bytes = 0
+        self.sketch = FrequencySketch(capacity)
+        self.resize(capacity)
+
+    def resize(self, capacity: int) -> None:
+        capacity = max(4, capacity)
+        self.window_cap = max(1, int(capacity * _WINDOW_RATIO))
+        self.main_cap = capacity - self.window_cap
+        self.protected_cap = max(1, int(self.main_cap * _PROTECTED_RATIO))
+
+    def segment_of(self, slot: tuple[str, str]) -> OrderedDict[tuple[str, str], _Entry] | None:
+        for segment in (self.window, self.probation, self.protected):
+            if slot in segment:
+                return segment
+        return None
+
+    def __len__(self) -> int:
+        return len(self.window) + len(self.probation) + len(self.protected)
+
+
+class CorpusReadCache:
+    """分片 W-TinyLFU；条目键为 (层, keywords)，同一 keywords 的各层落在同一片。"""
+
+    def __init__(self, capacity: int, *, shards: int = _DEFAULT_SHARDS) -> None:
+        self.capacity = max(1, int(capacity))
+        self._shards = [_Shard(self._shard_capacity(shards)) for _ in range(max(1, shards))]
+        self._layer_hits = dict.fromkeys(LAYERS, 0)
+        self._layer_misses = dict.fromkeys(LAYERS, 0)
+        self.evictions = 0
+        self.admission_rejects = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _shard_capacity(self, shards: int) -> int:
+        return -(-self.capacity // max(1, shards))
+
+    def resize(self, capacity: int) -> None:
+        """只改上限，超出部分在之后的写入里逐步淘汰。"""
+        self.capacity = max(1, int(capacity))
+        per_shard = self._shard_capacity(len(self._shards))
+        for shard in self._shards:
+            shard.resize(per_shard)
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def get(self, layer: str, key: str, *, now: float | None = None) -> tuple[bool, Any]:
+        shard = self._shard(key)
+        shard.sketch.increment(key)
+        slot = (layer, key)
+        segment = shard.segment_of(slot)
+        if segment is None:
+            self._layer_misses[layer] += 1
+            return False, None
+        entry = segment[slot]
+        if entry.expires_at <= (time.monotonic() if now is None else now):
+            del segment[slot]
+            shard.bytes -= entry.size
+            self.expirations += 1
+            self._layer_misses[layer] += 1
+            return False, None
+        if segment is shard.probation:
+            del shard.probation[slot]
+            shard.protected[slot] = entry
+            if len(shard.protected) > shard.protected_cap:
+                demoted, demoted_entry = shard.protected.popitem(last=False)
+                shard.probation[demoted] = demoted_entry
+        else:
+            segment.move_to_end(slot)
+        self._layer_hits[layer] += 1
+        return True, entry.value
+
+    def expires_at(self, layer: str, key: str) -> float | None:
+        shard = self._shard(key)
+        segment = shard.segment_of((layer, key))
+        return None if segment is None else segment[(layer, key)].expires_at
+
+    def put(self, layer: str, key: str, value: Any, ttl_sec: float, *, now: float | None = None) -> None:
+        shard = self._shard(key)
+        slot = (layer, key)
+        entry = _Entry(value, (time.monotonic() if now is None else now) + ttl_sec, approx_value_bytes(value))
+        segment = shard.segment_of(slot)
+        if segment is not None:
+            shard.bytes += entry.size - segment[slot].size
+            segment[slot] = entry
+            segment.move_to_end(slot)
+            return
+        shard.window[slot] = entry
+        shard.bytes += entry.size
+        while len(shard.window) > shard.window_cap:
+            candidate, candidate_entry = shard.window.popitem(last=False)
+            self._admit(shard, candidate, candidate_entry)
+        while len(shard.probation) + len(shard.protected) > shard.main_cap:
+            self._evict(shard, *self._main_victim(shard))
+
+    def _main_victim(self, shard: _Shard) -> tuple[OrderedDict[tuple[str, str], _Entry], tuple[str, str]]:
+        segment = shard.probation or shard.protected
+        return segment, next(iter(segment))
+
+    def _evict(self, shard: _Shard, segment: OrderedDict[tuple[str, str], _Entry], slot: tuple[str, str]) -> None:
+        shard.bytes -= segment.pop(slot).size
+        self.evictions += 1
+
+    def _admit(self, shard: _Shard, candidate: tuple[str, str], entry: _Entry) -> None:
+        if len(shard.probation) + len(shard.protected) < shard.main_cap:
+            shard.probation[candidate] = entry
+            return
+        segment, victim = self._main_victim(shard)
+        victim_entry = segment[victim]
+        if victim_entry.expires_at <= time.monotonic() or shard.sketch.frequency(candidate[1]) > shard.sketch.frequency(
+            victim[1]
+        ):
+            self._evict(shard, segment, victim)
+            shard.probation[candidate] = entry
+            return
+        shard.bytes -= entry.size
+        self.evictions += 1
+        self.admission_rejects += 1
+
+    def clip(self, layer: str, key: str, ttl_sec: float, *, now: float | None = None) -> None:
+        """软失效：把剩余寿命截到 ttl_sec 以内，不延长；写入前发出的加载结果不再入缓存。"""
+        shard = self._shard(key)
+        slot = (layer, key)
+        shard.inflight.pop(slot, None)
+        segment = shard.segment_of(slot)
+        if segment is None:
+            return
+        deadline = (time.monotonic() if now is None else now) + ttl_sec
+        entry = segment[slot]
+        if entry.expires_at > deadline:
+            entry.expires_at = deadline
+            self.invalidations += 1
+
+    def drop(self, key: str, layers: tuple[str, ...] = LAYERS) -> None:
+        """硬失效；同时放掉未完成的加载，旧结果回来后不会再写入。"""
+        shard = self._shard(key)
+        for layer in layers:
+            slot = (layer, key)
+            shard.inflight.pop(slot, None)
+            segment = shard.segment_of(slot)
+            if segment is not None:
+                shard.bytes -= segment.pop(slot).size
+                self.invalidations += 1
+
+    def clear(self, layers: tuple[str, ...] = LAYERS) -> None:
+        wanted = set(layers)
+        for shard in self._shards:
+            for slot in [slot for slot in shard.inflight if slot[0] in wanted]:
+                shard.inflight.pop(slot, None)
+            for segment in (shard.window, shard.probation, shard.protected):
+                for slot in [slot for slot in segment if slot[0] in wanted]:
+                    shard.bytes -= segment.pop(slot).size
+
+    def join_or_start(self, layer: str, key: str, loader) -> tuple[asyncio.Task[Any], bool]:
+        """同层同 key 并发 miss 合并；返回 (加载任务, 是否本次新起)。"""
+        shard = self._shard(key)
+        slot = (layer, key)
+        task = shard.inflight.get(slot)
+        if task is not None:
+            return task, False
+        task = asyncio.create_task(loader(key))
+        shard.inflight[slot] = task
+        return task, True
+
+    def abandon(self, layer: str, key: str, task: asyncio.Task[Any]) -> None:
+        shard = self._shard(key)
+        if shard.inflight.get((layer, key)) is task:
+            shard.inflight.pop((layer, key), None)
+
+    def finish(self, layer: str, key: str, task: asyncio.Task[Any], value: Any, ttl_sec: float) -> None:
+        """加载完成后入缓存；期间被 drop 过（inflight 不再指向本任务）则丢弃结果。"""
+        shard = self._shard(key)
+        if shard.inflight.get((layer, key)) is not task:
+            return
+        shard.inflight.pop((layer, key), None)
+        now = time.monotonic()
+        if layer != SNAPSHOT_LAYER:
+            floor = self.expires_at(SNAPSHOT_LAYER, key)
+            if floor is not None:
+                ttl_sec = min(ttl_sec, max(0.0, floor - now))
+        if ttl_sec > 0:
+            self.put(layer, key, value, ttl_sec, now=now)
+
+    def stats(self) -> dict[str, Any]:
+        hits = sum(self._layer_hits.values())
+        misses = sum(self._layer_misses.values())
+        return {
+            "capacity": self.capacity,
+            "shards": len(self._shards),
+            "entries": sum(len(shard) for shard in self._shards),
+            "approx_bytes": sum(shard.bytes for shard in self._shards),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "evictions": self.evictions,
+            "admission_rejects": self.admission_rejects,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "layers": {
+                layer: {"hits": self._layer_hits[layer], "misses": self._layer_misses[layer]} for layer in LAYERS
+            },
+        }
+
+
+def shared_read_cache() -> CorpusReadCache:
+    """进程内单例；WebUI 改了上限后下次取用时跟着调整。"""
+    global _shared
+    capacity = read_cache_capacity()
+    if _shared is None:
+        _shared = CorpusReadCache(capacity, shards=read_cache_shards())
+    elif _shared.capacity != capacity:
+        _shared.resize(capacity)
+    return _shared
+
+
+def read_cache_stats() -> dict[str, Any]:
+    return shared_read_cache().stats()
+
+
+def discard_precomputed_replies(keywords: str | None) -> None:
+    """作废复读热词预计算候选；None 清全部。复读插件未加载时什么都不做。"""
+    try:
+        from packages.repeater.bundle_precompute import discard_precomputed_candidates
+    except ImportError:
+        return
+    discard_precomputed_candidates(keywords=keywords)
+
+
+def note_corpus_learn(keywords: str) -> None:
+    """学习写入后调用：find / reply 层直接失效，快照层截短到写入宽限期，预计算候选当场作废。"""
+    key = (keywords or "").strip()
+    if not key:
+        return
+    discard_precomputed_replies(key)
+    if _shared is None:
+        return
+    _shared.drop(key, (FIND_LAYER, REPLY_LAYER))
+    _shared.clip(SNAPSHOT_LAYER, key, read_cache_write_grace_sec())
+
+
+def reset_read_cache_for_tests() -> None:
+    global _shared
+    _shared = None
@@ -5,6 +5,7 @@ from __future__ import annotations
 import time
 from typing import Any
 
+from pallas.product.corpus.backfill import corpus_backfill_stats
 from pallas.product.corpus.config import (
     auto_enroll_enabled,
     community_configured,
@@ -20,6 +21,7 @@ from pallas.product.corpus.config import (
     resolved_community_api_base_urls,
 )
 from pallas.product.corpus.store import corpus_community_enrollment_valid, load_corpus_community_state
+from pallas.product.corpus.write_fanout import corpus_mirror_stats
 
 
 async def build_corpus_status_snapshot() -> dict[str, Any]:
@@ -149,6 +151,8 @@ async def build_corpus_status_snapshot() -> dict[str, Any]:
                 "enrolled_at": int(enrolled_at) if enrolled_at is not None else None,
                 "expires_at": int(expires_at) if expires_at is not None else None,
                 "usage": community_usage,
+                "mirror": corpus_mirror_stats(),
+                "backfill": corpus_backfill_stats(),
             },
         },
         "deployment": {
@@ -1,13 +1,24 @@
-"""学习写入后异步 mirror 到联邦 / 社区语料源。"""
+"""学习写入后异步 mirror 到联邦 / 社区语料源。
+
+社区侧在一个时间窗内按 (keywords, answer_keywords) 合并成计数增量，整批一次 bulk contribute；
+队列满、远端失败或停机时未送达的条目落到本地 JSONL，worker 启动和之后发送成功时再补发。
+同机各分片 worker 共用这份文件：追加与改写走跨进程文件锁，补发另有一把非阻塞锁，同一时刻只有一个 worker 补发。
+补发是至少一次：发出去但没拿到响应的批次下次会重复计数。联邦侧仍逐条直写。
+"""
 
 from __future__ import annotations
 
 import asyncio
+import json
+import os
+import time
 from dataclasses import dataclass
+from pathlib import Path
 from typing import TYPE_CHECKING, Any, Literal
 
 from nonebot import get_driver, logger
 
+from pallas.core.foundation.config.repo_settings import repo_env_raw_value
 from pallas.core.foundation.db.modules import Answer, Context
 from pallas.product.corpus.config import CorpusConfig, community_contribute_enabled
 
@@ -38,10 +49,30 @@ def community_mirror_context(context: Context) -> Context:
 
 
 _WRITE_QUEUE_MAX = 2048
+# 单次 bulk 最多带的条目，超出拆成多批
+_BULK_MAX_ITEMS = 256
+# 合并条目最多保留的消息样本，计数增量不受影响
+_ITEM_MAX_MESSAGES = 8
+_DEFAULT_COALESCE_SEC = 1.0
+_DEFAULT_SPILL_MAX_MB = 32.0
+# 补发失败后的退避，逐次翻倍
+_REPLAY_RETRY_SEC = 30.0
+_REPLAY_RETRY_MAX_SEC = 600.0
+_SPILL_PATH = Path("data/pallas_config/corpus_mirror_spill.jsonl")
+
 _write_queue: asyncio.Queue[_MirrorWriteOp] | None = None
 _write_tasks: list[asyncio.Task[None]] = []
+# 队列满时后台落盘的任务，持有引用防止被回收
+_spill_tasks: set[asyncio.Task[None]] = set()
 _write_dropped_full: int = 0
 _LIFECYCLE_BOUND = False
+# 进入合并的社区写操作数 / 合并后产出的条目数 / 远端确认接收的条目数 / 累计落盘条目数
+_ops_in = 0
+_items_out = 0
+_items_shipped = 0
+_spilled_items = 0
+_replay_after = 0.0
+_replay_backoff = _REPLAY_RETRY_SEC
 
 
 @dataclass(frozen=True)
@@ -50,6 +81,26 @@ class _MirrorWriteOp:
     payload: dict[str, Any]
 
 
+def _env_float(name: str, default: float) -> float:
+    raw = repo_env_raw_value(name)
+    if raw is None:
+        return default
+    try:
+        return max(0.0, float(str(raw).strip()))
+    except ValueError:
+        return default
+
+
+def mirror_coalesce_window_sec() -> float:
+    """社区写回的合并窗口；``0`` 只合并队列里已积压的操作，不额外等待。"""
+    return _env_float("PALLAS_CORPUS_MIRROR_COALESCE_SEC", _DEFAULT_COALESCE_SEC)
+
+
+def mirror_spill_max_bytes() -> int:
+    """落盘文件上限；``0`` 关闭落盘，队列满或远端失败时照旧丢弃。"""
+    return int(_env_float("PALLAS_CORPUS_MIRROR_SPILL_MAX_MB", _DEFAULT_SPILL_MAX_MB) * 1024 * 1024)
+
+
 def corpus_write_queue() -> asyncio.Queue[_MirrorWriteOp]:
     global _write_queue
     if _write_queue is None:
@@ -67,22 +118,457 @@ def corpus_write_concurrency() -> int:
     return 1
 
 
+def corpus_mirror_stats() -> dict[str, Any]:
+    try:
+        spill_bytes = _SPILL_PATH.stat().st_size
+    except OSError:
+        spill_bytes = 0
+    return {
+        "queue_depth": _write_queue.qsize() if _write_queue is not None else 0,
+        "queue_max": _WRITE_QUEUE_MAX,
+        "coalesce_window_sec": mirror_coalesce_window_sec(),
+        "ops_in": _ops_in,
+        "items_out": _items_out,
+        "items_shipped": _items_shipped,
+        # 平均几条写操作合成一个 bulk 条目
+        "coalesce_ratio": round(_ops_in / _items_out, 2) if _items_out else 0.0,
+        "spilled_items": _spilled_items,
+        "spill_bytes": spill_bytes,
+        "dropped": _write_dropped_full,
+    }
+
+
+def _merge_messages(into: list[str], extra: list[str]) -> None:
+    seen = set(into)
+    for msg in extra:
+        if len(into) >= _ITEM_MAX_MESSAGES:
+            return
+        if msg not in seen:
+            seen.add(msg)
+            into.append(msg)
+
+
+class _MirrorCoalescer:
+    """社区侧写操作合并成 bulk 条目：insert 按 keywords、upsert_answer 按 (keywords, answer_keywords) 归并。"""
+
+    __slots__ = ("inserts", "upserts")
+
+    def __init__(self) -> None:
+        self.inserts: dict[str, dict[str, Any]] = {}
+        self.upserts: dict[tuple[str, str], dict[str, Any]] = {}
+
+    def add_op(self, op: _MirrorWriteOp) -> None:
+        payload = op.payload
+        if op.kind == "insert":
+            from pallas.product.corpus.community_source import RemoteCorpusRepository
+
+            context = community_mirror_context(payload["context"])
+            self.add_item({"op": "insert", "context": RemoteCorpusRepository._context_to_payload(context)})
+            return
+        self.add_item({
+            "op": "upsert_answer",
+            "keywords": payload["keywords"],
+            "group_id": 0,
+            "answer_keywords": payload["answer_keywords"],
+            "answer_time": int(payload["answer_time"]),
+            "message": payload["message"],
+            "messages": [payload["message"]],
+            "count": 1,
+            "append_on_existing": bool(payload["append_on_existing"]),
+        })
+
+    def add_item(self, item: dict[str, Any]) -> None:
+        if item.get("op") == "insert":
+            context = item.get("context")
+            if isinstance(context, dict):
+                self._add_insert(context)
+            return
+        key = (str(item.get("keywords") or ""), str(item.get("answer_keywords") or ""))
+        existing = self.upserts.get(key)
+        if existing is None:
+            fresh = dict(item)
+            fresh["messages"] = list(item.get("messages") or [item.get("message")])[:_ITEM_MAX_MESSAGES]
+            fresh["count"] = int(item.get("count") or 1)
+            self.upserts[key] = fresh
+            return
+        existing["count"] += int(item.get("count") or 1)
+        existing["answer_time"] = max(int(existing["answer_time"]), int(item.get("answer_time") or 0))
+        existing["append_on_existing"] = bool(existing["append_on_existing"] or item.get("append_on_existing"))
+        _merge_messages(existing["messages"], list(item.get("messages") or [item.get("message")]))
+
+    def _add_insert(self, context: dict[str, Any]) -> None:
+        keywords = str(context.get("keywords") or "")
+        existing = self.inserts.get(keywords)
+        if existing is None:
+            self.inserts[keywords] = {**context, "answers": [dict(a) for a in context.get("answers") or []]}
+            return
+        existing["time"] = max(int(existing["time"]), int(context.get("time") or 0))
+        existing["trigger_count"] = int(existing["trigger_count"]) + int(context.get("trigger_count") or 0)
+        answers = {str(a["keywords"]): a for a in existing["answers"]}
+        for incoming in context.get("answers") or []:
+            current = answers.get(str(incoming.get("keywords")))
+            if current is None:
+                current = answers[str(incoming.get("keywords"))] = dict(incoming)
+                existing["answers"].append(current)
+                continue
+            current["count"] = int(current["count"]) + int(incoming.get("count") or 0)
+            current["time"] = max(int(current["time"]), int(incoming.get("time") or 0))
+            current["messages"] = list(current.get("messages") or [])
+            _merge_messages(current["messages"], list(incoming.get("messages") or []))
+
+    def items(self) -> list[dict[str, Any]]:
+        # 同一 keywords 先建 context 再累加 answer
+        return [{"op": "insert", "context": ctx} for ctx in self.inserts.values()] + list(self.upserts.values())
+
+
+def coalesce_answer_entries(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """把逐条 answer 写入（含 keywords / answer_keywords / answer_time / message）归并成 bulk upsert 条目。"""
+    coalescer = _MirrorCoalescer()
+    for entry in entries:
+        coalescer.add_item({"op": "upsert_answer", **entry, "messages": [entry["message"]], "count": 1})
+    return coalescer.items()
+
+
+def _bulk_capable(payload: dict[str, Any]) -> bool:
+    community = payload.get("community")
+    return (
+        community is not None
+        and community_contribute_enabled(payload["cfg"])
+        and callable(getattr(community, "contribute_items", None))
+    )
+
+
+def _note_dropped(n: int) -> None:
+    global _write_dropped_full
+    before = _write_dropped_full
+    _write_dropped_full += n
+    if before == 0 or before // 200 != _write_dropped_full // 200:
+        logger.info(
+            "Corpus mirror queue reached maximum [{}] and dropped [{}] entries",
+            _WRITE_QUEUE_MAX,
+            _write_dropped_full,
+        )
+
+
+def _spill_lock_path() -> Path:
+    return _SPILL_PATH.with_name(f"{_SPILL_PATH.name}.lock")
+
+
+def _replay_lock_path() -> Path:
+    return _SPILL_PATH.with_name(f"{_SPILL_PATH.name}.replay.lock")
+
+
+def _encode_items(items: list[dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items).encode("utf-8")
+
+
+def _append_spill(data: bytes, limit: int) -> bool:
+    """持锁追加；超上限返回 False。可在线程里跑，不碰模块计数。"""
+    from pallas.core.foundation.fs_lock import interprocess_file_lock
+
+    with interprocess_file_lock(_spill_lock_path()):
+        size = _SPILL_PATH.stat().st_size if _SPILL_PATH.exists() else 0
+        if limit <= 0 or size + len(data) > limit:
+            return False
+        _SPILL_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with _SPILL_PATH.open("ab") as fh:
+            fh.write(data)
+    return True
+
+
+def _note_spill(items: list[dict[str, Any]], ok: bool) -> bool:
+    global _spilled_items
+    if ok:
+        _spilled_items += len(items)
+    else:
+        _note_dropped(len(items))
+    return ok
+
+
+def _spill_items(items: list[dict[str, Any]]) -> bool:
+    """合并条目追加到落盘文件；超上限或写失败时计入丢弃。同步版，只给取消与停机路径用。"""
+    if not items:
+        return True
+    try:
+        ok = _append_spill(_encode_items(items), mirror_spill_max_bytes())
+    except OSError as e:
+        logger.warning("Corpus mirror spill failed with error type [{}]", type(e).__name__)
+        ok = False
+    return _note_spill(items, ok)
+
+
+async def _spill_items_off_loop(items: list[dict[str, Any]]) -> bool:
+    """同 _spill_items，文件锁与写盘放到线程里，不卡事件循环。"""
+    if not items:
+        return True
+    try:
+        ok = await asyncio.to_thread(_append_spill, _encode_items(items), mirror_spill_max_bytes())
+    except OSError as e:
+        logger.warning("Corpus mirror spill failed with error type [{}]", type(e).__name__)
+        ok = False
+    return _note_spill(items, ok)
+
+
+def _defer_replay() -> None:
+    global _replay_after, _replay_backoff
+    _replay_after = time.monotonic() + _replay_backoff
+    _replay_backoff = min(_REPLAY_RETRY_MAX_SEC, _replay_backoff * 2)
+
+
+def _spill_pending() -> bool:
+    return _SPILL_PATH.exists()
+
+
+def _replay_due() -> bool:
+    return time.monotonic() >= _replay_after and _spill_pending()
+
+
+def _read_spill() -> bytes | None:
+    """持锁读，避免读到别的 worker 追加到一半的行。"""
+    from pallas.core.foundation.fs_lock import interprocess_file_lock
+
+    try:
+        with interprocess_file_lock(_spill_lock_path()):
+            return _SPILL_PATH.read_bytes()
+    except OSError:
+        return None
+
+
+def _rewrite_spill(consumed: int, keep: list[dict[str, Any]]) -> None:
+    """
+    去掉已补发的前 consumed 字节，未送达的条目写回，补发期间别的 worker 新追加的尾部原样保留。
+    只有持补发锁的 worker 会改写，其余进程只在尾部追加，所以前 consumed 字节仍是读出时的内容。
+    """
+    from pallas.core.foundation.fs_lock import interprocess_file_lock
+
+    with interprocess_file_lock(_spill_lock_path()):
+        try:
+            current = _SPILL_PATH.read_bytes()
+        except OSError:
+            current = b""
+        tail = current[consumed:] if len(current) >= consumed else b""
+        head = _encode_items(keep)
+        if not head and not tail:
+            _SPILL_PATH.unlink(missing_ok=True)
+            return
+        tmp = _SPILL_PATH.with_name(f"{_SPILL_PATH.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(head + tail)
+        tmp.replace(_SPILL_PATH)
+
+
+async def _send_items(community: Any, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """按批发送，返回未送达的条目（逐条退回时已发出的部分已扣掉）；某批失败即停，其后的批次原样带回。"""
+    global _items_shipped
+    for offset in range(0, len(items), _BULK_MAX_ITEMS):
+        chunk = items[offset : offset + _BULK_MAX_ITEMS]
+        try:
+            rest = await community.contribute_items(chunk)
+        except Exception as e:
+            logger.warning("Corpus mirror bulk failed with error type [{}]: [{!r}]", type(e).__name__, e)
+            rest = chunk
+        _items_shipped += len(chunk) - len(rest)
+        if rest:
+            return [*rest, *items[offset + _BULK_MAX_ITEMS :]]
+    return []
+
+
+async def replay_corpus_mirror_spill() -> int:
+    """补发落盘条目，返回送达条目数；社区写回未启用或别的 worker 正在补发时保留文件等下次。"""
+    global _replay_after
+    from pallas.core.foundation.fs_lock import try_interprocess_file_lock
+
+    with try_interprocess_file_lock(_replay_lock_path()) as owned:
+        if not owned:
+            _replay_after = time.monotonic() + _REPLAY_RETRY_SEC
+            return 0
+        return await _replay_spill_owned()
+
+
+async def _replay_spill_owned() -> int:
+    global _replay_after, _replay_backoff
+    raw = await asyncio.to_thread(_read_spill)
+    if raw is None:
+        return 0
+    from pallas.product.corpus.config import get_corpus_config
+    from pallas.product.corpus.factory import build_community_repository
+
+    community = build_community_repository() if community_contribute_enabled(get_corpus_config()) else None
+    if community is None or not callable(getattr(community, "contribute_items", None)):
+        _defer_replay()
+        return 0
+    coalescer = _MirrorCoalescer()
+    for line in raw.splitlines():
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(item, dict):
+            coalescer.add_item(item)
+    items = coalescer.items()
+    remaining = await _send_items(community, items)
+    sent = len(items) - len(remaining)
+    try:
+        await asyncio.to_thread(_rewrite_spill, len(raw), remaining)
+    except OSError as e:
+        logger.warning("Corpus mirror spill rewrite failed with error type [{}]", type(e).__name__)
+    if remaining:
+        _defer_replay()
+    else:
+        _replay_after = 0.0
+        _replay_backoff = _REPLAY_RETRY_SEC
+        if sent:
+            logger.info("Corpus mirror replayed [{}] spilled entries", sent)
+    return sent
+
+
+async def _ship_community(community: Any, items: list[dict[str, Any]]) -> None:
+    try:
+        remaining = await _send_items(community, items)
+    except asyncio.CancelledError:
+        _spill_items(items)
+        raise
+    if remaining:
+        await _spill_items_off_loop(remaining)
+        _defer_replay()
+
+
+async def _ship_ops(ops: list[_MirrorWriteOp]) -> None:
+    global _ops_in, _items_out
+    batches: dict[int, tuple[Any, _MirrorCoalescer]] = {}
+    direct: list[_MirrorWriteOp] = []
+    for op in ops:
+        payload = op.payload
+        if not _bulk_capable(payload):
+            direct.append(op)
+            continue
+        community = payload["community"]
+        entry = batches.get(id(community))
+        if entry is None:
+            entry = batches[id(community)] = (community, _MirrorCoalescer())
+        entry[1].add_op(op)
+        _ops_in += 1
+        if payload.get("fed") is not None:
+            direct.append(_MirrorWriteOp(kind=op.kind, payload={**payload, "community": None}))
+    pending = [(community, coalescer.items()) for community, coalescer in batches.values()]
+    for _community, items in pending:
+        _items_out += len(items)
+    try:
+        for op in direct:
+            try:
+                if op.kind == "upsert_answer":
+                    await mirror_upsert_answer(**op.payload)
+                else:
+                    await mirror_insert(**op.payload)
+            except Exception as e:
+                logger.warning("Corpus mirror failed with error type [{}]: [{!r}]", type(e).__name__, e)
+    except asyncio.CancelledError:
+        for _community, items in pending:
+            _spill_items(items)
+        raise
+    while pending:
+        community, items = pending[0]
+        try:
+            await _ship_community(community, items)
+        except asyncio.CancelledError:
+            for _community, rest in pending[1:]:
+                _spill_items(rest)
+            raise
+        pending.pop(0)
+
+
+async def _collect_window(queue: asyncio.Queue[_MirrorWriteOp], ops: list[_MirrorWriteOp]) -> None:
+    """先取走已积压的；首条走 bulk 时再在窗口内等后续操作。"""
+    window = mirror_coalesce_window_sec() if _bulk_capable(ops[0].payload) else 0.0
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + window
+    while len(ops) < _WRITE_QUEUE_MAX:
+        try:
+            ops.append(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        try:
+            ops.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+        except TimeoutError:
+            return
+
+
+async def _next_op(queue: asyncio.Queue[_MirrorWriteOp]) -> _MirrorWriteOp:
+    """空闲时也按退避节奏补发落盘条目，远端恢复后不必等下一条学习。"""
+    while True:
+        if not _spill_pending():
+            return await queue.get()
+        if _replay_due():
+            await replay_corpus_mirror_spill()
+            continue
+        try:
+            return await asyncio.wait_for(queue.get(), timeout=max(0.05, _replay_after - time.monotonic()))
+        except TimeoutError:
+            continue
+
+
 def _write_workers_running() -> bool:
     return bool(_write_tasks) and any(not task.done() for task in _write_tasks)
 
 
 async def run_corpus_write_consumer() -> None:
+    queue = corpus_write_queue()
     while True:
-        op = await corpus_write_queue().get()
+        ops = [await _next_op(queue)]
         try:
-            if op.kind == "upsert_answer":
-                await mirror_upsert_answer(**op.payload)
-            else:
-                await mirror_insert(**op.payload)
+            try:
+                await _collect_window(queue, ops)
+            except asyncio.CancelledError:
+                _spill_ops(ops)
+                raise
+            await _ship_ops(ops)
         except Exception as e:
             logger.warning("Corpus mirror failed with error type [{}]: [{!r}]", type(e).__name__, e)
         finally:
-            corpus_write_queue().task_done()
+            for _ in ops:
+                queue.task_done()
+
+
+def _coalesce_for_spill(ops: list[_MirrorWriteOp]) -> list[dict[str, Any]]:
+    """联邦侧和不支持 bulk 的目标没有补发通道，计入丢弃；其余合并成待落盘条目。"""
+    coalescer = _MirrorCoalescer()
+    lost = 0
+    for op in ops:
+        if _bulk_capable(op.payload):
+            coalescer.add_op(op)
+        else:
+            lost += 1
+    if lost:
+        _note_dropped(lost)
+    return coalescer.items()
+
+
+def _spill_ops(ops: list[_MirrorWriteOp]) -> None:
+    """未发出的操作同步落盘，用于取消与停机路径。"""
+    _spill_items(_coalesce_for_spill(ops))
+
+
+async def _spill_ops_off_loop(ops: list[_MirrorWriteOp]) -> None:
+    await _spill_items_off_loop(_coalesce_for_spill(ops))
+
+
+def _drain_queue_to_spill() -> None:
+    queue = _write_queue
+    if queue is None:
+        return
+    ops: list[_MirrorWriteOp] = []
+    while True:
+        try:
+            ops.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    for _ in ops:
+        queue.task_done()
+    if ops:
+        _spill_ops(ops)
 
 
 async def start_corpus_write_workers() -> None:
@@ -124,6 +610,7 @@ def bind_corpus_write_lifecycle() -> None:
     @driver.on_shutdown
     async def _on_shutdown() -> None:
         await stop_corpus_write_workers()
+        _drain_queue_to_spill()
 
 
 async def mirror_upsert_answer(
@@ -172,18 +659,14 @@ async def mirror_insert(
 
 
 def _enqueue_corpus_write(op: _MirrorWriteOp) -> None:
-    global _write_dropped_full
     ensure_corpus_write_workers()
     try:
         corpus_write_queue().put_nowait(op)
     except asyncio.QueueFull:
-        _write_dropped_full += 1
-        if _write_dropped_full == 1 or _write_dropped_full % 200 == 0:
-            logger.info(
-                "Corpus mirror queue reached maximum [{}] and dropped [{}] entries",
-                _WRITE_QUEUE_MAX,
-                _write_dropped_full,
-            )
+        # 社区侧落盘等补发，联邦侧照旧丢弃；写盘放后台，学习路径不等文件锁
+        task = asyncio.create_task(_spill_ops_off_loop([op]), name="corpus_mirror_spill")
+        _spill_tasks.add(task)
+        task.add_done_callback(_spill_tasks.discard)
 
 
 def schedule_mirror_upsert_answer(
@@ -257,7 +740,13 @@ def schedule_mirror_insert(
 
 
 async def reset_corpus_write_runtime_state_for_tests() -> None:
-    global _write_dropped_full
+    global _write_dropped_full, _ops_in, _items_out, _items_shipped, _spilled_items, _replay_after, _replay_backoff
     await stop_corpus_write_workers()
     clear_corpus_write_runtime_state()
     _write_dropped_full = 0
+    _ops_in = 0
+    _items_out = 0
+    _items_shipped = 0
+    _spilled_items = 0
+    _replay_after = 0.0
+    _replay_backoff = _REPLAY_RETRY_SEC
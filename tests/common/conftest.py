@@ -34,7 +34,9 @@ async def pg_engine():
     from sqlalchemy.ext.asyncio import create_async_engine
 
     from pallas.core.foundation.db.repository_pg import Base, dispose_pg, init_pg
+    from pallas.product.corpus.hot_rollup import clear_hot_rollup_for_tests
 
+    clear_hot_rollup_for_tests()
     engine = create_async_engine(PG_TEST_DSN)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -45,6 +47,7 @@ async def pg_engine():
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
         await dispose_pg()
+        clear_hot_rollup_for_tests()
 
 
 @pytest.fixture
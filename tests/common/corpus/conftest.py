@@ -0,0 +1,155 @@
+"""社区语料中心的本机替身：真实 socket 上的最小 HTTP/1.1 服务，离线测合批、部分失败与超时。"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+
+class CorpusStandInServer:
+    """
+    只实现 GET /context、POST /contexts（多 key）与 POST /contribute。
+    failing_keys 在批量与逐 key 接口都报错；flaky_keys 只在批量接口报错；delay_sec 让每个请求先睡一会。
+    batch_enabled 关掉时 POST /contexts 回 batch_unsupported_status（默认 404）。
+    contribute 请求体按序记在 contributions；bulk_enabled 关掉时 bulk 回 400，contribute_status 统一改写回码，
+    contribute_accept_max 限定最多接收几条，之后一律回 503。
+    """
+
+    def __init__(self) -> None:
+        self.contexts: dict[str, dict[str, Any]] = {}
+        self.failing_keys: set[str] = set()
+        self.flaky_keys: set[str] = set()
+        self.batch_enabled = True
+        self.batch_unsupported_status = 404
+        self.bulk_enabled = True
+        self.contribute_status = 200
+        self.contribute_accept_max: int | None = None
+        self.contributions: list[dict[str, Any]] = []
+        self.delay_sec = 0.0
+        self.requests: list[tuple[str, str, list[str]]] = []
+        self.connections = 0
+        self.base = ""
+        self._server: asyncio.base_events.Server | None = None
+
+    def add_context(self, keywords: str, answer: str, *, count: int = 3) -> None:
+        self.contexts[keywords] = {
+            "keywords": keywords,
+            "time": 1,
+            "trigger_count": count,
+            "answers": [{"keywords": answer, "group_id": 0, "count": count, "time": 1, "messages": [answer]}],
+            "ban": [],
+            "clear_time": 0,
+        }
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}/v1/corpus"
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            # keep-alive：同一连接上循环读请求，直到客户端关闭
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode().split(" ", 2)
+                headers: dict[str, str] = {}
+                while True:
+                    header = await reader.readline()
+                    if header in {b"\r\n", b"\n", b""}:
+                        break
+                    name, value = header.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                status, payload = await self._route(method, target, body)
+                data = json.dumps(payload).encode()
+                head = f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n"
+                writer.write(head.encode() + data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes) -> tuple[int, Any]:
+        url = urlsplit(target)
+        if method == "GET" and url.path.endswith("/context"):
+            key = parse_qs(url.query).get("keywords", [""])[0]
+            self.requests.append(("GET", url.path, [key]))
+            await asyncio.sleep(self.delay_sec)
+            if key in self.failing_keys:
+                return 500, {"error": "boom"}
+            ctx = self.contexts.get(key)
+            return (200, ctx) if ctx is not None else (404, {})
+        if method == "POST" and url.path.endswith("/contexts"):
+            keys = list(json.loads(body or b"{}").get("keywords") or [])
+            self.requests.append(("POST", url.path, keys))
+            await asyncio.sleep(self.delay_sec)
+            if not self.batch_enabled:
+                return self.batch_unsupported_status, {}
+            bad = self.failing_keys | self.flaky_keys
+            return 200, {
+                "contexts": {key: self.contexts.get(key) for key in keys if key not in bad},
+                "errors": {key: "boom" for key in keys if key in bad},
+            }
+        if method == "POST" and url.path.endswith("/contribute"):
+            payload = json.loads(body or b"{}")
+            if payload.get("op") == "bulk" and not self.bulk_enabled:
+                return 400, {"error": "unknown op"}
+            if self.contribute_accept_max is not None and len(self.contributions) >= self.contribute_accept_max:
+                return 503, {}
+            if self.contribute_status == 200:
+                self.contributions.append(payload)
+            return self.contribute_status, {}
+        return 404, {}
+
+
+@pytest.fixture(autouse=True)
+def _isolated_negative_cache(monkeypatch, tmp_path):
+    """远程未命中负缓存落到临时目录，不跨测试、不跨运行残留。"""
+    from pallas.product.corpus import negative_cache
+
+    negative_cache.reset_shared_negative_cache()
+    monkeypatch.setattr(negative_cache, "negative_cache_path", lambda: tmp_path / "corpus_negative_cache.bin")
+    yield
+    negative_cache.reset_shared_negative_cache()
+
+
+@pytest.fixture
+async def corpus_stand_in(monkeypatch):
+    from pallas.product.corpus import community_source as mod
+
+    monkeypatch.setenv("PALLAS_CORPUS_REMOTE_BATCH_WINDOW_MS", "20")
+    mod.clear_remote_find_batchers()
+    mod._bulk_unsupported_bases.clear()
+    mod._shared_client = None
+    mod._shared_client_timeout = None
+    mod._shared_contribute_client = None
+    mod._shared_contribute_client_timeout = None
+    server = CorpusStandInServer()
+    await server.start()
+    try:
+        yield server
+    finally:
+        if mod._shared_client is not None:
+            await mod._shared_client.aclose()
+        if mod._shared_contribute_client is not None:
+            await mod._shared_contribute_client.aclose()
+        mod._shared_client = None
+        mod._shared_client_timeout = None
+        mod._shared_contribute_client = None
+        mod._shared_contribute_client_timeout = None
+        mod._bulk_unsupported_bases.clear()
+        mod.clear_remote_find_batchers()
+        await server.close()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from pallas.product.corpus.community_source import RemoteCorpusRepository
+
+
+def _repo(server, *, timeout_sec: float = 5.0) -> RemoteCorpusRepository:
+    return RemoteCorpusRepository(api_base=server.base, token="pc_test", timeout_sec=timeout_sec)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_finds_share_one_batch_request(corpus_stand_in) -> None:
+    server = corpus_stand_in
+    for i in range(4):
+        server.add_context(f"kw{i}", f"answer{i}")
+
+    keys = ["kw0", "kw1", "kw2", "kw3", "kw1", "missing"]
+    # factory 每次新建仓储实例，同 base/token 仍合进同一批
+    results = await asyncio.gather(*(_repo(server).find_by_keywords(key) for key in keys))
+
+    assert [ctx.answers[0].keywords if ctx else None for ctx in results] == [
+        "answer0",
+        "answer1",
+        "answer2",
+        "answer3",
+        "answer1",
+        None,
+    ]
+    assert server.requests == [("POST", "/v1/corpus/contexts", ["kw0", "kw1", "kw2", "kw3", "missing"])]
+
+    await asyncio.gather(*(_repo(server).find_by_keywords(key) for key in ("kw0", "kw2")))
+    assert len(server.requests) == 2
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_partial_batch_failure_only_retries_failed_keys(corpus_stand_in) -> None:
+    server = corpus_stand_in
+    for key in ("ok", "flaky", "broken"):
+        server.add_context(key, f"{key}_answer")
+    server.flaky_keys.add("flaky")
+    server.failing_keys.add("broken")
+
+    ok, flaky, broken = await asyncio.gather(*(_repo(server).find_by_keywords(k) for k in ("ok", "flaky", "broken")))
+
+    assert ok is not None
+    assert ok.answers[0].keywords == "ok_answer"
+    assert flaky is not None
+    assert flaky.answers[0].keywords == "flaky_answer"
+    assert broken is None
+    assert server.requests[0][0] == "POST"
+    assert sorted((method, keys[0]) for method, _path, keys in server.requests[1:]) == [
+        ("GET", "broken"),
+        ("GET", "flaky"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_timeout_reaches_every_waiter(corpus_stand_in) -> None:
+    server = corpus_stand_in
+    server.add_context("a", "x")
+    server.add_context("b", "y")
+    server.delay_sec = 1.5
+
+    results = await asyncio.gather(
+        *(_repo(server, timeout_sec=0.5).find_by_keywords(k) for k in ("a", "b")),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, httpx.TimeoutException) for result in results)
+    assert len(server.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_server_without_batch_endpoint_falls_back_per_key(corpus_stand_in) -> None:
+    server = corpus_stand_in
+    server.batch_enabled = False
+    server.add_context("a", "x")
+    server.add_context("b", "y")
+
+    first = await asyncio.gather(*(_repo(server).find_by_keywords(k) for k in ("a", "b")))
+    assert [ctx.answers[0].keywords for ctx in first] == ["x", "y"]
+    assert [method for method, _path, _keys in server.requests] == ["POST", "GET", "GET"]
+
+    server.requests.clear()
+    await asyncio.gather(*(_repo(server).find_by_keywords(k) for k in ("a", "b")))
+    assert [method for method, _path, _keys in server.requests] == ["GET", "GET"]
+
+
+@pytest.mark.asyncio
+async def test_batch_rejection_is_remembered_for_any_unsupported_status(corpus_stand_in) -> None:
+    server = corpus_stand_in
+    server.batch_enabled = False
+    server.batch_unsupported_status = 422
+    server.add_context("a", "x")
+    server.add_context("b", "y")
+
+    await asyncio.gather(*(_repo(server).find_by_keywords(k) for k in ("a", "b")))
+    server.requests.clear()
+    await asyncio.gather(*(_repo(server).find_by_keywords(k) for k in ("a", "b")))
+
+    assert [method for method, _path, _keys in server.requests] == ["GET", "GET"]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_not_shared_across_timeouts(corpus_stand_in) -> None:
+    server = corpus_stand_in
+    server.add_context("a", "x")
+    server.add_context("b", "y")
+    server.delay_sec = 1.0
+
+    fast, slow = await asyncio.gather(
+        _repo(server, timeout_sec=0.5).find_by_keywords("a"),
+        _repo(server, timeout_sec=5.0).find_by_keywords("b"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(fast, httpx.TimeoutException)
+    assert slow is not None
+    assert slow.answers[0].keywords == "y"
+
+
+@pytest.mark.asyncio
+async def test_zero_window_disables_batching(corpus_stand_in, monkeypatch) -> None:
+    server = corpus_stand_in
+    server.add_context("a", "x")
+    monkeypatch.setenv("PALLAS_CORPUS_REMOTE_BATCH_WINDOW_MS", "0")
+
+    ctx = await _repo(server).find_by_keywords("a")
+
+    assert ctx is not None
+    assert server.requests == [("GET", "/v1/corpus/context", ["a"])]
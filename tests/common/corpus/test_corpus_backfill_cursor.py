@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 
 from pallas.core.foundation.db.modules import Answer, Context
@@ -58,3 +60,113 @@ async def test_backfill_cursor_advances(monkeypatch: pytest.MonkeyPatch, tmp_pat
     state = load_backfill_state()
     assert state.get("cursor_keywords") == "beta"
     assert "beta" in pushed
+
+
+def _ctx(keywords: str, message: str) -> Context:
+    return Context.model_construct(
+        keywords=keywords,
+        time=1,
+        trigger_count=1,
+        answers=[Answer(keywords=f"{keywords}-a", group_id=1, count=1, time=1, messages=[message])],
+        ban=[],
+        clear_time=0,
+    )
+
+
+def _patch_pipeline(monkeypatch: pytest.MonkeyPatch, tmp_path, contexts: list[Context], community) -> None:
+    from pallas.product.corpus import backfill as mod
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PALLAS_CORPUS_BACKFILL_BATCH_SIZE", "2")
+    monkeypatch.setattr(mod, "should_run_corpus_backfill", lambda: True)
+    monkeypatch.setattr(mod, "backfill_should_skip_pressure", lambda: False)
+    monkeypatch.setattr(mod, "consume_backfill_rate_slot", lambda: True)
+    monkeypatch.setattr(mod, "build_community_repository", lambda: community)
+
+    async def page(*, after_keywords: str, limit: int):
+        return [c for c in contexts if c.keywords > after_keywords][:limit]
+
+    monkeypatch.setattr(mod, "list_local_contexts_page", page)
+
+
+@pytest.mark.asyncio
+async def test_backfill_pipeline_bulk_uploads_pages_and_filters_guarded(monkeypatch, tmp_path) -> None:
+    from pallas.product.corpus import backfill as mod
+    from pallas.product.corpus.backfill_store import load_backfill_state
+
+    batches: list[list[dict]] = []
+
+    class BulkCommunity:
+        async def contribute_bulk(self, items) -> bool:
+            batches.append(list(items))
+            return True
+
+    contexts = [_ctx(f"k{i}", f"msg{i}") for i in range(5)]
+    _patch_pipeline(monkeypatch, tmp_path, contexts, BulkCommunity())
+    monkeypatch.setattr(
+        "pallas.product.llm.corpus_contamination.reject_corpus_learn_message",
+        lambda message, source="": message == "msg3",
+    )
+
+    await mod.run_corpus_backfill_round()
+
+    assert len(batches) == 3
+    pushed = sorted(item["keywords"] for batch in batches for item in batch)
+    assert pushed == ["k0", "k1", "k2", "k4"]
+    assert all(item["op"] == "upsert_answer" and item["group_id"] == 0 for batch in batches for item in batch)
+    assert load_backfill_state()["cursor_keywords"] == "k4"
+    stats = mod.corpus_backfill_stats()
+    assert stats["last_round_contexts"] == 5
+    assert stats["items_rejected"] >= 1
+    assert stats["queue_depth"] == {}
+
+
+@pytest.mark.asyncio
+async def test_backfill_pipeline_resumes_after_failed_page(monkeypatch, tmp_path) -> None:
+    from pallas.product.corpus import backfill as mod
+    from pallas.product.corpus.backfill_store import load_backfill_state
+
+    monkeypatch.setenv("PALLAS_CORPUS_BACKFILL_CONCURRENCY", "1")
+    seen: list[str] = []
+    fail = {"k2"}
+
+    class FlakyCommunity:
+        async def contribute_bulk(self, items) -> bool:
+            keys = [item["keywords"] for item in items]
+            if fail & set(keys):
+                return False
+            seen.extend(keys)
+            return True
+
+    contexts = [_ctx(f"k{i}", f"msg{i}") for i in range(6)]
+    _patch_pipeline(monkeypatch, tmp_path, contexts, FlakyCommunity())
+
+    await mod.run_corpus_backfill_round()
+    assert load_backfill_state()["cursor_keywords"] == "k1"
+    assert mod.corpus_backfill_stats()["last_stop_reason"] == "upload_failed"
+
+    fail.clear()
+    await mod.run_corpus_backfill_round()
+    assert load_backfill_state()["cursor_keywords"] == "k5"
+    assert seen[:2] == ["k0", "k1"]
+    assert sorted(set(seen)) == [f"k{i}" for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_stage_failure_cancels_the_other_stages(monkeypatch, tmp_path) -> None:
+    from pallas.product.corpus import backfill as mod
+
+    class BulkCommunity:
+        async def contribute_bulk(self, items) -> bool:
+            return True
+
+    def broken_entries(context):
+        raise RuntimeError("boom")
+
+    contexts = [_ctx(f"k{i:02d}", f"msg{i}") for i in range(40)]
+    _patch_pipeline(monkeypatch, tmp_path, contexts, BulkCommunity())
+    monkeypatch.setattr(mod, "backfill_answer_entries", broken_entries)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await asyncio.wait_for(mod.run_corpus_backfill_round(), timeout=5.0)
+    assert mod.corpus_backfill_stats()["running"] is False
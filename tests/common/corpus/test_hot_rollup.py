@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from pallas.core.foundation.db.repository import LearnAnswerItem
+
+
+def test_sketch_keeps_heavy_hitters_and_parks_evicted_deltas() -> None:
+    from pallas.product.corpus.hot_rollup import HotKeywordSketch
+
+    sketch = HotKeywordSketch(width=256, k=3)
+    for _ in range(20):
+        sketch.add("hot", "a", "msg_a")
+    for _ in range(5):
+        sketch.add("warm", "b", "msg_b")
+    sketch.add("cold", "c", "msg_c")
+    # 榜满后新词条只有估计频次超过榜尾才能挤进来
+    for _ in range(3):
+        sketch.add("rising", "d", "msg_d")
+
+    assert set(sketch.entries) == {"hot", "warm", "rising"}
+    drained = {(kw, ans): delta for kw, ans, delta, _msg in sketch.drain()}
+    assert drained[("hot", "a")] == 20
+    assert drained[("warm", "b")] == 5
+    assert drained[("cold", "c")] == 1
+    assert sketch.drain() == []
+
+
+def test_sketch_caps_answers_per_entry() -> None:
+    from pallas.product.corpus import hot_rollup as mod
+
+    sketch = mod.HotKeywordSketch(width=64, k=4)
+    for i in range(mod._ANSWERS_PER_ENTRY + 3):
+        sketch.add("kw", f"ans{i}", f"m{i}")
+
+    drained = sketch.drain()
+    assert sum(delta for _kw, _ans, delta, _msg in drained) == mod._ANSWERS_PER_ENTRY + 3
+    assert ("kw", "", 3, None) in drained
+
+
+@pytest.mark.asyncio
+async def test_hot_keywords_read_from_rollup_for_both_scopes(pg_engine, monkeypatch) -> None:
+    from pallas.core.foundation.db.repository_pg import PgContextRepository
+    from pallas.product.corpus import local_hot
+
+    repo = PgContextRepository()
+    now = int(time.time())
+    items = (
+        [LearnAnswerItem("早", 1, "早安", now, "早安呀", True)] * 4
+        + [LearnAnswerItem("早", 2, "早啊", now, "早啊", True)] * 2
+        + [LearnAnswerItem("晚", 2, "晚安", now, "晚安", True)] * 3
+    )
+    await repo.learn_answers(items)
+    monkeypatch.setattr(local_hot, "get_db_backend", lambda: "postgresql")
+
+    scanned = await local_hot.scan_local_hot_keywords_pg(scope="global", group_id=None, limit=10, answers_per_keyword=3)
+
+    async def no_scan(**kwargs):
+        raise AssertionError("rollup should answer without scanning context_answer")
+
+    monkeypatch.setattr(local_hot, "scan_local_hot_keywords_pg", no_scan)
+    rolled = await local_hot.aggregate_local_hot_keywords(scope="global", limit=10)
+    assert [(row["keywords"], row["score"]) for row in rolled] == [("早", 6), ("晚", 3)]
+    assert [(row["keywords"], row["score"]) for row in rolled] == [(row["keywords"], row["score"]) for row in scanned]
+    assert [a["answer_keywords"] for a in rolled[0]["answers"]] == ["早安", "早啊"]
+
+    group = await local_hot.aggregate_local_hot_keywords(scope="group", group_id=2, limit=10)
+    assert [(row["keywords"], row["score"]) for row in group] == [("晚", 3), ("早", 2)]
+    assert group[1]["answers"][0]["message"] == "早啊"
+
+
+@pytest.mark.asyncio
+async def test_empty_rollup_falls_back_to_scan(pg_engine, monkeypatch) -> None:
+    from pallas.core.foundation.db.repository_pg import PgContextRepository
+    from pallas.product.corpus import hot_rollup, local_hot
+
+    await PgContextRepository().learn_answers([LearnAnswerItem("旧", 1, "答", int(time.time()), "答", True)])
+    hot_rollup.clear_hot_rollup_for_tests()
+    monkeypatch.setattr(local_hot, "get_db_backend", lambda: "postgresql")
+
+    rows = await local_hot.aggregate_local_hot_keywords(scope="global", limit=10)
+
+    assert [(row["keywords"], row["score"]) for row in rows] == [("旧", 1)]
@@ -84,3 +84,52 @@ def test_merge_counts_adds_duplicate_answer_keys():
     assert merged.answers[0].count == 9
     assert merged.answers[0].time == 3
     assert merged.answers[0].messages == ["a", "b"]
+
+
+def _ctx(answers: list[Answer], *, trigger_count: int = 1, time: int = 1) -> Context:
+    return Context.model_construct(
+        keywords="k", time=time, trigger_count=trigger_count, answers=answers, ban=[], clear_time=0
+    )
+
+
+def test_merge_shares_untouched_answers_and_leaves_sources_intact():
+    shared = Answer(keywords="s", group_id=1, count=2, time=1, messages=["s"])
+    local_x = Answer(keywords="x", group_id=100, count=5, time=1, messages=["a", "b"])
+    remote_x = Answer(keywords="x", group_id=100, count=4, time=3, messages=["b", "c", "c"])
+    base = _ctx([shared, local_x])
+    extra = _ctx([remote_x])
+
+    merged = merge_contexts(base, extra, strategy="merge_counts")
+
+    assert merged is not None
+    assert merged.answers[0] is shared
+    assert merged.answers[1] is not local_x
+    assert merged.answers[1].messages == ["a", "b", "c"]
+    assert merged.answers[1].count == 9
+    assert local_x.count == 5
+    assert local_x.messages == ["a", "b"]
+    assert remote_x.messages == ["b", "c", "c"]
+
+
+def test_merged_view_reuses_result_until_sources_change():
+    from pallas.product.corpus.merge import clear_merged_context_views, merged_context_view
+
+    clear_merged_context_views()
+    base = _ctx([Answer(keywords="x", group_id=1, count=1, time=1, messages=["a"])])
+
+    def remote(count: int) -> Context:
+        # 远程每次返回新对象
+        return _ctx([Answer(keywords="y", group_id=0, count=count, time=2, messages=["y"])])
+
+    first = merged_context_view("k", "community", base, remote(1), strategy="merge_counts")
+    assert merged_context_view("k", "community", base, remote(1), strategy="merge_counts") is first
+
+    changed = merged_context_view("k", "community", base, remote(2), strategy="merge_counts")
+    assert changed is not first
+    assert {a.keywords: a.count for a in changed.answers} == {"x": 1, "y": 2}
+
+    fresh_base = _ctx(list(base.answers))
+    assert merged_context_view("k", "community", fresh_base, remote(2), strategy="merge_counts") is not changed
+
+    clear_merged_context_views("k")
+    assert merged_context_view("k", "community", fresh_base, remote(2), strategy="merge_counts") is not changed
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+
+from pallas.product.corpus.community_source import RemoteCorpusRepository
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_misses_are_shared_between_mappings(tmp_path: Path) -> None:
+    from pallas.product.corpus.negative_cache import NegativeLookupCache
+
+    path = tmp_path / "neg.bin"
+    writer = NegativeLookupCache(path, 64)
+    reader = NegativeLookupCache(path, 64)
+    try:
+        writer.note_miss("冷门词", ttl_sec=60, max_ttl_sec=600, growth=2.0, now=1000)
+
+        assert reader.is_negative("冷门词", now=1030)
+        assert not reader.is_negative("冷门词", now=1061)
+        assert not reader.is_negative("别的词", now=1030)
+
+        assert reader.forget("冷门词")
+        assert not writer.is_negative("冷门词", now=1030)
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_repeated_misses_stretch_ttl_up_to_cap(tmp_path: Path) -> None:
+    from pallas.product.corpus.negative_cache import NegativeLookupCache
+
+    cache = NegativeLookupCache(tmp_path / "neg.bin", 64)
+    try:
+        kwargs = {"ttl_sec": 60, "max_ttl_sec": 200, "growth": 2.0}
+        assert cache.note_miss("kw", now=0, **kwargs) == 60
+        # 未到期再记不放大
+        assert cache.note_miss("kw", now=30, **kwargs) == 30
+        assert cache.note_miss("kw", now=60, **kwargs) == 120
+        assert cache.note_miss("kw", now=180, **kwargs) == 200
+        assert cache.note_miss("kw", now=380, **kwargs) == 200
+    finally:
+        cache.close()
+
+
+def test_huge_growth_clamps_instead_of_overflowing(tmp_path: Path) -> None:
+    from pallas.product.corpus.negative_cache import NegativeLookupCache
+
+    cache = NegativeLookupCache(tmp_path / "neg.bin", 64)
+    try:
+        kwargs = {"ttl_sec": 60, "max_ttl_sec": 86400, "growth": 1e300}
+        assert cache.note_miss("kw", now=0, **kwargs) == 60
+        assert cache.note_miss("kw", now=60, **kwargs) == 86400
+        assert cache.note_miss("kw", now=90000, **kwargs) == 86400
+    finally:
+        cache.close()
+
+
+def test_writes_do_not_wait_for_a_held_lock(tmp_path: Path) -> None:
+    from pallas.core.foundation.fs_lock import try_interprocess_file_lock
+    from pallas.product.corpus.negative_cache import NegativeLookupCache
+
+    path = tmp_path / "neg.bin"
+    cache = NegativeLookupCache(path, 64)
+    try:
+        cache.note_miss("已记下", ttl_sec=60, max_ttl_sec=600, growth=2.0, now=0)
+        with try_interprocess_file_lock(path.with_name(f"{path.name}.lock")) as held:
+            assert held
+            # 别的 worker 持锁：记未命中直接跳过，清除照样生效
+            assert cache.note_miss("新词", ttl_sec=60, max_ttl_sec=600, growth=2.0, now=0) == 0
+            assert cache.forget("已记下")
+        assert not cache.is_negative("新词", now=1)
+        assert not cache.is_negative("已记下", now=1)
+    finally:
+        cache.close()
+
+
+def test_full_bucket_evicts_earliest_expiry(tmp_path: Path) -> None:
+    from pallas.product.corpus.negative_cache import NegativeLookupCache
+
+    cache = NegativeLookupCache(tmp_path / "neg.bin", 4)
+    try:
+        for i in range(4):
+            cache.note_miss(f"k{i}", ttl_sec=100 + i, max_ttl_sec=1000, growth=1.0, now=0)
+        cache.note_miss("new", ttl_sec=100, max_ttl_sec=1000, growth=1.0, now=0)
+
+        assert cache.is_negative("new", now=1)
+        assert not cache.is_negative("k0", now=1)
+        assert all(cache.is_negative(f"k{i}", now=1) for i in range(1, 4))
+    finally:
+        cache.close()
+
+
+@pytest.mark.asyncio
+async def test_remote_misses_skip_http_until_found(corpus_stand_in, monkeypatch) -> None:
+    from pallas.product.corpus import negative_cache
+
+    server = corpus_stand_in
+    monkeypatch.setenv("PALLAS_CORPUS_REMOTE_BATCH_WINDOW_MS", "0")
+    repo = RemoteCorpusRepository(api_base=server.base, token="pc_test")
+
+    assert await repo.find_by_keywords("nope") is None
+    assert await repo.find_by_keywords("nope") is None
+    assert len(server.requests) == 1
+
+    # 重启后重新映射同一文件，仍然记得
+    negative_cache.reset_shared_negative_cache()
+    assert await repo.find_by_keywords("nope") is None
+    assert len(server.requests) == 1
+
+    # 本机贡献过的 keywords 不再当未命中
+    server.add_context("nope", "ans")
+    await repo.contribute_bulk([{"op": "upsert_answer", "keywords": "nope", "answer_keywords": "ans"}])
+    ctx = await repo.find_by_keywords("nope")
+    assert ctx is not None
+    assert [method for method, _path, _keys in server.requests] == ["GET", "GET"]
+
+
+@pytest.mark.asyncio
+async def test_batch_errors_are_not_cached_as_misses(corpus_stand_in) -> None:
+    server = corpus_stand_in
+    server.failing_keys.add("broken")
+
+    repo = RemoteCorpusRepository(api_base=server.base, token="pc_test")
+    await asyncio.gather(repo.find_by_keywords("broken"), repo.find_by_keywords("absent"))
+    server.requests.clear()
+    await asyncio.gather(repo.find_by_keywords("broken"), repo.find_by_keywords("absent"))
+
+    # absent 已记为未命中，只剩 broken 一个 key，直接逐 key GET
+    assert [(method, keys) for method, _path, keys in server.requests] == [("GET", ["broken"])]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from pallas.product.corpus import read_cache as mod
+from pallas.product.corpus.read_cache import REPLY_LAYER, SNAPSHOT_LAYER, CorpusReadCache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_shared_cache():
+    mod.reset_read_cache_for_tests()
+    yield
+    mod.reset_read_cache_for_tests()
+
+
+def test_one_off_scan_does_not_evict_hot_keywords() -> None:
+    cache = CorpusReadCache(200, shards=1)
+    hot = [f"hot{i}" for i in range(50)]
+
+    def read(key: str) -> bool:
+        hit, _value = cache.get(REPLY_LAYER, key)
+        if not hit:
+            cache.put(REPLY_LAYER, key, key, 60)
+        return hit
+
+    for _ in range(4):
+        for key in hot:
+            read(key)
+    # 热词照常被问，中间穿插大量只出现一次的短语
+    for i in range(2000):
+        read(f"once{i}")
+        if i % 100 == 99:
+            assert all(read(key) for key in hot)
+
+    assert all(cache.get(REPLY_LAYER, key) == (True, key) for key in hot)
+    stats = cache.stats()
+    assert stats["entries"] <= 200
+    assert stats["admission_rejects"] > 0
+    assert stats["evictions"] >= 2000 - 200
+
+
+def test_learn_drops_reply_layer_and_clips_snapshot(monkeypatch) -> None:
+    monkeypatch.setenv("PALLAS_CORPUS_READ_CACHE_WRITE_GRACE_SEC", "1")
+    cache = mod.shared_read_cache()
+    cache.put(SNAPSHOT_LAYER, "kw", "snap", 30, now=100.0)
+    cache.put(REPLY_LAYER, "kw", "reply", 30, now=100.0)
+
+    mod.note_corpus_learn("kw")
+
+    assert cache.get(REPLY_LAYER, "kw", now=100.0) == (False, None)
+    expires = cache.expires_at(SNAPSHOT_LAYER, "kw")
+    assert expires is not None
+    assert cache.get(SNAPSHOT_LAYER, "kw", now=expires - 0.5) == (True, "snap")
+    assert cache.get(SNAPSHOT_LAYER, "kw", now=expires) == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_upper_layer_never_outlives_snapshot_and_drop_discards_inflight() -> None:
+    cache = CorpusReadCache(100, shards=2)
+    cache.put(SNAPSHOT_LAYER, "kw", "snap", 2)
+
+    async def loader(key: str) -> str:
+        await asyncio.sleep(0)
+        return f"merged:{key}"
+
+    task, started = cache.join_or_start(REPLY_LAYER, "kw", loader)
+    again, started_again = cache.join_or_start(REPLY_LAYER, "kw", loader)
+    assert started
+    assert not started_again
+    assert again is task
+    cache.finish(REPLY_LAYER, "kw", task, await task, 45)
+    assert cache.expires_at(REPLY_LAYER, "kw") <= cache.expires_at(SNAPSHOT_LAYER, "kw")
+
+    task, _ = cache.join_or_start(REPLY_LAYER, "other", loader)
+    cache.drop("other")
+    cache.finish(REPLY_LAYER, "other", task, await task, 45)
+    assert cache.get(REPLY_LAYER, "other") == (False, None)
+
+
+def test_stats_reach_hotpath_snapshot() -> None:
+    from pallas.core.platform.ingress.hotpath_metrics import hotpath_metrics_snapshot, merge_hotpath_metrics
+
+    cache = mod.shared_read_cache()
+    cache.put(REPLY_LAYER, "kw", None, 30)
+    cache.get(REPLY_LAYER, "kw")
+    cache.get(REPLY_LAYER, "missing")
+
+    snap = hotpath_metrics_snapshot()
+    assert snap["corpus_read_cache_hits"] == 1
+    assert snap["corpus_read_cache_misses"] == 1
+    assert snap["corpus_read_cache_entries"] == 1
+    assert snap["corpus_read_cache_bytes"] > 0
+    merged = merge_hotpath_metrics([snap, snap])
+    assert merged["corpus_read_cache_hits"] == 2
+    assert merged["corpus_read_cache_hit_ratio"] == 0.5
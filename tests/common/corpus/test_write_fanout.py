@@ -76,3 +76,165 @@ async def test_schedule_mirror_insert_uses_background_queue(monkeypatch: pytest.
 
     assert called == ["kw"]
     await mod.reset_corpus_write_runtime_state_for_tests()
+
+
+@pytest.fixture
+async def mirror_to_stand_in(corpus_stand_in, monkeypatch: pytest.MonkeyPatch, tmp_path):
+    from pallas.product.corpus import write_fanout as mod
+    from pallas.product.corpus.community_source import RemoteCorpusRepository
+
+    await mod.reset_corpus_write_runtime_state_for_tests()
+    monkeypatch.setattr(mod, "_SPILL_PATH", tmp_path / "corpus_mirror_spill.jsonl")
+    monkeypatch.setattr(mod, "community_contribute_enabled", lambda cfg: True)
+    monkeypatch.setattr("pallas.core.foundation.db.pool_budget.pg_pool_under_pressure", lambda threshold=0.75: False)
+    monkeypatch.setenv("PALLAS_CORPUS_MIRROR_COALESCE_SEC", "0.2")
+    community = RemoteCorpusRepository(api_base=corpus_stand_in.base, token="pc_test", timeout_sec=2.0)
+    monkeypatch.setattr("pallas.product.corpus.factory.build_community_repository", lambda: community)
+    try:
+        yield mod, community
+    finally:
+        await mod.reset_corpus_write_runtime_state_for_tests()
+
+
+def _schedule_upserts(mod, community, pairs: list[tuple[str, str, str]]) -> None:
+    cfg = CorpusConfig(community_contribute=True)
+    for i, (keywords, answer, message) in enumerate(pairs):
+        mod.schedule_mirror_upsert_answer(
+            fed=None,
+            community=community,
+            cfg=cfg,
+            keywords=keywords,
+            group_id=7,
+            answer_keywords=answer,
+            answer_time=100 + i,
+            message=message,
+            append_on_existing=i % 2 == 0,
+        )
+
+
+@pytest.mark.asyncio
+async def test_community_mirror_coalesces_into_one_bulk(corpus_stand_in, mirror_to_stand_in) -> None:
+    mod, community = mirror_to_stand_in
+    pairs = [("kw", "ans", f"m{i % 2}") for i in range(5)] + [("kw", "other", "x"), ("kw2", "ans", "y")]
+    _schedule_upserts(mod, community, pairs)
+
+    await asyncio.wait_for(mod.corpus_write_queue().join(), timeout=2.0)
+
+    assert len(corpus_stand_in.contributions) == 1
+    bulk = corpus_stand_in.contributions[0]
+    assert bulk["op"] == "bulk"
+    by_key = {(item["keywords"], item["answer_keywords"]): item for item in bulk["items"]}
+    assert set(by_key) == {("kw", "ans"), ("kw", "other"), ("kw2", "ans")}
+    merged = by_key[("kw", "ans")]
+    assert merged["count"] == 5
+    assert merged["group_id"] == 0
+    assert merged["answer_time"] == 104
+    assert merged["messages"] == ["m0", "m1"]
+    assert merged["append_on_existing"] is True
+    stats = mod.corpus_mirror_stats()
+    assert stats["ops_in"] == 7
+    assert stats["items_shipped"] == 3
+    assert stats["coalesce_ratio"] == pytest.approx(7 / 3, abs=0.01)
+    assert stats["spill_bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_remote_outage_spills_then_replays(corpus_stand_in, mirror_to_stand_in) -> None:
+    mod, community = mirror_to_stand_in
+    corpus_stand_in.contribute_status = 503
+    _schedule_upserts(mod, community, [("kw", "ans", "a"), ("kw", "ans", "b")])
+
+    await asyncio.wait_for(mod.corpus_write_queue().join(), timeout=2.0)
+
+    stats = mod.corpus_mirror_stats()
+    assert stats["spill_bytes"] > 0
+    assert stats["spilled_items"] == 1
+    assert corpus_stand_in.contributions == []
+
+    # 落盘条目与新的失败批次再合并一次，计数累加不丢
+    _schedule_upserts(mod, community, [("kw", "ans", "c")])
+    await asyncio.wait_for(mod.corpus_write_queue().join(), timeout=2.0)
+
+    corpus_stand_in.contribute_status = 200
+    assert await mod.replay_corpus_mirror_spill() == 1
+    assert not mod._SPILL_PATH.exists()
+    [bulk] = corpus_stand_in.contributions
+    [item] = bulk["items"]
+    assert item["count"] == 3
+    assert item["messages"] == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_unsupported_falls_back_to_single_contribute(corpus_stand_in, mirror_to_stand_in) -> None:
+    mod, community = mirror_to_stand_in
+    corpus_stand_in.bulk_enabled = False
+    ctx = Context.model_construct(
+        keywords="kw",
+        time=1,
+        trigger_count=1,
+        answers=[Answer(keywords="a", group_id=3, count=1, time=1, messages=["hi"])],
+        ban=[],
+        clear_time=0,
+    )
+    mod.schedule_mirror_insert(fed=None, community=community, cfg=CorpusConfig(community_contribute=True), context=ctx)
+    _schedule_upserts(mod, community, [("kw", "a", "hi"), ("kw", "a", "yo")])
+
+    await asyncio.wait_for(mod.corpus_write_queue().join(), timeout=2.0)
+
+    assert [body["op"] for body in corpus_stand_in.contributions] == ["insert", "upsert_answer", "upsert_answer"]
+    insert, *upserts = corpus_stand_in.contributions
+    assert insert["context"]["answers"][0]["group_id"] == 0
+    # 旧版服务端不认 count / messages：合并条目拆回逐次增量
+    assert [upsert["message"] for upsert in upserts] == ["hi", "yo"]
+    assert all("count" not in upsert and "messages" not in upsert for upsert in upserts)
+    assert mod.corpus_mirror_stats()["spill_bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_partial_single_fallback_spills_only_unsent_increments(corpus_stand_in, mirror_to_stand_in) -> None:
+    mod, community = mirror_to_stand_in
+    corpus_stand_in.bulk_enabled = False
+    corpus_stand_in.contribute_accept_max = 1
+    _schedule_upserts(mod, community, [("kw", "ans", "a"), ("kw", "ans", "b"), ("kw", "ans", "c")])
+
+    await asyncio.wait_for(mod.corpus_write_queue().join(), timeout=2.0)
+
+    assert [body["message"] for body in corpus_stand_in.contributions] == ["a"]
+    assert mod.corpus_mirror_stats()["spilled_items"] == 1
+
+    corpus_stand_in.contribute_accept_max = None
+    assert await mod.replay_corpus_mirror_spill() == 1
+    assert [body["message"] for body in corpus_stand_in.contributions] == ["a", "b", "c"]
+    assert not mod._SPILL_PATH.exists()
+
+
+@pytest.mark.asyncio
+async def test_replay_skips_while_another_worker_holds_the_replay_lock(corpus_stand_in, mirror_to_stand_in) -> None:
+    from pallas.core.foundation.fs_lock import try_interprocess_file_lock
+
+    mod, _community = mirror_to_stand_in
+    assert mod._spill_items([{"op": "upsert_answer", "keywords": "kw", "answer_keywords": "ans", "message": "m"}])
+
+    with try_interprocess_file_lock(mod._replay_lock_path()) as owned:
+        assert owned
+        assert await mod.replay_corpus_mirror_spill() == 0
+    assert mod._SPILL_PATH.exists()
+    assert corpus_stand_in.contributions == []
+
+
+def test_coalesce_answer_entries_merges_same_answer() -> None:
+    from pallas.product.corpus.write_fanout import coalesce_answer_entries
+
+    entry = {"keywords": "天气", "answer_keywords": "不错", "group_id": 0, "append_on_existing": False}
+    items = coalesce_answer_entries([
+        {**entry, "answer_time": 1, "message": "不错"},
+        {**entry, "answer_time": 5, "message": "真不错"},
+        {**entry, "answer_keywords": "下雨", "answer_time": 2, "message": "下雨"},
+    ])
+
+    assert len(items) == 2
+    merged = next(item for item in items if item["answer_keywords"] == "不错")
+    assert merged["op"] == "upsert_answer"
+    assert merged["count"] == 2
+    assert merged["answer_time"] == 5
+    assert merged["messages"] == ["不错", "真不错"]
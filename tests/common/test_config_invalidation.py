@@ -0,0 +1,109 @@
+"""配置缓存推送失效：PG NOTIFY 随写事务送达其它进程，只丢那一条；回源期间被失效不回填旧值。"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+from sqlalchemy import text
+
+
+def test_foreign_payload_invalidates_single_key_and_own_payload_is_ignored() -> None:
+    from pallas.core.foundation.db import config_invalidation as ci
+    from pallas.core.foundation.db.repository_pg import BotConfigRow, _get_config_cache
+
+    cache = _get_config_cache(BotConfigRow)
+    cache.clear()
+    cache.put(1, "one")
+    cache.put(2, "two")
+
+    assert not ci.apply_config_invalidation(ci.config_invalidation_payload("bot_config", 1))
+    assert cache.get(1) == (True, "one")
+    assert not ci.apply_config_invalidation("not json")
+
+    assert ci.apply_config_invalidation(json.dumps({"o": "other-process", "t": "bot_config", "k": 1}))
+    assert cache.get(1) == (False, None)
+    assert cache.get(2) == (True, "two")
+    cache.clear()
+
+
+def test_stale_load_is_dropped_and_push_extends_ttl(monkeypatch) -> None:
+    from pallas.core.foundation.db import config_invalidation as ci
+    from pallas.core.foundation.db.repository_pg import _ConfigCache
+
+    cache = _ConfigCache(ttl=60, capacity=4, pushed_ttl=600)
+    epoch = cache.epoch
+    cache.invalidate(7)
+    cache.put(7, "stale", epoch=epoch)
+    assert cache.get(7) == (False, None)
+
+    cache.put(0, 0)
+    assert cache._store[0][1] - time.monotonic() <= 60
+    monkeypatch.setattr(ci, "_listening", True)
+    for key in range(1, 6):
+        cache.put(key, key)
+    assert cache._store[5][1] - time.monotonic() > 60
+    # 超容量整体换新 dict，保留最近写入的
+    assert len(cache._store) <= 4
+    assert cache.get(5) == (True, 5)
+
+
+def test_trim_keeps_recently_read_entries(monkeypatch) -> None:
+    from pallas.core.foundation.db import repository_pg
+    from pallas.core.foundation.db.repository_pg import _ConfigCache
+
+    clock = iter(range(1, 1000))
+    monkeypatch.setattr(repository_pg.time, "monotonic", lambda: float(next(clock)))
+    cache = _ConfigCache(ttl=10_000, capacity=4)
+    for key in range(4):
+        cache.put(key, key)
+    # 最早载入的 0 一直被读，裁剪时应留下，没人读的 1 先走
+    assert cache.get(0) == (True, 0)
+    cache.put(4, 4)
+
+    assert cache.get(0) == (True, 0)
+    assert cache.get(1) == (False, None)
+    assert len(cache._store) <= 4
+
+
+@pytest.mark.asyncio
+async def test_pg_notify_from_another_writer_reaches_listener(pg_engine, monkeypatch) -> None:
+    from pallas.core.foundation.db import config_invalidation as ci
+    from pallas.core.foundation.db.repository_pg import PgConfigRepository, get_session
+
+    monkeypatch.setenv("PG_CONFIG_INVALIDATION", "pg")
+    await ci.start_config_invalidation_listener(pg_engine)
+    try:
+        for _ in range(100):
+            if ci.config_push_active():
+                break
+            await asyncio.sleep(0.02)
+        assert ci.config_push_active()
+
+        repo = PgConfigRepository("bot_config", "account")
+        await repo.upsert_field(3003, "security", False)
+        assert (await repo.get(3003)).security is False
+
+        # 模拟另一进程：别的 origin 在写事务里发 NOTIFY
+        async with get_session() as session:
+            await session.execute(text("UPDATE bot_config SET security = true WHERE account = 3003"))
+            await session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {
+                    "channel": ci.CONFIG_NOTIFY_CHANNEL,
+                    "payload": json.dumps({"o": "other", "t": "bot_config", "k": 3003}),
+                },
+            )
+            await session.commit()
+
+        for _ in range(100):
+            if not repo._cache.get(3003)[0]:
+                break
+            await asyncio.sleep(0.02)
+        assert (await repo.get(3003)).security is True
+        assert ci.config_invalidation_stats()["applied"] >= 1
+    finally:
+        await ci.stop_config_invalidation_listener()
+    assert not ci.config_push_active()
@@ -0,0 +1,221 @@
+"""语料三表哈希分区：新库直接建分区、已有数据在线拷贝切换，切换后仓储读写与级联删除照常。"""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+
+
+async def _layout(engine) -> dict[str, str]:
+    async with engine.connect() as conn:
+        rows = await conn.execute(
+            text(
+                "SELECT relname, relkind::text FROM pg_class "
+                "WHERE relname IN ('context', 'context_answer', 'context_answer_message')"
+            )
+        )
+        return {str(r[0]): str(r[1]) for r in rows}
+
+
+async def _seed(repo, prefix: str, n: int) -> None:
+    from pallas.core.foundation.db.modules import Context
+
+    for i in range(n):
+        kw = f"{prefix}{i}"
+        await repo.insert(
+            Context.model_construct(keywords=kw, time=100, trigger_count=1, answers=[], ban=[], clear_time=0)
+        )
+        await repo.upsert_answer(kw, 1, "a", 100 + i, f"m{i}", append_on_existing=True)
+
+
+@pytest.fixture(autouse=True)
+def _reset_layout():
+    from pallas.core.foundation.db.context_partitions import note_context_partition_layout
+
+    yield
+    note_context_partition_layout(0)
+
+
+@pytest.mark.asyncio
+async def test_empty_tables_become_partitioned_on_ensure(pg_engine, monkeypatch):
+    from pallas.core.foundation.db.context_partitions import context_partition_count, ensure_context_partitions
+    from pallas.core.foundation.db.repository_pg import PgContextRepository
+
+    monkeypatch.setenv("PG_CONTEXT_PARTITIONS", "4")
+    async with pg_engine.begin() as conn:
+        await conn.run_sync(ensure_context_partitions)
+
+    assert await _layout(pg_engine) == {"context": "p", "context_answer": "p", "context_answer_message": "p"}
+    assert context_partition_count() == 4
+
+    repo = PgContextRepository()
+    await _seed(repo, "fresh", 3)
+    await repo.learn_answer(
+        keywords="fresh0", group_id=1, answer_keywords="a", answer_time=200, message="m-again", append_on_existing=True
+    )
+    found = await repo.find_by_keywords("fresh0")
+    assert found is not None
+    assert found.answers[0].count == 2
+
+    # 再跑一遍 ensure 不重复建表
+    async with pg_engine.begin() as conn:
+        await conn.run_sync(ensure_context_partitions)
+    assert context_partition_count() == 4
+
+
+@pytest.mark.asyncio
+async def test_online_migration_keeps_concurrent_writes_and_cascades(pg_engine, monkeypatch):
+    from pallas.core.foundation.db import context_partitions as parts
+    from pallas.core.foundation.db.repository_pg import PgContextRepository
+
+    repo = PgContextRepository()
+    await _seed(repo, "old", 12)
+
+    monkeypatch.setenv("PG_CONTEXT_PARTITIONS", "4")
+    async with pg_engine.begin() as conn:
+        # 有数据时 ensure 不动表，只提示走迁移
+        await conn.run_sync(parts.ensure_context_partitions)
+    assert (await _layout(pg_engine))["context"] == "r"
+
+    shadow = await parts.prepare_context_partition_migration(4)
+    assert shadow == {"context": 4, "context_answer": 4, "context_answer_message": 4}
+
+    copied = await parts.copy_context_partition_table("context", batch_size=5)
+    assert copied == 12
+    # 拷贝中途的写入、更新与删除经同步触发器落到影子表
+    await _seed(repo, "mid", 2)
+    await repo.learn_answer(
+        keywords="old0", group_id=1, answer_keywords="a", answer_time=300, message="m-late", append_on_existing=True
+    )
+    async with pg_engine.begin() as conn:
+        await conn.execute(text("DELETE FROM context WHERE keywords = 'old11'"))
+    for table in ("context_answer", "context_answer_message"):
+        await parts.copy_context_partition_table(table, batch_size=5)
+
+    verify = await parts.verify_context_partition_counts()
+    assert verify["ok"], verify
+    assert verify["tables"]["context"]["source"] == 13
+
+    assert await parts.finish_context_partition_migration(drop_legacy=True) == 4
+    assert await _layout(pg_engine) == {"context": "p", "context_answer": "p", "context_answer_message": "p"}
+    assert parts.context_partition_count() == 4
+
+    found = await repo.find_by_keywords("old0")
+    assert found is not None
+    assert found.answers[0].count == 2
+    assert sorted(found.answers[0].messages) == ["m-late", "m0"]
+    assert await repo.find_by_keywords("old11") is None
+    await repo.learn_answer(
+        keywords="new", group_id=1, answer_keywords="b", answer_time=400, message="fresh", append_on_existing=True
+    )
+    assert (await repo.find_by_keywords("new")).answers[0].messages == ["fresh"]
+
+    # 逐片删除过期 Context，answer / message 由级联触发器带走
+    await repo.delete_expired(expiration=150, threshold=5)
+    async with pg_engine.connect() as conn:
+        remaining = set((await conn.execute(text("SELECT keywords FROM context"))).scalars())
+        answers = (await conn.execute(text("SELECT count(*) FROM context_answer"))).scalar_one()
+        messages = (await conn.execute(text("SELECT count(*) FROM context_answer_message"))).scalar_one()
+        index_names = set(
+            (
+                await conn.execute(
+                    text("SELECT indexname FROM pg_indexes WHERE tablename IN ('context', 'context_answer')")
+                )
+            ).scalars()
+        )
+    assert remaining == {"old0", "new"}
+    assert answers == 2
+    assert messages == 3
+    # 切换后索引 / 约束沿用原名，ensure 与 ON CONFLICT ON CONSTRAINT 照常命中
+    assert {"context_pkey", "uq_context_answer_ctx_group_kw", "ix_context_answer_ctx_count_time"} <= index_names
+
+
+@pytest.mark.asyncio
+async def test_partition_job_runs_on_event_loop(pg_engine):
+    import asyncio
+
+    from pallas.core.foundation.db import migrate_jobs
+    from pallas.core.foundation.db.context_partitions import context_partition_count
+    from pallas.core.foundation.db.repository_pg import PgContextRepository
+
+    await _seed(PgContextRepository(), "job", 5)
+    job = migrate_jobs.start_context_partition_job(partitions=2, drop_legacy=True, batch_size=100)
+    await asyncio.gather(*list(migrate_jobs._job_tasks))
+
+    payload = migrate_jobs.migrate_job_status_payload(job)
+    assert payload["status"] == "completed", payload["logs"]
+    assert payload["kind"] == "context_partitions"
+    assert payload["result"]["copied"] == {"context": 5, "context_answer": 5, "context_answer_message": 5}
+    assert context_partition_count() == 2
+    with pytest.raises(ValueError, match="已是分区表"):
+        migrate_jobs.start_context_partition_job(partitions=2)
+
+
+@pytest.mark.asyncio
+async def test_stale_layout_is_refreshed_after_another_worker_swaps(pg_engine, monkeypatch):
+    """别的 worker 在线切换后本进程仍记单表布局：写入被拒时重读目录并重试，逐片删也按新布局走。"""
+    from pallas.core.foundation.db import context_partitions as parts
+    from pallas.core.foundation.db.repository_pg import PgContextRepository
+
+    monkeypatch.setenv("PG_CONTEXT_PARTITIONS", "4")
+    async with pg_engine.begin() as conn:
+        await conn.run_sync(parts.ensure_context_partitions)
+    parts.note_context_partition_layout(0)
+
+    repo = PgContextRepository()
+    assert await repo.learn_answer(
+        keywords="stale", group_id=1, answer_keywords="a", answer_time=100, message="m1", append_on_existing=False
+    )
+    assert parts.context_partition_count() == 4
+
+    parts.note_context_partition_layout(0)
+    await repo.upsert_answer("stale", 1, "a", 110, "m2", append_on_existing=True)
+    assert parts.context_partition_count() == 4
+
+    parts.note_context_partition_layout(0)
+    await repo.delete_expired(expiration=200, threshold=5)
+    assert parts.context_partition_count() == 4
+    assert await repo.find_by_keywords("stale") is None
+
+
+@pytest.mark.asyncio
+async def test_only_stale_layout_errors_are_retried(monkeypatch):
+    from sqlalchemy.exc import NotSupportedError, ProgrammingError
+
+    from pallas.core.foundation.db import context_partitions as parts
+    from pallas.core.foundation.db import repository_pg
+
+    class _PgError(Exception):
+        def __init__(self, message: str, sqlstate: str) -> None:
+            super().__init__(message)
+            self.sqlstate = sqlstate
+
+    refreshed: list[int] = []
+
+    async def refresh() -> int:
+        refreshed.append(4)
+        parts.note_context_partition_layout(4)
+        return 4
+
+    monkeypatch.setattr(parts, "refresh_context_partition_layout", refresh)
+    stale = NotSupportedError("INSERT", {}, _PgError("cannot retrieve a system column in this context", "0A000"))
+    attempts: list[int] = []
+
+    async def write() -> int:
+        attempts.append(parts.context_partition_count())
+        if len(attempts) == 1:
+            raise stale
+        return 7
+
+    assert await repository_pg._retry_on_stale_partition_layout(write) == 7
+    assert attempts == [0, 4]
+    assert refreshed == [4]
+
+    other = ProgrammingError("INSERT", {}, _PgError('column "xmax" does not exist', "42703"))
+
+    async def broken() -> None:
+        raise other
+
+    with pytest.raises(ProgrammingError):
+        await repository_pg._retry_on_stale_partition_layout(broken)
+    assert refreshed == [4]
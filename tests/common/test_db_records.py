@@ -0,0 +1,70 @@
+"""PG 读路径的 __slots__ 记录：兼容调用方用到的 model_* 接口，Mongo 侧按需还原 Document。"""
+
+from __future__ import annotations
+
+import pytest
+
+from pallas.core.foundation.db.records import AnswerRecord, BanRecord, ContextRecord, MessageRecord, as_document
+
+
+def test_answer_copy_keeps_topical_and_dump_matches_model() -> None:
+    from pallas.core.foundation.db.modules import Answer
+
+    answer = AnswerRecord("a", 1, 2, 100, ["m"])
+    answer._topical = 3
+    copied = answer.model_copy(update={"messages": list(answer.messages)})
+    copied.messages.append("n")
+    copied._topical += 1
+
+    assert answer.messages == ["m"]
+    assert (answer._topical, copied._topical) == (3, 4)
+    assert not hasattr(answer, "__dict__")
+    model = Answer.model_construct(keywords="a", group_id=1, count=2, time=100, messages=["m"])
+    assert answer.model_dump(by_alias=True) == model.model_dump(by_alias=True)
+
+
+def test_records_round_trip_to_beanie_documents() -> None:
+    from pallas.core.foundation.db.modules import Answer, Ban, Context, Message
+
+    ctx = ContextRecord("kw", 100, 5, [AnswerRecord("a", 1, 2, 100, ["m"])], [BanRecord("kw", 1, "r", 9)], 7)
+    assert ctx.model_dump(by_alias=True)["count"] == 5
+
+    doc = as_document(ctx)
+    assert isinstance(doc, Context)
+    assert isinstance(doc.answers[0], Answer)
+    assert isinstance(doc.ban[0], Ban)
+    assert (doc.trigger_count, doc.clear_time, doc.answers[0].messages) == (5, 7, ["m"])
+
+    msg = as_document(MessageRecord(1, 2, 3, "raw", plain_text="raw", keywords="raw", time=10))
+    assert isinstance(msg, Message)
+    assert (msg.raw_message, msg.time, msg.message_id) == ("raw", 10, None)
+    assert as_document(doc) is doc
+
+
+@pytest.mark.asyncio
+async def test_pg_reads_return_slotted_records(pg_engine) -> None:
+    from pallas.core.foundation.db.modules import Context, Message
+    from pallas.core.foundation.db.repository_pg import PgContextRepository, PgMessageRepository
+
+    repo = PgContextRepository()
+    await repo.insert(
+        Context.model_construct(keywords="rec", time=100, trigger_count=1, answers=[], ban=[], clear_time=0)
+    )
+    await repo.upsert_answer("rec", 1, "a", 100, "m", append_on_existing=True)
+    found = await repo.find_by_keywords("rec")
+    reply = await repo.find_by_keywords_for_reply("rec")
+    assert isinstance(found, ContextRecord)
+    assert isinstance(reply, ContextRecord)
+    assert isinstance(found.answers[0], AnswerRecord)
+    assert reply.answers[0].messages == ["m"]
+
+    message_repo = PgMessageRepository()
+    await message_repo.bulk_insert([
+        Message.model_construct(
+            group_id=5, user_id=1, bot_id=2, raw_message="x", is_plain_text=True, plain_text="x", keywords="x", time=10
+        ),
+        MessageRecord(5, 1, 2, "y", plain_text="y", keywords="y", time=11),
+    ])
+    recent = await message_repo.find_recent_in_group(5)
+    assert [type(m) for m in recent] == [MessageRecord, MessageRecord]
+    assert [m.raw_message for m in recent] == ["x", "y"]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import concurrent.futures
 
-from pallas.core.foundation.fs_lock import atomic_write_text, interprocess_file_lock
+from pallas.core.foundation.fs_lock import atomic_write_text, interprocess_file_lock, try_interprocess_file_lock
 
 
 def test_atomic_write_text_unique_tmp(tmp_path) -> None:
@@ -19,3 +19,14 @@ def test_atomic_write_text_unique_tmp(tmp_path) -> None:
     lines = [line for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
     assert len(lines) == 40
     assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_try_lock_reports_contention_without_blocking(tmp_path) -> None:
+    lock_path = tmp_path / "replay.lock"
+
+    with try_interprocess_file_lock(lock_path) as first:
+        assert first is True
+        with try_interprocess_file_lock(lock_path) as second:
+            assert second is False
+    with try_interprocess_file_lock(lock_path) as again:
+        assert again is True
@@ -0,0 +1,96 @@
+"""热路径查询：语句只构造一次、重复执行命中编译缓存，认领过滤语义不变，按名记账。"""
+
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_reuse_compiled_statements_and_record_timings(pg_engine) -> None:
+    from pallas.core.foundation.db.hot_queries import hot_query_stats, reset_hot_query_stats
+    from pallas.core.foundation.db.records import MessageRecord
+    from pallas.core.foundation.db.repository_pg import PgContextRepository, PgMessageRepository
+
+    reset_hot_query_stats()
+    repo = PgContextRepository()
+    messages = PgMessageRepository()
+    await messages.bulk_insert([MessageRecord(9, 1 + i % 2, 2, f"m{i}", time=100 + i) for i in range(6)])
+    for i in range(3):
+        await repo.learn_answer(
+            keywords="hot",
+            group_id=9,
+            answer_keywords="a",
+            answer_time=200 + i,
+            message=f"msg{i}",
+            append_on_existing=True,
+        )
+        reply = await repo._find_by_keywords_for_reply_snapshot("hot")
+        recent = await messages.find_recent_in_group(9, before_time=105, user_id=1, limit=2)
+
+    assert reply is not None
+    assert reply.trigger_count == 3
+    assert reply.answers[0].messages == ["msg0", "msg1", "msg2"]
+    assert [(m.raw_message, m.time) for m in recent] == [("m2", 102), ("m4", 104)]
+
+    stats = {row["name"]: row for row in hot_query_stats()}
+    for name in (
+        "learn_answer",
+        "reply_snapshot",
+        "find_recent_in_group",
+    ):
+        assert stats[name]["calls"] == 3
+        # 新 engine 首次执行编译一次，之后命中编译缓存
+        assert stats[name]["compile_misses"] == 1
+        assert stats[name]["total_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_claim_many_filters_with_array_params(pg_engine) -> None:
+    from pallas.core.foundation.db.hot_queries import hot_query_stats
+    from pallas.core.platform.work_jobs.models import WorkJob
+    from pallas.core.platform.work_jobs.pg_store import PostgresWorkJobStore
+
+    store = PostgresWorkJobStore()
+    jobs = [
+        await store.enqueue(WorkJob.create(kind=kind, payload={"bot_qq": qq}, idempotency_key=f"hot:{i}"))
+        for i, (kind, qq) in enumerate([("a", 1), ("b", 1), ("c", 2), ("b", 2)])
+    ]
+
+    claimed = await store.claim_many(
+        owner="w",
+        lease_sec=30,
+        limit=10,
+        exclude_kinds=frozenset({"c"}),
+        bot_owner_ids=frozenset({1, 2}),
+        priority_kinds=frozenset({"b"}),
+    )
+    assert [job.id for job in claimed] == [jobs[1].id, jobs[3].id, jobs[0].id]
+
+    await store.enqueue(WorkJob.create(kind="a", payload={"bot_qq": 3}, idempotency_key="hot:4"))
+    assert await store.claim_many(owner="w", lease_sec=30, limit=10, kinds=frozenset({"a"})) != []
+    assert await store.claim_many(owner="w", lease_sec=30, limit=10, kinds=frozenset()) == []
+    rest = await store.claim_many(owner="w", lease_sec=30, limit=1, bot_owner_ids=frozenset({2}))
+    assert [job.id for job in rest] == [jobs[2].id]
+    assert {row["name"]: row for row in hot_query_stats()}["work_jobs.claim_many"]["calls"] >= 4
+
+
+def test_compile_timing_is_skipped_without_private_gen_time() -> None:
+    from types import SimpleNamespace
+
+    from sqlalchemy.engine.default import CACHE_MISS
+
+    from pallas.core.foundation.db import hot_queries
+
+    hot_queries.reset_hot_query_stats()
+    context = SimpleNamespace(
+        execution_options={hot_queries.HOT_QUERY_OPTION: "no_gen_time"},
+        compiled=SimpleNamespace(),
+        cache_hit=CACHE_MISS,
+    )
+
+    hot_queries._before_cursor_execute(None, None, "", None, context, False)
+    hot_queries._after_cursor_execute(None, None, "", None, context, False)
+
+    stats = {row["name"]: row for row in hot_queries.hot_query_stats()}
+    assert stats["no_gen_time"]["calls"] == 1
+    assert stats["no_gen_time"]["compile_misses"] == 0
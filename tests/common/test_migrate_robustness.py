@@ -337,6 +337,44 @@ async def test_migrate_message_dirty_rows_counted(pg_env):
     assert stats.failed == 0
 
 
+async def test_migrate_message_copy_path_matches_insert(pg_env):
+    """COPY 路径：NUL 剥除、缺省列补默认值，游标与数据同事务推进，断点续传不重复。"""
+    from bson import ObjectId
+    from sqlalchemy import select
+
+    from pallas.core.foundation.db.repository_pg import MessageRow
+
+    migrate = pg_env["migrate"]
+
+    docs = [
+        {
+            "_id": ObjectId(),
+            "group_id": 1,
+            "user_id": 2,
+            "bot_id": 3,
+            "raw_message": f"msg{i}\x00",
+            "is_plain_text": True,
+            "keywords": "",
+            "time": 100 + i,
+        }
+        for i in range(6)
+    ]
+    db = _FakeDb({"message": docs[:4]})
+    await migrate._migrate_message(
+        db, pg_env["sf"], MessageRow, pg_env["pg_insert"], batch_size=2, dry_run=False, copy=True
+    )
+    db = _FakeDb({"message": docs})
+    await migrate._migrate_message(
+        db, pg_env["sf"], MessageRow, pg_env["pg_insert"], batch_size=2, dry_run=False, copy=True
+    )
+
+    async with pg_env["sf"]() as session:
+        rows = (await session.execute(select(MessageRow).order_by(MessageRow.time))).scalars().all()
+    assert [r.raw_message for r in rows] == [f"msg{i}" for i in range(6)]
+    assert [r.plain_text for r in rows] == [f"msg{i}" for i in range(6)]
+    assert {(r.sender_name, r.suppressed_by_rage, r.message_id) for r in rows} == {("", False, None)}
+
+
 # ---------------------------------------------------------------------------
 # BlackList / Config 迁移
 # ---------------------------------------------------------------------------
@@ -99,3 +99,22 @@ def test_format_detail_includes_bottleneck_and_blocker():
     assert "bottleneck=lock_contention" in text
     assert "block: blocked_pid=11" in text
     assert "slow_active: pid=11" in text
+
+
+def test_format_includes_hot_query_timings():
+    snap = PgActivitySnapshot(
+        hot_queries=[
+            {
+                "name": "reply_snapshot.answers",
+                "calls": 10,
+                "compile_misses": 1,
+                "compile_ms": 0.8,
+                "mean_ms": 1.5,
+                "max_ms": 4.0,
+                "total_ms": 15.0,
+            }
+        ]
+    )
+    detail = format_pg_activity_detail(snap)
+    assert "hot_query: reply_snapshot.answers calls=10 mean_ms=1.5" in detail
+    assert "compile_misses=1 compile_ms=0.8" in detail
@@ -0,0 +1,87 @@
+"""message 批量落库的 COPY 快路径：与 executemany 结果一致，跟随会话事务，冲突表不走 COPY。"""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import func, select
+
+
+def _records(n: int, *, offset: int = 0):
+    from pallas.core.foundation.db.records import MessageRecord
+
+    return [
+        MessageRecord(
+            7,
+            1,
+            2,
+            f"m{i}\x00",
+            plain_text=f"m{i}",
+            keywords="k\x00",
+            sender_name="兔兔" if i % 2 else "",
+            message_id=i or None,
+            suppressed_by_rage=i == 3,
+            time=offset + i,
+        )
+        for i in range(n)
+    ]
+
+
+async def _rows(pg_engine):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from pallas.core.foundation.db.repository_pg import MessageRow
+
+    async with async_sessionmaker(pg_engine)() as session:
+        rows = (await session.execute(select(MessageRow).order_by(MessageRow.time))).scalars().all()
+        return [
+            (r.raw_message, r.plain_text, r.keywords, r.sender_name, r.message_id, r.suppressed_by_rage, r.time)
+            for r in rows
+        ]
+
+
+@pytest.mark.asyncio
+async def test_copy_and_insert_paths_store_identical_rows(pg_engine, monkeypatch):
+    from pallas.core.foundation.db import pg_copy
+    from pallas.core.foundation.db.repository_pg import MessageRow, PgMessageRepository, get_session
+
+    n = pg_copy.COPY_MIN_ROWS
+    calls: list[int | None] = []
+    real_copy_rows = pg_copy.copy_rows
+
+    async def spy(*args, **kwargs):
+        result = await real_copy_rows(*args, **kwargs)
+        calls.append(result)
+        return result
+
+    monkeypatch.setattr(pg_copy, "copy_rows", spy)
+    repo = PgMessageRepository()
+    await repo.bulk_insert(_records(n))
+    copied = await _rows(pg_engine)
+    assert calls == [n]
+
+    async with get_session() as session:
+        await session.execute(MessageRow.__table__.delete())
+        await session.commit()
+    monkeypatch.setenv("PG_BULK_COPY", "0")
+    await repo.bulk_insert(_records(n))
+    assert calls == [n]
+    assert await _rows(pg_engine) == copied
+    assert copied[3] == ("m3", "m3", "k", "兔兔", 3, True, 3)
+
+
+@pytest.mark.asyncio
+async def test_copy_rolls_back_with_session_and_skips_conflict_tables(pg_engine):
+    from pallas.core.foundation.db.pg_copy import copy_rows, copy_safe_table
+    from pallas.core.foundation.db.repository_pg import ContextRow, MessageRow, _message_values, get_session
+
+    async with get_session() as session:
+        assert await copy_rows(session, MessageRow.__table__, map(_message_values, _records(3))) == 3
+        await session.rollback()
+    async with get_session() as session:
+        assert (await session.execute(select(func.count()).select_from(MessageRow))).scalar_one() == 0
+
+    # keywords_hash 唯一：需要 ON CONFLICT 的表交回调用方 INSERT
+    assert copy_safe_table(MessageRow.__table__)
+    assert not copy_safe_table(ContextRow.__table__)
+    async with get_session() as session:
+        assert await copy_rows(session, ContextRow.__table__, [{"keywords": "k"}]) is None
@@ -78,3 +78,50 @@ def test_pg_pool_capacity_cached_until_disk_revision(monkeypatch):
     assert pg_pool_capacity() == 12
     rev["v"] = ((2, 2),)
     assert pg_pool_capacity() == 14
+
+
+@pytest.mark.asyncio
+async def test_reply_read_pool_settings_and_pressure(monkeypatch):
+    from pallas.core.foundation.db import runtime
+    from pallas.core.foundation.db.pool_budget import reply_pool_under_pressure
+
+    values: dict[str, str] = {}
+    monkeypatch.setattr(
+        "pallas.core.foundation.config.repo_settings.repo_env_raw_value",
+        lambda key: values.get(key),
+    )
+    assert runtime.reply_read_pool_settings() is None
+    values["PG_REPLY_POOL_SIZE"] = "3"
+    assert runtime.reply_read_pool_settings() == {"host": None, "port": None, "pool_size": 3, "max_overflow": 2}
+    values.clear()
+    values["PG_REPLICA_HOST"] = "replica.internal"
+    assert runtime.reply_read_pool_settings()["pool_size"] == 4
+
+    # 未装只读池：沿用主池压力
+    monkeypatch.setattr("pallas.core.foundation.db.pool_budget.pg_pool_under_pressure", lambda threshold: True)
+    assert reply_pool_under_pressure(threshold=0.55) is True
+
+    class FakePool:
+        def size(self) -> int:
+            return 4
+
+        def checkedout(self) -> int:
+            return 1
+
+        def overflow(self) -> int:
+            return 0
+
+    class FakeEngine:
+        pool = FakePool()
+
+        async def dispose(self) -> None:
+            return None
+
+    runtime.install_reply_read_engine(FakeEngine(), target="replica.internal:5432", capacity=4)
+    try:
+        assert reply_pool_under_pressure(threshold=0.55) is False
+        runtime.note_reply_read_failure()
+        assert runtime.reply_read_engine() is None
+        assert reply_pool_under_pressure(threshold=0.55) is True
+    finally:
+        await runtime.dispose_reply_read_engine()
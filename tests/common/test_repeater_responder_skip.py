@@ -206,7 +206,7 @@ async def test_context_find_skips_when_pg_pool_under_pressure(monkeypatch) -> No
         raise AssertionError("find_by_keywords should not run under pool pressure")
 
     monkeypatch.setattr(
-        "packages.repeater.responder.pg_pool_under_pressure",
+        "packages.repeater.responder.reply_pool_under_pressure",
         lambda threshold=0.55: True,
     )
     monkeypatch.setattr(
@@ -251,7 +251,7 @@ async def test_context_find_db_timeout_returns_none(monkeypatch) -> None:
         raise SATimeoutError("QueuePool limit of size 8 overflow 4 reached", None, None)
 
     monkeypatch.setattr(
-        "packages.repeater.responder.pg_pool_under_pressure",
+        "packages.repeater.responder.reply_pool_under_pressure",
         lambda threshold=0.55: False,
     )
 
@@ -316,7 +316,7 @@ async def test_context_find_passes_group_id_to_resolve_persona(monkeypatch) -> N
             clear_time=0,
         )
 
-    monkeypatch.setattr("packages.repeater.responder.pg_pool_under_pressure", lambda threshold=0.55: False)
+    monkeypatch.setattr("packages.repeater.responder.reply_pool_under_pressure", lambda threshold=0.55: False)
     monkeypatch.setattr("pallas.product.persona.resolve_persona_for_message", fake_resolve_persona_for_message)
     monkeypatch.setattr("pallas.product.persona.loader.load_affect_triggers", fake_load_affect_triggers)
 
@@ -153,6 +153,81 @@ async def test_replace_answers_upserts_and_drops_orphans(pg_engine):
     assert "drop-me" not in by_kw
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("partitions", [0, 4])
+async def test_prune_expired_answers_matches_replace_answers_and_resumes(pg_engine, monkeypatch, request, partitions):
+    """集合式清理与逐条 replace_answers 保留同一批 Answer；限时中断后从断点续跑，分区表下逐片删结果相同。"""
+    from pallas.core.foundation.db.context_partitions import ensure_context_partitions, note_context_partition_layout
+    from pallas.core.foundation.db.modules import Answer, Context
+    from pallas.core.foundation.db.repository_pg import MaintenanceCursorRow, PgContextRepository, get_session
+
+    if partitions:
+        monkeypatch.setenv("PG_CONTEXT_PARTITIONS", str(partitions))
+        request.addfinalizer(lambda: note_context_partition_layout(0))
+        async with pg_engine.begin() as conn:
+            await conn.run_sync(ensure_context_partitions)
+
+    def build(prefix: str) -> list[Context]:
+        # 0/1 号命中 trigger_count，2/3 号命中 clear_time，4 号两者都不命中
+        return [
+            Context.model_construct(
+                keywords=f"{prefix}-{i}",
+                time=0,
+                trigger_count=150 if i < 2 else 5,
+                answers=[
+                    Answer.model_construct(keywords="keep-count", group_id=1, count=3, time=10, messages=["a"]),
+                    Answer.model_construct(keywords="keep-fresh", group_id=1, count=1, time=900, messages=["b"]),
+                    Answer.model_construct(keywords="drop", group_id=2, count=1, time=10, messages=["c"]),
+                ],
+                ban=[],
+                clear_time=100 if i in (2, 3) else 999,
+            )
+            for i in range(5)
+        ]
+
+    repo = PgContextRepository()
+    for ctx in [*build("legacy"), *build("bulk")]:
+        await repo.insert(ctx)
+
+    expiration = 500
+    for ctx in await repo.find_for_cleanup(100, expiration):
+        if ctx.keywords.startswith("legacy"):
+            kept = [ans for ans in ctx.answers if ans.count > 1 or ans.time > expiration]
+            await repo.replace_answers(ctx.keywords, kept, 1234)
+
+    monkeypatch.setattr(PgContextRepository, "_PRUNE_CONTEXT_CHUNK", 3)
+    first = await repo.prune_expired_answers(
+        trigger_threshold=100, expiration=expiration, clear_time=1234, budget_sec=0
+    )
+    assert first.finished is False
+    assert first.batches == 1
+    async with get_session(read_only=True) as session:
+        cursor = await session.get(MaintenanceCursorRow, PgContextRepository._PRUNE_CURSOR)
+        assert cursor is not None
+        assert cursor.last_id == first.last_id > 0
+    rest = await repo.prune_expired_answers(
+        trigger_threshold=100, expiration=expiration, clear_time=1234, budget_sec=60
+    )
+    assert rest.finished is True
+    assert rest.last_id == 0
+    assert first.answers_deleted + rest.answers_deleted == 4
+
+    for i in range(5):
+        legacy = await repo.find_by_keywords(f"legacy-{i}")
+        bulk = await repo.find_by_keywords(f"bulk-{i}")
+        assert legacy is not None
+        assert bulk is not None
+        assert bulk.clear_time == legacy.clear_time
+        assert sorted((a.keywords, a.count, a.messages) for a in bulk.answers) == sorted(
+            (a.keywords, a.count, a.messages) for a in legacy.answers
+        )
+    async with get_session(read_only=True) as session:
+        cursor = await session.get(MaintenanceCursorRow, PgContextRepository._PRUNE_CURSOR)
+        assert cursor is not None
+        assert cursor.last_id == 0
+        assert cursor.deleted == 4
+
+
 @pytest.mark.asyncio
 async def test_find_by_keywords_for_reply_caps_messages(pg_engine, monkeypatch):
     """接话 find 仅加载最近 N 条 message，全量 find 不受影响。"""
@@ -215,7 +290,7 @@ async def test_find_by_keywords_for_reply_keeps_bans(pg_engine):
 
 
 @pytest.mark.asyncio
-async def test_find_by_keywords_for_reply_uses_two_indexed_read_round_trips(pg_engine):
+async def test_find_by_keywords_for_reply_uses_one_read_round_trip(pg_engine):
     from sqlalchemy import event
 
     from pallas.core.foundation.db.modules import Ban, Context
@@ -249,7 +324,59 @@ async def test_find_by_keywords_for_reply_uses_two_indexed_read_round_trips(pg_e
     assert found is not None
     assert found.answers[0].messages == ["reply"]
     assert [ban.keywords for ban in found.ban] == ["forbidden"]
-    assert len(statements) == 2
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_find_by_keywords_for_reply_reads_from_reply_pool_and_fails_over(pg_engine):
+    """接话快照走独立只读池；只读池连不上时回落主池并进入冷却。"""
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from pallas.core.foundation.db import runtime
+    from pallas.core.foundation.db.modules import Context
+    from pallas.core.foundation.db.pool_budget import pool_budget_status
+    from pallas.core.foundation.db.repository_pg import PgContextRepository, clear_reply_query_snapshot_cache
+
+    repo = PgContextRepository()
+    await repo.insert(
+        Context.model_construct(keywords="replica", time=0, trigger_count=1, answers=[], ban=[], clear_time=0)
+    )
+    await repo.upsert_answer("replica", 1, "a", 101, "reply", append_on_existing=True)
+    await clear_reply_query_snapshot_cache("replica")
+
+    reply_engine = create_async_engine(pg_engine.url, pool_size=1, max_overflow=0)
+    runtime.install_reply_read_engine(reply_engine, target="test", capacity=1)
+    primary_reads: list[str] = []
+
+    def record_primary(_conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+        primary_reads.append(statement)
+
+    event.listen(pg_engine.sync_engine, "before_cursor_execute", record_primary)
+    try:
+        found = await repo.find_by_keywords_for_reply("replica")
+        assert found is not None
+        assert found.answers[0].messages == ["reply"]
+        assert primary_reads == []
+        stats = pool_budget_status()["reply_pool"]
+        assert stats["sessions"] == 1
+        assert stats["healthy"] is True
+
+        broken = create_async_engine("postgresql+asyncpg://nobody@127.0.0.1:1/none")
+        runtime.install_reply_read_engine(broken, target="down", capacity=1)
+        await clear_reply_query_snapshot_cache("replica")
+        found = await repo.find_by_keywords_for_reply("replica")
+        assert found is not None
+        assert found.answers[0].messages == ["reply"]
+        assert primary_reads
+        assert runtime.reply_read_engine() is None
+        stats = runtime.reply_read_pool_live_stats()
+        assert stats["failovers"] == 1
+        assert stats["healthy"] is False
+    finally:
+        event.remove(pg_engine.sync_engine, "before_cursor_execute", record_primary)
+        await runtime.dispose_reply_read_engine()
+        await reply_engine.dispose()
 
 
 def test_reply_message_query_limits_to_selected_answer_ids():
@@ -822,6 +949,313 @@ async def test_learn_answer_updates_existing_context(pg_engine):
     assert "second" not in found.answers[0].messages
 
 
+@pytest.mark.asyncio
+async def test_learn_answers_matches_per_row_learn_answer(pg_engine):
+    """批量 learn 合并计数后，结果须与逐条 learn_answer 完全一致。"""
+    from pallas.core.foundation.db.modules import Context
+    from pallas.core.foundation.db.repository import LearnAnswerItem
+    from pallas.core.foundation.db.repository_pg import PgContextRepository
+
+    repo = PgContextRepository()
+
+    def _items(prefix: str) -> list[LearnAnswerItem]:
+        rows = [
+            ("new", 1, "a", 100, "m1", False),
+            ("new", 1, "a", 110, "m2", True),
+            ("new", 1, "a", 120, "m3", False),
+            ("new", 2, "a", 130, "m4", False),
+            ("hit", 1, "b", 140, "m5", False),
+            ("hit", 1, "b", 150, "m6", True),
+            ("new", 1, "c", 160, "m7", True),
+        ]
+        return [
+            LearnAnswerItem(
+                keywords=f"{prefix}-{kw}",
+                group_id=gid,
+                answer_keywords=ans,
+                answer_time=ts,
+                message=msg,
+                append_on_existing=append,
+            )
+            for kw, gid, ans, ts, msg, append in rows
+        ]
+
+    for prefix in ("row", "batch"):
+        await repo.insert(
+            Context.model_construct(keywords=f"{prefix}-hit", time=0, trigger_count=4, answers=[], ban=[], clear_time=0)
+        )
+
+    row_flags = [
+        await repo.learn_answer(
+            keywords=item.keywords,
+            group_id=item.group_id,
+            answer_keywords=item.answer_keywords,
+            answer_time=item.answer_time,
+            message=item.message,
+            append_on_existing=item.append_on_existing,
+        )
+        for item in _items("row")
+    ]
+    batch_flags = await repo.learn_answers(_items("batch"))
+
+    assert batch_flags == row_flags == [True, False, False, False, False, False, False]
+
+    def _shape(ctx: Context) -> tuple:
+        answers = sorted((a.group_id, a.keywords, a.count, a.time, tuple(a.messages)) for a in ctx.answers)
+        return ctx.trigger_count, ctx.time, answers
+
+    for kw in ("new", "hit"):
+        by_row = await repo.find_by_keywords(f"row-{kw}")
+        by_batch = await repo.find_by_keywords(f"batch-{kw}")
+        assert by_row is not None
+        assert by_batch is not None
+        assert _shape(by_batch) == _shape(by_row)
+
+
+async def _learn_answer_three_round_trips(*, keywords, group_id, answer_keywords, answer_time, message, append):
+    """learn_answer 改成单条 CTE 之前的逐段写法，作等价性对照。"""
+    from sqlalchemy import insert
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+    from pallas.core.foundation.db.repository_pg import (
+        ContextAnswerMessageRow,
+        ContextAnswerRow,
+        ContextRow,
+        _was_insert,
+        _was_insert_column,
+        get_session,
+        keywords_hash,
+    )
+
+    async with get_session() as session:
+        ctx_stmt = pg_insert(ContextRow).values(
+            keywords=keywords, keywords_hash=keywords_hash(keywords), time=answer_time, trigger_count=1, clear_time=0
+        )
+        ctx_stmt = ctx_stmt.on_conflict_do_update(
+            index_elements=[ContextRow.keywords_hash],
+            set_={"trigger_count": ContextRow.trigger_count + 1, "time": ctx_stmt.excluded.time},
+        ).returning(ContextRow.id, _was_insert_column(ContextRow.trigger_count))
+        ctx_row = (await session.execute(ctx_stmt)).first()
+        ans_stmt = pg_insert(ContextAnswerRow).values(
+            context_id=ctx_row.id,
+            keywords=answer_keywords,
+            keywords_hash=keywords_hash(answer_keywords),
+            group_id=group_id,
+            count=1,
+            time=answer_time,
+        )
+        ans_stmt = ans_stmt.on_conflict_do_update(
+            constraint="uq_context_answer_ctx_group_kw",
+            set_={"count": ContextAnswerRow.count + 1, "time": ans_stmt.excluded.time},
+        ).returning(ContextAnswerRow.id, _was_insert_column(ContextAnswerRow.count))
+        ans_row = (await session.execute(ans_stmt)).first()
+        if _was_insert(ans_row.was_insert, 1) or append:
+            await session.execute(insert(ContextAnswerMessageRow).values(answer_id=ans_row.id, message=message))
+        await session.commit()
+    return _was_insert(ctx_row.was_insert, 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("partitions", [0, 4])
+async def test_learn_answer_single_statement_matches_three_round_trips(pg_engine, monkeypatch, partitions):
+    """单条 CTE 的 learn_answer 与原先三次往返的结果逐项一致，分区表下同样成立。"""
+    from sqlalchemy import event
+
+    from pallas.core.foundation.db.context_partitions import ensure_context_partitions, note_context_partition_layout
+    from pallas.core.foundation.db.repository_pg import PgContextRepository
+
+    if partitions:
+        monkeypatch.setenv("PG_CONTEXT_PARTITIONS", str(partitions))
+        async with pg_engine.begin() as conn:
+            await conn.run_sync(ensure_context_partitions)
+    rows = [
+        ("k", 1, "a", 100, "m1", False),
+        ("k", 1, "a", 110, "m2", True),
+        ("k", 1, "a", 120, "m3", False),
+        ("k", 2, "a", 130, "m4", False),
+        ("j", 1, "b", 140, "m5", True),
+        ("k", 1, "c", 150, "m6", True),
+    ]
+    repo = PgContextRepository()
+    statements: list[str] = []
+
+    def record_statement(_conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+        statements.append(statement)
+
+    try:
+        event.listen(pg_engine.sync_engine, "before_cursor_execute", record_statement)
+        try:
+            piped = [
+                await repo.learn_answer(
+                    keywords=f"cte-{kw}",
+                    group_id=gid,
+                    answer_keywords=ans,
+                    answer_time=ts,
+                    message=msg,
+                    append_on_existing=append,
+                )
+                for kw, gid, ans, ts, msg, append in rows
+            ]
+        finally:
+            event.remove(pg_engine.sync_engine, "before_cursor_execute", record_statement)
+        reference = [
+            await _learn_answer_three_round_trips(
+                keywords=f"ref-{kw}", group_id=gid, answer_keywords=ans, answer_time=ts, message=msg, append=append
+            )
+            for kw, gid, ans, ts, msg, append in rows
+        ]
+
+        assert piped == reference == [True, False, False, False, True, False]
+        assert len(statements) == len(rows)
+        for kw in ("k", "j"):
+            got = await repo.find_by_keywords(f"cte-{kw}")
+            want = await repo.find_by_keywords(f"ref-{kw}")
+            assert got is not None
+            assert want is not None
+            assert (got.trigger_count, got.time) == (want.trigger_count, want.time)
+            assert sorted((a.group_id, a.keywords, a.count, a.time, tuple(a.messages)) for a in got.answers) == sorted(
+                (a.group_id, a.keywords, a.count, a.time, tuple(a.messages)) for a in want.answers
+            )
+    finally:
+        note_context_partition_layout(0)
+
+
+_REPLY_SNAPSHOT_TWO_QUERY_REFERENCE = (
+    """
+    SELECT c.id, c.keywords, c.time, c.trigger_count, c.clear_time,
+        COALESCE((
+            SELECT jsonb_agg(jsonb_build_object(
+                'keywords', b.keywords, 'group_id', b.group_id, 'reason', b.reason, 'time', b.time
+            ) ORDER BY b.id)
+            FROM context_ban b WHERE b.context_id = c.id
+        ), '[]'::jsonb) AS bans
+    FROM context c WHERE c.keywords_hash = :khash
+    """,
+    """
+    WITH answers AS (
+        SELECT a.id, a.keywords, a.group_id, a.count, a.time
+        FROM context_answer a WHERE a.context_id = :context_id
+        ORDER BY a.count DESC, a.time DESC LIMIT :ans_cap
+    ), ranked_messages AS (
+        SELECT m.answer_id, m.message, m.id,
+               row_number() OVER (PARTITION BY m.answer_id ORDER BY m.id DESC) AS rn
+        FROM context_answer_message m JOIN answers a ON a.id = m.answer_id
+    ), messages AS (
+        SELECT answer_id, jsonb_agg(message ORDER BY id) AS values
+        FROM ranked_messages WHERE rn <= :msg_cap GROUP BY answer_id
+    )
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+        'keywords', a.keywords, 'group_id', a.group_id, 'count', a.count, 'time', a.time,
+        'messages', COALESCE(m.values, '[]'::jsonb)
+    ) ORDER BY a.count DESC, a.time DESC), '[]'::jsonb) AS answers
+    FROM answers a LEFT JOIN messages m ON m.answer_id = a.id
+    """,
+)
+
+
+@pytest.mark.asyncio
+async def test_reply_snapshot_single_query_matches_two_query_reference(pg_engine, monkeypatch):
+    """单条 json_agg + LATERAL 的接话快照，与原先 context / answer 两次查询的结果一致（含 caps 截断）。"""
+    import json
+
+    from sqlalchemy import text
+
+    from pallas.core.foundation.db.modules import Ban, Context
+    from pallas.core.foundation.db.repository_pg import PgContextRepository, get_session, keywords_hash
+
+    msg_cap, ans_cap = 2, 3
+    monkeypatch.setattr("pallas.product.corpus.reply_perf_config.reply_query_caps", lambda _kw: (msg_cap, ans_cap))
+    repo = PgContextRepository()
+    bans = [Ban.model_construct(keywords="snap", group_id=g, reason=f"r{g}", time=g) for g in (3, 1)]
+    await repo.insert(
+        Context.model_construct(keywords="snap", time=1, trigger_count=1, answers=[], ban=bans, clear_time=7)
+    )
+    await repo.insert(
+        Context.model_construct(keywords="empty", time=1, trigger_count=1, answers=[], ban=[], clear_time=0)
+    )
+    # 5 条 answer，count 各不相同；第 i 条写 i+1 次，每次一条 message
+    for i in range(5):
+        for j in range(i + 1):
+            await repo.upsert_answer("snap", 10 + i, f"a{i}", 100 + i * 10 + j, f"a{i}-m{j}", append_on_existing=True)
+
+    async def reference(keywords: str):
+        async with get_session(read_only=True) as session:
+            ctx = (
+                (
+                    await session.execute(
+                        text(_REPLY_SNAPSHOT_TWO_QUERY_REFERENCE[0]), {"khash": keywords_hash(keywords)}
+                    )
+                )
+                .mappings()
+                .one_or_none()
+            )
+            if ctx is None:
+                return None
+            answers = (
+                await session.execute(
+                    text(_REPLY_SNAPSHOT_TWO_QUERY_REFERENCE[1]),
+                    {"context_id": ctx["id"], "ans_cap": ans_cap, "msg_cap": msg_cap},
+                )
+            ).scalar_one()
+        load = lambda v: v if isinstance(v, list) else json.loads(v)  # noqa: E731
+        return ctx["keywords"], ctx["time"], ctx["trigger_count"], ctx["clear_time"], load(ctx["bans"]), load(answers)
+
+    for keywords in ("snap", "empty", "missing"):
+        got = await repo._find_by_keywords_for_reply_snapshot(keywords)
+        want = await reference(keywords)
+        if want is None:
+            assert got is None
+            continue
+        assert got is not None
+        assert (
+            got.keywords,
+            got.time,
+            got.trigger_count,
+            got.clear_time,
+            [b.model_dump() for b in got.ban],
+            [a.model_dump() for a in got.answers],
+        ) == want
+
+    snap = await repo._find_by_keywords_for_reply_snapshot("snap")
+    assert [a.keywords for a in snap.answers] == ["a4", "a3", "a2"]
+    assert snap.answers[0].messages == ["a4-m3", "a4-m4"]
+
+
+@pytest.mark.asyncio
+async def test_learn_answers_skips_contaminated_items(pg_engine, monkeypatch) -> None:
+    from pallas.core.foundation.db.repository import LearnAnswerItem
+    from pallas.core.foundation.db.repository_pg import PgContextRepository
+    from pallas.product.llm.config import LlmConfig
+
+    monkeypatch.setattr(
+        "pallas.product.llm.config.get_llm_config",
+        lambda: LlmConfig(llm_corpus_learn_guard_enabled=True),
+    )
+    repo = PgContextRepository()
+    flags = await repo.learn_answers([
+        LearnAnswerItem(
+            keywords="batch-blocked",
+            group_id=1,
+            answer_keywords="ans",
+            answer_time=100,
+            message="希望每个庆典都能顺利举行",
+            append_on_existing=False,
+        ),
+        LearnAnswerItem(
+            keywords="batch-kept",
+            group_id=1,
+            answer_keywords="ans",
+            answer_time=100,
+            message="msg",
+            append_on_existing=False,
+        ),
+    ])
+
+    assert flags == [False, True]
+    assert await repo.find_by_keywords("batch-blocked") is None
+    assert await repo.find_by_keywords("batch-kept") is not None
+
+
 @pytest.mark.asyncio
 async def test_delete_expired_chunked(pg_engine):
     """delete_expired 分块模式下应清掉所有过期行、保留未过期行。"""
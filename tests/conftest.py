@@ -25,6 +25,19 @@ def _reset_embedding_runtime_state() -> None:
         pass
 
 
+@pytest.fixture(scope="session", autouse=True)
+def _isolate_shared_keyword_cache(tmp_path_factory: pytest.TempPathFactory) -> None:
+    """共享分词缓存默认写 data/repeater/keyword_cache.bin，测试期间改落到临时目录。"""
+    from packages.repeater import keyword_cache
+
+    cache_path = tmp_path_factory.mktemp("keyword_cache") / "keyword_cache.bin"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(keyword_cache, "keyword_cache_path", lambda: cache_path)
+        keyword_cache.reset_shared_keyword_cache()
+        yield
+        keyword_cache.reset_shared_keyword_cache()
+
+
 @pytest.fixture
 async def beanie_fixture(monkeypatch: pytest.MonkeyPatch):
     """
@@ -37,6 +50,11 @@ async def beanie_fixture(monkeypatch: pytest.MonkeyPatch):
 
     monkeypatch.setattr(nonebot.get_driver().config, "db_backend", "mongodb", raising=False)
 
+    from pallas.core.foundation.db.context_repo_access import invalidate_shared_context_repository
+
+    # 前序用例可能已按 PG 后端建好共享 context_repo，切后端后须重建
+    invalidate_shared_context_repository()
+
     from beanie import init_beanie
     from mongomock_motor import AsyncMongoMockClient
 
@@ -98,6 +116,7 @@ async def beanie_fixture(monkeypatch: pytest.MonkeyPatch):
     await motor_db.drop_collection("llm_relationship_note")
     await motor_db.drop_collection("sticker_label")
     motor_client.close()
+    invalidate_shared_context_repository()
 
 
 def pytest_configure(config):  # noqa: ARG001
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+
+import pytest
+
+_SAMPLES = (
+    "哈哈",
+    "草",
+    "牛牛你好",
+    "牛牛今天也很可爱呢",
+    "[CQ:image,file=a.image]",
+    "[CQ:xml,data=x]",
+    "两行\n文本",
+    "[CQ:at,qq=1] 你来",
+)
+
+
+def _context(seed: int, size: int = 400):
+    from pallas.core.foundation.db import Answer, Context
+
+    rng = random.Random(seed)
+    answers = [
+        Answer(
+            keywords=f"kw{rng.randrange(40)}",
+            group_id=rng.randrange(6) + 1,
+            count=rng.choice((1, 2, 3, 5)),
+            time=i,
+            messages=[] if rng.random() < 0.05 else [rng.choice(_SAMPLES)],
+        )
+        for i in range(size)
+    ]
+    return Context.model_construct(keywords="ctx", time=1, trigger_count=1, answers=answers, ban=[], clear_time=0)
+
+
+def _legacy_indices(context, spec) -> list[int]:
+    """迁移前逐条循环里最终会进入 candidate_answers 的下标。"""
+    picked: list[int] = []
+    cache: dict[str, list[int]] = defaultdict(list)
+    answers_count: dict[str, int] = defaultdict(int)
+    for idx, answer in enumerate(context.answers):
+        count = answer.count
+        if not spec.is_drunk and count < spec.count_threshold:
+            continue
+        if answer.keywords in spec.excluded_keywords or not answer.messages:
+            continue
+        sample = answer.messages[0]
+        if spec.is_image and "[CQ:" not in sample:
+            continue
+        if sample.startswith("牛牛") and (not spec.to_me or len(sample) <= 6):
+            continue
+        if sample.startswith("[CQ:xml") or "\n" in sample:
+            continue
+        if count < 3 and sample in spec.recent_messages:
+            continue
+        if answer.group_id == spec.group_id:
+            picked.append(idx)
+        elif "[CQ:at,qq=" in sample:
+            continue
+        elif spec.is_drunk and count > spec.count_threshold:
+            picked.append(idx)
+        else:
+            answers_count[answer.keywords] += 1
+            if answers_count[answer.keywords] < spec.cross_group_threshold:
+                cache[answer.keywords].append(idx)
+            else:
+                picked.extend(cache.pop(answer.keywords, ()))
+                picked.append(idx)
+    return sorted(picked)
+
+
+def _spec(rng: random.Random):
+    from packages.repeater.answer_columns import CandidateFilter
+
+    return CandidateFilter(
+        group_id=rng.randrange(6) + 1,
+        count_threshold=rng.choice((1, 2, 3)),
+        cross_group_threshold=rng.choice((1, 2, 3)),
+        is_drunk=rng.random() < 0.3,
+        is_image=rng.random() < 0.2,
+        to_me=rng.random() < 0.5,
+        excluded_keywords=frozenset(f"kw{rng.randrange(40)}" for _ in range(3)),
+        recent_messages=frozenset({"草", "哈哈"} if rng.random() < 0.5 else ()),
+    )
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_candidate_indices_match_legacy_loop(monkeypatch: pytest.MonkeyPatch, use_numpy: bool) -> None:
+    from packages.repeater import answer_columns
+
+    if use_numpy and answer_columns.np is None:
+        pytest.skip("numpy 未安装")
+    if not use_numpy:
+        monkeypatch.setattr(answer_columns, "np", None)
+
+    rng = random.Random(11)
+    for seed in range(20):
+        context = _context(seed)
+        columns = answer_columns.AnswerColumns(context.answers)
+        for _ in range(10):
+            spec = _spec(rng)
+            assert columns.candidate_indices(spec) == _legacy_indices(context, spec)
+
+
+def test_answer_columns_cached_per_snapshot_and_rebuilt_on_growth() -> None:
+    from packages.repeater.answer_columns import answer_columns_for, clear_answer_columns
+    from pallas.core.foundation.db import Answer
+
+    clear_answer_columns()
+    context = _context(1, size=10)
+
+    first = answer_columns_for(context)
+    assert answer_columns_for(context) is first
+
+    context.answers.append(Answer(keywords="kw_new", group_id=1, count=1, time=1, messages=["新"]))
+    rebuilt = answer_columns_for(context)
+    assert rebuilt is not first
+    assert rebuilt.size == 11
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_prefilter_matches_full_exclusion(monkeypatch: pytest.MonkeyPatch, use_numpy: bool) -> None:
+    from dataclasses import replace
+
+    from packages.repeater import answer_columns
+
+    if use_numpy and answer_columns.np is None:
+        pytest.skip("numpy 未安装")
+    if not use_numpy:
+        monkeypatch.setattr(answer_columns, "np", None)
+
+    rng = random.Random(5)
+    for seed in range(10):
+        context = _context(seed)
+        columns = answer_columns.AnswerColumns(context.answers)
+        banned = {f"kw{rng.randrange(40)}" for _ in range(4)}
+        prefilter = columns.prefilter(banned)
+        for _ in range(10):
+            spec = _spec(rng)
+            full = replace(spec, excluded_keywords=spec.excluded_keywords | banned)
+            assert columns.candidate_indices(spec, prefilter) == columns.candidate_indices(full)
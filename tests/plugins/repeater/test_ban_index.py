@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+class _Ctx(SimpleNamespace):
+    pass
+
+
+def _ban(keywords: str, group_id: int) -> SimpleNamespace:
+    return SimpleNamespace(keywords=keywords, group_id=group_id)
+
+
+@pytest.fixture
+def ban_manager():
+    from packages.repeater.ban_manager import BanManager
+
+    BanManager._blacklist_answer.clear()
+    BanManager._blacklist_answer_reserve.clear()
+    BanManager.invalidate_ban_index()
+    yield BanManager
+    BanManager._blacklist_answer.clear()
+    BanManager._blacklist_answer_reserve.clear()
+    BanManager.invalidate_ban_index()
+
+
+@pytest.mark.asyncio
+async def test_compiled_matches_find_ban_keywords(ban_manager) -> None:
+    flag = ban_manager.BLACKLIST_FLAG
+    ban_manager._blacklist_answer[flag] |= {"g1", "g2"}
+    ban_manager._blacklist_answer[7] |= {"own"}
+    ban_manager._blacklist_answer[8] |= {"other"}
+    threshold = ban_manager.CROSS_GROUP_THRESHOLD
+    context = _Ctx(
+        ban=[
+            _ban("ctx_own", 7),
+            _ban("ctx_flag", flag),
+            *(_ban("ctx_cross", 100 + i) for i in range(threshold)),
+            *(_ban("ctx_few", 200 + i) for i in range(max(0, threshold - 1))),
+        ]
+    )
+
+    for group_id in (7, 8, 9):
+        for ctx in (None, context):
+            expected = await ban_manager.find_ban_keywords(context=ctx, group_id=group_id)
+            assert ban_manager.compiled_ban_keywords(ctx, group_id) == expected
+    # 重复调用复用同一个编译结果
+    assert ban_manager.compiled_ban_keywords(context, 7) is ban_manager.compiled_ban_keywords(context, 7)
+
+
+@pytest.mark.asyncio
+async def test_compiled_index_follows_ban_and_global_updates(ban_manager) -> None:
+    context = _Ctx(ban=[])
+    before = ban_manager.compiled_ban_keywords(context, 7)
+    assert before == frozenset()
+
+    reply_dict = {7: {1: [{"time": 1, "pre_keywords": "pre", "reply": "out", "reply_keywords": "out_kw"}]}}
+    with patch("packages.repeater.ban_manager.context_repo.append_ban", new_callable=AsyncMock):
+        assert await ban_manager.ban(7, 1, "out", "r", reply_dict) is True
+    # ban() 只写候选名单，但 context 上追加的 ban 随长度变化重新编译
+    context.ban.append(_ban("out_kw", 7))
+    assert ban_manager.compiled_ban_keywords(context, 7) == {"out_kw"}
+
+    for group_id in range(300, 300 + ban_manager.CROSS_GROUP_THRESHOLD):
+        ban_manager._blacklist_answer[group_id].add("glob")
+    with patch.object(ban_manager, "_select_blacklist", new=AsyncMock()):
+        await ban_manager.update_global_blacklist()
+    assert ban_manager.compiled_ban_keywords(context, 7) == {"out_kw", "glob"}
+    assert ban_manager.compiled_ban_keywords(None, 8) == {"glob"}
+
+    # 绕过 ban() 直接改字典同样能察觉
+    ban_manager._blacklist_answer[8].add("direct")
+    assert ban_manager.compiled_ban_keywords(None, 8) == {"glob", "direct"}
+
+
+def test_group_index_is_reused_when_group_has_no_bans(ban_manager) -> None:
+    context = _Ctx(ban=[_ban("ctx_own", 7)])
+
+    assert ban_manager.compiled_ban_keywords(None, 9) is ban_manager.compiled_ban_keywords(None, 9)
+    assert ban_manager.compiled_ban_keywords(context, 7) is ban_manager.compiled_ban_keywords(context, 7)
+
+
+def test_pg_context_record_reuses_cached_columns_and_ban_index(ban_manager) -> None:
+    """PG 读路径返回 ContextRecord：须能被弱引用，否则两处缓存每次都重建。"""
+    from packages.repeater.answer_columns import answer_columns_for
+    from pallas.core.foundation.db.records import AnswerRecord, BanRecord, ContextRecord
+
+    context = ContextRecord(
+        "kw",
+        100,
+        answers=[AnswerRecord("a", 7, 2, 100, ["m"]), AnswerRecord("b", 8, 3, 100, ["n"])],
+        ban=[BanRecord("a", 7, "r", 1)],
+    )
+
+    assert answer_columns_for(context) is answer_columns_for(context)
+    compiled = ban_manager.compiled_ban_keywords(context, 7)
+    assert compiled == frozenset({"a"})
+    assert ban_manager.compiled_ban_keywords(context, 7) is compiled
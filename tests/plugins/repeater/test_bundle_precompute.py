@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def precompute(monkeypatch: pytest.MonkeyPatch):
+    from packages.repeater import bundle_precompute
+    from pallas.core.platform.ingress import hotpath_metrics
+
+    bundle_precompute.clear_bundle_precompute_for_tests()
+    hotpath_metrics.clear_hotpath_metrics_for_tests()
+    monkeypatch.setattr(bundle_precompute, "bundle_precompute_top_k", lambda: 2)
+    monkeypatch.setattr("pallas.core.foundation.db.pool_budget.pg_pool_under_pressure", lambda threshold=0.0: False)
+    yield bundle_precompute
+    bundle_precompute.clear_bundle_precompute_for_tests()
+
+
+def _context(keywords: str):
+    from pallas.core.foundation.db import Answer, Context
+
+    answers = [
+        Answer(keywords="好 耶", group_id=1, count=3, time=1, messages=["好耶"]),
+        Answer(keywords="不 行", group_id=1, count=3, time=2, messages=["不行"]),
+        Answer(keywords=keywords, group_id=1, count=3, time=3, messages=["原话"]),
+    ]
+    return Context.model_construct(keywords=keywords, time=1, trigger_count=1, answers=answers, ban=[], clear_time=0)
+
+
+def test_hot_trigger_keywords_rank_by_count_and_topics(precompute) -> None:
+    for _ in range(3):
+        precompute.note_reply_trigger(1, "吃 饭")
+    for _ in range(2):
+        precompute.note_reply_trigger(1, "睡 觉")
+    precompute.note_reply_trigger(1, "打 游戏")
+
+    assert precompute.hot_trigger_keywords(1, (), 2) == ["吃 饭", "睡 觉"]
+    # 话题词出现 6 次，1 次触发也能翻到最前
+    assert precompute.hot_trigger_keywords(1, ["游戏"] * 6 + ["打"] * 20, 2)[0] == "打 游戏"
+    assert precompute.hot_trigger_keywords(2, (), 2) == []
+
+
+@pytest.mark.asyncio
+async def test_refresh_builds_entries_and_rebuilds_on_change(precompute, monkeypatch: pytest.MonkeyPatch) -> None:
+    from packages.repeater.ban_manager import BanManager
+    from pallas.core.platform.ingress import hotpath_metrics
+
+    contexts = {"吃 饭": _context("吃 饭")}
+    calls: list[str] = []
+
+    async def find_reply(keywords: str):
+        calls.append(keywords)
+        return contexts.get(keywords)
+
+    monkeypatch.setattr(
+        "pallas.core.foundation.db.context_repo_access.context_repo",
+        SimpleNamespace(find_by_keywords_for_reply=find_reply),
+    )
+    banned: set[str] = set()
+
+    async def find_ban_keywords(context, group_id):
+        return set(banned)
+
+    monkeypatch.setattr(BanManager, "find_ban_keywords", staticmethod(find_ban_keywords))
+
+    precompute.note_reply_trigger(1, "吃 饭")
+    precompute.note_reply_trigger(1, "没 结果")
+    assert await precompute.refresh_hot_reply_candidates({}) == 1
+
+    entry = precompute.lookup_precomputed_candidates(1, "吃 饭")
+    assert entry is not None
+    assert precompute.lookup_precomputed_candidates(1, "没 结果") is None
+    # 本句 keywords 折进预筛
+    assert [entry.context.answers[i].keywords for i in entry.prefilter.indices] == ["好 耶", "不 行"]
+
+    # 快照与 ban 集都没变：只续期
+    precompute.note_reply_trigger(1, "吃 饭")
+    assert await precompute.refresh_hot_reply_candidates({}) == 0
+    assert precompute.lookup_precomputed_candidates(1, "吃 饭") is entry
+
+    banned.add("不 行")
+    precompute.note_reply_trigger(1, "吃 饭")
+    assert await precompute.refresh_hot_reply_candidates({}) == 1
+    rebuilt = precompute.lookup_precomputed_candidates(1, "吃 饭")
+    assert [rebuilt.context.answers[i].keywords for i in rebuilt.prefilter.indices] == ["好 耶"]
+
+    snap = hotpath_metrics.hotpath_metrics_snapshot()
+    assert snap["bundle_precompute_refreshes"] == 3
+    assert snap["bundle_precompute_rebuilt"] == 2
+    assert snap["precompute_refresh_ms_p95"] is not None
+
+
+def test_entries_expire_and_discard_by_group(precompute, monkeypatch: pytest.MonkeyPatch) -> None:
+    from packages.repeater.answer_columns import AnswerColumns
+
+    context = _context("吃 饭")
+    columns = AnswerColumns(context.answers)
+    for group_id in (1, 2):
+        precompute._entries[(group_id, "吃 饭")] = precompute.PrecomputedCandidates(
+            context=context,
+            ban_keywords=frozenset(),
+            columns=columns,
+            prefilter=columns.prefilter(()),
+            answers_len=3,
+            refreshed_at=0.0,
+        )
+    monkeypatch.setattr(precompute.time, "monotonic", lambda: 50.0)
+
+    precompute.discard_precomputed_candidates(2)
+    assert precompute.lookup_precomputed_candidates(2, "吃 饭") is None
+    assert precompute.lookup_precomputed_candidates(1, "吃 饭") is not None
+
+    monkeypatch.setattr(precompute.time, "monotonic", lambda: 500.0)
+    assert precompute.lookup_precomputed_candidates(1, "吃 饭") is None
+
+
+def test_corpus_learn_discards_keyword_across_groups(precompute) -> None:
+    from packages.repeater.answer_columns import AnswerColumns
+    from pallas.product.corpus.read_cache import note_corpus_learn
+
+    for keywords in ("吃 饭", "睡 觉"):
+        context = _context(keywords)
+        columns = AnswerColumns(context.answers)
+        for group_id in (1, 2):
+            precompute._entries[(group_id, keywords)] = precompute.PrecomputedCandidates(
+                context=context,
+                ban_keywords=frozenset(),
+                columns=columns,
+                prefilter=columns.prefilter(()),
+                answers_len=3,
+                refreshed_at=precompute.time.monotonic(),
+            )
+
+    note_corpus_learn("吃 饭")
+
+    assert precompute.lookup_precomputed_candidates(1, "吃 饭") is None
+    assert precompute.lookup_precomputed_candidates(2, "吃 饭") is None
+    assert precompute.lookup_precomputed_candidates(1, "睡 觉") is not None
+    assert precompute.lookup_precomputed_candidates(2, "睡 觉") is not None
+
+
+def test_precompute_hit_ratio_in_snapshot_and_merge() -> None:
+    from pallas.core.platform.ingress import hotpath_metrics
+
+    hotpath_metrics.clear_hotpath_metrics_for_tests()
+    for hit in (True, True, True, False):
+        hotpath_metrics.record_bundle_precompute_lookup(hit=hit)
+
+    snap = hotpath_metrics.hotpath_metrics_snapshot()
+    assert snap["bundle_precompute_hit_ratio"] == 0.75
+    merged = hotpath_metrics.merge_hotpath_metrics([snap, {"bundle_precompute_miss": 2}])
+    assert merged["bundle_precompute_hit_ratio"] == 0.5
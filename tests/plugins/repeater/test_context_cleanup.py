@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+
+class _Repo:
+    def __init__(self, progress) -> None:
+        self.progress = progress
+        self.calls: list[str] = []
+        self.prune_kwargs: dict | None = None
+
+    async def delete_expired(self, expiration: int, threshold: int) -> None:
+        self.calls.append("delete_expired")
+
+    async def prune_expired_answers(self, **kwargs):
+        self.calls.append("prune")
+        self.prune_kwargs = kwargs
+        return self.progress
+
+    async def find_for_cleanup(self, trigger_threshold: int, expiration: int):
+        self.calls.append("find_for_cleanup")
+        return [
+            SimpleNamespace(
+                keywords="kw",
+                answers=[
+                    SimpleNamespace(keywords="keep", count=2, time=0),
+                    SimpleNamespace(keywords="drop", count=1, time=0),
+                ],
+            )
+        ]
+
+    async def replace_answers(self, keywords, answers, clear_time) -> None:
+        self.calls.append(f"replace:{keywords}:{[a.keywords for a in answers]}")
+
+
+@pytest.mark.asyncio
+async def test_clearup_context_prefers_set_based_prune(monkeypatch) -> None:
+    from packages.repeater import model
+    from pallas.core.foundation.db.repository import ContextCleanupProgress
+
+    monkeypatch.setenv("PALLAS_REPEATER_CONTEXT_CLEANUP_BUDGET_SEC", "42")
+    repo = _Repo(ContextCleanupProgress(3, 7, 1, 0, True, 1.0))
+    monkeypatch.setattr(model, "context_repo", repo)
+
+    await model.Chat.clearup_context()
+
+    assert repo.calls == ["delete_expired", "prune"]
+    assert repo.prune_kwargs is not None
+    assert repo.prune_kwargs["trigger_threshold"] == 100
+    assert repo.prune_kwargs["budget_sec"] == 42.0
+
+
+@pytest.mark.asyncio
+async def test_clearup_context_falls_back_when_backend_cannot_prune(monkeypatch) -> None:
+    from packages.repeater import model
+
+    repo = _Repo(None)
+    monkeypatch.setattr(model, "context_repo", repo)
+
+    await model.Chat.clearup_context()
+
+    assert repo.calls == ["delete_expired", "prune", "find_for_cleanup", "replace:kw:['keep']"]
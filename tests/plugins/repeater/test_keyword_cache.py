@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def test_entries_are_shared_between_mappings(tmp_path: Path) -> None:
+    from packages.repeater.keyword_cache import SharedKeywordCache
+
+    path = tmp_path / "kw.bin"
+    writer = SharedKeywordCache(path, 64)
+    reader = SharedKeywordCache(path, 64)
+    try:
+        writer.put("今天天气不错", 2, ("天气", "不错"), "tianqi bucuo")
+
+        assert reader.get("今天天气不错", 2) == (("天气", "不错"), "tianqi bucuo")
+        assert reader.get("今天天气不错", 1) is None
+        assert reader.get("别的句子", 2) is None
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_clock_eviction_keeps_recently_read_entry(tmp_path: Path) -> None:
+    from packages.repeater.keyword_cache import SharedKeywordCache
+
+    cache = SharedKeywordCache(tmp_path / "kw.bin", 8)
+    try:
+        for i in range(8):
+            assert cache.put(f"句子{i}", 2, (f"k{i}",), f"k{i}") is False
+        assert cache.get("句子3", 2) is not None
+
+        assert cache.put("新句子", 2, ("new",), "new") is True
+
+        assert cache.get("新句子", 2) == (("new",), "new")
+        assert cache.get("句子3", 2) == (("k3",), "k3")
+        assert sum(cache.get(f"句子{i}", 2) is not None for i in range(8)) == 7
+    finally:
+        cache.close()
+
+
+def test_corrupted_slot_reads_as_miss(tmp_path: Path) -> None:
+    from packages.repeater import keyword_cache
+
+    cache = keyword_cache.SharedKeywordCache(tmp_path / "kw.bin", 8)
+    try:
+        cache.put("你好", 2, ("你好",), "nihao")
+        for way in range(8):
+            offset = cache.small.slot_offset(0, way) + keyword_cache._SLOT_HEADER.size
+            cache._mm[offset] ^= 0xFF
+
+        assert cache.get("你好", 2) is None
+    finally:
+        cache.close()
+
+
+def test_long_payload_uses_large_slot_and_oversize_is_skipped(tmp_path: Path) -> None:
+    from packages.repeater.keyword_cache import SharedKeywordCache
+
+    path = tmp_path / "kw.bin"
+    writer = SharedKeywordCache(path, 64)
+    reader = SharedKeywordCache(path, 64)
+    try:
+        long_keywords = ("长长的关键词" * 4, "另一个长关键词" * 4)
+        long_pinyin = "changchangdeguanjianci" * 8
+        assert writer.put("长句子", 2, long_keywords, long_pinyin) is False
+        assert reader.get("长句子", 2) == (long_keywords, long_pinyin)
+
+        assert writer.put("超长句子", 2, ("超" * 200,), "chao" * 200) is None
+        assert reader.get("超长句子", 2) is None
+    finally:
+        writer.close()
+        reader.close()
+
+
+def test_slot_count_change_rebuilds_file(tmp_path: Path) -> None:
+    from packages.repeater.keyword_cache import SharedKeywordCache
+
+    path = tmp_path / "kw.bin"
+    small = SharedKeywordCache(path, 8)
+    small.put("你好", 2, ("你好",), "nihao")
+    small.close()
+
+    large = SharedKeywordCache(path, 64)
+    try:
+        assert large.get("你好", 2) is None
+        assert path.stat().st_size > 8 * 128
+    finally:
+        large.close()
+
+
+def test_extract_keyword_entry_reads_shared_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from packages.repeater import keyword_cache, model
+    from pallas.core.platform.ingress import hotpath_metrics
+
+    cache = keyword_cache.SharedKeywordCache(tmp_path / "kw.bin", 64)
+    monkeypatch.setattr(keyword_cache, "shared_keyword_cache", lambda: cache)
+    hotpath_metrics.clear_hotpath_metrics_for_tests()
+    model.extract_keyword_entry.cache_clear()
+    try:
+        cache.put("别的进程分过的句子", 2, ("别的", "句子"), "biede juzi")
+
+        assert model.extract_keyword_tags("别的进程分过的句子", 2) == ("别的", "句子")
+        first = model.extract_keyword_entry("这句还没人分过词", 2)
+        model.extract_keyword_entry.cache_clear()
+        assert model.extract_keyword_entry("这句还没人分过词", 2) == first
+
+        snap = hotpath_metrics.hotpath_metrics_snapshot()
+        assert snap["keywords_shared_hit"] == 2
+        assert snap["keywords_shared_miss"] == 1
+        assert snap["keywords_shared_hit_ratio"] == round(2 / 3, 4)
+    finally:
+        model.extract_keyword_entry.cache_clear()
+        cache.close()
+
+
+def test_oversized_entry_counts_as_shared_skip(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from packages.repeater import keyword_cache, model
+    from pallas.core.platform.ingress import hotpath_metrics
+
+    cache = keyword_cache.SharedKeywordCache(tmp_path / "kw.bin", 64)
+    monkeypatch.setattr(keyword_cache, "shared_keyword_cache", lambda: cache)
+    monkeypatch.setattr(model.jieba_analyse, "extract_tags", lambda *_args, **_kwargs: ["a" * 600])
+    hotpath_metrics.clear_hotpath_metrics_for_tests()
+    model.extract_keyword_entry.cache_clear()
+    try:
+        assert model.extract_keyword_tags("一句分出超长关键词的话", 2) == ("a" * 600,)
+
+        snap = hotpath_metrics.hotpath_metrics_snapshot()
+        assert snap["keywords_shared_skip"] == 1
+        assert snap["keywords_shared_evict"] == 0
+    finally:
+        model.extract_keyword_entry.cache_clear()
+        cache.close()
+
+
+def test_chat_data_pinyin_matches_direct_conversion(monkeypatch: pytest.MonkeyPatch) -> None:
+    from packages.repeater import keyword_cache, model
+
+    monkeypatch.setattr(keyword_cache, "shared_keyword_cache", lambda: None)
+    model.extract_keyword_entry.cache_clear()
+    chat_data = model.ChatData(
+        group_id=1,
+        user_id=2,
+        raw_message="今天天气真不错",
+        plain_text="今天天气真不错",
+        time=1,
+        bot_id=3,
+    )
+
+    assert chat_data.keywords_pinyin == model._keywords_pinyin(chat_data.keywords)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+
+def _item(keywords: str, message: str = "m"):
+    from pallas.core.foundation.db.repository import LearnAnswerItem
+
+    return LearnAnswerItem(
+        keywords=keywords,
+        group_id=1,
+        answer_keywords="ans",
+        answer_time=100,
+        message=message,
+        append_on_existing=True,
+    )
+
+
+class _BatchRepo:
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+        self.learn_answer = AsyncMock(return_value=False)
+
+    async def learn_answers(self, items):
+        self.batches.append([item.keywords for item in items])
+        await asyncio.sleep(0)
+        return [item.keywords.startswith("new") for item in items]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_learns_share_one_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    from packages.repeater import learn_batch
+
+    monkeypatch.setattr(learn_batch, "learn_batch_size", lambda: 64)
+    learn_batch.clear_learn_batch_writer()
+    repo = _BatchRepo()
+
+    flags = await asyncio.gather(
+        *(learn_batch.submit_learn_answer(repo, _item(kw)) for kw in ("new-a", "old-b", "new-c"))
+    )
+
+    assert flags == [True, False, True]
+    assert repo.batches == [["new-a", "old-b", "new-c"]]
+    repo.learn_answer.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_learns_arriving_during_flush_form_next_batch(monkeypatch: pytest.MonkeyPatch) -> None:
+    from packages.repeater import learn_batch
+
+    monkeypatch.setattr(learn_batch, "learn_batch_size", lambda: 2)
+    learn_batch.clear_learn_batch_writer()
+    repo = _BatchRepo()
+
+    await asyncio.gather(*(learn_batch.submit_learn_answer(repo, _item(f"k{i}")) for i in range(5)))
+
+    assert repo.batches == [["k0", "k1"], ["k2", "k3"], ["k4"]]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_propagates_to_every_waiter(monkeypatch: pytest.MonkeyPatch) -> None:
+    from packages.repeater import learn_batch
+
+    monkeypatch.setattr(learn_batch, "learn_batch_size", lambda: 64)
+    learn_batch.clear_learn_batch_writer()
+    repo = _BatchRepo()
+    repo.learn_answers = AsyncMock(side_effect=RuntimeError("pg down"))
+
+    results = await asyncio.gather(
+        learn_batch.submit_learn_answer(repo, _item("a")),
+        learn_batch.submit_learn_answer(repo, _item("b")),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_batch_size_one_uses_per_row_learn_answer(monkeypatch: pytest.MonkeyPatch) -> None:
+    from packages.repeater import learn_batch
+
+    monkeypatch.setattr(learn_batch, "learn_batch_size", lambda: 1)
+    repo = _BatchRepo()
+
+    await learn_batch.submit_learn_answer(repo, _item("a", "hello"))
+
+    assert repo.batches == []
+    repo.learn_answer.assert_awaited_once_with(
+        keywords="a",
+        group_id=1,
+        answer_keywords="ans",
+        answer_time=100,
+        message="hello",
+        append_on_existing=True,
+    )
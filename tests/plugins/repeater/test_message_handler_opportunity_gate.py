@@ -72,7 +72,7 @@ async def test_repeater_dispatches_locally_without_llm_select(monkeypatch: pytes
         tone="neutral",
         length_pref="any",
     )
-    monkeypatch.setattr("packages.repeater.responder.pg_pool_under_pressure", lambda **_kwargs: False)
+    monkeypatch.setattr("packages.repeater.responder.reply_pool_under_pressure", lambda **_kwargs: False)
     monkeypatch.setattr(
         "packages.repeater.responder.context_repo.find_by_keywords_for_reply",
         AsyncMock(return_value=context),
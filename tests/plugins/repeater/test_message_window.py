@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+
+def _win(capacity: int, count: int):
+    from packages.repeater.message_window import GroupMessageWindow
+
+    window = GroupMessageWindow(capacity)
+    for i in range(count):
+        window.append(SimpleNamespace(time=i, user_id=i % 3))
+    return window
+
+
+def test_ring_overwrites_oldest_and_reads_in_order() -> None:
+    window = _win(5, 8)
+
+    assert len(window) == 5
+    assert [m.time for m in window] == [3, 4, 5, 6, 7]
+    assert [m.time for m in reversed(window)] == [7, 6, 5, 4, 3]
+    assert [m.time for m in window[-2:]] == [6, 7]
+    assert [m.time for m in window[1:4]] == [4, 5, 6]
+    assert window[0].time == 3
+    assert window[-1].time == 7
+    with pytest.raises(IndexError):
+        window[5]
+
+
+def test_append_without_eviction_grows_and_drop_oldest_trims() -> None:
+    window = _win(3, 4)
+
+    assert window.append(SimpleNamespace(time=99, user_id=0), evict=False) is False
+    assert [m.time for m in window] == [1, 2, 3, 99]
+
+    window.drop_oldest(2)
+    assert [m.time for m in window] == [3, 99]
+    assert window.append(SimpleNamespace(time=100, user_id=0)) is False
+    assert window.append(SimpleNamespace(time=101, user_id=0)) is True
+    assert [m.time for m in window] == [99, 100, 101]
+
+
+def test_last_matching_scans_from_tail() -> None:
+    from packages.repeater.message_window import last_matching
+
+    window = _win(6, 10)
+    expected = [m for m in list(window) if m.user_id != 1][-2:]
+
+    assert last_matching(window, 2, lambda m: m.user_id != 1) == expected
+    assert last_matching(list(window), 2, lambda m: m.user_id != 1) == expected
+    assert last_matching(window, 0, lambda m: True) == []
+
+
+@pytest.mark.asyncio
+async def test_full_window_only_overwrites_synced_messages(beanie_fixture) -> None:
+    from packages.repeater.message_store import MessageStore
+    from packages.repeater.model import ChatData
+    from pallas.core.foundation.db import Message as MessageModel
+
+    MessageStore._message_lock = asyncio.Lock()
+    MessageStore._message_dict.clear()
+    MessageStore._synced_prefix_counts = {}
+    MessageStore._late_save_time = 0
+    old_reserved, old_count = MessageStore.SAVE_RESERVED_SIZE, MessageStore.SAVE_COUNT_THRESHOLD
+    MessageStore.SAVE_RESERVED_SIZE = 2
+    MessageStore.SAVE_COUNT_THRESHOLD = 3
+
+    def chat(i: int) -> ChatData:
+        return ChatData(group_id=7, user_id=1, raw_message=f"m{i}", plain_text=f"m{i}", time=10 + i, bot_id=9)
+
+    try:
+        with patch("packages.repeater.message_store.message_repo.bulk_insert", new=AsyncMock()) as mock_insert:
+            for i in range(4):
+                await MessageStore.message_insert(chat(i))
+            saved = mock_insert.await_args.args[0]
+            assert all(isinstance(msg, MessageModel) for msg in saved)
+            assert [msg.raw_message for msg in saved] == ["m0", "m1", "m2", "m3"]
+            assert [msg.raw_message for msg in MessageStore._message_dict[7]] == ["m2", "m3"]
+            assert MessageStore._synced_prefix_counts == {7: 2}
+
+            # 环容量 2 + 3：先覆盖两条已落库消息，之后只能扩容，未落库消息一条不丢
+            MessageStore.SAVE_COUNT_THRESHOLD = 10**6
+            for i in range(4, 10):
+                await MessageStore.message_insert(chat(i))
+            assert mock_insert.await_count == 1
+        assert [msg.raw_message for msg in MessageStore._message_dict[7]] == [f"m{i}" for i in range(4, 10)]
+        assert MessageStore._synced_prefix_counts[7] == 0
+    finally:
+        MessageStore._message_dict.clear()
+        MessageStore._synced_prefix_counts = {}
+        MessageStore._late_save_time = 0
+        MessageStore.SAVE_RESERVED_SIZE, MessageStore.SAVE_COUNT_THRESHOLD = old_reserved, old_count
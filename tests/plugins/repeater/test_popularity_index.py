@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+
+def _msgs(count: int, span: int, *, start: int = 1000) -> list[SimpleNamespace]:
+    step = span / max(1, count - 1)
+    return [SimpleNamespace(time=int(start + i * step)) for i in range(count)]
+
+
+def _accept_all(_group_id, _msgs) -> bool:
+    return True
+
+
+def test_ascending_matches_full_sort_by_rate() -> None:
+    from packages.repeater.popularity_index import GroupPopularityIndex, message_rate
+
+    rng = random.Random(3)
+    message_dict = {gid: _msgs(rng.randrange(5, 40), rng.randrange(0, 5000)) for gid in range(200)}
+    index = GroupPopularityIndex(10)
+
+    picked = index.ascending(message_dict, limit=1000, accept=_accept_all)
+
+    rates = [message_rate(msgs, 10) for _, msgs in picked]
+    assert rates == sorted(rates)
+    assert {gid for gid, _ in picked} == {gid for gid, msgs in message_dict.items() if len(msgs) >= 10}
+    # 出堆后须全部放回，第二次取结果一致
+    assert index.ascending(message_dict, limit=1000, accept=_accept_all) == picked
+
+
+def test_touch_reorders_and_limit_stops_early() -> None:
+    from packages.repeater.popularity_index import GroupPopularityIndex
+
+    message_dict = {1: _msgs(10, 100), 2: _msgs(10, 1000), 3: _msgs(10, 10)}
+    index = GroupPopularityIndex(10)
+    assert [gid for gid, _ in index.ascending(message_dict, limit=3, accept=_accept_all)] == [2, 1, 3]
+
+    message_dict[3] = _msgs(10, 5000)
+    index.touch(3, message_dict[3])
+
+    assert [gid for gid, _ in index.ascending(message_dict, limit=2, accept=_accept_all)] == [3, 2]
+    assert [gid for gid, _ in index.ascending(message_dict, limit=5, accept=lambda gid, _m: gid != 2)] == [3, 1]
+
+
+def test_untracked_window_change_is_corrected_on_read() -> None:
+    from packages.repeater.popularity_index import GroupPopularityIndex
+
+    message_dict = {1: _msgs(10, 100), 2: _msgs(10, 1000)}
+    index = GroupPopularityIndex(10)
+    index.rebuild(message_dict)
+
+    # 绕过 touch 直接改窗口：群 1 变冷，群 2 掉到门槛以下
+    message_dict[1][:] = _msgs(10, 9000)
+    del message_dict[2][5:]
+
+    assert [gid for gid, _ in index.ascending(message_dict, limit=5, accept=_accept_all)] == [1]
+
+
+def test_heap_is_compacted_under_repeated_touches() -> None:
+    from packages.repeater.popularity_index import GroupPopularityIndex
+
+    message_dict = {1: _msgs(10, 100)}
+    index = GroupPopularityIndex(10)
+    index.rebuild(message_dict)
+    for span in range(101, 1101):
+        message_dict[1] = _msgs(10, span)
+        index.touch(1, message_dict[1])
+
+    assert len(index._heap) <= 2 * len(index) + 64
+    assert index.ascending(message_dict, limit=5, accept=_accept_all) == [(1, message_dict[1])]
+
+
+@pytest.mark.asyncio
+async def test_message_store_popular_groups_follow_inserts(beanie_fixture) -> None:
+    from packages.repeater.message_store import MessageStore
+    from packages.repeater.model import ChatData
+
+    MessageStore._message_dict.clear()
+    MessageStore._late_save_time = 1
+    try:
+        for group_id, step in ((501, 1), (502, 60)):
+            for i in range(MessageStore.POPULARITY_MIN_MESSAGES):
+                await MessageStore.message_insert(
+                    ChatData(
+                        group_id=group_id,
+                        user_id=1,
+                        raw_message=f"m{i}",
+                        plain_text=f"m{i}",
+                        time=2 + i * step,
+                        bot_id=9,
+                    )
+                )
+
+        picked = await MessageStore.popular_groups(limit=5, accept=_accept_all)
+
+        assert [gid for gid, _ in picked] == [502, 501]
+    finally:
+        MessageStore._message_dict.clear()
+        MessageStore._late_save_time = 0
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import random
+from collections import Counter, deque
+
+from packages.repeater.topic_utils import TopicWindow, recent_topic_counts
+
+
+def test_topic_window_counts_track_deque_through_eviction() -> None:
+    rng = random.Random(3)
+    window = TopicWindow(16)
+    reference: deque[str] = deque(maxlen=16)
+    for _ in range(50):
+        batch = [f"t{rng.randrange(12)}" for _ in range(rng.randrange(1, 6))]
+        window += batch
+        reference += batch
+        assert list(window) == list(reference)
+        assert window.counts == Counter(reference)
+        assert all(window.count(key) == reference.count(key) for key in ("t0", "t5", "missing"))
+    assert 0 not in window.counts.values()
+
+    window.clear()
+    assert not window
+    assert not window.counts
+
+
+def test_recent_topic_counts_accepts_plain_iterables() -> None:
+    window = TopicWindow(4, ["a", "b", "a"])
+    assert recent_topic_counts(window) is window.counts
+    assert recent_topic_counts(deque(["a", "b", "a"])) == {"a": 2, "b": 1}
+    assert TopicWindow(0, ["a"]).counts == Counter()
+
+
+def test_answer_columns_pre_split_keyword_terms() -> None:
+    from packages.repeater.answer_columns import AnswerColumns
+    from pallas.core.foundation.db import Answer
+
+    answers = [
+        Answer(keywords="你好 世界", group_id=1, messages=["x"]),
+        Answer(keywords="[CQ:face,id=1] 哈", group_id=1, messages=["y"]),
+        Answer(keywords="你好 世界", group_id=2, messages=["z"]),
+    ]
+    columns = AnswerColumns(answers)
+
+    terms = [columns.keyword_terms[columns.keyword_ids[i]] for i in range(len(answers))]
+    assert terms == [("你好", "世界"), (), ("你好", "世界")]
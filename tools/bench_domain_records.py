@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""PG 读路径记录对比：Beanie model_construct vs __slots__ 记录（records），默认 1 万群。
+
+消息侧模拟按群拉近期窗口（find_recent_in_group），每群 --messages 条；语料侧每群一个 Context，
+带 --answers 条 Answer。行对象用 SimpleNamespace 代替 ORM 行，不连库。
+分别统计构造耗时、tracemalloc 常驻字节与分配块数、以及进程 RSS 增量。
+
+用法：uv run python tools/bench_domain_records.py --groups 10000 --messages 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def _init_nonebot() -> None:
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Adapter as ONEBOT_V11Adapter
+
+    try:
+        nonebot.get_driver()
+    except ValueError:
+        nonebot.init()
+        nonebot.get_driver().register_adapter(ONEBOT_V11Adapter)
+
+
+def _rss_kib() -> int:
+    try:
+        with Path("/proc/self/status").open(encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _message_rows(groups: int, messages: int) -> list[list[Any]]:
+    return [
+        [
+            SimpleNamespace(
+                group_id=group_id,
+                user_id=10000 + i % 13,
+                bot_id=1,
+                raw_message=f"消息内容{group_id % 97}-{i}",
+                is_plain_text=True,
+                plain_text=f"消息内容{group_id % 97}-{i}",
+                keywords=f"消息内容{group_id % 97}-{i}",
+                sender_name="兔兔",
+                message_id=group_id * 1000 + i,
+                reply_to_message_id=None,
+                time=1_700_000_000 + i,
+            )
+            for i in range(messages)
+        ]
+        for group_id in range(groups)
+    ]
+
+
+def _context_rows(groups: int, answers: int) -> list[Any]:
+    return [
+        SimpleNamespace(
+            keywords=f"kw{group_id}",
+            time=1_700_000_000,
+            trigger_count=answers,
+            clear_time=0,
+            ban=[SimpleNamespace(keywords=f"kw{group_id}", group_id=group_id, reason="r", time=1)],
+            answers=[
+                SimpleNamespace(
+                    id=group_id * 100 + j,
+                    keywords=f"ans{j}",
+                    group_id=group_id,
+                    count=j + 1,
+                    time=1_700_000_000 + j,
+                    messages=[SimpleNamespace(message=f"回复{j}")],
+                )
+                for j in range(answers)
+            ],
+        )
+        for group_id in range(groups)
+    ]
+
+
+def _legacy_message(row: Any) -> Any:
+    from pallas.core.foundation.db.modules import Message
+
+    return Message.model_construct(
+        group_id=int(row.group_id),
+        user_id=int(row.user_id),
+        bot_id=int(row.bot_id),
+        raw_message=str(row.raw_message),
+        is_plain_text=bool(row.is_plain_text),
+        plain_text=str(row.plain_text),
+        keywords=str(row.keywords),
+        sender_name=str(row.sender_name or ""),
+        message_id=int(row.message_id) if row.message_id is not None else None,
+        reply_to_message_id=int(row.reply_to_message_id) if row.reply_to_message_id is not None else None,
+        time=int(row.time),
+    )
+
+
+def _legacy_context(row: Any) -> Any:
+    from pallas.core.foundation.db.modules import Answer, Ban, Context
+
+    return Context.model_construct(
+        keywords=row.keywords,
+        time=row.time,
+        trigger_count=row.trigger_count,
+        answers=[
+            Answer.model_construct(
+                keywords=a.keywords,
+                group_id=a.group_id,
+                count=a.count,
+                time=a.time,
+                messages=[m.message for m in a.messages],
+            )
+            for a in row.answers
+        ],
+        ban=[
+            Ban.model_construct(keywords=b.keywords, group_id=b.group_id, reason=b.reason, time=b.time) for b in row.ban
+        ],
+        clear_time=row.clear_time,
+    )
+
+
+def _measure(label: str, build: Any) -> tuple[float, int]:
+    gc.collect()
+    rss_before = _rss_kib()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    kept = build()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    rss_delta = _rss_kib() - rss_before
+    print(
+        f"{label:<18} {elapsed * 1000:9.1f} ms  {current / (1 << 20):8.1f} MiB  "
+        f"{blocks:>10} blocks  rss +{rss_delta / 1024:7.1f} MiB"
+    )
+    del kept
+    return current / (1 << 20), blocks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--groups", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=32)
+    parser.add_argument("--answers", type=int, default=8)
+    args = parser.parse_args()
+
+    _init_nonebot()
+    from pallas.core.foundation.db.repository_pg import row_to_context, row_to_message
+
+    message_rows = _message_rows(args.groups, args.messages)
+    context_rows = _context_rows(args.groups, args.answers)
+    print(f"groups={args.groups} messages/group={args.messages} answers/context={args.answers}")
+
+    legacy, legacy_blocks = _measure(
+        "message model", lambda: [[_legacy_message(r) for r in rows] for rows in message_rows]
+    )
+    slotted, slotted_blocks = _measure(
+        "message record", lambda: [[row_to_message(r) for r in rows] for rows in message_rows]
+    )
+    print(f"message ratio      {legacy / slotted:9.1f}x bytes  {legacy_blocks / slotted_blocks:6.1f}x blocks")
+
+    legacy, legacy_blocks = _measure("context model", lambda: [_legacy_context(r) for r in context_rows])
+    slotted, slotted_blocks = _measure("context record", lambda: [row_to_context(r) for r in context_rows])
+    print(f"context ratio      {legacy / slotted:9.1f}x bytes  {legacy_blocks / slotted_blocks:6.1f}x blocks")
+
+
+if __name__ == "__main__":
+    main()
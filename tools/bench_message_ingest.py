@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""message 批量落库对比：executemany INSERT vs COPY（pg_copy），默认一批 10 万条。
+
+两条路径都在事务里写完后回滚，不在目标库留下数据；目标库须已建好 message 表（跑过一次 init_pg）。
+DSN 取 --dsn，缺省读 PG_TEST_DSN。
+
+用法：PG_TEST_DSN=postgresql+asyncpg://... uv run python tools/bench_message_ingest.py --messages 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def _messages(n: int) -> list:
+    from pallas.core.foundation.db.records import MessageRecord
+
+    return [
+        MessageRecord(
+            10000 + i % 1000,
+            20000 + i % 37,
+            1,
+            f"消息内容{i % 500}",
+            plain_text=f"消息内容{i % 500}",
+            keywords=f"消息 内容{i % 500}",
+            sender_name="兔兔",
+            message_id=i,
+            time=1_700_000_000 + i,
+        )
+        for i in range(n)
+    ]
+
+
+async def _timed(engine, write) -> float:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    async with AsyncSession(engine) as session:
+        t0 = time.perf_counter()
+        await write(session)
+        await session.flush()
+        elapsed = time.perf_counter() - t0
+        await session.rollback()
+    return elapsed
+
+
+async def _run(dsn: str, n: int, rounds: int) -> None:
+    from sqlalchemy import insert
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from pallas.core.foundation.db.pg_copy import copy_rows
+    from pallas.core.foundation.db.repository_pg import MessageRow, PgMessageRepository, _message_values
+
+    messages = _messages(n)
+    batch = PgMessageRepository._BULK_BATCH_SIZE
+
+    async def via_insert(session) -> None:
+        for i in range(0, len(messages), batch):
+            await session.execute(insert(MessageRow), [_message_values(m) for m in messages[i : i + batch]])
+
+    async def via_copy(session) -> None:
+        assert await copy_rows(session, MessageRow.__table__, map(_message_values, messages)) == n
+
+    engine = create_async_engine(dsn)
+    try:
+        print(f"messages={n} rounds={rounds}")
+        best_insert = min([await _timed(engine, via_insert) for _ in range(rounds)])
+        best_copy = min([await _timed(engine, via_copy) for _ in range(rounds)])
+    finally:
+        await engine.dispose()
+    print(f"insert   {best_insert * 1000:9.1f} ms  {n / best_insert:10.0f} rows/s")
+    print(f"copy     {best_copy * 1000:9.1f} ms  {n / best_copy:10.0f} rows/s")
+    print(f"speedup  {best_insert / best_copy:9.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dsn", default=os.getenv("PG_TEST_DSN", ""))
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("需要 --dsn 或 PG_TEST_DSN")
+    asyncio.run(_run(args.dsn, args.messages, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
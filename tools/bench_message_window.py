@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""复读群消息窗口内存对比：list[Message] vs __slots__ 记录环（message_window），默认 1 万群。
+
+每群填满 --messages 条，文本按 --distinct 种循环以模拟刷屏重复；tracemalloc 统计常驻字节。
+list 侧逐条跑 model_construct，1 万群约需数分钟。
+
+用法：uv run python tools/bench_message_window.py --groups 10000 --messages 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+def _init_nonebot() -> None:
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Adapter as ONEBOT_V11Adapter
+
+    try:
+        nonebot.get_driver()
+    except ValueError:
+        nonebot.init()
+        nonebot.get_driver().register_adapter(ONEBOT_V11Adapter)
+
+
+def _fill(groups: int, messages: int, distinct: int, make: Any, container: Any) -> dict[int, Any]:
+    windows: dict[int, Any] = {}
+    for group_id in range(groups):
+        window = container()
+        for i in range(messages):
+            # 群聊刷屏时同一句会重复出现，distinct 控制去重前文本种类
+            raw = f"消息内容{group_id % 97}-{i % distinct}"
+            window.append(
+                make(
+                    group_id=group_id,
+                    user_id=10000 + i % 13,
+                    bot_id=1,
+                    raw_message=raw,
+                    is_plain_text=True,
+                    plain_text=raw,
+                    keywords=raw,
+                    sender_name="",
+                    message_id=None,
+                    reply_to_message_id=None,
+                    suppressed_by_rage=False,
+                    time=1_700_000_000 + i,
+                )
+            )
+        windows[group_id] = window
+    return windows
+
+
+def _measure(label: str, groups: int, messages: int, distinct: int, make: Any, container: Any) -> float:
+    gc.collect()
+    tracemalloc.start()
+    windows = _fill(groups, messages, distinct, make, container)
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mib = current / (1 << 20)
+    print(f"{label:<10} {mib:10.1f} MiB  {current / (groups * messages):8.0f} B/msg")
+    del windows
+    return mib
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--groups", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--distinct", type=int, default=30)
+    args = parser.parse_args()
+
+    _init_nonebot()
+    from packages.repeater.message_window import GroupMessageWindow, WindowMessage
+    from pallas.core.foundation.db import Message as MessageModel
+
+    print(f"groups={args.groups} messages/group={args.messages}")
+    legacy = _measure("list", args.groups, args.messages, args.distinct, MessageModel.model_construct, list)
+    ring = _measure(
+        "ring",
+        args.groups,
+        args.messages,
+        args.distinct,
+        WindowMessage,
+        lambda: GroupMessageWindow(args.messages),
+    )
+    print(f"ratio      {legacy / ring:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
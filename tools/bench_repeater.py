@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""复读全链路回放基准：learn → find_reply_bundle → answer_from_bundle，按间隔穿插 speak。
+
+语料取 --corpus 指定的 JSONL（每行 {"group_id", "user_id", "text"}，可选 "time"），
+缺省时按 --groups / --messages 生成合成群聊（少量高频句 + 长尾，保证能学到也能回复）。
+后端二选一：memory 用 mongomock 内存库（与测试同一套替身），pg 连本地 PostgreSQL（--dsn）。
+--rate 按全局消息速率限速，0 表示尽快跑完。
+
+结果以 JSON 输出（stdout 或 --out），含吞吐、各阶段 p50/p95/p99、hotpath_metrics 分位、
+每条消息的 PG 语句数与峰值 RSS，便于跨提交对比。stdout 只有这份 JSON，日志一律走 stderr，
+可以直接接 ``| jq``。运行期间的插件数据写到 --data-dir（缺省为临时目录，跑完即删），不碰仓库 data/。
+
+用法：
+  uv run python tools/bench_repeater.py --groups 50 --messages 5000
+  PALLAS_BENCH_PG_DSN=postgresql+asyncpg://postgres@localhost/pallas_bench \\
+    uv run python tools/bench_repeater.py --backend pg --reset --out bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+_BOT_ID = 10000
+_HOT_PHRASES = (
+    "哈哈哈",
+    "草",
+    "确实",
+    "笑死我了",
+    "牛牛你好",
+    "今天吃什么",
+    "好家伙",
+    "有一说一",
+    "[CQ:image,file=a.image]",
+    "[CQ:face,id=178]",
+)
+_TAIL_WORDS = ("刚才", "那个", "游戏", "作业", "下班", "周末", "猫猫", "电影", "奶茶", "开会", "抽卡", "睡觉")
+
+
+def _use_data_root(path: Path) -> None:
+    """须在导入任何业务模块前调用：部分模块 import 时就把 DATA_ROOT 拼进模块级常量。"""
+    from pallas.core.foundation import paths
+
+    path.mkdir(parents=True, exist_ok=True)
+    paths.DATA_ROOT = path
+
+
+def _init_nonebot() -> None:
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Adapter as ONEBOT_V11Adapter
+    from nonebot.log import default_filter, default_format, logger, logger_id
+
+    # nonebot 默认把日志打到 stdout，会和 JSON 结果混在一起
+    logger.remove(logger_id)
+    logger.add(sys.stderr, level=0, diagnose=False, filter=default_filter, format=default_format)
+    try:
+        nonebot.get_driver()
+    except ValueError:
+        nonebot.init()
+        nonebot.get_driver().register_adapter(ONEBOT_V11Adapter)
+
+
+def synthetic_corpus(groups: int, messages: int, *, seed: int) -> list[dict[str, Any]]:
+    """群按 Zipf 分配消息量；每群少量高频句反复出现，其余为随机拼接的长尾句。"""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(groups)]
+    group_ids = rng.choices(range(1, groups + 1), weights=weights, k=messages)
+    rows = []
+    for group_id in group_ids:
+        if rng.random() < 0.55:
+            text = rng.choice(_HOT_PHRASES)
+        else:
+            text = "".join(rng.sample(_TAIL_WORDS, rng.randint(2, 4)))
+        rows.append({"group_id": group_id, "user_id": 20000 + rng.randrange(40), "text": text})
+    return rows
+
+
+def load_corpus(path: Path, limit: int) -> list[dict[str, Any]]:
+    rows = []
+    with path.open(encoding="utf-8") as fp:
+        for line in fp:
+            line = line.strip()
+            if not line:
+                continue
+            rows.append(json.loads(line))
+            if 0 < limit <= len(rows):
+                break
+    return rows
+
+
+async def _setup_memory() -> Any:
+    import nonebot
+    from beanie import init_beanie
+    from mongomock_motor import AsyncMongoMockClient
+
+    from pallas.core.foundation.db.context_repo_access import invalidate_shared_context_repository
+    from pallas.core.foundation.db.modules import (
+        BlackList,
+        BotConfigModule,
+        Context,
+        GroupConfigModule,
+        ImageCache,
+        Message,
+        UserConfigModule,
+    )
+
+    os.environ["DB_BACKEND"] = "mongodb"
+    nonebot.get_driver().config.db_backend = "mongodb"
+    invalidate_shared_context_repository()
+    client = AsyncMongoMockClient()
+    db = client["bench_pallas_bot"]
+    list_names = db.list_collection_names
+
+    async def _list_names(session=None, **_kwargs):
+        # mongomock_motor 不接受 beanie 传的 nameOnly 等参数
+        return list_names(session=session)
+
+    db.list_collection_names = _list_names
+    await init_beanie(
+        database=db,
+        document_models=[
+            BotConfigModule,
+            GroupConfigModule,
+            UserConfigModule,
+            Message,
+            Context,
+            BlackList,
+            ImageCache,
+        ],
+    )
+    return None
+
+
+async def _setup_pg(dsn: str, *, reset: bool) -> Any:
+    import nonebot
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from pallas.core.foundation.db.context_repo_access import invalidate_shared_context_repository
+    from pallas.core.foundation.db.repository_pg import Base, init_pg
+
+    os.environ["DB_BACKEND"] = "postgresql"
+    nonebot.get_driver().config.db_backend = "postgresql"
+    invalidate_shared_context_repository()
+    engine = create_async_engine(dsn)
+    if reset:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+    await init_pg(engine)
+    return engine
+
+
+def _percentiles(samples: list[float]) -> dict[str, float | None]:
+    if not samples:
+        return {"n": 0, "mean": None, "p50": None, "p95": None, "p99": None}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+
+    def pick(ratio: float) -> float:
+        return round(ordered[min(last, int(round(last * ratio)))], 3)
+
+    return {
+        "n": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+    }
+
+
+def _peak_rss_bytes() -> int | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位 KiB，macOS 单位字节
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+async def _drain(gen: Any) -> int:
+    if gen is None:
+        return 0
+    sent = 0
+    async for _msg in gen:
+        sent += 1
+    return sent
+
+
+async def replay(rows: list[dict[str, Any]], *, rate: float, speak_every: int, engine: Any) -> dict[str, Any]:
+    from packages.repeater.model import Chat, ChatData
+    from pallas.core.platform.ingress.hotpath_metrics import clear_hotpath_metrics_for_tests, hotpath_metrics_snapshot
+
+    statements = 0
+    listener = None
+    if engine is not None:
+        from sqlalchemy import event
+
+        def listener(*_args: Any) -> None:
+            nonlocal statements
+            statements += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", listener)
+
+    clear_hotpath_metrics_for_tests()
+    stage_ms: dict[str, list[float]] = defaultdict(list)
+    counts = {"learned": 0, "bundles": 0, "replies": 0, "reply_messages": 0, "speaks": 0, "errors": 0}
+    base_time = int(time.time())
+    interval = 1.0 / rate if rate > 0 else 0.0
+    # 消息时间戳走模拟时钟；不限速时按每条 1 秒推进，学习才能找到“前一条”
+    clock_step = interval or 1.0
+    started = time.perf_counter()
+    try:
+        for i, row in enumerate(rows):
+            if interval:
+                # 按全局速率排队：落后时不补睡，直接追
+                delay = started + i * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            text = str(row.get("text") or "")
+            chat = Chat(
+                ChatData(
+                    group_id=int(row["group_id"]),
+                    user_id=int(row["user_id"]),
+                    raw_message=text,
+                    plain_text="" if "[CQ:" in text else text,
+                    time=int(row.get("time") or base_time + int(i * clock_step)),
+                    bot_id=_BOT_ID,
+                )
+            )
+            try:
+                t0 = time.perf_counter()
+                if await chat.learn():
+                    counts["learned"] += 1
+                t1 = time.perf_counter()
+                bundle = await chat.find_reply_bundle()
+                t2 = time.perf_counter()
+                stage_ms["learn"].append((t1 - t0) * 1000.0)
+                stage_ms["find_reply_bundle"].append((t2 - t1) * 1000.0)
+                if bundle is not None:
+                    counts["bundles"] += 1
+                    sent = await _drain(await chat.answer_from_bundle(bundle))
+                    stage_ms["answer_from_bundle"].append((time.perf_counter() - t2) * 1000.0)
+                    if sent:
+                        counts["replies"] += 1
+                        counts["reply_messages"] += sent
+                if speak_every > 0 and (i + 1) % speak_every == 0:
+                    t3 = time.perf_counter()
+                    if await Chat.speak() is not None:
+                        counts["speaks"] += 1
+                    stage_ms["speak"].append((time.perf_counter() - t3) * 1000.0)
+            except Exception as exc:
+                counts["errors"] += 1
+                if counts["errors"] <= 5:
+                    print(f"replay error at #{i}: {exc!r}", file=sys.stderr)
+            stage_ms["message"].append((time.perf_counter() - t0) * 1000.0)
+        # 窗口里未落库的消息与黑名单一并刷盘，语句数才覆盖完整回放
+        t_sync = time.perf_counter()
+        await Chat.sync()
+        stage_ms["sync"].append((time.perf_counter() - t_sync) * 1000.0)
+    finally:
+        if listener is not None:
+            from sqlalchemy import event
+
+            event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    elapsed = time.perf_counter() - started
+
+    snapshot = hotpath_metrics_snapshot()
+    total = len(rows)
+    return {
+        "messages": total,
+        "elapsed_sec": round(elapsed, 3),
+        "throughput_msg_per_sec": round(total / elapsed, 2) if elapsed > 0 else None,
+        **counts,
+        "stages_ms": {name: _percentiles(samples) for name, samples in stage_ms.items()},
+        "hotpath_ms": {key: value for key, value in snapshot.items() if key.endswith(("_ms_p50", "_ms_p95"))},
+        "hotpath_counters": {
+            key: value for key, value in snapshot.items() if isinstance(value, int) and not isinstance(value, bool)
+        },
+        "pg_statements": statements if engine is not None else None,
+        "pg_statements_per_message": round(statements / total, 3) if engine is not None and total else None,
+    }
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    if args.corpus:
+        rows = load_corpus(Path(args.corpus), args.messages)
+        source = str(args.corpus)
+    else:
+        rows = synthetic_corpus(args.groups, args.messages, seed=args.seed)
+        source = "synthetic"
+    random.seed(args.seed)
+
+    engine = None
+    if args.backend == "pg":
+        if not args.dsn:
+            raise SystemExit("--backend pg 需要 --dsn 或 PALLAS_BENCH_PG_DSN")
+        engine = await _setup_pg(args.dsn, reset=args.reset)
+    else:
+        await _setup_memory()
+
+    try:
+        result = await replay(rows, rate=args.rate, speak_every=args.speak_every, engine=engine)
+    finally:
+        if engine is not None:
+            from pallas.core.foundation.db.repository_pg import dispose_pg
+
+            await dispose_pg()
+
+    return {
+        "bench": "repeater",
+        "revision": _git_revision(),
+        "backend": args.backend,
+        "corpus": source,
+        "groups": len({int(row["group_id"]) for row in rows}),
+        "rate": args.rate,
+        "seed": args.seed,
+        "python": sys.version.split()[0],
+        **result,
+        "peak_rss_bytes": _peak_rss_bytes(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=("memory", "pg"), default="memory")
+    parser.add_argument("--dsn", default=os.environ.get("PALLAS_BENCH_PG_DSN", ""))
+    parser.add_argument("--reset", action="store_true", help="pg 后端开跑前 drop_all，保证空库起步")
+    parser.add_argument("--corpus", default="", help="JSONL 语料；缺省生成合成语料")
+    parser.add_argument("--groups", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=5000, help="合成语料条数；给 --corpus 时为读取上限（0 不限）")
+    parser.add_argument("--rate", type=float, default=0.0, help="全局消息速率（条/秒），0 不限速")
+    parser.add_argument("--speak-every", type=int, default=200, help="每 N 条消息调用一次 speak，0 关闭")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", default="", help="结果 JSON 写入路径；缺省打印到 stdout")
+    parser.add_argument("--data-dir", default="", help="运行期插件数据目录；缺省用临时目录并在结束后删除")
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        data_dir = args.data_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix="pallas_bench_"))
+        _use_data_root(Path(data_dir))
+        _init_nonebot()
+        # 依赖里零星的 print 也挪到 stderr，stdout 只留最终 JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            report = asyncio.run(_run(args))
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        Path(args.out).write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""复读取候选微基准：逐条 Python 循环 vs 列式预筛（answer_columns），默认 5k 条 answers。
+
+构造一个热词 Context（多群、含 CQ/牛牛/换行/@ 等样本），两种实现跑同一组筛选参数，
+先核对候选一致，再报 mean / p95 与加速比。列只在首轮构建，构建耗时单列。
+
+用法：uv run python tools/bench_reply_candidates.py --answers 5000 --rounds 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+_SAMPLES = (
+    "哈哈哈",
+    "草",
+    "确实",
+    "牛牛你好",
+    "牛牛今天也很可爱呢你说是不是",
+    "[CQ:image,file=a.image]",
+    "[CQ:xml,data=x]",
+    "第一行\n第二行",
+    "[CQ:at,qq=10001] 你来",
+    "笑死我了",
+)
+
+
+def _init_nonebot() -> None:
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Adapter as ONEBOT_V11Adapter
+
+    try:
+        nonebot.get_driver()
+    except ValueError:
+        nonebot.init()
+        nonebot.get_driver().register_adapter(ONEBOT_V11Adapter)
+
+
+def build_context(size: int, *, groups: int, keywords: int, seed: int):
+    from pallas.core.foundation.db import Answer, Context
+
+    rng = random.Random(seed)
+    answers = [
+        Answer(
+            keywords=f"kw{rng.randrange(keywords)}",
+            group_id=rng.randrange(groups) + 1,
+            count=rng.choice((1, 1, 1, 2, 2, 3, 5, 8)),
+            time=1_700_000_000 + i,
+            messages=[rng.choice(_SAMPLES) + ("" if rng.random() < 0.7 else str(i))],
+        )
+        for i in range(size)
+    ]
+    return Context.model_construct(keywords="哈哈", time=1, trigger_count=size, answers=answers, ban=[], clear_time=0)
+
+
+def legacy_candidates(context, spec) -> list[str]:
+    """迁移前 _context_find_with_pool 的逐条筛选与跨群计数（只保留候选 keywords 顺序）。"""
+    candidates: dict[str, int] = {}
+    other_group_cache: dict[str, int] = {}
+    answers_count: dict[str, int] = defaultdict(int)
+    for answer in context.answers:
+        count = answer.count
+        if not spec.is_drunk and count < spec.count_threshold:
+            continue
+        answer_key = answer.keywords
+        if answer_key in spec.excluded_keywords:
+            continue
+        if not answer.messages:
+            continue
+        sample_msg = answer.messages[0]
+        if spec.is_image and "[CQ:" not in sample_msg:
+            continue
+        if sample_msg.startswith("牛牛") and (not spec.to_me or len(sample_msg) <= 6):
+            continue
+        if sample_msg.startswith("[CQ:xml"):
+            continue
+        if "\n" in sample_msg:
+            continue
+        if count < 3 and sample_msg in spec.recent_messages:
+            continue
+        if answer.group_id == spec.group_id:
+            candidates.setdefault(answer_key, 0)
+        elif "[CQ:at,qq=" in sample_msg:
+            continue
+        elif spec.is_drunk and count > spec.count_threshold:
+            candidates.setdefault(answer_key, 0)
+        else:
+            answers_count[answer_key] += 1
+            cur_count = answers_count[answer_key]
+            if cur_count < spec.cross_group_threshold:
+                other_group_cache.setdefault(answer_key, 0)
+            else:
+                candidates.setdefault(answer_key, 0)
+    return list(candidates)
+
+
+def columnar_candidates(context, spec) -> list[str]:
+    from packages.repeater.answer_columns import answer_columns_for
+
+    answers = context.answers
+    candidates: dict[str, int] = {}
+    answers_count: dict[str, int] = defaultdict(int)
+    for idx in answer_columns_for(context).candidate_indices(spec):
+        answer = answers[idx]
+        answer_key = answer.keywords
+        if answer.group_id == spec.group_id or (spec.is_drunk and answer.count > spec.count_threshold):
+            candidates.setdefault(answer_key, 0)
+            continue
+        answers_count[answer_key] += 1
+        if answers_count[answer_key] >= spec.cross_group_threshold:
+            candidates.setdefault(answer_key, 0)
+    return list(candidates)
+
+
+def _timed(fn, context, spec, rounds: int) -> list[float]:
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn(context, spec)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples
+
+
+def _p95(samples: list[float]) -> float:
+    return sorted(samples)[int(len(samples) * 0.95) - 1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=5000)
+    parser.add_argument("--groups", type=int, default=60)
+    parser.add_argument("--keywords", type=int, default=800)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    _init_nonebot()
+    from packages.repeater import answer_columns
+    from packages.repeater.answer_columns import AnswerColumns, CandidateFilter
+
+    context = build_context(args.answers, groups=args.groups, keywords=args.keywords, seed=args.seed)
+    spec = CandidateFilter(
+        group_id=1,
+        count_threshold=2,
+        cross_group_threshold=2,
+        is_drunk=False,
+        is_image=False,
+        to_me=False,
+        excluded_keywords=frozenset({"kw1", "kw2", "哈哈"}),
+        recent_messages=frozenset({"草", "确实"}),
+    )
+
+    t0 = time.perf_counter()
+    AnswerColumns(context.answers)
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    expected = legacy_candidates(context, spec)
+    got = columnar_candidates(context, spec)
+    if expected != got:
+        print(f"候选不一致：legacy={len(expected)} columnar={len(got)}")
+        return 1
+
+    legacy = _timed(legacy_candidates, context, spec, args.rounds)
+    columnar = _timed(columnar_candidates, context, spec, args.rounds)
+    backend = "numpy" if answer_columns.np is not None else "python"
+    print(f"answers={args.answers} candidates={len(got)} backend={backend} columns_build={build_ms:.2f}ms")
+    print(f"legacy   mean={statistics.fmean(legacy):.3f}ms p95={_p95(legacy):.3f}ms")
+    print(f"columnar mean={statistics.fmean(columnar):.3f}ms p95={_p95(columnar):.3f}ms")
+    print(f"speedup  mean={statistics.fmean(legacy) / statistics.fmean(columnar):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""复读话题加分微基准：每次 Counter(deque) + 逐条 split vs TopicWindow 计数 + 列上预切的话题词。
+
+TOPICS_SIZE 从 16 扫到 512，每档把窗口填满，对同一批候选 answers 算 topical 总分；
+先核对两种实现结果一致，再报每次取候选的 mean 耗时与加速比。
+
+用法：uv run python tools/bench_topic_scoring.py --answers 400 --rounds 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+_SIZES = (16, 32, 64, 128, 256, 512)
+
+
+def _init_nonebot() -> None:
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Adapter as ONEBOT_V11Adapter
+
+    try:
+        nonebot.get_driver()
+    except ValueError:
+        nonebot.init()
+        nonebot.get_driver().register_adapter(ONEBOT_V11Adapter)
+
+
+def build_answers(size: int, *, vocab: int, seed: int):
+    from pallas.core.foundation.db import Answer
+
+    rng = random.Random(seed)
+    answers = []
+    for i in range(size):
+        words = [f"w{rng.randrange(vocab)}" for _ in range(rng.randrange(1, 5))]
+        keywords = "[CQ:image,file=a.image]" if rng.random() < 0.05 else " ".join(words)
+        answers.append(Answer(keywords=keywords, group_id=1, count=2, time=i, messages=[f"m{i}"]))
+    return answers
+
+
+def legacy_scores(answers, topics: deque[str]) -> int:
+    """迁移前：每次取候选现数一遍窗口，逐条 split keywords。"""
+    topic_counts = Counter(topics)
+    total = 0
+    for answer in answers:
+        answer_key = answer.keywords
+        if "[CQ:" not in answer_key:
+            total += sum(topic_counts[key] for key in answer_key.split(" "))
+    return total
+
+
+def indexed_scores(answers, window, columns) -> int:
+    from packages.repeater.topic_utils import recent_topic_counts
+
+    topic_counts = recent_topic_counts(window)
+    keyword_ids = columns.keyword_ids
+    keyword_terms = columns.keyword_terms
+    total = 0
+    for idx in range(len(answers)):
+        terms = keyword_terms[keyword_ids[idx]]
+        total += sum(topic_counts.get(term, 0) for term in terms) if topic_counts else 0
+    return total
+
+
+def _mean_ms(fn, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.fmean(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=400)
+    parser.add_argument("--vocab", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    _init_nonebot()
+    from packages.repeater.answer_columns import AnswerColumns
+    from packages.repeater.topic_utils import TopicWindow
+
+    answers = build_answers(args.answers, vocab=args.vocab, seed=args.seed)
+    columns = AnswerColumns(answers)
+    rng = random.Random(args.seed)
+    print(f"answers={args.answers} vocab={args.vocab} rounds={args.rounds}")
+    for size in _SIZES:
+        topics = [f"w{rng.randrange(args.vocab)}" for _ in range(size * 2)]
+        legacy_window: deque[str] = deque(topics, maxlen=size)
+        window = TopicWindow(size, topics)
+        expected = legacy_scores(answers, legacy_window)
+        got = indexed_scores(answers, window, columns)
+        if expected != got:
+            print(f"TOPICS_SIZE={size} 结果不一致：legacy={expected} indexed={got}")
+            return 1
+        legacy = _mean_ms(lambda w=legacy_window: legacy_scores(answers, w), args.rounds)
+        indexed = _mean_ms(lambda w=window: indexed_scores(answers, w, columns), args.rounds)
+        print(f"TOPICS_SIZE={size:<4} legacy={legacy:.4f}ms indexed={indexed:.4f}ms speedup={legacy / indexed:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
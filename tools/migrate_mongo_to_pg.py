@@ -11,6 +11,7 @@ MongoDB → PostgreSQL 迁移脚本
 - 逐条 defensive 解析，脏数据（缺字段 / 非法类型 / NUL 字符）跳过并计入汇总，不阻断
 - Context 聚合同 batch 内相同 keywords_hash 的 answers / bans，不再丢数据
 - upsert 依赖 `repository_pg` 里定义的唯一约束（含复合 upsert_answer 约束），新字段自动加到 PG
+- Message 纯追加，默认整批走 COPY（PG_BULK_COPY=0 或 --no-copy 退回 INSERT）
 
 用法：
     uv run python tools/migrate_mongo_to_pg.py
@@ -22,6 +23,7 @@ MongoDB → PostgreSQL 迁移脚本
     --mongo-db NAME 源 Mongo 库名，覆盖 MONGO_DB 环境变量（默认 PallasBot）
     --tables TABLE  仅迁移指定表，可选：context message blacklist botconfig groupconfig userconfig imagecache
     --restart       清空 pallas_migration_state 重新从头迁移
+    --no-copy       Message 表逐批 INSERT，不走 COPY
 
 示例：
 # 全量迁移
@@ -41,7 +43,7 @@ MongoDB → PostgreSQL 迁移脚本
 
 环境变量（从 .env 读取，也可手动设置）：
     MONGO_HOST / MONGO_PORT / MONGO_USER / MONGO_PASSWORD / MONGO_DB
-    PG_HOST / PG_PORT / PG_USER / PG_PASSWORD / PG_DB
+    PG_HOST / PG_PORT / PG_USER / PG_PASSWORD / PG_DB / PG_BULK_COPY
 """
 
 from __future__ import annotations
@@ -575,7 +577,9 @@ async def _migrate_context(db, sf, ContextRow, AnsRow, AnsMsgRow, BanRow, ins, b
 # ---------------------------------------------------------------------------
 
 
-async def _migrate_message(db, sf, MsgRow, ins, batch_size, dry_run) -> _TableStats:
+async def _migrate_message(db, sf, MsgRow, ins, batch_size, dry_run, *, copy: bool = False) -> _TableStats:
+    from pallas.core.foundation.db.pg_copy import copy_rows
+
     col = db["message"]
     stats = _TableStats()
     stats.total = await col.count_documents({})
@@ -609,9 +613,12 @@ async def _migrate_message(db, sf, MsgRow, ins, batch_size, dry_run) -> _TableSt
 
         if rows and not dry_run:
             async with sf() as session:
-                # 分批插入避免超出 asyncpg 参数上限
-                for i in range(0, len(rows), _MSG_ROW_BATCH):
-                    await session.execute(ins(MsgRow), rows[i : i + _MSG_ROW_BATCH])
+                # message 纯追加：COPY 一次灌完整批，与游标推进同一事务；不可用时退回分批 INSERT
+                copied = await copy_rows(session, MsgRow.__table__, rows) if copy else None
+                if copied is None:
+                    # 分批插入避免超出 asyncpg 参数上限
+                    for i in range(0, len(rows), _MSG_ROW_BATCH):
+                        await session.execute(ins(MsgRow), rows[i : i + _MSG_ROW_BATCH])
                 await _set_state(session, "message", str(batch[-1]["_id"]))
                 await session.commit()
 
@@ -1075,6 +1082,7 @@ async def migrate(
     restart: bool,
     *,
     progress: list[str] | None = None,
+    copy: bool | None = None,
 ) -> dict[str, Any]:
     def _log(msg: str) -> None:
         print(msg)
@@ -1095,6 +1103,7 @@ async def migrate(
     from sqlalchemy.dialects.postgresql import insert as pg_insert
     from sqlalchemy.ext.asyncio import async_sessionmaker
 
+    from pallas.core.foundation.db.pg_copy import bulk_copy_enabled
     from pallas.core.foundation.db.repository_pg import (
         AdminMemberRow,
         BlackListRow,
@@ -1136,7 +1145,8 @@ async def migrate(
         )
         summaries.append(("context", s))
     if "message" in tables:
-        s = await _migrate_message(db, sf, MessageRow, pg_insert, batch_size, dry_run)
+        use_copy = bulk_copy_enabled() if copy is None else copy
+        s = await _migrate_message(db, sf, MessageRow, pg_insert, batch_size, dry_run, copy=use_copy)
         summaries.append(("message", s))
     if "blacklist" in tables:
         s = await _migrate_blacklist(db, sf, BlackListRow, pg_insert, batch_size, dry_run)
@@ -1201,6 +1211,9 @@ if __name__ == "__main__":
         "--tables", nargs="+", choices=ALL_TABLES, metavar="TABLE", help="仅迁移指定表（空格分隔），不指定则迁移全部"
     )
     parser.add_argument("--restart", action="store_true", help="清空 pallas_migration_state 从头迁移")
+    parser.add_argument(
+        "--no-copy", action="store_true", help="message 表不走 COPY，逐批 INSERT（默认随 PG_BULK_COPY）"
+    )
     args = parser.parse_args()
 
     apply_migrate_env_from_repo()
@@ -1210,7 +1223,17 @@ if __name__ == "__main__":
     if args.tables:
         print(f"仅迁移：{', '.join(t for t in ALL_TABLES if t in selected)}")
 
-    result = asyncio.run(migrate(args.batch, args.dry_run, selected, args.pg_db, args.mongo_db, args.restart))
+    result = asyncio.run(
+        migrate(
+            args.batch,
+            args.dry_run,
+            selected,
+            args.pg_db,
+            args.mongo_db,
+            args.restart,
+            copy=False if args.no_copy else None,
+        )
+    )
     if not args.dry_run and result.get("ok"):
         verify = asyncio.run(verify_migration_counts(selected, mongo_db=args.mongo_db, pg_db=args.pg_db))
         print("\n========== 行数校验 ==========")